@@ -0,0 +1,33 @@
+# audit/audited.py
+"""Models whose saves and deletes go to the audit trail (see capture.py)"""
+from django.apps import apps
+
+from .capture import register
+
+
+AUDITED_APPS = [
+    'core', 'employees', 'documents', 'projects', 'production',
+    'procurement', 'finance', 'crm', 'support',
+]
+
+# Derived tables and counters, rebuilt or bumped from the audited rows
+SKIPPED_MODELS = {
+    'projects.ProjectRollup',
+    'finance.ReceivableAgingSnapshot',
+    'finance.BankBalancePoint',
+    'finance.PeriodTotal',
+    'finance.DepreciationEntry',
+    'finance.CommissionRun',
+    'finance.DocumentNumberCounter',
+}
+
+# Never copied into the log
+EXCLUDED_FIELDS = {
+    'core.CustomUser': ['password', 'last_login'],
+}
+
+
+for app_label in AUDITED_APPS:
+    for model in apps.get_app_config(app_label).get_models():
+        if model._meta.label not in SKIPPED_MODELS:
+            register(model, exclude=EXCLUDED_FIELDS.get(model._meta.label, ()))
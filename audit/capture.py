@@ -0,0 +1,213 @@
+# audit/capture.py
+"""
+Capture of audit entries for the registered models (see audited.py).
+
+Each loaded or constructed instance keeps a shallow copy of its field
+values; a save compares the registered fields against it and records the
+changed ones as ``{field: [old, new]}`` (every set field for a CREATE, the
+last known values for a DELETE). Saves that change nothing are not logged;
+``auto_now`` fields are left out of the diffs. The copy is refreshed by each
+save, not by ``refresh_from_db()`` or a rollback, so an instance reused
+after those diffs against its last saved values.
+
+Entries are built in the saving thread, then handed to the writer
+(writer.py) by an ``on_commit`` callback: a rolled-back transaction or
+savepoint drops its entries with it. Writes that send no signals are only
+logged when their caller records them: ``record_bulk()`` after
+``bulk_create`` / ``bulk_update`` of instances, ``record_update()`` for a
+``QuerySet.update`` (the bulk imports, posting, depreciation and commission
+runs do).
+
+The acting user comes from the request being served (AuditMiddleware; DRF
+sets ``request.user`` once it has authenticated the token) or from
+``acting_as()`` in background jobs.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_init, post_save, post_delete
+from django.utils import timezone
+
+from .writer import writer
+
+
+_fields = {}
+
+# The request being served, or a user id (acting_as)
+_actor = ContextVar('audit_actor', default=None)
+
+_encoder = DjangoJSONEncoder()
+
+JSON_TYPES = (str, int, float, bool, list, dict)
+
+
+def register(model, exclude=()):
+    """Log saves and deletes of ``model``, leaving out the ``exclude`` fields"""
+    _fields[model] = tuple(
+        (field, field.name, field.attname) for field in model._meta.concrete_fields
+        if not field.primary_key and field.name not in exclude and not getattr(field, 'auto_now', False)
+    )
+    uid = f'audit_{model._meta.label_lower}'
+    post_init.connect(remember, sender=model, dispatch_uid=f'{uid}_init')
+    post_save.connect(saved, sender=model, dispatch_uid=f'{uid}_save')
+    post_delete.connect(deleted, sender=model, dispatch_uid=f'{uid}_delete')
+
+
+def is_audited(model):
+    return model in _fields
+
+
+# ==================== ACTOR ====================
+
+def _user_id():
+    actor = _actor.get()
+    if actor is None or isinstance(actor, int):
+        return actor
+    user = getattr(actor, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+@contextmanager
+def acting_as(user):
+    """Attribute the entries recorded in the block to ``user`` (a user or user id)"""
+    token = _actor.set(getattr(user, 'pk', user))
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+
+class AuditMiddleware:
+    """Makes the user of each request the actor of the entries it causes"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _actor.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _actor.reset(token)
+
+
+# ==================== DIFFS ====================
+
+def _plain(value):
+    """``value`` as JSON for the ``changes`` column"""
+    if value is None or isinstance(value, JSON_TYPES):
+        return value
+    if isinstance(value, FieldFile):
+        return value.name or None
+    try:
+        return _encoder.default(value)
+    except TypeError:
+        return str(value)
+
+
+def _differs(field, old, new):
+    # '12.50' assigned to a DecimalField is not a change from Decimal('12.5')
+    try:
+        return field.to_python(old) != field.to_python(new)
+    except (ValidationError, TypeError, ValueError):
+        return True
+
+
+def _snapshot(instance):
+    initial = instance.__dict__.copy()
+    initial.pop('_state', None)
+    initial.pop('_audit_initial', None)
+    return initial
+
+
+def remember(sender, instance, **kwargs):
+    instance._audit_initial = _snapshot(instance)
+
+
+def _record(model, pk, action, changes):
+    if pk is None:
+        return
+    entry = {
+        'user_id': _user_id(),
+        'action': action,
+        'model_name': model.__name__,
+        'object_id': pk,
+        'timestamp': timezone.now(),
+        'changes': changes,
+    }
+    transaction.on_commit(partial(writer.add, entry), robust=True)
+
+
+def record_save(instance, created):
+    """Log a save of ``instance`` against the values it was loaded with"""
+    fields = _fields.get(type(instance))
+    if fields is None:
+        return
+    after = instance.__dict__
+    changes = {}
+    if created:
+        for field, name, attname in fields:
+            value = after.get(attname)
+            if value is not None and value != '':
+                changes[name] = [None, _plain(value)]
+    else:
+        before = getattr(instance, '_audit_initial', None) or {}
+        for field, name, attname in fields:
+            # Deferred on either side: unknown, not changed
+            if attname in before and attname in after:
+                old, new = before[attname], after[attname]
+                if old != new and _differs(field, old, new):
+                    changes[name] = [_plain(old), _plain(new)]
+        if not changes:
+            instance._audit_initial = _snapshot(instance)
+            return
+    _record(type(instance), instance.pk, 'CREATE' if created else 'UPDATE', changes)
+    instance._audit_initial = _snapshot(instance)
+
+
+def record_bulk(instances, created):
+    """Log instances written by ``bulk_create`` (``created``) or ``bulk_update``"""
+    for instance in instances:
+        record_save(instance, created)
+
+
+def record_update(model, pk, changes):
+    """
+    Log an update of row ``pk`` made without a save (``QuerySet.update``,
+    ``F()`` expressions); ``changes`` is ``{field name: (old, new)}``
+    """
+    if model not in _fields:
+        return
+    changes = {
+        name: [_plain(old), _plain(new)] for name, (old, new) in changes.items()
+        if old != new
+    }
+    if changes:
+        _record(model, pk, 'UPDATE', changes)
+
+
+def record_delete(instance):
+    fields = _fields.get(type(instance))
+    if fields is None:
+        return
+    before = getattr(instance, '_audit_initial', None) or instance.__dict__
+    changes = {
+        name: [_plain(before[attname]), None]
+        for field, name, attname in fields
+        if before.get(attname) is not None and before.get(attname) != ''
+    }
+    _record(type(instance), instance.pk, 'DELETE', changes)
+
+
+def saved(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        record_save(instance, created)
+
+
+def deleted(sender, instance, **kwargs):
+    record_delete(instance)
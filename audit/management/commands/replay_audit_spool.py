@@ -0,0 +1,16 @@
+# audit/management/commands/replay_audit_spool.py
+from django.core.management.base import BaseCommand
+
+from audit.writer import fcntl, writer
+
+
+class Command(BaseCommand):
+    help = "Write the audit spool files left by stopped processes (running writers also do this every minute)"
+
+    def handle(self, *args, **options):
+        if fcntl is None:
+            self.stdout.write(self.style.WARNING(
+                "No file locks on this platform: stop every worker first, their open spools look abandoned too"
+            ))
+        written = writer.adopt_orphans()
+        self.stdout.write(self.style.SUCCESS(f"{written} audit entries written"))
@@ -1,16 +1,22 @@
 # audit/models.py
 from django.db import models
+from django.utils import timezone
 
 class AuditLog(models.Model):
     user = models.ForeignKey('core.CustomUser', on_delete=models.SET_NULL, null=True, blank=True)
     action = models.CharField(max_length=100)  # e.g., "CREATE", "UPDATE", "DELETE"
     model_name = models.CharField(max_length=100)  # e.g., "Project", "Allocation"
     object_id = models.PositiveIntegerField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)  # When the change was made, not when the entry was written
     changes = models.JSONField(null=True, blank=True)  # Stores old/new values as dict
+    # Set by audit.writer; makes replaying a spool file idempotent
+    entry_id = models.UUIDField(unique=True, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp', 'id']),
+        ]
         verbose_name = 'Audit Log'
         verbose_name_plural = 'Audit Logs'
 
@@ -0,0 +1,21 @@
+# audit/permissions.py
+from rest_framework import permissions
+
+
+# Positions that may read the audit trail
+AUDITOR_POSITIONS = ['CEO', 'EDBO', 'Audit Manager']
+
+
+class IsAuditor(permissions.BasePermission):
+    """
+    Permission check for the audit trail: it holds the before/after values of
+    every audited model, whoever may read the model itself
+    """
+    def has_permission(self, request, view):
+        user = request.user
+        if not user.is_authenticated:
+            return False
+        if user.is_staff or user.is_superuser:
+            return True
+        profile = getattr(user, 'profile', None)
+        return profile is not None and profile.position in AUDITOR_POSITIONS
@@ -1,3 +1,182 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+import uuid
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from unittest.mock import patch
 
-# Create your tests here.
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.models import CustomUser, EmployeeProfile
+from projects.models import Project
+from .capture import acting_as
+from .models import AuditLog
+from .writer import AuditWriter, spool_directory
+
+
+def make_profile(email, position):
+    user = CustomUser.objects.create_user(username=email, email=email, password='secret')
+    return EmployeeProfile.objects.create(user=user, position=position)
+
+
+def make_entry(**fields):
+    entry = {
+        'user_id': None, 'action': 'UPDATE', 'model_name': 'Project', 'object_id': 1,
+        'timestamp': timezone.now(), 'changes': {'name': ['A', 'B']},
+    }
+    entry.update(fields)
+    return entry
+
+
+class AuditLogAccessTests(APITestCase):
+    def setUp(self):
+        self.worker = make_profile('w@x.com', 'Clerk')
+        self.auditor = make_profile('a@x.com', 'Audit Manager')
+        AuditLog.objects.create(
+            action='UPDATE', model_name='BankAccount', object_id=1,
+            changes={'current_balance': ['100.00', '250.00']},
+        )
+
+    def test_other_employees_cannot_read_the_trail(self):
+        self.client.force_authenticate(self.worker.user)
+        self.assertEqual(self.client.get('/api/audit/audit-logs/?model_name=BankAccount').status_code, 403)
+        self.assertEqual(self.client.get('/api/audit/audit-logs/?format=csv').status_code, 403)
+
+    def test_auditors_and_staff_read_the_trail(self):
+        self.client.force_authenticate(self.auditor.user)
+        response = self.client.get('/api/audit/audit-logs/?model_name=BankAccount')
+        self.assertEqual(response.status_code, 200)
+
+        staff = CustomUser.objects.create_user(username='s@x.com', email='s@x.com', password='secret', is_staff=True)
+        self.client.force_authenticate(staff)
+        self.assertEqual(self.client.get('/api/audit/audit-logs/').status_code, 200)
+
+
+class CaptureTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='u@x.com', email='u@x.com', password='secret')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = Project.objects.create(
+                name='Harbour', code='H-1', description='', start_date=date(2024, 1, 1), budget=Decimal('100.00'),
+            )
+
+    def entries(self, action):
+        return AuditLog.objects.filter(model_name='Project', object_id=self.project.pk, action=action)
+
+    def test_create_logs_the_set_fields(self):
+        changes = self.entries('CREATE').get().changes
+        self.assertEqual(changes['name'], [None, 'Harbour'])
+        self.assertNotIn('description', changes)
+
+    def test_update_logs_the_changed_fields_and_the_actor(self):
+        self.project.budget = '100.0'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+        # Same value, different spelling
+        self.assertFalse(self.entries('UPDATE').exists())
+
+        self.project = Project.objects.get(pk=self.project.pk)
+        self.project.budget = Decimal('250.00')
+        with acting_as(self.user), self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+        entry = self.entries('UPDATE').get()
+        self.assertEqual(entry.changes, {'budget': ['100.00', '250.00']})
+        self.assertEqual(entry.user, self.user)
+
+    def test_rolled_back_changes_are_not_logged(self):
+        self.project.name = 'Lighthouse'
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.project.save()
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertFalse(self.entries('UPDATE').exists())
+
+    def test_delete_logs_the_last_values(self):
+        pk = self.project.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.delete()
+        entry = AuditLog.objects.get(model_name='Project', object_id=pk, action='DELETE')
+        self.assertEqual(entry.changes['name'], ['Harbour', None])
+
+    def test_passwords_are_left_out(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = CustomUser.objects.create_user(username='v@x.com', email='v@x.com', password='secret')
+        changes = AuditLog.objects.get(model_name='CustomUser', object_id=user.pk).changes
+        self.assertNotIn('password', changes)
+        self.assertEqual(changes['email'], [None, 'v@x.com'])
+
+
+class WriterTests(TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        override = override_settings(AUDIT_SPOOL_DIR=str(self.directory), AUDIT_FLUSH_INTERVAL=60, AUDIT_FLUSH_SIZE=2)
+        override.enable()
+        self.addCleanup(override.disable)
+        # Flushed by hand, not by the writer thread or at exit
+        for target in ('audit.writer.threading.Thread', 'audit.writer.atexit.register'):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.writer = AuditWriter()
+        self.spools = spool_directory()
+        self.spools.mkdir(parents=True)
+
+    def spool_files(self):
+        return sorted(self.spools.glob('*.jsonl'))
+
+    def orphan(self, content, directory=None):
+        (directory or self.spools).joinpath('host-1-dead.jsonl').write_text(content)
+
+    def test_entries_are_spooled_until_the_flush(self):
+        self.writer.add(make_entry(object_id=1))
+        self.assertEqual(AuditLog.objects.count(), 0)
+        self.assertEqual(len(self.spool_files()), 1)
+        self.assertFalse(self.writer.wake.is_set())
+
+        self.writer.add(make_entry(object_id=2))
+        # AUDIT_FLUSH_SIZE reached
+        self.assertTrue(self.writer.wake.is_set())
+
+        self.assertEqual(self.writer.flush(), 2)
+        self.assertEqual(sorted(AuditLog.objects.values_list('object_id', flat=True)), [1, 2])
+        self.assertEqual(self.spool_files(), [])
+
+    def test_spools_left_by_a_stopped_process_are_written_once(self):
+        entry_id = str(uuid.uuid4())
+        line = json.dumps({**make_entry(), 'entry_id': entry_id, 'timestamp': timezone.now().isoformat()})
+        # The crash cut the last line short
+        self.orphan(line + '\n{"action": "UPD')
+        with self.assertLogs('audit.writer', 'WARNING') as logs:
+            self.assertEqual(self.writer.adopt_orphans(), 1)
+        self.assertIn('Skipping unreadable line 2', logs.output[0])
+        self.assertEqual(self.spool_files(), [])
+
+        # Written again after a crash between the insert and the delete
+        self.orphan(line + '\n')
+        with self.assertLogs('audit.writer', 'WARNING'):
+            self.writer.adopt_orphans()
+        self.assertEqual(AuditLog.objects.filter(entry_id=entry_id).count(), 1)
+
+    def test_spools_of_a_running_writer_are_left_alone(self):
+        other = AuditWriter()
+        other.add(make_entry())
+        self.assertEqual(self.writer.adopt_orphans(), 0)
+        self.assertEqual(len(self.spool_files()), 1)
+        other.flush()
+
+    def test_spools_of_another_database_are_left_alone(self):
+        elsewhere = self.directory / 'another-database'
+        elsewhere.mkdir()
+        line = json.dumps({**make_entry(), 'entry_id': str(uuid.uuid4()), 'timestamp': timezone.now().isoformat()})
+        self.orphan(line + '\n', elsewhere)
+        self.assertEqual(self.writer.adopt_orphans(), 0)
+        self.assertTrue((elsewhere / 'host-1-dead.jsonl').exists())
@@ -2,18 +2,21 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from core.export import ExportMixin
+from core.fieldsets import SparseFieldsetMixin
 from .models import AuditLog
+from .permissions import IsAuditor
 from .serializers import AuditLogSerializer
 
-class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+class AuditLogViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Read-only endpoint for audit logs.
-    Accessible only to authenticated users (further restricted by permissions/groups in future).
+    Accessible only to staff and auditors (CEO, EDBO, Audit Manager).
     Supports filtering and searching.
     """
     queryset = AuditLog.objects.all().select_related('user')
     serializer_class = AuditLogSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsAuditor]
 
     # Filtering & Searching
     filter_backends = [
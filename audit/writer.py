@@ -0,0 +1,242 @@
+# audit/writer.py
+"""
+Per-process buffer that writes committed audit entries with ``bulk_create``.
+
+``add()`` runs in the commit callback of the transaction that made the
+change. It appends the entry to the process buffer and, as one JSON line,
+to the process's spool file under ``AUDIT_SPOOL_DIR``; nothing else happens
+on the request path. A daemon thread writes the buffer every
+``AUDIT_FLUSH_INTERVAL`` seconds (sooner once ``AUDIT_FLUSH_SIZE`` entries
+are waiting) and deletes the spool file it has written. The rest is
+flushed at exit.
+
+A worker that crashes leaves its spool file behind. Each writer holds an
+exclusive lock on its open spool file; the next writer to start (or
+``manage.py replay_audit_spool``) finds files nobody holds and writes them.
+Spool files sit in a subdirectory per database, so a writer only ever
+adopts entries meant for the database it writes to.
+Entries carry a unique ``entry_id``, so a file written twice (a crash
+between the insert and the delete) logs nothing twice.
+
+With ``AUDIT_FLUSH_INTERVAL = 0`` entries are written straight away in the
+commit callback, without buffer, spool or thread (tests, single-process
+scripts).
+"""
+import atexit
+import hashlib
+import itertools
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils.dateparse import parse_datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: no takeover of other processes' spools
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+# How often a running writer looks for spools left by crashed processes (seconds)
+ADOPT_INTERVAL = 60
+
+
+def write_entries(entries):
+    """Insert entries (dicts of AuditLog fields); ones already logged are skipped"""
+    from .models import AuditLog
+
+    with transaction.atomic():
+        AuditLog.objects.bulk_create(
+            [AuditLog(**entry) for entry in entries], batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
+
+
+def spool_directory():
+    """Spool directory of the database the entries are written to"""
+    database = connections['default'].settings_dict
+    key = '|'.join(str(database.get(part) or '') for part in ('ENGINE', 'HOST', 'PORT', 'NAME'))
+    return Path(settings.AUDIT_SPOOL_DIR) / hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def _lock(spool_file):
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(spool_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def read_spool(spool_file):
+    """Entries of a spool file; a line cut short by a crash is skipped"""
+    entries = []
+    for number, line in enumerate(spool_file.read().splitlines(), start=1):
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            logger.warning('Skipping unreadable line %d of audit spool %s', number, spool_file.name)
+            continue
+        entry['timestamp'] = parse_datetime(entry['timestamp'])
+        entries.append(entry)
+    return entries
+
+
+class Spool:
+    """An open spool file, locked for as long as its entries are unwritten"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'ab', buffering=0)
+        _lock(self.file)
+        self.entries = []
+
+    def append(self, entry, line):
+        self.file.write(line)
+        self.entries.append(entry)
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.file.close()
+
+
+class AuditWriter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.pid = None
+        self._reseed()
+
+    def _reseed(self):
+        # Entry ids are a random per-process half and a counter: unique without
+        # paying for os.urandom() on every entry
+        self.id_base = uuid.uuid4().int >> 64 << 64
+        self.id_counter = itertools.count()
+
+    def _start(self):
+        # First entry in this process (or in a fork of the process that started it)
+        self.pid = os.getpid()
+        self._reseed()
+        self.spool = None
+        self.unwritten = []
+        self.sequence = 0
+        self.wake = threading.Event()
+        self.directory = spool_directory()
+        self.prefix = f'{socket.gethostname()}-{self.pid}-{uuid.uuid4().hex[:8]}'
+        threading.Thread(target=self._run, name='audit-writer', daemon=True).start()
+        atexit.register(self.flush)
+
+    def add(self, entry):
+        """Queue a committed entry (dict of AuditLog fields but entry_id)"""
+        entry['entry_id'] = uuid.UUID(int=self.id_base | next(self.id_counter))
+        if not settings.AUDIT_FLUSH_INTERVAL:
+            write_entries([entry])
+            return
+
+        line = json.dumps({
+            **entry, 'entry_id': str(entry['entry_id']), 'timestamp': entry['timestamp'].isoformat()
+        }).encode() + b'\n'
+        with self.lock:
+            if self.pid != os.getpid():
+                self._start()
+            try:
+                if self.spool is None:
+                    self.sequence += 1
+                    self.directory.mkdir(parents=True, exist_ok=True)
+                    self.spool = Spool(self.directory / f'{self.prefix}-{self.sequence}.jsonl')
+                self.spool.append(entry, line)
+            except OSError:
+                spooled = False
+            else:
+                spooled = True
+                full = len(self.spool.entries) >= settings.AUDIT_FLUSH_SIZE
+        if not spooled:
+            logger.exception('Audit spool unavailable; writing the entry directly')
+            write_entries([entry])
+        elif full:
+            self.wake.set()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of entries written"""
+        if self.pid != os.getpid():
+            return 0
+        with self.flush_lock:
+            with self.lock:
+                if self.spool is not None:
+                    self.unwritten.append(self.spool)
+                    self.spool = None
+                spools, self.unwritten = self.unwritten, []
+
+            written = 0
+            for i, spool in enumerate(spools):
+                try:
+                    write_entries(spool.entries)
+                except Exception:
+                    # Still on disk and locked; retried on the next flush
+                    logger.exception('Could not write %d audit entries', len(spool.entries))
+                    with self.lock:
+                        self.unwritten[:0] = spools[i:]
+                    break
+                written += len(spool.entries)
+                spool.discard()
+            return written
+
+    def adopt_orphans(self):
+        """Write the spool files no running writer holds; returns the number of entries"""
+        directory = spool_directory()
+        if not directory.is_dir():
+            return 0
+        own = {spool.path for spool in [self.spool, *self.unwritten] if spool is not None} \
+            if self.pid == os.getpid() else set()
+
+        written = 0
+        for path in sorted(directory.glob('*.jsonl')):
+            if path in own:
+                continue
+            try:
+                spool_file = open(path, 'rb+')
+            except FileNotFoundError:
+                continue  # Written meanwhile by another writer
+            with spool_file:
+                if not _lock(spool_file):
+                    continue  # Its writer is alive
+                entries = read_spool(spool_file)
+                if entries:
+                    write_entries(entries)
+                    written += len(entries)
+                os.remove(path)
+        if written:
+            logger.warning('Wrote %d audit entries left by a stopped process', written)
+        return written
+
+    def _run(self):
+        waited = ADOPT_INTERVAL
+        while True:
+            close_old_connections()
+            # Without file locks a live writer's spool looks abandoned
+            if fcntl is not None and waited >= ADOPT_INTERVAL:
+                waited = 0
+                try:
+                    self.adopt_orphans()
+                except Exception:
+                    logger.exception('Could not replay audit spool files')
+            self.wake.wait(settings.AUDIT_FLUSH_INTERVAL)
+            self.wake.clear()
+            waited += settings.AUDIT_FLUSH_INTERVAL
+            self.flush()
+
+
+writer = AuditWriter()
@@ -0,0 +1,409 @@
+# core/export.py
+"""
+CSV / XLSX export of list endpoints (``?format=csv`` or ``?format=xlsx``).
+
+``ExportMixin`` answers an export request on ``list`` with the view's own
+``filter_queryset(get_queryset())`` (same filters, ordering and visibility)
+without paginating or serializing rows. The columns are the serializer's
+fields (after ``?fields=``) that resolve to a column path, read with
+``values_list()`` through ``.iterator(chunk_size=...)``: a server-side cursor
+on PostgreSQL. Rows are written to the response as they are fetched, so
+memory stays flat however big the table is (server-side cursors need
+``DISABLE_SERVER_SIDE_CURSORS`` off, i.e. session pooling).
+
+- relations export their id, ``get_<field>_display`` sources the choice
+  label, nested or computed fields (methods, properties) are left out;
+- XLSX is written by a minimal streaming writer (inline strings, one sheet
+  per 1,048,575 rows) so there is no spreadsheet library to load;
+- XLSX exports above ``EXPORT_XLSX_MAX_ROWS`` rows, and any export with
+  ``?async=1``, run as a background job (202; the job's ``result_url``
+  downloads the file).
+
+Other responses asked for as CSV / XLSX (a single object, a custom list
+action) go through the renderers: one column per key of the serialized rows.
+"""
+import csv
+import io
+import json
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.response import Response
+
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def serialized_rows(data):
+    """Header, then one list of values per item of serialized ``data`` (a list, a page or one object)"""
+    if isinstance(data, dict):
+        data = data['results'] if isinstance(data.get('results'), list) else [data]
+    items = [item for item in data or () if isinstance(item, dict)]
+    header = list(dict.fromkeys(name for item in items for name in item))
+    yield header
+    for item in items:
+        yield [item.get(name) for name in header]
+
+
+class CSVRenderer(BaseRenderer):
+    """?format=csv; ExportMixin streams list exports itself, other responses are rendered here"""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b''.join(write_csv(serialized_rows(data)))
+
+
+class XLSXRenderer(BaseRenderer):
+    media_type = XLSX_CONTENT_TYPE
+    format = 'xlsx'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        output = io.BytesIO()
+        write_xlsx(serialized_rows(data), output)
+        return output.getvalue()
+
+
+# ==================== COLUMNS ====================
+
+DISPLAY_SOURCE = re.compile(r'^get_(\w+)_display$')
+
+
+def _column(field, model):
+    """(values path, converter) for a serializer field, or None if it is not a plain column"""
+    if field.source == '*':
+        return None
+    path = []
+    attrs = field.source_attrs
+    for index, attr in enumerate(attrs):
+        last = index == len(attrs) - 1
+        display = DISPLAY_SOURCE.match(attr) if last else None
+        if display:
+            try:
+                model_field = model._meta.get_field(display.group(1))
+            except FieldDoesNotExist:
+                return None
+            if not model_field.choices:
+                return None
+            labels = {value: str(label) for value, label in model_field.flatchoices}
+            return '__'.join(path + [model_field.name]), lambda value: labels.get(value, value)
+
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if model_field.many_to_many or model_field.one_to_many or not model_field.concrete:
+            return None
+
+        path.append(model_field.name)
+        if last:
+            return '__'.join(path), None
+        if not model_field.is_relation:
+            return None
+        model = model_field.related_model
+    return None
+
+
+def export_columns(serializer, model):
+    """[(header, values path, converter or None)] for the exportable fields of ``serializer``"""
+    columns = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        column = _column(field, model)
+        if column is not None:
+            columns.append((name, *column))
+    return columns
+
+
+def export_rows(queryset, columns, chunk_size=None):
+    """Header, then one list of values per row, read through a server-side cursor"""
+    chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    yield [header for header, _, _ in columns]
+
+    converters = [(index, convert) for index, (_, _, convert) in enumerate(columns) if convert]
+    rows = queryset.prefetch_related(None).values_list(*(path for _, path, _ in columns))
+    for row in rows.iterator(chunk_size=chunk_size):
+        row = list(row)
+        for index, convert in converters:
+            row[index] = convert(row[index])
+        yield row
+
+
+# ==================== WRITERS ====================
+
+class _Pipe:
+    """Write-only file that hands out what was written since the last read"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def read(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat() if timezone.is_aware(value) else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_cell(value):
+    text = _text(value)
+    # Keep spreadsheets from evaluating text as a formula
+    if isinstance(value, str) and text[:1] in ('=', '+', '-', '@'):
+        return "'" + text
+    return text
+
+
+def write_csv(rows):
+    """Encoded CSV chunks, one per row"""
+    writer = csv.writer(_Echo())
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row]).encode('utf-8')
+
+
+XLSX_MAX_ROWS = 1048576
+
+ILLEGAL_XML = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_NAMESPACE = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_RELATIONSHIPS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PACKAGE_RELATIONSHIPS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+
+def _column_letters(count):
+    letters = []
+    for index in range(count):
+        name, index = '', index + 1
+        while index:
+            index, remainder = divmod(index - 1, 26)
+            name = chr(65 + remainder) + name
+        letters.append(name)
+    return letters
+
+
+class XLSXWriter:
+    """Write-only XLSX: rows go straight into a deflated zip member"""
+
+    def __init__(self, fileobj, header):
+        self.zip = zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED)
+        self.header = header
+        self.letters = _column_letters(len(header))
+        self.sheets = 0
+        self.sheet = None
+        self.rows = 0
+
+    def _cell(self, reference, value):
+        if value is None:
+            return ''
+        if isinstance(value, bool):
+            return f'<c r="{reference}" t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, (int, float, Decimal)) and value == value and abs(value) != float('inf'):
+            return f'<c r="{reference}"><v>{value}</v></c>'
+        text = ILLEGAL_XML.sub('', _text(value))[:32767]
+        return f'<c r="{reference}" t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+    def _write_row(self, values):
+        self.rows += 1
+        cells = ''.join(
+            self._cell(f'{letter}{self.rows}', value)
+            for letter, value in zip(self.letters, values)
+        )
+        self.sheet.write(f'<row r="{self.rows}">{cells}</row>'.encode('utf-8'))
+
+    def _close_sheet(self):
+        self.sheet.write(b'</sheetData></worksheet>')
+        self.sheet.close()
+
+    def writerow(self, values):
+        if self.sheet is None or self.rows >= XLSX_MAX_ROWS:
+            if self.sheet is not None:
+                self._close_sheet()
+            self.sheets += 1
+            self.sheet = self.zip.open(f'xl/worksheets/sheet{self.sheets}.xml', 'w')
+            self.sheet.write(
+                f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<worksheet xmlns="{_NAMESPACE}"><sheetData>'.encode('utf-8')
+            )
+            self.rows = 0
+            self._write_row(self.header)
+        self._write_row(values)
+
+    def close(self):
+        if self.sheet is None:
+            self.writerow([])
+        self._close_sheet()
+
+        numbers = range(1, self.sheets + 1)
+        self.zip.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + ''.join(
+                f'<Override PartName="/xl/worksheets/sheet{number}.xml" '
+                f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for number in numbers
+            )
+            + '</Types>'
+        ))
+        self.zip.writestr('_rels/.rels', (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Relationships xmlns="{_PACKAGE_RELATIONSHIPS}">'
+            f'<Relationship Id="rId1" Type="{_RELATIONSHIPS}/officeDocument" Target="xl/workbook.xml"/>'
+            f'</Relationships>'
+        ))
+        self.zip.writestr('xl/workbook.xml', (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<workbook xmlns="{_NAMESPACE}" xmlns:r="{_RELATIONSHIPS}"><sheets>'
+            + ''.join(f'<sheet name="Sheet{number}" sheetId="{number}" r:id="rId{number}"/>' for number in numbers)
+            + '</sheets></workbook>'
+        ))
+        self.zip.writestr('xl/_rels/workbook.xml.rels', (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Relationships xmlns="{_PACKAGE_RELATIONSHIPS}">'
+            + ''.join(
+                f'<Relationship Id="rId{number}" Type="{_RELATIONSHIPS}/worksheet" Target="worksheets/sheet{number}.xml"/>'
+                for number in numbers
+            )
+            + '</Relationships>'
+        ))
+        self.zip.close()
+
+
+def write_xlsx(rows, fileobj=None):
+    """
+    Write header + rows as XLSX into ``fileobj``; without one, yield the
+    file's bytes as they are produced (for a streaming response)
+    """
+    rows = iter(rows)
+    header = next(rows)
+    if fileobj is not None:
+        writer = XLSXWriter(fileobj, header)
+        for row in rows:
+            writer.writerow(row)
+        writer.close()
+        return writer
+    return _stream_xlsx(header, rows)
+
+
+def _stream_xlsx(header, rows):
+    pipe = _Pipe()
+    writer = XLSXWriter(pipe, header)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % 500 == 0:
+            data = pipe.read()
+            if data:
+                yield data
+    writer.close()
+    yield pipe.read()
+
+
+# ==================== VIEWS ====================
+
+def export_filename(view, extension):
+    name = getattr(view, 'basename', None) or view.get_queryset().model._meta.model_name
+    return f"{name}-{timezone.localdate():%Y%m%d}.{extension}"
+
+
+class ExportMixin:
+    """``?format=csv|xlsx`` on list: stream the filtered rows instead of a page of JSON"""
+    export_renderer_classes = [CSVRenderer, XLSXRenderer]
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if getattr(self, 'action', None) == 'list':
+            renderers += [renderer() for renderer in self.export_renderer_classes]
+        return renderers
+
+    def _export_format(self, request):
+        renderer = getattr(request, 'accepted_renderer', None)
+        return renderer.format if renderer is not None and renderer.format in EXPORT_FORMATS else None
+
+    def list(self, request, *args, **kwargs):
+        export_format = self._export_format(request)
+        if export_format is None:
+            return super().list(request, *args, **kwargs)
+        return self.export(request, export_format)
+
+    def export(self, request, export_format):
+        from jobs.views import offload, wants_async
+
+        queryset = self.filter_queryset(self.get_queryset())
+        large = (
+            export_format == 'xlsx'
+            and queryset.count() > getattr(settings, 'EXPORT_XLSX_MAX_ROWS', 100000)
+        )
+        if wants_async(request) or large:
+            return offload(
+                request, 'core.export',
+                view=f'{type(self).__module__}.{type(self).__qualname__}',
+                basename=getattr(self, 'basename', None),
+                kwargs=self.kwargs,
+                query={
+                    name: values for name, values in request.query_params.lists()
+                    if name not in ('format', 'async')
+                },
+                export_format=export_format,
+            )
+
+        rows = export_rows(queryset, export_columns(self.get_serializer(), queryset.model))
+        if export_format == 'csv':
+            response = StreamingHttpResponse(write_csv(rows), content_type='text/csv; charset=utf-8')
+        else:
+            response = StreamingHttpResponse(write_xlsx(rows), content_type=XLSX_CONTENT_TYPE)
+        response['Content-Disposition'] = f'attachment; filename="{export_filename(self, export_format)}"'
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Errors and job responses of an export request are JSON
+        if isinstance(response, Response) and self._export_format(request):
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,205 @@
+# core/fieldsets.py
+"""
+Sparse fieldsets (``?fields=``) and expansion (``?expand=``) for viewsets.
+
+``?fields=id,name,code`` trims the serializer to those fields and
+``?expand=manager`` swaps a primary-key field for the nested serializer named
+in the serializer's ``Meta.expandable_fields``. The queryset is then shaped
+from whatever fields are left: ``select_related`` for followed foreign keys,
+``prefetch_related`` for many-valued sources, ``only()`` for the columns read,
+plus the annotations a field declares in ``Meta.field_requirements``.
+
+Fields whose needs cannot be worked out (a method field with no declared
+requirements, a property, ``source='*'``) keep the full row and whatever
+joins the view's queryset already had.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+class Requires:
+    """What a serializer field needs from the queryset, for fields that cannot be derived from ``source``"""
+
+    def __init__(self, only=(), select=(), prefetch=(), annotate=None):
+        self.only = tuple(only)
+        self.select = tuple(select)
+        self.prefetch = tuple(prefetch)
+        # Callable returning {name: expression}, evaluated per request
+        self.annotate = annotate
+
+
+class _Plan:
+    def __init__(self):
+        self.only = set()
+        self.select = set()
+        self.prefetch = {}
+        self.annotate = {}
+        self.full = {}
+
+    @property
+    def narrow(self):
+        return '' not in self.full
+
+
+def _split(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def _meta(serializer, name, default):
+    return getattr(getattr(serializer, 'Meta', None), name, default)
+
+
+def shape_serializer(serializer, request):
+    """Apply ?expand= and ?fields= from the request to ``serializer`` in place"""
+    expandable = _meta(serializer, 'expandable_fields', {})
+    expand = [name for name in _split(request.query_params.get('expand')) if name in expandable]
+
+    for name in expand:
+        serializer_class, kwargs = expandable[name]
+        if isinstance(serializer_class, str):
+            serializer_class = import_string(serializer_class)
+        serializer.fields[name] = serializer_class(read_only=True, **kwargs)
+
+    requested = _split(request.query_params.get('fields'))
+    if requested:
+        keep = set(requested) | set(expand)
+        for name in list(serializer.fields):
+            if name not in keep:
+                serializer.fields.pop(name)
+    return serializer
+
+
+def _collect(serializer, model, prefix, plan):
+    requirements = _meta(serializer, 'field_requirements', {})
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+
+        requires = requirements.get(name)
+        if requires is not None:
+            plan.only.update(prefix + path for path in requires.only)
+            plan.select.update(prefix + path for path in requires.select)
+            for path in requires.prefetch:
+                plan.prefetch.setdefault(prefix + path, None)
+            if requires.annotate is not None:
+                if prefix:
+                    plan.full[prefix] = model
+                else:
+                    plan.annotate.update(requires.annotate())
+            continue
+
+        if field.source == '*':
+            plan.full[prefix] = model
+            continue
+        _walk(field, model, prefix, field.source_attrs, plan)
+
+
+def _walk(field, model, prefix, attrs, plan):
+    for index, attr in enumerate(attrs):
+        last = index == len(attrs) - 1
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            # Method, property or annotation: any column may be read
+            plan.full[prefix] = model
+            return
+
+        path = prefix + attr
+        if not model_field.is_relation:
+            plan.only.add(path)
+            return
+
+        if model_field.many_to_many or model_field.one_to_many:
+            child = getattr(field, 'child', None)
+            if last and not prefix and isinstance(child, serializers.ModelSerializer):
+                related = model_field.related_model
+                nested = _Plan()
+                _collect(child, related, '', nested)
+                plan.prefetch[path] = _apply(related._default_manager.all(), nested, narrow=False)
+            else:
+                plan.prefetch.setdefault(path, None)
+            return
+
+        if model_field.concrete:
+            plan.only.add(path)
+        if last:
+            if isinstance(field, serializers.BaseSerializer):
+                plan.select.add(path)
+                _collect(field, model_field.related_model, path + '__', plan)
+            elif not isinstance(field, (serializers.PrimaryKeyRelatedField, serializers.ManyRelatedField)):
+                plan.select.add(path)
+                plan.full[path + '__'] = model_field.related_model
+            elif not model_field.concrete:
+                plan.select.add(path)
+                plan.full[path + '__'] = model_field.related_model
+            return
+
+        plan.select.add(path)
+        model = model_field.related_model
+        prefix = path + '__'
+
+
+def _apply(queryset, plan, narrow):
+    if plan.annotate:
+        queryset = queryset.annotate(**plan.annotate)
+
+    if narrow:
+        # Joins are fully known: replace the view's hard-coded ones
+        queryset = queryset.select_related(None).prefetch_related(None)
+
+        only = set(plan.only)
+        for path in plan.select:
+            parts = path.split('__')
+            only.update('__'.join(parts[:i]) for i in range(1, len(parts) + 1))
+        for prefix, model in plan.full.items():
+            only.update(prefix + field.name for field in model._meta.concrete_fields)
+        queryset = queryset.only(*only) if only else queryset.only('pk')
+
+    if plan.select:
+        queryset = queryset.select_related(*sorted(plan.select))
+
+    existing = {
+        getattr(lookup, 'prefetch_to', lookup)
+        for lookup in queryset._prefetch_related_lookups
+    }
+    for path, nested in sorted(plan.prefetch.items()):
+        if path in existing:
+            continue
+        queryset = queryset.prefetch_related(Prefetch(path, queryset=nested) if nested is not None else path)
+    return queryset
+
+
+def prune_queryset(queryset, serializer):
+    """Shape ``queryset`` to what ``serializer`` (already shaped) will read"""
+    plan = _Plan()
+    _collect(serializer, queryset.model, '', plan)
+    return _apply(queryset, plan, narrow=plan.narrow)
+
+
+class SparseFieldsetMixin:
+    """Honour ?fields= and ?expand= on list and retrieve, pruning the queryset to match"""
+    sparse_actions = ('list', 'retrieve')
+
+    def _sparse(self):
+        request = getattr(self, 'request', None)
+        return (
+            request is not None
+            and request.method in SAFE_METHODS
+            and getattr(self, 'action', None) in self.sparse_actions
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self._sparse():
+            shape_serializer(getattr(serializer, 'child', serializer), self.request)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self._sparse() and hasattr(queryset, 'model'):
+            queryset = prune_queryset(queryset, self.get_serializer())
+        return queryset
@@ -0,0 +1,534 @@
+# core/imports.py
+"""
+Bulk imports of onboarding data through django-import-export resources
+(CSV, JSON, YAML; XLSX / XLS / ODS when tablib's readers are installed).
+
+``BulkModelResource`` is the base of the apps' resources (``resources.py``):
+- foreign keys use ``LookupWidget``: before the first row, the distinct
+  values of the column are resolved to primary keys by their natural key
+  (``Meta.widgets = {'project': {'field': 'code'}}``), 1,000 per query, so a
+  row costs a dict lookup instead of a query;
+- the rows an import updates (matched on ``import_id_fields``) are loaded the
+  same way up front by ``BulkInstanceLoader``, from the importing view's
+  ``get_queryset()``: a row whose id exists outside it is rejected, neither
+  updated nor created;
+- rows are cleaned without the per-row queries of ``full_clean()`` (foreign
+  key existence is the lookup's job, import ids repeated in the file are
+  reported as duplicates) and through the view's serializer, as a PATCH
+  would be (relations and uniqueness left to the lookups and the database),
+  then written with ``bulk_create`` / ``bulk_update`` every ``batch_size``
+  rows;
+- bulk writes send no signals, so a committed import bumps the model's cache
+  version, re-indexes the written rows for search, logs them to the audit
+  trail and calls ``after_bulk_import()`` for the model's own bookkeeping.
+
+``run_import()`` runs a resource over a dataset in one transaction and
+returns a report: counts, per-row errors and, on a dry run, the changes each
+row would make. Invalid rows are skipped and reported; an error while writing
+rolls the whole import back, as does a dry run.
+
+``ImportMixin`` adds ``POST <list>/import/`` to a viewset (multipart "file",
+optional "dry_run"; ``?async=1`` runs it as a background job).
+"""
+import functools
+
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.core.files.storage import default_storage
+from django.db import transaction
+from import_export.formats.base_formats import DEFAULT_FORMATS
+from import_export.instance_loaders import ModelInstanceLoader
+from import_export.resources import ModelResource
+from import_export.results import RowResult
+from import_export.utils import get_related_model
+from import_export.widgets import ForeignKeyWidget
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
+
+from .versioning import bump_version
+
+
+LOOKUP_CHUNK_SIZE = 1000
+
+# Keep the report bounded on a badly formatted file
+MAX_REPORTED_ROWS = 1000
+
+
+class ImportFileError(ValueError):
+    """The upload cannot be read as a dataset"""
+
+
+def _slices(values, size=LOOKUP_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _key(value):
+    """A cell as a lookup key: stripped text, None when empty"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+# ==================== LOOKUPS ====================
+
+class LookupWidget(ForeignKeyWidget):
+    """
+    Foreign key by a natural key (``field``), resolved from a dict loaded once
+    per import. Cleans to the pk, so its Field sets the ``<name>_id`` attribute.
+    """
+
+    def __init__(self, model, field='pk', **kwargs):
+        kwargs['key_is_id'] = True
+        super().__init__(model, field, **kwargs)
+        self.keys = {}
+        self.names = {}
+
+    def load(self, values):
+        """Resolve the distinct non-empty ``values`` of the column"""
+        self.keys, self.names = {}, {}
+        wanted = {_key(value) for value in values}
+        wanted.discard(None)
+        queryset = self.model._default_manager.order_by()
+        for chunk in _slices(wanted):
+            for key, pk in queryset.filter(**{f'{self.field}__in': chunk}).values_list(self.field, 'pk'):
+                self.keys[str(key)] = pk
+                self.names[pk] = key
+
+    def clean(self, value, row=None, **kwargs):
+        key = _key(value)
+        if key is None:
+            return None
+        pk = self.keys.get(key)
+        if pk is None:
+            raise ValueError(f'Unknown {self.model._meta.verbose_name} "{key}"')
+        return pk
+
+    def name(self, pk):
+        """The natural key of ``pk`` when the file used it, else the pk"""
+        return self.names.get(pk, pk)
+
+
+class BulkInstanceLoader(ModelInstanceLoader):
+    """
+    Loads the existing rows matching the file's import ids up front, 1,000 per
+    query, from ``resource.get_queryset()``; ids that exist outside it are
+    ``hidden``
+    """
+
+    def __init__(self, resource, dataset=None):
+        super().__init__(resource, dataset)
+        self.instances = {}
+        self.hidden = set()
+        self.field = resource.fields[resource.get_import_id_fields()[0]]
+        if dataset is None or self.field.column_name not in (dataset.headers or ()):
+            return
+
+        keys = set()
+        for value in dataset[self.field.column_name]:
+            try:
+                keys.add(self.field.widget.clean(value))
+            except ValueError:
+                # Reported with the row
+                continue
+        keys.discard(None)
+        keys.discard('')
+
+        attname = resource.model_field(self.field).attname
+        queryset = self.get_queryset().order_by()
+        for chunk in _slices(keys):
+            for instance in queryset.filter(**{f'{attname}__in': chunk}):
+                self.instances[getattr(instance, attname)] = instance
+
+        if getattr(resource, 'scope', None) is not None:
+            everything = resource._meta.model._default_manager.order_by()
+            for chunk in _slices(keys - self.instances.keys()):
+                self.hidden.update(everything.filter(**{f'{attname}__in': chunk}).values_list(attname, flat=True))
+
+    def get_instance(self, row):
+        try:
+            return self.instances.get(self.field.clean(row))
+        except ValueError:
+            return None
+
+    def is_hidden(self, row):
+        try:
+            return self.field.clean(row) in self.hidden
+        except ValueError:
+            return False
+
+
+# ==================== RESOURCES ====================
+
+class BulkRowResult(RowResult):
+    def add_instance_info(self, instance):
+        # Not str(instance): it may follow a foreign key, a query per row
+        if instance is not None:
+            self.object_id = instance.pk
+
+
+class BulkModelResource(ModelResource):
+    """Chunked, query-bounded import of one model (see the module docstring)"""
+
+    class Meta:
+        use_bulk = True
+        batch_size = 1000
+        skip_diff = True
+        clean_model_instances = True
+        instance_loader_class = BulkInstanceLoader
+
+    def __init__(self, progress=None, queryset=None, serializer=None, **kwargs):
+        super().__init__(**kwargs)
+        # Called with (rows done, total rows) after each batch (background jobs)
+        self.progress = progress
+        # The importing view's rows and serializer (None: every row, no serializer)
+        self.scope = queryset
+        self.serializer = serializer
+
+    def get_queryset(self):
+        if self.scope is not None:
+            return self.scope.all()
+        return super().get_queryset()
+
+    @classmethod
+    def get_fk_widget(cls, field):
+        return functools.partial(LookupWidget, model=get_related_model(field))
+
+    @classmethod
+    def field_from_django_field(cls, field_name, django_field, readonly):
+        field = super().field_from_django_field(field_name, django_field, readonly)
+        if isinstance(field.widget, LookupWidget):
+            # Set the key itself rather than a related instance per cell
+            field.attribute = django_field.attname
+        return field
+
+    def get_import_fields(self):
+        # During an import, only the file's columns (the library walks every field, per row)
+        columns = getattr(self, 'columns', None)
+        return super().get_import_fields() if columns is None else columns
+
+    @classmethod
+    def get_row_result_class(cls):
+        return BulkRowResult
+
+    def model_field(self, field):
+        return self._meta.model._meta.get_field(field.attribute)
+
+    def before_import(self, dataset, **kwargs):
+        dataset.headers = [str(header or '').strip().lower() for header in dataset.headers or ()]
+        self.total = len(dataset)
+        self.columns = None
+        self.columns = [field for field in self.get_import_fields() if field.column_name in dataset.headers]
+        for field in self.columns:
+            if isinstance(field.widget, LookupWidget):
+                field.widget.load(dataset[field.column_name])
+        self.foreign_keys = [field for field in self._meta.model._meta.concrete_fields if field.is_relation]
+        self.seen = {}
+        self.written = []
+        self.changes = []
+        self.user = kwargs.get('user')
+        self._prepare_serializer()
+
+    def _prepare_serializer(self):
+        """{serializer field: attribute} of the file's columns the serializer validates"""
+        self.serializer_fields = {}
+        if self.serializer is None:
+            return
+        # Uniqueness is the import ids' and the database's job: no query per row
+        self.serializer.validators = []
+        self.serializer.partial = True
+        columns = {self.model_field(field).name for field in self.columns}
+        for name, field in self.serializer.fields.items():
+            if field.read_only or field.source not in columns:
+                continue
+            if isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField)):
+                continue  # Checked by its lookup
+            field.validators = [
+                validator for validator in field.validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+            self.serializer_fields[name] = field.source
+
+    def before_import_row(self, row, **kwargs):
+        self.row_number = kwargs.get('row_number')
+
+    def get_or_init_instance(self, instance_loader, row):
+        instance, new = super().get_or_init_instance(instance_loader, row)
+        if new and instance_loader.is_hidden(row):
+            # Exists, but not for this user: neither an update nor a new row
+            id_field = self.fields[self.get_import_id_fields()[0]]
+            raise ValidationError({id_field.column_name: [
+                f'No {self._meta.model._meta.verbose_name} "{row[id_field.column_name]}" to update'
+            ]})
+        return instance, new
+
+    def after_init_instance(self, instance, new, row, **kwargs):
+        self.instance = instance
+        self.new = new
+        self.original = None
+        if kwargs.get('dry_run') and not new:
+            self.original = {field.column_name: self._value(instance, field) for field in self.columns}
+
+    def import_field(self, field, instance, row, is_m2m=False, **kwargs):
+        try:
+            super().import_field(field, instance, row, is_m2m, **kwargs)
+        except (ArithmeticError, TypeError):
+            # A malformed number is the row's error, not the import's
+            raise ValueError(f'Not a valid value: "{row[field.column_name]}"')
+
+    def validate_instance(self, instance, import_validation_errors=None, validate_unique=True):
+        errors = dict(import_validation_errors or {})
+        # Foreign keys were checked by their lookup (or come from the database);
+        # full_clean() would query each one again
+        for field in self.foreign_keys:
+            missing = not field.null and getattr(instance, field.attname) is None
+            if missing and errors.keys().isdisjoint((field.name, field.attname)):
+                errors[field.name] = [ValidationError(field.error_messages['null'], code='null')]
+        try:
+            instance.full_clean(
+                exclude=set(errors) | {field.name for field in self.foreign_keys},
+                validate_unique=False,
+                validate_constraints=False,
+            )
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+        for name, messages in self._serializer_errors(instance).items():
+            # Not twice what full_clean() already found
+            errors.setdefault(name, messages)
+
+        if not errors:
+            id_field = self.fields[self.get_import_id_fields()[0]]
+            key = self._value(instance, id_field)
+            if key not in (None, ''):
+                if key in self.seen:
+                    errors[id_field.column_name] = [ValidationError(
+                        f'Same {id_field.column_name} as row {self.seen[key]}', code='unique'
+                    )]
+                else:
+                    self.seen[key] = self.row_number
+        if errors:
+            # Report by column, e.g. "email" rather than "user" / "user_id"
+            columns = {}
+            for field in self.columns:
+                columns[field.attribute] = columns[self.model_field(field).name] = field.column_name
+            raise ValidationError({columns.get(name, name): messages for name, messages in errors.items()})
+
+    def _serializer_errors(self, instance):
+        """{field: messages} of the serializer's validation of the row"""
+        if not self.serializer_fields:
+            return {}
+        serializer = self.serializer
+        serializer.instance = None if self.new else instance
+        data = {name: getattr(instance, source) for name, source in self.serializer_fields.items()}
+        serializer.initial_data = data
+        try:
+            serializer.run_validation(data)
+        except serializers.ValidationError as e:
+            detail = e.detail if isinstance(e.detail, dict) else {api_settings.NON_FIELD_ERRORS_KEY: e.detail}
+        else:
+            return {}
+        errors = {}
+        for name, messages in detail.items():
+            name = NON_FIELD_ERRORS if name == api_settings.NON_FIELD_ERRORS_KEY else self.serializer_fields.get(name, name)
+            errors[name] = [str(message) for message in (messages if isinstance(messages, list) else [messages])]
+        return errors
+
+    def before_save_instance(self, instance, row, **kwargs):
+        # bulk_update() skips auto_now
+        if instance.pk is not None:
+            for field in instance._meta.concrete_fields:
+                if getattr(field, 'auto_now', False):
+                    setattr(instance, field.attname, field.pre_save(instance, False))
+
+    def get_bulk_update_fields(self):
+        id_fields = [self.fields[name] for name in self.get_import_id_fields()]
+        names = [
+            self.model_field(field).name for field in self.columns
+            if field.attribute and field not in id_fields
+        ]
+        names += [
+            field.name for field in self._meta.model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+        ]
+        return list(dict.fromkeys(names))
+
+    def after_import_row(self, row, row_result, **kwargs):
+        if kwargs.get('dry_run') and len(self.changes) < MAX_REPORTED_ROWS and row_result.import_type in (
+            RowResult.IMPORT_TYPE_NEW, RowResult.IMPORT_TYPE_UPDATE
+        ):
+            self.changes.append({
+                'row': kwargs['row_number'],
+                'action': row_result.import_type,
+                'changes': self._diff(),
+            })
+        if self.progress is not None and kwargs['row_number'] % self._meta.batch_size == 0:
+            self.progress(kwargs['row_number'], self.total)
+
+    def _value(self, instance, field):
+        value = getattr(instance, self.model_field(field).attname)
+        if isinstance(field.widget, LookupWidget) and value is not None:
+            return field.widget.name(value)
+        return value
+
+    def _diff(self):
+        """{column: [old, new]} of what the current row changes"""
+        diff = {}
+        for field in self.columns:
+            old = self.original.get(field.column_name) if self.original else None
+            new = self._value(self.instance, field)
+            if old != new:
+                diff[field.column_name] = [old, new]
+        return diff
+
+    # ==================== WRITING ====================
+
+    def bulk_create(self, using_transactions, dry_run, raise_errors, batch_size=None, result=None):
+        instances = list(self.create_instances)
+        super().bulk_create(using_transactions, dry_run, raise_errors, batch_size=batch_size, result=result)
+        self.written.extend(instances)
+        self._audit(instances, created=True)
+
+    def bulk_update(self, using_transactions, dry_run, raise_errors, batch_size=None, result=None):
+        instances = list(self.update_instances)
+        super().bulk_update(using_transactions, dry_run, raise_errors, batch_size=batch_size, result=result)
+        self.written.extend(instances)
+        self._audit(instances, created=False)
+
+    def _audit(self, instances, created):
+        # Logged on commit only, so a dry run (rolled back) logs nothing
+        from audit.capture import record_bulk
+
+        record_bulk(instances, created)
+
+    def after_import(self, dataset, result, **kwargs):
+        if kwargs.get('dry_run') or result.has_errors() or not self.written:
+            return
+        from search.registry import reindex
+
+        model = self._meta.model
+        pks = [instance.pk for instance in self.written]
+        bump_version(model)
+
+        def refresh():
+            bump_version(model)
+            for chunk in _slices(pks):
+                reindex(model, chunk)
+        transaction.on_commit(refresh)
+        self.after_bulk_import(self.written)
+
+    def after_bulk_import(self, instances):
+        """Bookkeeping the model's save signals would have done (inside the transaction)"""
+
+
+# ==================== RUNNING ====================
+
+def import_format(name):
+    """The import-export format for a file name, by extension"""
+    extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+    formats = {fmt().get_extension(): fmt for fmt in DEFAULT_FORMATS if fmt().can_import()}
+    if extension not in formats:
+        raise ImportFileError(f'Unsupported file type; use one of {", ".join(sorted(formats))}')
+    return formats[extension]()
+
+
+def read_dataset(fileobj, name):
+    """A tablib Dataset from an uploaded or opened binary file"""
+    fmt = import_format(name)
+    content = fileobj.read()
+    try:
+        if not fmt.is_binary():
+            content = content.decode('utf-8-sig')
+        return fmt.create_dataset(content)
+    except Exception as e:
+        raise ImportFileError(f'Could not read the file as {fmt.get_extension()}: {e}')
+
+
+def import_report(resource, result, dry_run):
+    totals = result.totals
+    errors = [
+        {'row': None, 'errors': {NON_FIELD_ERRORS: [str(error.error)]}}
+        for error in result.base_errors
+    ]
+    for row in result.error_rows:
+        errors.append({'row': row.number, 'errors': {NON_FIELD_ERRORS: [str(error.error) for error in row.errors]}})
+    for invalid in result.invalid_rows:
+        errors.append({'row': invalid.number, 'errors': invalid.error_dict})
+
+    report = {
+        'total': result.total_rows,
+        'new': totals[RowResult.IMPORT_TYPE_NEW],
+        'updated': totals[RowResult.IMPORT_TYPE_UPDATE],
+        'skipped': totals[RowResult.IMPORT_TYPE_SKIP],
+        'failed': totals[RowResult.IMPORT_TYPE_INVALID] + totals[RowResult.IMPORT_TYPE_ERROR],
+        'dry_run': dry_run,
+        'committed': not dry_run and not result.has_errors(),
+        'errors': sorted(errors, key=lambda error: error['row'] or 0)[:MAX_REPORTED_ROWS],
+    }
+    if dry_run:
+        report['changes'] = getattr(resource, 'changes', [])
+    return report
+
+
+def run_import(resource_class, dataset, dry_run=False, user=None, progress=None, queryset=None, serializer=None):
+    """
+    Import ``dataset`` with ``resource_class``; returns the report (counts,
+    row errors, changes). ``queryset`` limits the rows it may update and
+    ``serializer`` validates each row (see ``ImportMixin``).
+    """
+    resource = resource_class(progress=progress, queryset=queryset, serializer=serializer)
+    result = resource.import_data(dataset, dry_run=dry_run, use_transactions=True, user=user)
+    return import_report(resource, result, dry_run)
+
+
+class ImportMixin:
+    """
+    ``POST <list>/import/``: create or update rows from a file with
+    ``import_resource_class``. The import can only update the rows the view's
+    ``get_queryset()`` shows the caller, and validates each row with the
+    view's serializer.
+    """
+    import_resource_class = None
+
+    def run_import(self, dataset, dry_run=False, progress=None):
+        return run_import(
+            self.import_resource_class, dataset, dry_run=dry_run, user=self.request.user, progress=progress,
+            queryset=self.get_queryset(), serializer=self.get_serializer(),
+        )
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_file(self, request):
+        """Import rows from an upload (field "file"); "dry_run" returns the changes without saving"""
+        from jobs.models import upload_path
+        from jobs.views import offload, wants_async
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'A file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            import_format(upload.name)
+        except ImportFileError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        if wants_async(request):
+            path = default_storage.save(upload_path(upload.name), upload)
+            return offload(
+                request, 'core.import',
+                view=f'{type(self).__module__}.{type(self).__qualname__}',
+                basename=getattr(self, 'basename', None),
+                kwargs=self.kwargs,
+                query=dict(request.query_params.lists()),
+                path=path,
+                dry_run=dry_run,
+            )
+
+        try:
+            dataset = read_dataset(upload, upload.name)
+        except ImportFileError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.run_import(dataset, dry_run=dry_run))
@@ -0,0 +1,269 @@
+# core/pagination.py
+"""
+Default pagination for every list endpoint.
+
+Lists are paged by keyset: the cursor carries the ordering values of the
+boundary row plus its primary key, and the next page is fetched with a
+``WHERE (ordering, pk) > boundary`` range condition, so each page is an index
+range scan no matter how deep into the table it is. The ordering is the one
+the view already declares (``?ordering=``, ``ordering``, the queryset's
+``order_by()`` or the model's ``Meta.ordering``) with ``pk`` appended as a
+tiebreaker.
+
+Clients that need to jump to a page can opt in with ``?page=N``; that mode
+uses OFFSET but never issues a ``COUNT(*)``.
+"""
+import base64
+import datetime
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on the view's ordering with a primary-key tiebreaker"""
+    page_size = api_settings.PAGE_SIZE or 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_query_param = 'page'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.next_link = None
+        self.previous_link = None
+
+        if self.page_query_param in request.query_params:
+            return self._paginate_by_page(queryset, request)
+
+        self.ordering = self.get_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['r'])
+
+        queryset = queryset.order_by(*self._order_by(queryset.model, reverse))
+        loaded, deferred = queryset.query.deferred_loading
+        if loaded and not deferred:
+            # Sparse fieldsets load only some columns; the cursor needs the ordering ones too
+            queryset = queryset.only(*loaded, *(
+                field.lstrip('-') for field in self.ordering if '__' not in field
+            ))
+        if cursor:
+            try:
+                queryset = queryset.filter(
+                    self._beyond(queryset.model, cursor['p'], reverse)
+                )
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+        if rows and has_next:
+            self.next_link = self.encode_cursor(self._position(rows[-1]), reverse=False)
+        if rows and has_previous:
+            self.previous_link = self.encode_cursor(self._position(rows[0]), reverse=True)
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.next_link),
+            ('previous', self.previous_link),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # ==================== ORDERING ====================
+
+    def get_ordering(self, request, queryset, view):
+        """View ordering as a list of field names, ending with a pk tiebreaker"""
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = queryset.query.order_by or queryset.model._meta.ordering or []
+
+        fields = []
+        for field in ordering:
+            if not isinstance(field, str) or field.lstrip('-') in ('pk', 'id', '?'):
+                continue
+            field = _column_path(queryset.model, field)
+            if field not in fields:
+                fields.append(field)
+
+        descending = bool(fields) and fields[0].startswith('-')
+        fields.append('-pk' if descending else 'pk')
+        return fields
+
+    def _order_by(self, model, reverse):
+        # NULLs sort as the largest value in both directions (PostgreSQL's
+        # default), so a nullable column still matches a plain btree index
+        order_by = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            if not _is_nullable(model, name):
+                order_by.append(f'-{name}' if descending else name)
+            elif descending:
+                order_by.append(F(name).desc(nulls_first=True))
+            else:
+                order_by.append(F(name).asc(nulls_last=True))
+        return order_by
+
+    def _beyond(self, model, position, reverse):
+        """Rows strictly after ``position`` in the (possibly reversed) ordering"""
+        if len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            greater = field.startswith('-') == reverse
+            nullable = _is_nullable(model, name)
+
+            if value is None:
+                step = Q(**{f'{name}__isnull': False}) if not greater else None
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                step = Q(**{f'{name}__gt' if greater else f'{name}__lt': value})
+                if greater and nullable:
+                    step |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+
+            if step is not None:
+                condition |= equal & step
+            equal &= same
+        return condition
+
+    def _position(self, instance):
+        position = []
+        for field in self.ordering:
+            value = instance
+            for attr in field.lstrip('-').split('__'):
+                value = getattr(value, attr, None) if value is not None else None
+            position.append(value)
+        return position
+
+    # ==================== CURSOR ====================
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            return {'p': list(cursor['p']), 'r': bool(cursor.get('r'))}
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        payload = {'p': position}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, default=_encode_value, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii')
+        url = remove_query_param(self.base_url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    # ==================== PAGE NUMBERS ====================
+
+    def _paginate_by_page(self, queryset, request):
+        """Opt-in ?page=N mode: OFFSET paging with one extra row instead of a COUNT"""
+        try:
+            page = int(request.query_params[self.page_query_param])
+        except ValueError:
+            raise NotFound('Invalid page')
+        if page < 1:
+            raise NotFound('Invalid page')
+
+        if not queryset.ordered:
+            queryset = queryset.order_by('-pk')
+
+        offset = (page - 1) * self.page_size
+        rows = list(queryset[offset:offset + self.page_size + 1])
+        if page > 1 and not rows:
+            raise NotFound('Invalid page')
+
+        url = remove_query_param(self.base_url, self.cursor_query_param)
+        if len(rows) > self.page_size:
+            self.next_link = replace_query_param(url, self.page_query_param, page + 1)
+        if page > 1:
+            self.previous_link = replace_query_param(url, self.page_query_param, page - 1)
+        return rows[:self.page_size]
+
+
+def _encode_value(value):
+    # Full precision: a truncated timestamp would skip or repeat boundary rows
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _column_path(model, field):
+    """Order relations by their key column rather than the related model's Meta.ordering"""
+    prefix = '-' if field.startswith('-') else ''
+    names = field.lstrip('-').split('__')
+    for index, name in enumerate(names):
+        try:
+            related = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return field
+        if not related.is_relation:
+            return field
+        if index == len(names) - 1 and related.concrete and (related.many_to_one or related.one_to_one):
+            names[index] = related.attname
+            return prefix + '__'.join(names)
+        model = related.related_model
+    return field
+
+
+def _is_nullable(model, path):
+    """Whether the ordering path can produce NULL (nullable column or nullable join)"""
+    for name in path.split('__'):
+        if name == 'pk':
+            return False
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Annotation: assume it can be NULL
+            return True
+        if field.null or (field.is_relation and not field.concrete):
+            return True
+        model = field.related_model or model
+    return False
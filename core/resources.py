@@ -0,0 +1,20 @@
+# core/resources.py
+"""Bulk import resources of the core app (see core.imports)"""
+from import_export.fields import Field
+
+from .imports import BulkModelResource, LookupWidget
+from .models import CustomUser, EmployeeProfile
+
+
+class EmployeeProfileResource(BulkModelResource):
+    """Profiles of existing users, by the user's email; the manager by email too"""
+    email = Field(attribute='user_id', column_name='email', widget=LookupWidget(CustomUser, 'email'))
+
+    class Meta:
+        model = EmployeeProfile
+        import_id_fields = ['email']
+        fields = ['email', 'department', 'position', 'phone', 'reports_to', 'is_active']
+        widgets = {
+            'department': {'field': 'name'},
+            'reports_to': {'field': 'user__email'},
+        }
@@ -0,0 +1,121 @@
+# core/response_cache.py
+"""
+Two-tier cache for computed (analytics) action responses.
+
+``@cached_response(Model, ...)`` keys an action's response data by the
+action, its normalized query parameters, the caller's visibility scope, the
+current date and the version counters (see ``core.versioning``) of the
+models it reads. A write to any of those models bumps its counter, so the
+next request computes a fresh entry under a new key; nothing has to be
+deleted, and every process sees the change through the shared counters.
+
+Lookups try a small per-process LRU first, then the shared cache (Redis in
+production, local memory in tests and development).
+"""
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .versioning import model_versions, untracked
+
+
+class LocalLRU:
+    """Thread-safe, size-bounded, expiring in-process cache"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalLRU(getattr(settings, 'RESPONSE_CACHE_LOCAL_ENTRIES', 512))
+
+
+def normalized_params(request):
+    """Query parameters without blanks, sorted by name and value"""
+    return sorted(
+        (name, sorted(value for value in values if value != ''))
+        for name, values in request.query_params.lists()
+        if any(value != '' for value in values)
+    )
+
+
+def _response_key(view, action_name, request, scope, models):
+    token = '|'.join([
+        f'{type(view).__module__}.{type(view).__name__}.{action_name}',
+        repr(normalized_params(request)),
+        str(scope),
+        timezone.now().date().isoformat(),
+        *(f'{model._meta.label_lower}={version}' for model, version in zip(models, model_versions(models))),
+    ])
+    return 'response:' + hashlib.sha1(token.encode('utf-8')).hexdigest()
+
+
+def cached_response(*models, scope=None, timeout=None):
+    """
+    Cache a view action's 200 response data until a write to ``models``.
+
+    ``scope(view, request)`` returns what distinguishes callers who may see
+    different rows (e.g. the profile id for "my projects"); None means everyone
+    shares an entry.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            missing = untracked(models)
+            if missing:
+                raise ImproperlyConfigured(
+                    f"{func.__qualname__} caches by version of {', '.join(missing)}; call track_versions() for it"
+                )
+            expires = timeout or getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+            caller = scope(view, request) if scope is not None else None
+            key = _response_key(view, func.__name__, request, caller, models)
+
+            data = local_cache.get(key)
+            if data is None:
+                data = cache.get(key)
+                if data is not None:
+                    local_cache.set(key, data, expires)
+            if data is not None:
+                return Response(data)
+
+            response = func(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, expires)
+                local_cache.set(key, response.data, expires)
+            return response
+
+        return wrapper
+    return decorator
@@ -0,0 +1,81 @@
+# core/tasks.py
+"""Background jobs shared by every app (see jobs.runner)"""
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import HttpRequest, QueryDict
+from django.utils.module_loading import import_string
+from rest_framework.request import Request
+
+from jobs.runner import job
+
+from .export import export_columns, export_filename, export_rows, write_csv, write_xlsx
+from .imports import read_dataset
+
+
+PROGRESS_EVERY = 10000
+
+
+def _view(view, basename, kwargs, query, user, action='list', method='GET'):
+    """An instance of viewset ``view`` set up as for a request to ``action`` with ``query``"""
+    http_request = HttpRequest()
+    http_request.method = method
+    http_request.GET = QueryDict(mutable=True)
+    for name, values in query.items():
+        http_request.GET.setlist(name, values)
+
+    request = Request(http_request)
+    request.user = user
+    instance = import_string(view)(action=action, basename=basename, detail=False)
+    instance.action_map = {method.lower(): action}
+    instance.request = request
+    instance.args = ()
+    instance.kwargs = kwargs
+    instance.format_kwarg = None
+    return instance
+
+
+@job('core.export', queue='reports')
+def export(job, view, basename, kwargs, query, export_format):
+    """Write a list endpoint's rows for the job's creator to ``job.result_file``"""
+    user = job.created_by or get_user_model()()
+    instance = _view(view, basename, kwargs, query, user)
+    queryset = instance.filter_queryset(instance.get_queryset())
+    total = queryset.count()
+    columns = export_columns(instance.get_serializer(), queryset.model)
+
+    def rows():
+        for count, row in enumerate(export_rows(queryset, columns)):
+            if count and count % PROGRESS_EVERY == 0:
+                job.set_progress(count * 100 // max(total, 1), f"{count} of {total} rows")
+            yield row
+
+    with tempfile.TemporaryFile() as output:
+        if export_format == 'xlsx':
+            write_xlsx(rows(), output)
+        else:
+            for chunk in write_csv(rows()):
+                output.write(chunk)
+        output.seek(0)
+        # Stored under a random name (see jobs.models.result_path)
+        job.result_file.save(f"export.{export_format}", File(output), save=False)
+    job.save(update_fields=['result_file'])
+    return {'rows': total, 'format': export_format, 'filename': export_filename(instance, export_format)}
+
+
+@job('core.import', queue='imports')
+def import_rows(job, view, basename, kwargs, query, path, dry_run=False):
+    """Import an uploaded file through viewset ``view``'s import, as its creator (see core.imports)"""
+    def progress(done, total):
+        job.set_progress(done * 100 // max(total, 1), f"{done} of {total} rows")
+
+    try:
+        user = job.created_by or get_user_model()()
+        instance = _view(view, basename, kwargs, query, user, action='import_file', method='POST')
+        with default_storage.open(path, 'rb') as upload:
+            dataset = read_dataset(upload, path)
+        return instance.run_import(dataset, dry_run=dry_run, progress=progress)
+    finally:
+        default_storage.delete(path)
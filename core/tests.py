@@ -1,3 +1,247 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from crm.models import Customer
+from jobs.models import Job
+from projects.models import LandParcel, Project, ProjectTask, TaskCategory
+from .export import CSVRenderer, XLSXRenderer
+from .models import CustomUser, EmployeeProfile
+from .response_cache import LocalLRU, local_cache
+from .versioning import bump_version
+
+
+def make_user(email, **fields):
+    return CustomUser.objects.create_user(username=email, email=email, password='secret', **fields)
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        # Background exports store their files under MEDIA_ROOT
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = make_user('u@x.com')
+        self.client.force_authenticate(self.user)
+        Customer.objects.create(full_name='Ada', phone='1', national_id='N-1')
+        Customer.objects.create(full_name='=cmd()', phone='2')
+
+    def test_csv_is_streamed(self):
+        response = self.client.get('/api/pr-crm/customers/?format=csv&fields=full_name,phone')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'full_name,phone')
+        # Formulas are neutralised
+        self.assertIn("'=cmd(),2", lines)
+
+    def test_xlsx_is_a_workbook(self):
+        response = self.client.get('/api/pr-crm/customers/?format=xlsx')
+        workbook = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIn('xl/worksheets/sheet1.xml', workbook.namelist())
+
+    def export_async(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get('/api/pr-crm/customers/?format=csv&async=1')
+        self.assertEqual(response.status_code, 202)
+        return Job.objects.get(pk=response.data['id'])
+
+    def test_background_export_is_downloaded_by_its_owner_only(self):
+        job = self.export_async()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertNotIn('customer', job.result_file.name)
+        self.assertRegex(job.result_file.name, r'^jobs/\d{4}/\d{2}/[\w-]{32}\.csv$')
+
+        response = self.client.get(f'/api/jobs/{job.pk}/')
+        self.assertTrue(response.data['result_url'].endswith(f'/api/jobs/{job.pk}/download/'))
+        response = self.client.get(f'/api/jobs/{job.pk}/download/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment; filename="customer-', response['Content-Disposition'])
+        self.assertIn(b'Ada', b''.join(response.streaming_content))
+
+        self.client.force_authenticate(make_user('other@x.com'))
+        self.assertEqual(self.client.get(f'/api/jobs/{job.pk}/download/').status_code, 404)
+        self.client.force_authenticate(make_user('staff@x.com', is_staff=True))
+        self.assertEqual(self.client.get(f'/api/jobs/{job.pk}/download/').status_code, 404)
+
+    def test_renderers_render_serialized_data(self):
+        data = {'count': 1, 'results': [{'id': 1, 'name': 'Ada'}]}
+        self.assertEqual(CSVRenderer().render(data), b'id,name\r\n1,Ada\r\n')
+        workbook = zipfile.ZipFile(io.BytesIO(XLSXRenderer().render({'id': 1})))
+        self.assertIn(b'<v>1</v>', workbook.read('xl/worksheets/sheet1.xml'))
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = make_user('u@x.com')
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url):
+        """Ids of every page, following the next links; and the last response"""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data['next']
+        return pages, response
+
+    def test_pages_cover_tied_rows_once(self):
+        # Same registration date everywhere: the pk breaks the ties
+        customers = [Customer.objects.create(full_name=f'C{n}', phone=str(n)) for n in range(5)]
+        pages, last = self.walk('/api/pr-crm/customers/?page_size=2')
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), [customer.pk for customer in reversed(customers)])
+        self.assertNotIn('count', last.data)
+
+        previous = self.client.get(last.data['previous'])
+        self.assertEqual([row['id'] for row in previous.data['results']], pages[1])
+
+    def test_nullable_ordering_puts_nulls_last(self):
+        project = Project.objects.create(
+            name='Harbour', code='H-1', description='', start_date=date(2024, 1, 1), budget=Decimal('1'),
+        )
+        starts = [date(2024, 3, 1), None, date(2024, 1, 1), None, date(2024, 2, 1)]
+        tasks = [
+            ProjectTask.objects.create(project=project, title=str(n), start_date=start, due_date=date(2024, 6, 1))
+            for n, start in enumerate(starts)
+        ]
+        pages, last = self.walk('/api/projects/tasks/?ordering=start_date&page_size=2')
+        self.assertEqual(sum(pages, []), [tasks[2].pk, tasks[4].pk, tasks[0].pk, tasks[1].pk, tasks[3].pk])
+
+    def test_page_numbers_on_request(self):
+        for n in range(3):
+            Customer.objects.create(full_name=f'C{n}', phone=str(n))
+        response = self.client.get('/api/pr-crm/customers/?page=2&page_size=2')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+        self.assertIn('page=1', response.data['previous'])
+
+    def test_bad_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/pr-crm/customers/?cursor=nonsense').status_code, 404)
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        user = make_user('pm@x.com', first_name='Pat')
+        self.manager = EmployeeProfile.objects.create(user=user, position='Project Manager')
+        self.client.force_authenticate(user)
+        for n in range(3):
+            Project.objects.create(
+                name=f'Estate {n}', code=f'E-{n}', description='Long text', start_date=date(2024, 1, 1),
+                budget=Decimal('1'), manager=self.manager,
+            )
+
+    def test_fields_trim_the_payload_and_the_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/projects/projects/?fields=id,code')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'code'})
+        sql = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('"description"', sql)
+        self.assertEqual(len(queries), 1)
+
+    def test_expand_nests_the_related_row_in_the_same_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/projects/projects/?fields=id,manager&expand=manager')
+        rows = response.data['results']
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['manager']['id'], self.manager.pk)
+        self.assertEqual(rows[0]['manager']['position'], 'Project Manager')
+        self.assertLessEqual(len(queries), 2)
+
+    def test_unknown_expansions_are_ignored(self):
+        response = self.client.get('/api/projects/projects/?fields=id&expand=secrets')
+        self.assertEqual(set(response.data['results'][0]), {'id'})
+
+
+class VersionedCacheTests(APITestCase):
+    url = '/api/projects/task-categories/'
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(make_user('u@x.com'))
+        self.category = TaskCategory.objects.create(name='Civil')
+
+    def test_repeat_requests_are_served_from_the_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first['Cache-Control'], 'private, max-age=60')
+        with self.assertNumQueries(0):
+            again = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.data, first.data)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_writes_to_any_read_model_change_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        project = Project.objects.create(
+            name='Harbour', code='H-1', description='', start_date=date(2024, 1, 1), budget=Decimal('1'),
+        )
+        ProjectTask.objects.create(project=project, title='Dig', category=self.category, due_date=date(2024, 2, 1))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_bulk_writes_need_a_bump(self):
+        etag = self.client.get(self.url)['ETag']
+        TaskCategory.objects.update(description='Roads and drains')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        bump_version(TaskCategory)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.data['results'][0]['description'], 'Roads and drains')
+
+
+class ResponseCacheTests(APITestCase):
+    url = '/api/projects/land-parcels/statistics/'
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.client.force_authenticate(make_user('u@x.com'))
+        self.add_parcel('T-1')
+
+    def add_parcel(self, title_number):
+        return LandParcel.objects.create(
+            title_number=title_number, location='North', city='Town', state_province='State',
+            size_sq_meters=Decimal('100'), zoning='residential', acquisition_date=date(2024, 1, 1),
+            acquisition_cost=Decimal('1000'),
+        )
+
+    def test_repeat_is_served_without_queries_until_a_write(self):
+        self.assertEqual(self.client.get(self.url).data['total_parcels'], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).data['total_parcels'], 1)
+        self.add_parcel('T-2')
+        self.assertEqual(self.client.get(self.url).data['total_parcels'], 2)
+
+    def test_shared_tier_serves_other_processes(self):
+        self.client.get(self.url)
+        # As seen by a process with an empty local tier
+        local_cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).data['total_parcels'], 1)
+
+    def test_blank_and_reordered_parameters_share_an_entry(self):
+        self.client.get(self.url + '?quick_filter=available&ordering=')
+        with self.assertNumQueries(0):
+            self.client.get(self.url + '?quick_filter=available')
+
+    def test_local_tier_is_bounded(self):
+        lru = LocalLRU(2)
+        for key in 'abc':
+            lru.set(key, key.upper(), 60)
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(lru.get('c'), 'C')
+        lru.set('d', 'D', -1)
+        self.assertIsNone(lru.get('d'))
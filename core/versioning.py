@@ -0,0 +1,137 @@
+# core/versioning.py
+"""
+Per-model version counters and version-keyed response caching.
+
+``track_versions()`` (called from an app's ``ready()``) bumps a cache-held
+counter for a model whenever one of its rows is saved or deleted. A viewset
+using ``VersionedCacheMixin`` derives its ETag from the counters of every
+model its responses read plus the request itself, so a conditional request
+is answered 304 and a repeat request is served from the cache without
+querying the model tables.
+
+Counters live in the cache, not the database. Losing one (eviction, flush)
+only restarts it from the clock, which invalidates whatever was cached under
+the old value. ``QuerySet.update()`` and ``bulk_create()`` send no signals;
+call ``bump_version()`` after them.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+
+
+_tracked = set()
+
+
+def _version_key(model):
+    return f'versions:{model._meta.label_lower}'
+
+
+def _initial_version():
+    return int(time.time() * 1000)
+
+
+def model_versions(models):
+    """Current counter of each model, in order"""
+    keys = [_version_key(model) for model in models]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            cache.add(key, _initial_version(), None)
+            found[key] = cache.get(key)
+        versions.append(found[key])
+    return versions
+
+
+def bump_version(model):
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+def _row_changed(sender, raw=False, **kwargs):
+    if raw:
+        return
+    bump_version(sender)
+    # Again after commit, so a read racing the transaction cannot cache stale rows under the new version
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+def untracked(models):
+    """Labels of ``models`` whose writes do not bump a version"""
+    return [model._meta.label for model in models if model not in _tracked]
+
+
+def track_versions(*models):
+    for model in models:
+        label = model._meta.label_lower
+        post_save.connect(_row_changed, sender=model, dispatch_uid=f'versions_save_{label}')
+        post_delete.connect(_row_changed, sender=model, dispatch_uid=f'versions_delete_{label}')
+        _tracked.add(model)
+
+
+class VersionedCacheMixin:
+    """
+    Cache list and retrieve responses by model version, with ETag and Cache-Control.
+
+    ``version_models`` lists the models (besides the queryset's) whose rows the
+    serializer reads, e.g. the tasks behind a category's ``task_count``.
+    """
+    version_models = ()
+    version_cache_timeout = 60 * 60 * 24
+    version_max_age = 60
+
+    def _versioned_etag(self, request):
+        models = [self.queryset.model, *self.version_models]
+        missing = untracked(models)
+        if missing:
+            raise ImproperlyConfigured(
+                f"{type(self).__name__} caches by version of {', '.join(missing)}; call track_versions() for it"
+            )
+
+        params = sorted(request.query_params.lists())
+        token = '|'.join([
+            request.build_absolute_uri(request.path),
+            repr(params),
+            request.accepted_renderer.format,
+            *(f'{model._meta.label_lower}={version}' for model, version in zip(models, model_versions(models))),
+        ])
+        return hashlib.sha1(token.encode('utf-8')).hexdigest()
+
+    def _versioned(self, request, render):
+        etag = self._versioned_etag(request)
+        quoted = quote_etag(etag)
+
+        not_modified = get_conditional_response(request, etag=quoted)
+        if not_modified is not None:
+            not_modified['ETag'] = quoted
+            return not_modified
+
+        key = f'versioned:{etag}'
+        data = cache.get(key)
+        if data is None:
+            response = render()
+            if response.status_code != 200:
+                return response
+            cache.set(key, response.data, self.version_cache_timeout)
+        else:
+            response = Response(data)
+
+        response['ETag'] = quoted
+        patch_cache_control(response, private=True, max_age=self.version_max_age)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._versioned(request, lambda: super(VersionedCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._versioned(request, lambda: super(VersionedCacheMixin, self).retrieve(request, *args, **kwargs))
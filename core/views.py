@@ -6,6 +6,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate , get_user_model
 from .models import Department
+from .versioning import VersionedCacheMixin
 from .serializers import EmployeeProfileSerializer, DepartmentSerializer
 
 User = get_user_model()
@@ -82,7 +83,7 @@ class ProfileView(APIView):
 
 
 # Department ViewSet
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(VersionedCacheMixin, viewsets.ModelViewSet):
     """
     API for managing departments.
     - All authenticated users can view departments
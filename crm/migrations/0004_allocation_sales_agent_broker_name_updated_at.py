@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-17 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_customuser_email'),
+        ('crm', '0003_alter_lead_assigned_to_alter_lead_customer_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='allocation',
+            name='broker_name',
+            field=models.CharField(blank=True, max_length=200, null=True),
+        ),
+        migrations.AddField(
+            model_name='allocation',
+            name='sales_agent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='allocations', to='core.employeeprofile'),
+        ),
+        migrations.AddField(
+            model_name='allocation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
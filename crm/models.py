@@ -46,6 +46,10 @@ class Allocation(models.Model):
     allocation_date = models.DateField(auto_now_add=True)
     amount_paid = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     balance = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    # Who earns commission on the sale (finance/commissions.py)
+    sales_agent = models.ForeignKey(EmployeeProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='allocations')
+    broker_name = models.CharField(max_length=200, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
     documents = GenericRelation(Document)
 
     def __str__(self):
@@ -0,0 +1,13 @@
+# crm/resources.py
+"""Bulk import resources of the crm app (see core.imports)"""
+from core.imports import BulkModelResource
+
+from .models import Customer
+
+
+class CustomerResource(BulkModelResource):
+    """Customers by id (blank id: new customer)"""
+
+    class Meta:
+        model = Customer
+        fields = ['id', 'full_name', 'phone', 'email', 'national_id', 'address']
@@ -1,25 +1,33 @@
 # crm/views.py
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
+from core.export import ExportMixin
+from core.imports import ImportMixin
+from core.fieldsets import SparseFieldsetMixin
+from search.filters import IndexedSearchFilter
 from .models import Customer, Lead, SiteVisit, Allocation
+from .resources import CustomerResource
 from .serializers import CustomerSerializer, LeadSerializer, SiteVisitSerializer, AllocationSerializer
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(ImportMixin, ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Customer.objects.all().order_by('-date_registered')
     serializer_class = CustomerSerializer
     permission_classes = [IsAuthenticated]
+    import_resource_class = CustomerResource
+    filter_backends = [IndexedSearchFilter]
+    search_fields = ['full_name', 'phone', 'email', 'national_id']
 
-class LeadViewSet(viewsets.ModelViewSet):
+class LeadViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Lead.objects.all().order_by('-created_at')
     serializer_class = LeadSerializer
     permission_classes = [IsAuthenticated]
 
-class SiteVisitViewSet(viewsets.ModelViewSet):
+class SiteVisitViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = SiteVisit.objects.all().order_by('-visit_date')
     serializer_class = SiteVisitSerializer
     permission_classes = [IsAuthenticated]
 
-class AllocationViewSet(viewsets.ModelViewSet):
+class AllocationViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Allocation.objects.all().order_by('-allocation_date')
     serializer_class = AllocationSerializer
     permission_classes = [IsAuthenticated]
\ No newline at end of file
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class DocumentsConfig(AppConfig):
     name = 'documents'
+
+    def ready(self):
+        from core.versioning import track_versions
+        from .models import DocumentType
+        track_versions(DocumentType)
@@ -1,15 +1,21 @@
 # documents/views.py
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
+from core.export import ExportMixin
+from core.fieldsets import SparseFieldsetMixin
+from core.versioning import VersionedCacheMixin
+from search.filters import IndexedSearchFilter
 from .models import Document, DocumentType
 from .serializers import DocumentSerializer, DocumentTypeSerializer
 
-class DocumentViewSet(viewsets.ModelViewSet):
+class DocumentViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Document.objects.all().order_by('-uploaded_at')
     serializer_class = DocumentSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [IndexedSearchFilter]
+    search_fields = ['title', 'description', 'document_type__name']
 
-class DocumentTypeViewSet(viewsets.ModelViewSet):
+class DocumentTypeViewSet(ExportMixin, VersionedCacheMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = DocumentType.objects.all()
     serializer_class = DocumentTypeSerializer
     permission_classes = [IsAuthenticated]
\ No newline at end of file
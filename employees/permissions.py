@@ -0,0 +1,20 @@
+# employees/permissions.py
+from rest_framework import permissions
+
+
+# Positions that manage employee records
+HR_POSITIONS = ['HR Manager', 'Admin Manager', 'CEO', 'EDBO']
+
+
+class IsHRManager(permissions.BasePermission):
+    """
+    Permission check for HR managers (and the executives above them)
+    """
+    def has_permission(self, request, view):
+        user = request.user
+        if not user.is_authenticated:
+            return False
+        if user.is_staff or user.is_superuser:
+            return True
+        profile = getattr(user, 'profile', None)
+        return profile is not None and profile.position in HR_POSITIONS
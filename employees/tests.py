@@ -1,3 +1,52 @@
-from django.test import TestCase
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from core.models import CustomUser, EmployeeProfile
+from jobs.models import Job
+
+
+def make_profile(email, position):
+    user = CustomUser.objects.create_user(username=email, email=email, password='secret')
+    return EmployeeProfile.objects.create(user=user, position=position, phone='000')
+
+
+class EmployeeImportTests(APITestCase):
+    def setUp(self):
+        self.clerk = make_profile('c@x.com', 'Clerk')
+        self.hr = make_profile('hr@x.com', 'HR Manager')
+
+    def import_profiles(self, profile, url='/api/hr/employees/import/'):
+        self.client.force_authenticate(profile.user)
+        content = 'email,position,phone\nc@x.com,Clerk,555\n'
+        return self.client.post(url, {
+            'file': SimpleUploadedFile('profiles.csv', content.encode(), content_type='text/csv'),
+        }, format='multipart')
+
+    def test_only_hr_can_import_profiles(self):
+        self.assertEqual(self.import_profiles(self.clerk).status_code, 403)
+        self.clerk.refresh_from_db()
+        self.assertEqual(self.clerk.phone, '000')
+
+    def test_hr_manager_imports_profiles(self):
+        response = self.import_profiles(self.hr)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 1, response.data)
+        self.clerk.refresh_from_db()
+        self.assertEqual(self.clerk.phone, '555')
+
+    def test_background_import_stores_the_upload_under_a_random_name(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media), self.captureOnCommitCallbacks(execute=True):
+            response = self.import_profiles(self.hr, '/api/hr/employees/import/?async=1')
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(pk=response.data['id'])
+        self.assertEqual(job.status, 'succeeded', job.error)
+        self.assertNotIn('profiles', job.params['path'])
+        self.assertRegex(job.params['path'], r'^jobs/uploads/[\w-]{32}\.csv$')
+        self.clerk.refresh_from_db()
+        self.assertEqual(self.clerk.phone, '555')
@@ -6,11 +6,16 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from core.models import EmployeeProfile
 from core.serializers import EmployeeProfileSerializer
+from core.export import ExportMixin
+from core.imports import ImportMixin
+from core.resources import EmployeeProfileResource
+from core.fieldsets import SparseFieldsetMixin
 from .models import LeaveRequest
+from .permissions import IsHRManager
 from .serializers import LeaveRequestSerializer
 
 
-class EmployeeProfileViewSet(viewsets.ModelViewSet):  # Changed from ReadOnlyModelViewSet
+class EmployeeProfileViewSet(ImportMixin, ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):  # Changed from ReadOnlyModelViewSet
     """
     API for managing employee profiles.
     - HR Manager: Full CRUD access
@@ -21,6 +26,7 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):  # Changed from ReadOnlyMod
     )
     serializer_class = EmployeeProfileSerializer
     permission_classes = [IsAuthenticated]
+    import_resource_class = EmployeeProfileResource
     
     filter_backends = [
         DjangoFilterBackend,
@@ -42,8 +48,14 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):  # Changed from ReadOnlyMod
     ordering_fields = ['user__first_name', 'position', 'date_joined']
     ordering = ['user__first_name']
 
+    def get_permissions(self):
+        # Bulk changes to HR records are HR's
+        if self.action == 'import_file':
+            return [IsAuthenticated(), IsHRManager()]
+        return super().get_permissions()
 
-class LeaveRequestViewSet(viewsets.ModelViewSet):
+
+class LeaveRequestViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API for leave requests.
     - Staff: Create & view own requests
@@ -0,0 +1,148 @@
+# finance/aging.py
+"""
+Accounts-receivable aging.
+
+``receivable_aging()`` buckets each open invoice's balance (amount minus
+paid_amount) by days past due in a single conditional-aggregation query,
+grouped by customer, project or allocation. The buckets are expressed as
+due_date ranges relative to the as-of date, so the query filters and groups
+on ``(status, due_date)`` without date arithmetic in SQL.
+
+For a past as-of date, invoices issued by then are included whatever their
+current status, and payments dated after it are added back to the balance.
+``snapshot_aging()`` stores a day's result (run daily by the
+``snapshot_receivable_aging`` command); past dates are then read back from
+``ReceivableAgingSnapshot`` instead of being recomputed.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Invoice, Payment, ReceivableAgingSnapshot
+
+
+# Statuses whose balance is still receivable
+OPEN_STATUSES = ['sent', 'unpaid', 'partial', 'overdue']
+
+# Payments that count towards an invoice's paid_amount
+COUNTED_PAYMENT_STATUSES = ['pending', 'cleared']
+
+# (key, first day past due, last day past due)
+BUCKETS = [
+    ('current', None, 0),
+    ('days_1_30', 1, 30),
+    ('days_31_60', 31, 60),
+    ('days_61_90', 61, 90),
+    ('days_90_plus', 91, None),
+]
+AMOUNT_FIELDS = {key for key, _, _ in BUCKETS} | {'total'}
+
+# group_by -> (key column, label column)
+GROUPINGS = {
+    'customer': ('customer_id', 'customer__full_name'),
+    'project': ('project_id', 'project__name'),
+    'allocation': ('allocation_id', 'allocation__plot_number'),
+}
+
+MONEY = DecimalField(max_digits=15, decimal_places=2)
+ZERO = Value(Decimal('0'), output_field=MONEY)
+
+
+def _bucket_condition(as_of, first_day, last_day):
+    condition = Q()
+    if first_day is not None:
+        condition &= Q(due_date__lte=as_of - timedelta(days=first_day))
+    if last_day is not None:
+        condition &= Q(due_date__gte=as_of - timedelta(days=last_day))
+    return condition
+
+
+def _open_invoices(as_of):
+    """Invoices with a balance on ``as_of``, annotated with that ``balance``"""
+    if as_of >= timezone.now().date():
+        invoices = Invoice.objects.filter(status__in=OPEN_STATUSES).annotate(
+            balance=F('amount') - F('paid_amount')
+        )
+    else:
+        paid_later = Payment.objects.filter(
+            invoice=OuterRef('pk'),
+            status__in=COUNTED_PAYMENT_STATUSES,
+            payment_date__gt=as_of,
+        ).order_by().values('invoice').annotate(total=Sum('amount')).values('total')
+        invoices = Invoice.objects.filter(
+            status__in=OPEN_STATUSES + ['paid'],
+        ).annotate(
+            balance=F('amount') - F('paid_amount') + Coalesce(Subquery(paid_later, output_field=MONEY), ZERO)
+        )
+    return invoices.filter(issue_date__lte=as_of, balance__gt=0)
+
+
+def receivable_aging(as_of=None, group_by='customer'):
+    """
+    {'as_of', 'group_by', 'rows', 'totals'}; each row holds the group key and
+    label, one balance per bucket, the total and the invoice count.
+    """
+    as_of = as_of or timezone.now().date()
+    key_column, label_column = GROUPINGS[group_by]
+
+    aggregates = {
+        key: Coalesce(Sum('balance', filter=_bucket_condition(as_of, first_day, last_day)), ZERO)
+        for key, first_day, last_day in BUCKETS
+    }
+    aggregates['total'] = Coalesce(Sum('balance'), ZERO)
+    aggregates['invoice_count'] = Count('pk')
+
+    grouped = _open_invoices(as_of).order_by().values(key_column, label_column).annotate(**aggregates)
+
+    rows = []
+    totals = {key: Decimal('0') for key, _, _ in BUCKETS}
+    totals.update(total=Decimal('0'), invoice_count=0)
+    for group in grouped.order_by('-total'):
+        row = {
+            group_by: group[key_column],
+            'label': group[label_column] or 'Unassigned',
+        }
+        for field in totals:
+            row[field] = group[field]
+            totals[field] += group[field]
+        rows.append(row)
+
+    return {'as_of': as_of, 'group_by': group_by, 'rows': rows, 'totals': totals}
+
+
+def snapshot_aging(as_of=None):
+    """Store the aging of ``as_of`` (default today) for every grouping"""
+    as_of = as_of or timezone.now().date()
+    for group_by in GROUPINGS:
+        report = receivable_aging(as_of, group_by)
+        ReceivableAgingSnapshot.objects.update_or_create(
+            as_of=as_of, group_by=group_by,
+            defaults={'rows': report['rows'], 'totals': report['totals'], 'created_at': timezone.now()}
+        )
+
+
+def _amounts(values):
+    """Snapshot row or totals with its amounts back as Decimals"""
+    return {
+        field: Decimal(value) if field in AMOUNT_FIELDS else value
+        for field, value in values.items()
+    }
+
+
+def aging_report(as_of=None, group_by='customer'):
+    """Stored snapshot for a past date when there is one, else computed"""
+    today = timezone.now().date()
+    as_of = as_of or today
+    if as_of < today:
+        snapshot = ReceivableAgingSnapshot.objects.filter(as_of=as_of, group_by=group_by).first()
+        if snapshot is not None:
+            return {
+                'as_of': as_of, 'group_by': group_by,
+                'rows': [_amounts(row) for row in snapshot.rows],
+                'totals': _amounts(snapshot.totals),
+                'snapshot_taken_at': snapshot.created_at,
+            }
+    return receivable_aging(as_of, group_by)
@@ -3,3 +3,16 @@ from django.apps import AppConfig
 
 class FinanceConfig(AppConfig):
     name = 'finance'
+
+    def ready(self):
+        from core.versioning import track_versions
+        from . import numbering  # noqa: F401
+        from .models import (
+            Invoice, Expense, Payment, PurchaseOrder, BankAccount, PettyCashAccount,
+            ReceivableAgingSnapshot
+        )
+        # Cached dashboard and summary actions (see core.response_cache)
+        track_versions(
+            Invoice, Expense, Payment, PurchaseOrder, BankAccount, PettyCashAccount,
+            ReceivableAgingSnapshot
+        )
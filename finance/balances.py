@@ -0,0 +1,168 @@
+# finance/balances.py
+"""
+End-of-day balance series for bank accounts.
+
+The live series is one SQL statement over the account's transactions: each
+row's signed change is its ``balance_after`` minus the previous row's (in
+posting order, so transfers need no direction rule), the changes are summed
+per ``transaction_date``, and a running SUM() window over the days gives the
+balance at the end of each day, back-dated entries included. Only the days
+of the requested range (plus the last one before it, to carry forward) are
+returned, and they are resampled to day, week or month points in Python.
+
+Closed financial periods cannot change any more, so their daily points are
+stored in ``BankBalancePoint`` when the period is closed; a range that falls
+within stored periods is read from that table instead of being recomputed.
+"""
+from bisect import bisect_right
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Max, Q, Subquery
+
+from .models import BankAccount, BankBalancePoint, BankTransaction, FinancialPeriod
+
+
+RESOLUTIONS = ['day', 'week', 'month']
+
+CENT = Decimal('0.01')
+
+_RUNNING_CHANGE_SQL = '''
+    WITH deltas AS (
+        SELECT transaction_date AS day,
+               balance_after - COALESCE(LAG(balance_after) OVER (ORDER BY id), %s) AS delta
+        FROM {table}
+        WHERE account_id = %s
+    ),
+    daily AS (
+        SELECT day, SUM(delta) AS net FROM deltas GROUP BY day
+    ),
+    running AS (
+        SELECT day, SUM(net) OVER (ORDER BY day) AS change FROM daily
+    )
+    SELECT day, change FROM running
+    WHERE day <= %s
+      AND day >= COALESCE((SELECT MAX(day) FROM running WHERE day <= %s), %s)
+    ORDER BY day
+'''
+
+
+def _as_date(value):
+    # SQLite returns dates from raw SQL as text
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def _as_money(value):
+    return Decimal(str(value)).quantize(CENT)
+
+
+def daily_balances(account, start, end):
+    """
+    [(day, balance)] at the end of each day with transactions in [start, end],
+    preceded by the last such day before ``start`` when there is one
+    """
+    opening = account.opening_balance
+    sql = _RUNNING_CHANGE_SQL.format(table=connection.ops.quote_name(BankTransaction._meta.db_table))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [opening, account.pk, end, start, start])
+        rows = cursor.fetchall()
+    return [(_as_date(day), opening + _as_money(change)) for day, change in rows]
+
+
+def stored_range(account):
+    """
+    (first, last) day covered by stored points: the run of closed periods,
+    oldest first, whose points are stored for ``account`` (None if none)
+    """
+    stored = set(
+        BankBalancePoint.objects.filter(account=account).values_list('period_id', flat=True).distinct()
+    )
+    if not stored:
+        return None
+
+    covered = None
+    for pk, start_date, end_date, is_closed in FinancialPeriod.objects.order_by('start_date').values_list(
+        'pk', 'start_date', 'end_date', 'is_closed'
+    ):
+        if not is_closed or pk not in stored:
+            break
+        covered = (covered[0] if covered else start_date, end_date)
+    return covered
+
+
+def _stored_balances(account, start, end):
+    carried = BankBalancePoint.objects.filter(
+        account=account, day__lte=start
+    ).order_by().values('account').annotate(last=Max('day')).values('last')
+    points = BankBalancePoint.objects.filter(
+        Q(day__gt=start, day__lte=end) | Q(day=Subquery(carried)),
+        account=account,
+    ).order_by('day').values_list('day', 'balance')
+    return list(points)
+
+
+def _period_ends(start, end, resolution):
+    """Last day of each day, week (Monday-Sunday) or month in [start, end], clipped to end"""
+    current = start
+    while current <= end:
+        if resolution == 'day':
+            last = current
+        elif resolution == 'week':
+            last = current + timedelta(days=6 - current.weekday())
+        else:
+            last = (current.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        last = min(last, end)
+        yield last
+        current = last + timedelta(days=1)
+
+
+def resample(points, start, end, resolution, opening):
+    """End-of-period balances from sparse daily ``points``, carrying the last one forward"""
+    days = [day for day, _ in points]
+    series = []
+    for last in _period_ends(start, end, resolution):
+        index = bisect_right(days, last)
+        series.append({'date': last, 'balance': points[index - 1][1] if index else opening})
+    return series
+
+
+def balance_series(account, start, end, resolution='day'):
+    """End-of-period balances of ``account`` between ``start`` and ``end`` inclusive"""
+    covered = stored_range(account)
+    if covered is not None and not covered[0] <= start <= covered[1]:
+        covered = None
+
+    points = {}
+    if covered is not None:
+        points.update(_stored_balances(account, start, min(end, covered[1])))
+    if covered is None or end > covered[1]:
+        live_start = start if covered is None else covered[1] + timedelta(days=1)
+        points.update(daily_balances(account, live_start, end))
+
+    return resample(sorted(points.items()), start, end, resolution, account.opening_balance)
+
+
+def store_period_balances(period):
+    """Store the daily points of every bank account for a closed ``period``"""
+    day_before = period.start_date - timedelta(days=1)
+    points = []
+    for account in BankAccount.objects.all():
+        daily = daily_balances(account, period.start_date, period.end_date)
+        carried_in = daily[0][1] if daily and daily[0][0] < period.start_date else account.opening_balance
+        closing = daily[-1][1] if daily else carried_in
+
+        # The day before and the last day let ranges starting or ending
+        # anywhere in the period carry forward from stored points alone
+        account_points = {day_before: carried_in, period.end_date: closing}
+        account_points.update((day, balance) for day, balance in daily if day >= period.start_date)
+        points.extend(
+            BankBalancePoint(account=account, period=period, day=day, balance=balance)
+            for day, balance in account_points.items()
+        )
+
+    with transaction.atomic():
+        BankBalancePoint.objects.filter(period=period).delete()
+        # The day before may already be stored as the previous period's last day
+        BankBalancePoint.objects.bulk_create(points, batch_size=1000, ignore_conflicts=True)
+    return len(points)
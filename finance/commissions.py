@@ -0,0 +1,257 @@
+# finance/commissions.py
+"""
+Commission calculation runs.
+
+``calculate_commissions(start, end)`` computes the commissions earned on the
+allocations made in [start, end) (a sales period) and writes them as
+``Commission`` rows:
+- the base of an allocation is the cleared payments on its invoices;
+- every active structure applies: 'sales' ones to the allocation's
+  ``sales_agent``, 'brokers' ones to its ``broker_name`` (there is no
+  channel-partner link on allocations, so those structures are skipped);
+- percentage: base x rate %; fixed: ``fixed_amount`` (or ``rate``) once the
+  allocation has a base; tiered: marginal brackets over each earner's
+  cumulative base in the period, allocations taken in date order.
+
+Each tier table is turned once into bracket starts and the commission due at
+each start, so an amount is priced with one bisect and the run stays linear
+in the number of allocations.
+
+A run only recomputes the earners with an allocation or payment changed since
+the previous run of the same period (all of them on the first run, with
+``full=True``, or after a structure changed). Rows are matched on
+(allocation, structure, earner): missing ones are bulk-created, pending ones
+bulk-updated, and pending ones that no longer apply (the earner changed) are
+cancelled. Approved, paid and cancelled rows are never changed.
+"""
+from bisect import bisect_right
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from audit.capture import record_bulk
+from crm.models import Allocation
+
+from .models import Commission, CommissionRun, CommissionStructure, Payment
+
+
+CENT = Decimal('0.01')
+
+ZERO = Decimal('0')
+
+# Structure audience -> how an allocation names its earner
+EARNERS = {
+    'sales': 'sales_agent_id',
+    'brokers': 'broker_name',
+}
+
+
+class TierTable:
+    """Marginal brackets of a tiered structure, priced by bisect"""
+
+    def __init__(self, tiers, default_rate=ZERO):
+        brackets = sorted(
+            (Decimal(str(tier['from'])), Decimal(str(tier['rate'])))
+            for tier in tiers
+        )
+        if not brackets or brackets[0][0] > 0:
+            brackets.insert(0, (ZERO, ZERO if brackets else Decimal(default_rate)))
+
+        self.starts = [start for start, _ in brackets]
+        self.rates = [rate for _, rate in brackets]
+        # Commission due on an amount equal to each bracket start
+        self.due = [ZERO]
+        for i in range(1, len(brackets)):
+            width = self.starts[i] - self.starts[i - 1]
+            self.due.append(self.due[-1] + width * self.rates[i - 1] / 100)
+
+    def total(self, amount):
+        """Commission due on a cumulative ``amount``"""
+        i = bisect_right(self.starts, amount) - 1
+        if i < 0:
+            return ZERO
+        return self.due[i] + (amount - self.starts[i]) * self.rates[i] / 100
+
+
+def validate_tiers(tiers):
+    """Error message for a malformed tier list, or None"""
+    if not isinstance(tiers, list):
+        return 'Tiers must be a list of {"from": amount, "rate": percent}'
+    starts = set()
+    for tier in tiers:
+        try:
+            start, rate = Decimal(str(tier['from'])), Decimal(str(tier['rate']))
+        except (KeyError, TypeError, ArithmeticError):
+            return 'Tiers must be a list of {"from": amount, "rate": percent}'
+        if start < 0 or rate < 0 or not start.is_finite() or not rate.is_finite():
+            return 'Tier amounts and rates cannot be negative'
+        if start in starts:
+            return f'Two tiers start at {start}'
+        starts.add(start)
+    return None
+
+
+def commission_amount(structure, base, cumulative=ZERO, table=None):
+    """Commission of ``structure`` on ``base``, after ``cumulative`` earlier base (tiered only)"""
+    if base <= 0:
+        return ZERO
+    if structure.commission_type == 'fixed':
+        amount = structure.fixed_amount or structure.rate
+    elif structure.commission_type == 'tiered':
+        table = table or TierTable(structure.tiers, structure.rate)
+        amount = table.total(cumulative + base) - table.total(cumulative)
+    else:
+        amount = base * structure.rate / 100
+    return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+# ==================== RUNS ====================
+
+def _collected():
+    paid = Payment.objects.filter(
+        invoice__allocation=OuterRef('pk'), status='cleared'
+    ).values('invoice__allocation').annotate(total=Sum('amount')).values('total')
+    return Coalesce(
+        Subquery(paid), Value(ZERO),
+        output_field=DecimalField(max_digits=15, decimal_places=2)
+    )
+
+
+def _touched(allocations, since):
+    """(sales agent ids, broker names) with an allocation changed since ``since``"""
+    changed = allocations.filter(
+        Q(updated_at__gte=since) | Q(invoices__payments__updated_at__gte=since)
+    )
+    agents, brokers = set(), set()
+    for agent_id, broker_name in changed.values_list('sales_agent_id', 'broker_name').distinct():
+        agents.add(agent_id)
+        brokers.add(broker_name)
+    # Earners who lost one of those allocations have to be re-tiered too
+    for employee_id, broker_name in Commission.objects.filter(
+        allocation__in=changed.values('pk')
+    ).values_list('employee_id', 'broker_name').distinct():
+        agents.add(employee_id)
+        brokers.add(broker_name)
+    agents.discard(None)
+    brokers.discard(None)
+    return agents, brokers
+
+
+def calculate_commissions(start=None, end=None, full=False):
+    """
+    Bring the Commission rows of allocations made in [start, end) (default:
+    this month) up to date. Returns the CommissionRun with its counts.
+    """
+    today = timezone.now().date()
+    start = start or today.replace(day=1)
+    end = end or (start + timedelta(days=32)).replace(day=1)
+
+    structures = list(CommissionStructure.objects.filter(is_active=True, applicable_to__in=EARNERS))
+    previous = CommissionRun.objects.filter(
+        period_start=start, period_end=end, finished_at__isnull=False
+    ).order_by('-started_at').first()
+    if previous is None or any(structure.updated_at >= previous.started_at for structure in structures):
+        full = True
+
+    run = CommissionRun.objects.create(period_start=start, period_end=end, full=full)
+
+    allocations = Allocation.objects.filter(allocation_date__gte=start, allocation_date__lt=end)
+    if not full:
+        agents, brokers = _touched(allocations, previous.started_at)
+        allocations = allocations.filter(Q(sales_agent_id__in=agents) | Q(broker_name__in=brokers))
+
+    def in_scope(structure, earner):
+        # A partial run re-tiers only the touched earners; others keep their rows
+        if full:
+            return True
+        return earner in (agents if structure.applicable_to == 'sales' else brokers)
+
+    rows = list(allocations.annotate(base=_collected()).order_by('allocation_date', 'pk').values_list(
+        'pk', 'sales_agent_id', 'broker_name', 'base'
+    ))
+    existing = {}
+    for commission in Commission.objects.filter(allocation__in=allocations.values('pk')):
+        key = (commission.allocation_id, commission.structure_id, commission.employee_id, commission.broker_name or None)
+        existing[key] = commission
+
+    tables = {
+        structure.pk: TierTable(structure.tiers, structure.rate)
+        for structure in structures if structure.commission_type == 'tiered'
+    }
+    cumulative = {}
+    to_create, to_update, seen = [], [], set()
+
+    for allocation_id, agent_id, broker_name, base in rows:
+        earners = {'sales_agent_id': agent_id, 'broker_name': broker_name or None}
+        for structure in structures:
+            earner = earners[EARNERS[structure.applicable_to]]
+            if earner is None or not in_scope(structure, earner):
+                continue
+            employee_id, broker = (earner, None) if structure.applicable_to == 'sales' else (None, earner)
+            key = (allocation_id, structure.pk, employee_id, broker)
+            seen.add(key)
+
+            running = cumulative.get((structure.pk, earner), ZERO)
+            amount = commission_amount(structure, base, running, tables.get(structure.pk))
+            cumulative[(structure.pk, earner)] = running + base
+
+            commission = existing.get(key)
+            if commission is None:
+                if amount > 0:
+                    to_create.append(Commission(
+                        allocation_id=allocation_id,
+                        structure=structure,
+                        employee_id=employee_id,
+                        broker_name=broker,
+                        base_amount=base,
+                        commission_amount=amount,
+                    ))
+            elif commission.status == 'pending' and (
+                commission.base_amount != base or commission.commission_amount != amount
+            ):
+                commission.base_amount = base
+                commission.commission_amount = amount
+                to_update.append(commission)
+
+    structures_by_id = {structure.pk: structure for structure in structures}
+    to_cancel = [
+        commission for key, commission in existing.items()
+        if key not in seen and commission.status == 'pending'
+        and commission.structure_id in structures_by_id
+        and in_scope(structures_by_id[commission.structure_id], commission.employee_id or commission.broker_name)
+    ]
+    for commission in to_cancel:
+        commission.status = 'cancelled'
+
+    with transaction.atomic():
+        Commission.objects.bulk_create(to_create, batch_size=1000)
+        Commission.objects.bulk_update(to_update, ['base_amount', 'commission_amount'], batch_size=1000)
+        Commission.objects.bulk_update(to_cancel, ['status'], batch_size=1000)
+        record_bulk(to_create, created=True)
+        record_bulk(to_update + to_cancel, created=False)
+
+    run.allocations = len(rows)
+    run.created = len(to_create)
+    run.updated = len(to_update)
+    run.cancelled = len(to_cancel)
+    run.finished_at = timezone.now()
+    run.save(update_fields=['allocations', 'created', 'updated', 'cancelled', 'finished_at'])
+    return run
+
+
+def run_report(run):
+    """API summary of a CommissionRun (period end inclusive)"""
+    return {
+        'run': run.pk,
+        'period_start': run.period_start,
+        'period_end': run.period_end - timedelta(days=1),
+        'full': run.full,
+        'allocations': run.allocations,
+        'created': run.created,
+        'updated': run.updated,
+        'cancelled': run.cancelled,
+    }
@@ -0,0 +1,156 @@
+# finance/dashboard.py
+"""
+Finance manager's landing page in one call.
+
+Each section is one query: filtered aggregates over Invoice, Payment, Expense
+and PurchaseOrder, plus the active bank and petty-cash accounts. Period
+filters are plain ``date >= start AND date < end`` ranges so they can use the
+date indexes (``__month``/``__year`` lookups cannot). For a closed financial
+period the expense breakdown is read from its frozen totals (periods.py).
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .aging import OPEN_STATUSES
+from .models import (
+    BankAccount, Expense, FinancialPeriod, Invoice, Payment, PeriodTotal, PettyCashAccount, PurchaseOrder
+)
+
+
+MONEY = DecimalField(max_digits=15, decimal_places=2)
+ZERO = Value(Decimal('0'), output_field=MONEY)
+
+# Invoices that count as billed
+BILLED_EXCLUDED_STATUSES = ['draft', 'pending_approval', 'cancelled', 'void']
+
+# Purchase orders the company is committed to but has not fully received
+COMMITTED_PO_STATUSES = ['approved', 'sent', 'partial']
+
+
+def _sum(expression, condition=None):
+    return Coalesce(Sum(expression, filter=condition, output_field=MONEY), ZERO)
+
+
+def month_range(day):
+    """First day of ``day``'s month and first day of the next month"""
+    start = day.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def receivables(start, end, today):
+    return Invoice.objects.aggregate(
+        outstanding=_sum(F('amount') - F('paid_amount'), Q(status__in=OPEN_STATUSES)),
+        open_count=Count('pk', filter=Q(status__in=OPEN_STATUSES)),
+        overdue=_sum(F('amount') - F('paid_amount'), Q(status__in=OPEN_STATUSES, due_date__lt=today)),
+        overdue_count=Count('pk', filter=Q(status__in=OPEN_STATUSES, due_date__lt=today)),
+        invoiced=_sum('amount', Q(issue_date__gte=start, issue_date__lt=end) & ~Q(status__in=BILLED_EXCLUDED_STATUSES)),
+        invoiced_count=Count('pk', filter=Q(issue_date__gte=start, issue_date__lt=end) & ~Q(status__in=BILLED_EXCLUDED_STATUSES)),
+    )
+
+
+def receipts(start, end):
+    return Payment.objects.filter(
+        payment_date__gte=start, payment_date__lt=end
+    ).aggregate(
+        collected=_sum('amount', Q(status='cleared')),
+        collected_count=Count('pk', filter=Q(status='cleared')),
+        pending=_sum('amount', Q(status='pending')),
+        bounced=_sum('amount', Q(status='bounced')),
+    )
+
+
+def expense_totals(start, end):
+    in_period = Q(expense_date__gte=start, expense_date__lt=end, status__in=['approved', 'paid'])
+    return Expense.objects.aggregate(
+        payable=_sum('total_amount', Q(status='approved')),
+        payable_count=Count('pk', filter=Q(status='approved')),
+        pending_approval=_sum('total_amount', Q(status='pending')),
+        pending_approval_count=Count('pk', filter=Q(status='pending')),
+        spent=_sum('total_amount', in_period),
+    )
+
+
+def expenses_by_category(start, end):
+    labels = dict(Expense.EXPENSE_CATEGORY_CHOICES)
+    rows = Expense.objects.filter(
+        expense_date__gte=start, expense_date__lt=end, status__in=['approved', 'paid']
+    ).order_by().values('category').annotate(
+        total=Sum('total_amount'), count=Count('pk')
+    ).order_by('-total')
+    return [
+        {**row, 'category_display': labels.get(row['category'], row['category'])}
+        for row in rows
+    ]
+
+
+def frozen_expenses_by_category(period):
+    """expenses_by_category() of a closed period, from its stored totals"""
+    rows = PeriodTotal.objects.filter(
+        period=period, dimension='expense_category', metric='spent'
+    ).order_by('-amount')
+    return [
+        {'category': row.key, 'category_display': row.label, 'total': row.amount, 'count': row.count}
+        for row in rows
+    ]
+
+
+def committed_purchases():
+    return PurchaseOrder.objects.filter(status__in=COMMITTED_PO_STATUSES).aggregate(
+        committed=_sum('total_amount'), count=Count('pk')
+    )
+
+
+def finance_dashboard(start=None, end=None):
+    """
+    Dashboard for the period [start, end), by default the current month;
+    ``summary`` has the FinancialDashboardSerializer fields.
+    """
+    today = timezone.now().date()
+    if start is None or end is None:
+        start, end = month_range(today)
+
+    invoices = receivables(start, end, today)
+    payments = receipts(start, end)
+    expenses = expense_totals(start, end)
+    purchases = committed_purchases()
+    banks = list(BankAccount.objects.filter(is_active=True).values(
+        'id', 'account_name', 'bank_name', 'currency', 'current_balance'
+    ).order_by('-is_primary', 'bank_name'))
+    # A closed period's breakdown was frozen when it was closed
+    closed = FinancialPeriod.objects.filter(
+        is_closed=True, start_date=start, end_date=end - timedelta(days=1)
+    ).first()
+    categories = frozen_expenses_by_category(closed) if closed else expenses_by_category(start, end)
+    petty_cash = list(PettyCashAccount.objects.filter(is_active=True).values(
+        'id', 'name', 'current_balance', 'maximum_limit'
+    ).order_by('name'))
+
+    cash_balance = sum((account['current_balance'] for account in banks), Decimal('0')) + \
+        sum((account['current_balance'] for account in petty_cash), Decimal('0'))
+
+    return {
+        'summary': {
+            'total_revenue': payments['collected'],
+            'total_expenses': expenses['spent'],
+            'net_profit': payments['collected'] - expenses['spent'],
+            'outstanding_receivables': invoices['outstanding'],
+            'outstanding_payables': expenses['payable'],
+            'cash_balance': cash_balance,
+            'period_start': start,
+            'period_end': end - timedelta(days=1),
+        },
+        'receivables': invoices,
+        'receipts': payments,
+        'payables': {**expenses, 'purchase_orders_committed': purchases['committed'], 'purchase_orders_open': purchases['count']},
+        'expense_by_category': categories,
+        'bank_accounts': banks,
+        'petty_cash': [
+            {**account, 'below_half_limit': account['current_balance'] < account['maximum_limit'] / 2}
+            for account in petty_cash
+        ],
+    }
@@ -0,0 +1,168 @@
+# finance/depreciation.py
+"""
+Monthly depreciation runs for fixed assets.
+
+``run_depreciation(period_end)`` brings every active asset's schedule up to
+the month ending ``period_end``: assets are read in chunks as plain value
+rows together with their last stored month (two correlated subqueries on
+the ``(asset, period_end)`` key), the missing months are computed in one
+pass, and each chunk is written with one ``bulk_create`` of
+``DepreciationEntry`` rows and one ``bulk_update`` of the assets'
+``accumulated_depreciation``/``current_value``. Re-running a month is a
+no-op, and an asset added late is caught up from its purchase month.
+
+Methods:
+- straight_line: (price - salvage) / months of useful life, every month;
+- declining_balance: double-declining, 2 / life years of the book value per
+  year, spread over the months, switching to straight-line over the
+  remaining life once that charges more.
+Neither goes below the salvage value; depreciation starts in the purchase
+month, the last month of useful life takes the book value down to salvage,
+and entries stop once the asset is fully depreciated or its life is over.
+"""
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from audit.capture import record_update
+
+from .models import Asset, DepreciationEntry
+
+
+CHUNK_SIZE = 2000
+
+CENT = Decimal('0.01')
+
+
+def month_end(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
+def _next_month_end(period_end):
+    return month_end(period_end + timedelta(days=1))
+
+
+def _months_between(start, end):
+    return (end.year - start.year) * 12 + end.month - start.month
+
+
+def _monthly_charge(method, book_value, depreciable, salvage, life_months, remaining_months):
+    """Charge for a month with ``remaining_months`` of useful life left (this one included)"""
+    left = max(book_value - salvage, Decimal('0'))
+    if remaining_months <= 1:
+        return left
+    if method == 'declining_balance':
+        # Double-declining until straight-line over the rest of the life is larger
+        charge = max(book_value * 2 / life_months, left / remaining_months)
+    else:
+        charge = depreciable / life_months
+    charge = charge.quantize(CENT, rounding=ROUND_HALF_UP)
+    # Never below salvage
+    return min(charge, left)
+
+
+def schedule(asset, start_end, period_end, accumulated):
+    """
+    Entries for ``asset`` (a value row) for each month end from ``start_end``
+    through ``period_end``, continuing from ``accumulated`` depreciation
+    """
+    price = asset['purchase_price']
+    salvage = asset['salvage_value']
+    life_months = max(asset['useful_life_years'], 1) * 12
+    method = asset['depreciation_method']
+    depreciable = price - salvage
+
+    first_end = month_end(asset['purchase_date'])
+
+    entries = []
+    current = start_end
+    while current <= period_end:
+        opening = price - accumulated
+        remaining_months = life_months - _months_between(first_end, current)
+        if opening <= salvage or remaining_months <= 0:
+            # Fully depreciated, or past its useful life; no more entries
+            break
+        charge = _monthly_charge(method, opening, depreciable, salvage, life_months, remaining_months)
+        accumulated += charge
+        entries.append(DepreciationEntry(
+            asset_id=asset['pk'],
+            period_end=current,
+            method=method,
+            opening_value=opening,
+            depreciation=charge,
+            closing_value=opening - charge,
+            accumulated_depreciation=accumulated,
+        ))
+        current = _next_month_end(current)
+    return entries
+
+
+def run_depreciation(period_end=None, assets=None, chunk_size=CHUNK_SIZE):
+    """
+    Depreciate ``assets`` (default: every active asset) through the month
+    containing ``period_end`` (default: this month). Returns counts.
+    """
+    period_end = month_end(period_end or timezone.now().date())
+    assets = (assets if assets is not None else Asset.objects.all()).filter(
+        is_active=True, purchase_date__lte=period_end
+    )
+
+    latest = DepreciationEntry.objects.filter(asset=OuterRef('pk')).order_by('-period_end')
+    rows = assets.annotate(
+        last_period_end=Subquery(latest.values('period_end')[:1]),
+        last_accumulated=Subquery(latest.values('accumulated_depreciation')[:1]),
+    ).order_by('pk').values(
+        'pk', 'purchase_date', 'purchase_price', 'salvage_value', 'useful_life_years',
+        'depreciation_method', 'accumulated_depreciation', 'current_value',
+        'last_period_end', 'last_accumulated'
+    )
+
+    report = {'period_end': period_end, 'assets': 0, 'entries': 0, 'depreciation': Decimal('0')}
+    chunk = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            _write(chunk, period_end, report)
+            chunk = []
+    if chunk:
+        _write(chunk, period_end, report)
+    return report
+
+
+def _write(rows, period_end, report):
+    entries = []
+    changed, updated = [], []
+    for row in rows:
+        if row['last_period_end'] is not None and row['last_period_end'] >= period_end:
+            continue
+        if row['last_period_end'] is None:
+            start_end, accumulated = month_end(row['purchase_date']), Decimal('0')
+        else:
+            start_end, accumulated = _next_month_end(row['last_period_end']), row['last_accumulated']
+
+        asset_entries = schedule(row, start_end, period_end, accumulated)
+        if not asset_entries:
+            continue
+        entries.extend(asset_entries)
+        last = asset_entries[-1]
+        changed.append(row)
+        updated.append(Asset(
+            pk=row['pk'],
+            accumulated_depreciation=last.accumulated_depreciation,
+            current_value=last.closing_value,
+        ))
+        report['depreciation'] += sum((entry.depreciation for entry in asset_entries), Decimal('0'))
+
+    with transaction.atomic():
+        DepreciationEntry.objects.bulk_create(entries, batch_size=1000)
+        Asset.objects.bulk_update(updated, ['accumulated_depreciation', 'current_value'], batch_size=1000)
+        for row, asset in zip(changed, updated):
+            record_update(Asset, asset.pk, {
+                'accumulated_depreciation': (row['accumulated_depreciation'], asset.accumulated_depreciation),
+                'current_value': (row['current_value'], asset.current_value),
+            })
+    report['assets'] += len(updated)
+    report['entries'] += len(entries)
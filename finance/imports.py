@@ -0,0 +1,288 @@
+# finance/imports.py
+"""
+Bulk payment import from CSV (bank statement exports, PDC batches).
+
+Rows are streamed from the file and handled in chunks. Each chunk is
+validated with one lookup query per referenced table, then written in one
+transaction:
+- the Payments are bulk-inserted;
+- invoice ``paid_amount`` and status are moved with set-based UPDATEs
+  (the rows are locked and read first so the audit trail gets the change);
+- cleared payments are posted to their bank accounts in one batch per
+  account (see posting.py).
+Invalid rows are skipped and reported with their line number; they do not
+stop the rest of the chunk.
+
+Columns (header names, any order): customer, invoice or invoice_number,
+amount, payment_date, payment_method, status, receipt_number,
+reference_number, bank_name, cheque_date, deposited_to_account, notes.
+``customer`` defaults to the invoice's customer; a missing
+``receipt_number`` is allocated from the payment series.
+"""
+import codecs
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Case, When, Value, F, DecimalField
+from django.utils.dateparse import parse_date
+
+from audit.capture import record_bulk, record_update
+from core.versioning import bump_version
+from crm.models import Customer
+
+from .models import Payment, Invoice, BankAccount
+from .numbering import next_numbers
+from .periods import closed_period_name, closed_ranges
+from .posting import post_bank_entries
+
+
+CHUNK_SIZE = 1000
+
+# Keep the report bounded on a badly formatted file
+MAX_REPORTED_ERRORS = 1000
+
+PAYMENT_METHODS = {choice for choice, _ in Payment.PAYMENT_METHOD_CHOICES}
+PAYMENT_STATUSES = {choice for choice, _ in Payment.STATUS_CHOICES}
+
+
+def read_csv(binary_file):
+    """Stream dict rows from an uploaded or opened binary CSV file"""
+    lines = codecs.iterdecode(binary_file, 'utf-8-sig')
+    for row in csv.DictReader(lines):
+        yield {
+            (key or '').strip().lower(): (value or '').strip()
+            for key, value in row.items()
+        }
+
+
+def _chunks(rows, size):
+    chunk = []
+    # Line 1 is the header
+    for line, row in enumerate(rows, start=2):
+        chunk.append((line, row))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _date(value):
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
+
+def _int(value):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return False
+
+
+class PaymentImport:
+    def __init__(self, received_by=None, deposited_to_account=None, chunk_size=CHUNK_SIZE, dry_run=False, progress=None):
+        self.received_by = received_by
+        self.default_account_id = getattr(deposited_to_account, 'pk', deposited_to_account)
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        # Called with the report after each chunk (background jobs)
+        self.progress = progress
+        self.seen_receipts = set()
+        self.closed_periods = closed_ranges()
+        self.report = {'total': 0, 'imported': 0, 'failed': 0, 'errors': []}
+
+    def run(self, rows):
+        for chunk in _chunks(rows, self.chunk_size):
+            self.report['total'] += len(chunk)
+            payments = self._validate(chunk)
+            if payments and not self.dry_run:
+                self._write(payments)
+            self.report['imported'] += len(payments)
+            if self.progress is not None:
+                self.progress(self.report)
+
+        if self.report['imported'] and not self.dry_run:
+            # Set-based writes send no signals
+            bump_version(Invoice)
+            bump_version(Payment)
+        return self.report
+
+    def _error(self, line, errors):
+        self.report['failed'] += 1
+        if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+            self.report['errors'].append({'row': line, 'errors': errors})
+
+    # ==================== VALIDATION ====================
+
+    def _lookups(self, chunk):
+        invoice_ids, invoice_numbers, customer_ids, account_ids, receipts = set(), set(), set(), set(), set()
+        for line, row in chunk:
+            if _int(row.get('invoice')):
+                invoice_ids.add(_int(row['invoice']))
+            if row.get('invoice_number'):
+                invoice_numbers.add(row['invoice_number'])
+            if _int(row.get('customer')):
+                customer_ids.add(_int(row['customer']))
+            if _int(row.get('deposited_to_account')):
+                account_ids.add(_int(row['deposited_to_account']))
+            if row.get('receipt_number'):
+                receipts.add(row['receipt_number'])
+        if self.default_account_id:
+            account_ids.add(self.default_account_id)
+
+        invoices = Invoice.objects.filter(pk__in=invoice_ids) | Invoice.objects.filter(invoice_number__in=invoice_numbers)
+        invoice_rows = list(invoices.values_list('pk', 'invoice_number', 'customer_id'))
+        return {
+            'invoices_by_id': {pk: customer_id for pk, _, customer_id in invoice_rows},
+            'invoices_by_number': {number: (pk, customer_id) for pk, number, customer_id in invoice_rows},
+            'customers': set(Customer.objects.filter(pk__in=customer_ids).values_list('pk', flat=True)),
+            'accounts': set(BankAccount.objects.filter(pk__in=account_ids, is_active=True).values_list('pk', flat=True)),
+            'existing_receipts': set(Payment.objects.filter(receipt_number__in=receipts).values_list('receipt_number', flat=True)),
+        }
+
+    def _validate(self, chunk):
+        known = self._lookups(chunk)
+        payments = []
+        for line, row in chunk:
+            errors = {}
+
+            invoice_id = customer_id = None
+            if row.get('invoice'):
+                invoice_id = _int(row['invoice'])
+                if invoice_id not in known['invoices_by_id']:
+                    errors['invoice'] = 'Unknown invoice'
+                else:
+                    customer_id = known['invoices_by_id'][invoice_id]
+            elif row.get('invoice_number'):
+                if row['invoice_number'] not in known['invoices_by_number']:
+                    errors['invoice_number'] = 'Unknown invoice number'
+                else:
+                    invoice_id, customer_id = known['invoices_by_number'][row['invoice_number']]
+
+            if row.get('customer'):
+                customer_id = _int(row['customer'])
+                if customer_id not in known['customers']:
+                    errors['customer'] = 'Unknown customer'
+            elif customer_id is None:
+                errors['customer'] = 'Required when no invoice is given'
+
+            try:
+                amount = Decimal(row.get('amount', '').replace(',', ''))
+                if amount <= 0:
+                    errors['amount'] = 'Must be greater than zero'
+            except InvalidOperation:
+                errors['amount'] = 'Not a number'
+
+            payment_date = _date(row.get('payment_date'))
+            if payment_date is None:
+                errors['payment_date'] = 'Required, as YYYY-MM-DD'
+            elif closed_period_name(payment_date, self.closed_periods):
+                errors['payment_date'] = 'Falls in a closed financial period'
+
+            cheque_date = None
+            if row.get('cheque_date'):
+                cheque_date = _date(row['cheque_date'])
+                if cheque_date is None:
+                    errors['cheque_date'] = 'Use YYYY-MM-DD'
+
+            payment_method = row.get('payment_method') or 'bank_transfer'
+            if payment_method not in PAYMENT_METHODS:
+                errors['payment_method'] = f'One of {", ".join(sorted(PAYMENT_METHODS))}'
+
+            payment_status = row.get('status') or 'cleared'
+            if payment_status not in PAYMENT_STATUSES:
+                errors['status'] = f'One of {", ".join(sorted(PAYMENT_STATUSES))}'
+
+            account_id = self.default_account_id
+            if row.get('deposited_to_account'):
+                account_id = _int(row['deposited_to_account'])
+            if account_id is not None and account_id not in known['accounts']:
+                errors['deposited_to_account'] = 'Unknown or inactive bank account'
+
+            receipt_number = row.get('receipt_number')
+            if receipt_number:
+                if receipt_number in known['existing_receipts'] or receipt_number in self.seen_receipts:
+                    errors['receipt_number'] = 'Duplicate receipt number'
+
+            if errors:
+                self._error(line, errors)
+                continue
+
+            if receipt_number:
+                self.seen_receipts.add(receipt_number)
+            payments.append(Payment(
+                invoice_id=invoice_id,
+                customer_id=customer_id,
+                receipt_number=receipt_number or '',
+                amount=amount,
+                payment_date=payment_date,
+                payment_method=payment_method,
+                reference_number=row.get('reference_number') or None,
+                bank_name=row.get('bank_name') or None,
+                cheque_date=cheque_date,
+                status=payment_status,
+                received_by=self.received_by,
+                deposited_to_account_id=account_id,
+                notes=row.get('notes') or None,
+            ))
+        return payments
+
+    # ==================== WRITING ====================
+
+    def _write(self, payments):
+        unnumbered = [payment for payment in payments if not payment.receipt_number]
+        for payment, number in zip(unnumbered, next_numbers('payment', len(unnumbered))):
+            payment.receipt_number = number
+
+        with transaction.atomic():
+            payments = Payment.objects.bulk_create(payments)
+            record_bulk(payments, created=True)
+            self._settle_invoices(payments)
+            self._post_deposits(payments)
+
+    def _settle_invoices(self, payments):
+        totals = {}
+        for payment in payments:
+            if payment.invoice_id:
+                totals[payment.invoice_id] = totals.get(payment.invoice_id, Decimal('0')) + payment.amount
+        if not totals:
+            return
+
+        invoices = Invoice.objects.filter(pk__in=totals)
+        before = {
+            pk: (paid_amount, status)
+            for pk, paid_amount, status in invoices.select_for_update().values_list('pk', 'paid_amount', 'status')
+        }
+        invoices.update(paid_amount=F('paid_amount') + Case(
+            *(When(pk=pk, then=Value(total)) for pk, total in totals.items()),
+            output_field=DecimalField(max_digits=15, decimal_places=2)
+        ))
+        # Same rules as a single payment (PaymentViewSet.perform_create)
+        invoices.filter(paid_amount__gte=F('amount')).update(status='paid')
+        invoices.filter(paid_amount__gt=0, paid_amount__lt=F('amount')).update(status='partial')
+        for pk, paid_amount, status in invoices.values_list('pk', 'paid_amount', 'status'):
+            old_paid, old_status = before[pk]
+            record_update(Invoice, pk, {'paid_amount': (old_paid, paid_amount), 'status': (old_status, status)})
+
+    def _post_deposits(self, payments):
+        by_account = {}
+        for payment in payments:
+            if payment.deposited_to_account_id and payment.status == 'cleared':
+                by_account.setdefault(payment.deposited_to_account_id, []).append({
+                    'transaction_date': payment.payment_date,
+                    'transaction_type': 'deposit',
+                    'amount': payment.amount,
+                    'reference_number': payment.receipt_number,
+                    'description': f"Payment received - {payment.receipt_number}",
+                    'payment': payment,
+                })
+        for account_id, entries in by_account.items():
+            post_bank_entries(account_id, entries)
+
+
+def import_payments(binary_file, **options):
+    """Import a payments CSV; returns the report (counts and per-row errors)"""
+    return PaymentImport(**options).run(read_csv(binary_file))
@@ -0,0 +1,29 @@
+# finance/management/commands/calculate_commissions.py
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from finance.commissions import calculate_commissions
+from finance.dashboard import month_range
+
+
+class Command(BaseCommand):
+    help = "Calculate the commissions of a sales period (only earners changed since the last run)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help="YYYY-MM; default the current month")
+        parser.add_argument('--full', action='store_true', help="Recompute every earner of the period")
+
+    def handle(self, *args, **options):
+        try:
+            day = datetime.strptime(options['month'], '%Y-%m').date() if options['month'] else timezone.now().date()
+        except ValueError:
+            raise CommandError("--month must be YYYY-MM")
+
+        start, end = month_range(day)
+        run = calculate_commissions(start, end, full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{start:%Y-%m}: {run.allocations} allocations, {run.created} created, "
+            f"{run.updated} updated, {run.cancelled} cancelled{' (full)' if run.full else ''}"
+        ))
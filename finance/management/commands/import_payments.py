@@ -0,0 +1,45 @@
+# finance/management/commands/import_payments.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.imports import import_payments, CHUNK_SIZE
+from finance.models import BankAccount
+
+
+class Command(BaseCommand):
+    help = "Import payments from a CSV file (bank statement export or PDC batch)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with a header row")
+        parser.add_argument('--account', type=int, help="Bank account for rows without deposited_to_account")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Validate only")
+        parser.add_argument('--errors', help="Write the per-row error report to this JSON file")
+
+    def handle(self, *args, **options):
+        if options['account'] and not BankAccount.objects.filter(pk=options['account']).exists():
+            raise CommandError(f"Bank account {options['account']} does not exist")
+
+        try:
+            with open(options['path'], 'rb') as csv_file:
+                report = import_payments(
+                    csv_file,
+                    deposited_to_account=options['account'],
+                    chunk_size=options['chunk_size'],
+                    dry_run=options['dry_run'],
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+
+        if options['errors']:
+            with open(options['errors'], 'w') as errors_file:
+                json.dump(report['errors'], errors_file, indent=2)
+        else:
+            for error in report['errors'][:20]:
+                self.stderr.write(f"Row {error['row']}: {error['errors']}")
+
+        verb = "Validated" if options['dry_run'] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report['imported']} of {report['total']} rows ({report['failed']} failed)"
+        ))
@@ -0,0 +1,35 @@
+# finance/management/commands/reconcile_bank_accounts.py
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.models import BankAccount
+from finance.reconciliation import reconcile, DATE_WINDOW_DAYS
+
+
+class Command(BaseCommand):
+    help = "Match unlinked bank transactions to payments and expenses"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--account', type=int, action='append', help="Bank account id (repeatable); default all active")
+        parser.add_argument('--window', type=int, default=DATE_WINDOW_DAYS, help="Date window in days")
+        parser.add_argument('--propose-only', action='store_true', help="Store proposals without applying any match")
+        parser.add_argument('--full', action='store_true', help="Revisit every unmatched line, not only those with new candidates")
+
+    def handle(self, *args, **options):
+        accounts = BankAccount.objects.filter(is_active=True)
+        if options['account']:
+            accounts = BankAccount.objects.filter(pk__in=options['account'])
+            if len(accounts) != len(set(options['account'])):
+                raise CommandError("Unknown bank account id")
+
+        for account in accounts:
+            report = reconcile(
+                account,
+                window_days=options['window'],
+                auto_apply=not options['propose_only'],
+                full=options['full'],
+            )
+            self.stdout.write(
+                f"{account.account_number}: {report['matched']} matched, {report['proposed']} proposed, "
+                f"{report['unmatched']} unmatched ({report['skipped']} unchanged lines skipped)"
+            )
+        self.stdout.write(self.style.SUCCESS("Reconciliation finished"))
@@ -0,0 +1,28 @@
+# finance/management/commands/run_depreciation.py
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.depreciation import run_depreciation
+
+
+class Command(BaseCommand):
+    help = "Depreciate all active assets through a month (monthly schedule, safe to re-run)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help="YYYY-MM; default the current month")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        period_end = None
+        if options['month']:
+            try:
+                period_end = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError("--month must be YYYY-MM")
+
+        report = run_depreciation(period_end, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['period_end']}: {report['entries']} entries for {report['assets']} assets, "
+            f"{report['depreciation']} depreciated"
+        ))
@@ -0,0 +1,25 @@
+# finance/management/commands/snapshot_receivable_aging.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from finance.aging import snapshot_aging
+
+
+class Command(BaseCommand):
+    help = "Store today's receivable aging (run daily, e.g. from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', help="Date to snapshot (YYYY-MM-DD), default today")
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options['as_of']:
+            try:
+                as_of = parse_date(options['as_of'])
+            except ValueError:
+                as_of = None
+            if as_of is None:
+                raise CommandError("--as-of must be a date (YYYY-MM-DD)")
+
+        snapshot_aging(as_of)
+        self.stdout.write(self.style.SUCCESS(f"Stored receivable aging as of {as_of or 'today'}"))
@@ -0,0 +1,24 @@
+# finance/management/commands/store_balance_points.py
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.balances import store_period_balances
+from finance.models import FinancialPeriod
+
+
+class Command(BaseCommand):
+    help = "Store daily bank balance points of closed financial periods (backfill)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', type=int, action='append', help="Financial period id (repeatable); default all closed")
+
+    def handle(self, *args, **options):
+        periods = FinancialPeriod.objects.filter(is_closed=True).order_by('start_date')
+        if options['period']:
+            periods = periods.filter(pk__in=options['period'])
+            if len(periods) != len(set(options['period'])):
+                raise CommandError("Unknown or open financial period id")
+
+        for period in periods:
+            count = store_period_balances(period)
+            self.stdout.write(f"{period.name}: {count} points")
+        self.stdout.write(self.style.SUCCESS("Balance points stored"))
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-17 10:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_asset_bankaccount_banktransaction_budget_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='banktransaction',
+            index=models.Index(fields=['transaction_date', 'id'], name='finance_ban_transac_a1d34f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['expense_date', 'id'], name='finance_exp_expense_19025b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['issue_date', 'id'], name='finance_inv_issue_d_a531ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_date', 'id'], name='finance_pay_payment_376d9a_idx'),
+        ),
+    ]
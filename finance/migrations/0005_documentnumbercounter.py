@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-17 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_banktransaction_finance_ban_transac_a1d34f_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentNumberCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series', models.CharField(max_length=50)),
+                ('year', models.PositiveIntegerField(default=0)),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+            ],
+            options={
+                'unique_together': {('series', 'year')},
+            },
+        ),
+    ]
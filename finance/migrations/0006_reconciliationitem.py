@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-17 13:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_customuser_email'),
+        ('finance', '0005_documentnumbercounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('unmatched', 'Unmatched'), ('proposed', 'Match Proposed'), ('matched', 'Matched')], default='unmatched', max_length=20)),
+                ('score', models.PositiveSmallIntegerField(default=0)),
+                ('checked_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reconciliation_items', to='finance.bankaccount')),
+                ('bank_transaction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reconciliation', to='finance.banktransaction')),
+                ('expense', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reconciliation_items', to='finance.expense')),
+                ('matched_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reconciliations_confirmed', to='core.employeeprofile')),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reconciliation_items', to='finance.payment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account', 'status'], name='finance_rec_account_b207ac_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-17 13:40
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0006_reconciliationitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceivableAgingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField()),
+                ('group_by', models.CharField(choices=[('customer', 'Customer'), ('project', 'Project'), ('allocation', 'Allocation')], max_length=20)),
+                ('rows', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('totals', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-as_of'],
+                'unique_together': {('as_of', 'group_by')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['status', 'due_date'], name='finance_inv_status_0e2dc8_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-17 14:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_receivableagingsnapshot_invoice_status_due_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='banktransaction',
+            index=models.Index(fields=['account', 'id'], name='finance_ban_account_0eabb8_idx'),
+        ),
+        migrations.CreateModel(
+            name='BankBalancePoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_points', to='finance.bankaccount')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_points', to='finance.financialperiod')),
+            ],
+            options={
+                'ordering': ['day'],
+                'unique_together': {('account', 'day')},
+            },
+        ),
+    ]
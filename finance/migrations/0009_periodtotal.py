@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-17 14:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0008_bankbalancepoint_banktransaction_account_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('cost_center', 'Cost Center'), ('project', 'Project'), ('expense_category', 'Expense Category'), ('customer', 'Customer'), ('bank_account', 'Bank Account')], max_length=20)),
+                ('key', models.CharField(blank=True, max_length=50)),
+                ('label', models.CharField(max_length=200)),
+                ('metric', models.CharField(max_length=30)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='totals', to='finance.financialperiod')),
+            ],
+            options={
+                'unique_together': {('period', 'dimension', 'key', 'metric')},
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-17 15:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0009_periodtotal'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='asset',
+            name='depreciation_method',
+            field=models.CharField(choices=[('straight_line', 'Straight Line'), ('declining_balance', 'Declining Balance')], default='straight_line', max_length=50),
+        ),
+        migrations.CreateModel(
+            name='DepreciationEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_end', models.DateField()),
+                ('method', models.CharField(choices=[('straight_line', 'Straight Line'), ('declining_balance', 'Declining Balance')], max_length=50)),
+                ('opening_value', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('depreciation', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('closing_value', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('accumulated_depreciation', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='depreciation_entries', to='finance.asset')),
+            ],
+            options={
+                'ordering': ['asset', 'period_end'],
+                'unique_together': {('asset', 'period_end')},
+                'indexes': [models.Index(fields=['period_end'], name='finance_dep_period__25f4ad_idx')],
+            },
+        ),
+    ]
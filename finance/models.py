@@ -1,5 +1,6 @@
 # finance/models.py
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from decimal import Decimal
@@ -76,6 +77,9 @@ class Invoice(models.Model):
             models.Index(fields=['invoice_number']),
             models.Index(fields=['status']),
             models.Index(fields=['due_date']),
+            models.Index(fields=['issue_date', 'id']),
+            # Receivable aging and overdue lists
+            models.Index(fields=['status', 'due_date']),
         ]
 
     def __str__(self):
@@ -87,6 +91,29 @@ class Invoice(models.Model):
         return self.amount - self.paid_amount
 
 
+class ReceivableAgingSnapshot(models.Model):
+    """Receivable aging of one day and grouping, as computed by aging.py"""
+    GROUP_BY_CHOICES = [
+        ('customer', 'Customer'),
+        ('project', 'Project'),
+        ('allocation', 'Allocation'),
+    ]
+
+    as_of = models.DateField()
+    group_by = models.CharField(max_length=20, choices=GROUP_BY_CHOICES)
+    rows = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    totals = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-as_of']
+        unique_together = ['as_of', 'group_by']
+
+    def __str__(self):
+        return f"Aging {self.as_of} by {self.group_by}"
+
+
 class InvoiceLineItem(models.Model):
     invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name='line_items')
     description = models.CharField(max_length=255)
@@ -147,6 +174,9 @@ class Payment(models.Model):
 
     class Meta:
         ordering = ['-payment_date']
+        indexes = [
+            models.Index(fields=['payment_date', 'id']),
+        ]
 
     def __str__(self):
         return f"Payment {self.receipt_number} - {self.amount}"
@@ -301,6 +331,9 @@ class Expense(models.Model):
 
     class Meta:
         ordering = ['-expense_date']
+        indexes = [
+            models.Index(fields=['expense_date', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.expense_number} - {self.category} - {self.amount}"
@@ -365,11 +398,65 @@ class BankTransaction(models.Model):
 
     class Meta:
         ordering = ['-transaction_date']
+        indexes = [
+            models.Index(fields=['transaction_date', 'id']),
+            # Balance series walk an account's rows in posting order
+            models.Index(fields=['account', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.account.account_number} - {self.transaction_type} - {self.amount}"
 
 
+class BankBalancePoint(models.Model):
+    """End-of-day balance of an account, stored for closed periods (see balances.py)"""
+    account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name='balance_points')
+    period = models.ForeignKey('FinancialPeriod', on_delete=models.CASCADE, related_name='balance_points')
+    day = models.DateField()
+    balance = models.DecimalField(max_digits=15, decimal_places=2)
+
+    class Meta:
+        ordering = ['day']
+        unique_together = ['account', 'day']
+
+    def __str__(self):
+        return f"{self.account_id} - {self.day} - {self.balance}"
+
+
+class ReconciliationItem(models.Model):
+    """
+    Reconciliation outcome of one statement line (see reconciliation.py).
+    Matched lines are linked to their Payment or Expense and never examined
+    again; unmatched lines and pending proposals are kept here so the next run
+    only revisits them when a candidate of the same amount has appeared.
+    """
+    STATUS_CHOICES = [
+        ('unmatched', 'Unmatched'),
+        ('proposed', 'Match Proposed'),
+        ('matched', 'Matched'),
+    ]
+
+    bank_transaction = models.OneToOneField(BankTransaction, on_delete=models.CASCADE, related_name='reconciliation')
+    account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name='reconciliation_items')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='unmatched')
+    
+    # Best candidate (proposed, or applied once matched)
+    payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, null=True, blank=True, related_name='reconciliation_items')
+    expense = models.ForeignKey(Expense, on_delete=models.SET_NULL, null=True, blank=True, related_name='reconciliation_items')
+    score = models.PositiveSmallIntegerField(default=0)
+    
+    checked_at = models.DateTimeField(default=timezone.now)
+    matched_by = models.ForeignKey(EmployeeProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='reconciliations_confirmed')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['account', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.bank_transaction_id} - {self.status}"
+
+
 # ==================== BUDGETING ====================
 
 class Budget(models.Model):
@@ -435,6 +522,32 @@ class FinancialPeriod(models.Model):
         return self.name
 
 
+class PeriodTotal(models.Model):
+    """One frozen total of a closed period, e.g. customer 12 / invoiced (see periods.py)"""
+    DIMENSION_CHOICES = [
+        ('cost_center', 'Cost Center'),
+        ('project', 'Project'),
+        ('expense_category', 'Expense Category'),
+        ('customer', 'Customer'),
+        ('bank_account', 'Bank Account'),
+    ]
+
+    period = models.ForeignKey(FinancialPeriod, on_delete=models.CASCADE, related_name='totals')
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=50, blank=True)
+    label = models.CharField(max_length=200)
+    metric = models.CharField(max_length=30)
+    
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['period', 'dimension', 'key', 'metric']
+
+    def __str__(self):
+        return f"{self.period} - {self.dimension} {self.label} - {self.metric}"
+
+
 class TaxConfiguration(models.Model):
     tax_name = models.CharField(max_length=100)
     tax_rate = models.DecimalField(max_digits=5, decimal_places=2)
@@ -553,6 +666,11 @@ class Asset(models.Model):
         ('other', 'Other'),
     ]
 
+    DEPRECIATION_METHOD_CHOICES = [
+        ('straight_line', 'Straight Line'),
+        ('declining_balance', 'Declining Balance'),
+    ]
+
     asset_code = models.CharField(max_length=50, unique=True)
     name = models.CharField(max_length=200)
     asset_type = models.CharField(max_length=50, choices=ASSET_TYPE_CHOICES)
@@ -563,7 +681,7 @@ class Asset(models.Model):
     # Depreciation
     useful_life_years = models.IntegerField(default=5)
     salvage_value = models.DecimalField(max_digits=15, decimal_places=2, default=0)
-    depreciation_method = models.CharField(max_length=50, default='straight_line')
+    depreciation_method = models.CharField(max_length=50, choices=DEPRECIATION_METHOD_CHOICES, default='straight_line')
     accumulated_depreciation = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     
     current_value = models.DecimalField(max_digits=15, decimal_places=2)
@@ -585,6 +703,30 @@ class Asset(models.Model):
         return f"{self.asset_code} - {self.name}"
 
 
+class DepreciationEntry(models.Model):
+    """One month of an asset's depreciation schedule (see depreciation.py)"""
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='depreciation_entries')
+    period_end = models.DateField()
+    method = models.CharField(max_length=50, choices=Asset.DEPRECIATION_METHOD_CHOICES)
+    
+    opening_value = models.DecimalField(max_digits=15, decimal_places=2)
+    depreciation = models.DecimalField(max_digits=15, decimal_places=2)
+    closing_value = models.DecimalField(max_digits=15, decimal_places=2)
+    accumulated_depreciation = models.DecimalField(max_digits=15, decimal_places=2)
+    
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['asset', 'period_end']
+        unique_together = ['asset', 'period_end']
+        indexes = [
+            models.Index(fields=['period_end']),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} - {self.period_end} - {self.depreciation}"
+
+
 # ==================== COMMISSION & INCENTIVES ====================
 
 class CommissionStructure(models.Model):
@@ -598,6 +740,10 @@ class CommissionStructure(models.Model):
     ])
     
     rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    fixed_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    # Tiered: [{"from": 0, "rate": 1.5}, {"from": 5000000, "rate": 2}], rates in %,
+    # applied to each earner's cumulative base in the sales period
+    tiers = models.JSONField(default=list, blank=True)
     
     applicable_to = models.CharField(max_length=50, choices=[
         ('sales', 'Sales Team'),
@@ -608,6 +754,7 @@ class CommissionStructure(models.Model):
     is_active = models.BooleanField(default=True)
     
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -637,4 +784,47 @@ class Commission(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
-        return f"Commission - {self.allocation} - {self.commission_amount}"
\ No newline at end of file
+        return f"Commission - {self.allocation} - {self.commission_amount}"
+
+
+class CommissionRun(models.Model):
+    """One commission calculation over the sales period [period_start, period_end) (see commissions.py)"""
+    period_start = models.DateField()
+    period_end = models.DateField()
+    full = models.BooleanField(default=False)
+    
+    allocations = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['period_start', 'period_end', 'started_at']),
+        ]
+
+    def __str__(self):
+        return f"Commission run {self.period_start} - {self.period_end}"
+
+
+# ==================== DOCUMENT NUMBERING ====================
+
+class DocumentNumberCounter(models.Model):
+    """
+    Next free number of a numbering series (see numbering.py), per year for
+    yearly formats (year 0 otherwise). Unused on PostgreSQL, which keeps the
+    counters in sequences.
+    """
+    series = models.CharField(max_length=50)
+    year = models.PositiveIntegerField(default=0)
+    next_value = models.PositiveBigIntegerField(default=1)
+
+    class Meta:
+        unique_together = ['series', 'year']
+
+    def __str__(self):
+        return f"{self.series} {self.year or ''} - {self.next_value}"
@@ -0,0 +1,202 @@
+# finance/numbering.py
+"""
+Document numbers (EXP-00042, INV-2026-00017 ...) without a hot row.
+
+Each registered series fills its model's number field on ``pre_save`` when it
+is blank. Each process keeps a cache of up to ``DOCUMENT_NUMBER_BLOCK_SIZE``
+reserved numbers per series; only refilling it touches the database, through
+a PostgreSQL sequence (the refill is that many ``nextval`` in one query, and
+``nextval`` is never rolled back) or, elsewhere, a ``DocumentNumberCounter``
+row updated on a separate connection so the reservation survives a rollback
+of the caller's transaction (SQLite, used only in development, updates it in
+the caller's transaction). The block size is the cache size, not a sequence
+step: either counter steps by one per number, kept per series and year, so
+changing the block size carries on from the numbers already handed out.
+
+Numbers are unique but not gap-free: a block a process does not use up
+(restart, rollback of the document) leaves a gap. A series whose format
+contains ``{year}`` restarts every year. Formats can be overridden per series
+in ``settings.DOCUMENT_NUMBER_FORMATS``. A new counter starts after the highest
+number already stored for its prefix, compared as numbers.
+"""
+import re
+import threading
+
+from django.conf import settings
+from django.db import connection, connections, transaction, DEFAULT_DB_ALIAS
+from django.db.models import BigIntegerField, Max
+from django.db.models.functions import Cast, Length, Substr
+from django.db.models.signals import pre_save
+from django.utils import timezone
+
+from .models import DocumentNumberCounter, Expense, Invoice, Payment, PurchaseOrder
+
+
+DEFAULT_BLOCK_SIZE = 20
+
+
+class Series:
+    def __init__(self, name, model, field, format, block_size):
+        self.name = name
+        self.model = model
+        self.field = field
+        self.format = format
+        self.block_size = block_size
+
+    @property
+    def yearly(self):
+        return '{year' in self.format
+
+    def prefix(self, year):
+        return self.format.split('{number', 1)[0].format(year=year)
+
+    def suffix(self, year):
+        return self.format.split('{number', 1)[1].split('}', 1)[1].format(year=year)
+
+    def render(self, number, year):
+        return self.format.format(number=number, year=year)
+
+
+_series = {}
+# Reserved, not yet used numbers per (series, year)
+_reserved = {}
+_sequences = set()
+_lock = threading.Lock()
+
+
+def register(name, model, field, format):
+    """Number ``model.field`` from series ``name``, unless the field is already set"""
+    formats = getattr(settings, 'DOCUMENT_NUMBER_FORMATS', {})
+    block_size = getattr(settings, 'DOCUMENT_NUMBER_BLOCK_SIZE', DEFAULT_BLOCK_SIZE)
+    _series[name] = Series(name, model, field, formats.get(name, format), block_size)
+    pre_save.connect(_assign_numbers, sender=model, dispatch_uid=f'numbering_{model._meta.label_lower}')
+
+
+def next_number(name):
+    return next_numbers(name, 1)[0]
+
+
+def next_numbers(name, count):
+    """``count`` numbers of series ``name``, reserving as many blocks as needed at once"""
+    series = _series[name]
+    year = timezone.localdate().year if series.yearly else 0
+    return [series.render(number, year) for number in _take(series, year, count)]
+
+
+def _take(series, year, count):
+    with _lock:
+        reserved = _reserved.setdefault((series.name, year), [])
+        missing = count - len(reserved)
+        if missing > 0:
+            blocks = -(-missing // series.block_size)
+            reserved.extend(_reserve(series, year, blocks * series.block_size))
+        taken = reserved[:count]
+        del reserved[:count]
+        return taken
+
+
+def _assign_numbers(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for series in _series.values():
+        if series.model is sender and not getattr(instance, series.field):
+            setattr(instance, series.field, next_number(series.name))
+
+
+# ==================== BLOCK RESERVATION ====================
+
+def _highest_existing(series, year):
+    """Largest number already stored in the series format (0 if none)"""
+    prefix, suffix = series.prefix(year), series.suffix(year)
+    # Compared as numbers: INV-10 comes after INV-9
+    highest = series.model._default_manager.filter(**{
+        f'{series.field}__regex': '^' + re.escape(prefix) + r'[0-9]+' + re.escape(suffix) + '$'
+    }).aggregate(value=Max(Cast(
+        Substr(series.field, len(prefix) + 1, Length(series.field) - len(prefix) - len(suffix)),
+        BigIntegerField()
+    )))['value']
+    return highest or 0
+
+
+def _reserve(series, year, count):
+    """``count`` fresh numbers for (series, year), ascending"""
+    if connection.vendor == 'postgresql':
+        return _reserve_from_sequence(series, year, count)
+    return _reserve_from_counter(series, year, count)
+
+
+def _side_connection():
+    """
+    A new connection for the counter update, or None on SQLite: its single
+    writer would wait on the caller's own transaction (development only)
+    """
+    if connection.vendor == 'sqlite':
+        return None
+    return connections.create_connection(DEFAULT_DB_ALIAS)
+
+
+def _reserve_from_sequence(series, year, count):
+    # One sequence per series and year, stepping by one whatever the block size
+    name = f'finance_docnum_{series.name}_{year}'
+    if name not in _sequences:
+        # Created outside the caller's transaction so a rollback cannot drop it
+        side = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            with side.cursor() as cursor:
+                start = _highest_existing(series, year) + 1
+                cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {name} START WITH {start}')
+        finally:
+            side.close()
+        _sequences.add(name)
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT nextval(%s) FROM generate_series(1, %s)', [name, count])
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+def _bump_counter(db, series, year, count):
+    table = DocumentNumberCounter._meta.db_table
+    start = _highest_existing(series, year) + 1
+    with db.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (series, year, next_value) SELECT %s, %s, %s'
+            f' WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE series = %s AND year = %s)',
+            [series.name, year, start, series.name, year]
+        )
+        cursor.execute(
+            f'UPDATE {table} SET next_value = next_value + %s WHERE series = %s AND year = %s',
+            [count, series.name, year]
+        )
+        cursor.execute(
+            f'SELECT next_value FROM {table} WHERE series = %s AND year = %s',
+            [series.name, year]
+        )
+        end = cursor.fetchone()[0]
+        return list(range(end - count, end))
+
+
+def _reserve_from_counter(series, year, count):
+    side = _side_connection()
+    if side is None:
+        with transaction.atomic():
+            return _bump_counter(connection, series, year, count)
+
+    try:
+        side.set_autocommit(False)
+        try:
+            numbers = _bump_counter(side, series, year, count)
+            side.commit()
+        except Exception:
+            side.rollback()
+            raise
+        return numbers
+    finally:
+        side.close()
+
+
+# ==================== SERIES ====================
+
+register('expense', Expense, 'expense_number', 'EXP-{number:05d}')
+register('invoice', Invoice, 'invoice_number', 'INV-{year}-{number:05d}')
+register('payment', Payment, 'receipt_number', 'RCT-{year}-{number:05d}')
+register('purchase_order', PurchaseOrder, 'po_number', 'PO-{year}-{number:05d}')
@@ -0,0 +1,163 @@
+# finance/periods.py
+"""
+Financial period close.
+
+``close_period()`` freezes a period: it computes the period's totals by cost
+center, project, expense category, customer and bank account, stores them as
+``PeriodTotal`` rows together with the bank balance points (balances.py), and
+marks the period closed. From then on nothing dated inside it can be
+created, changed or deleted (``closed_period_on()`` is checked by the
+serializers, the destroy and status actions, balance posting and the payment
+import), so
+reports over closed periods read the stored totals and only open periods are
+aggregated live.
+"""
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .balances import daily_balances, store_period_balances
+from .models import BankAccount, Expense, FinancialPeriod, Invoice, Payment, PeriodTotal, ProjectCost
+
+
+DIMENSIONS = ['cost_center', 'project', 'expense_category', 'customer', 'bank_account']
+
+# Invoices that count as billed (same rule as the dashboard)
+BILLED_EXCLUDED_STATUSES = ['draft', 'pending_approval', 'cancelled', 'void']
+SPENT_EXPENSE_STATUSES = ['approved', 'paid']
+RECEIVED_PAYMENT_STATUSES = ['pending', 'cleared']
+
+
+class ClosedPeriodError(Exception):
+    pass
+
+
+# ==================== GUARDS ====================
+
+def closed_period_on(day):
+    """The closed FinancialPeriod containing ``day``, or None"""
+    if day is None:
+        return None
+    return FinancialPeriod.objects.filter(
+        is_closed=True, start_date__lte=day, end_date__gte=day
+    ).first()
+
+
+def closed_ranges():
+    """[(start, end, name)] of every closed period, for checking many dates at once"""
+    return list(FinancialPeriod.objects.filter(is_closed=True).values_list('start_date', 'end_date', 'name'))
+
+
+def closed_period_name(day, ranges):
+    for start, end, name in ranges:
+        if start <= day <= end:
+            return name
+    return None
+
+
+# ==================== TOTALS ====================
+
+def _grouped(queryset, date_field, start, end, key, label, metrics):
+    rows = queryset.filter(**{
+        f'{date_field}__gte': start, f'{date_field}__lte': end
+    }).order_by().values(key, label).annotate(
+        count=Count('pk'), **{metric: Sum(field) for metric, field in metrics.items()}
+    )
+    for row in rows:
+        for metric in metrics:
+            yield {
+                'key': '' if row[key] is None else str(row[key]),
+                'label': row[label] or 'Unassigned',
+                'metric': metric,
+                'amount': row[metric] or Decimal('0'),
+                'count': row['count'],
+            }
+
+
+def compute_totals(start, end):
+    """{dimension: [total rows]} for activity dated in [start, end]"""
+    invoices = Invoice.objects.exclude(status__in=BILLED_EXCLUDED_STATUSES)
+    expenses = Expense.objects.filter(status__in=SPENT_EXPENSE_STATUSES)
+    payments = Payment.objects.filter(status__in=RECEIVED_PAYMENT_STATUSES)
+    costs = ProjectCost.objects.all()
+
+    totals = {
+        'cost_center': list(_grouped(
+            costs, 'date', start, end, 'cost_center_id', 'cost_center__name',
+            {'actual': 'actual_amount', 'budgeted': 'budgeted_amount'}
+        )),
+        'project': [
+            *_grouped(invoices, 'issue_date', start, end, 'project_id', 'project__name', {'invoiced': 'amount'}),
+            *_grouped(expenses, 'expense_date', start, end, 'project_id', 'project__name', {'spent': 'total_amount'}),
+            *_grouped(costs, 'date', start, end, 'project_id', 'project__name', {'cost': 'actual_amount'}),
+        ],
+        'expense_category': list(_grouped(
+            expenses, 'expense_date', start, end, 'category', 'category', {'spent': 'total_amount'}
+        )),
+        'customer': [
+            *_grouped(invoices, 'issue_date', start, end, 'customer_id', 'customer__full_name', {'invoiced': 'amount'}),
+            *_grouped(payments, 'payment_date', start, end, 'customer_id', 'customer__full_name', {'received': 'amount'}),
+        ],
+        'bank_account': [],
+    }
+
+    categories = dict(Expense.EXPENSE_CATEGORY_CHOICES)
+    for row in totals['expense_category']:
+        row['label'] = categories.get(row['key'], row['label'])
+
+    for account in BankAccount.objects.all():
+        daily = daily_balances(account, start, end)
+        opening = daily[0][1] if daily and daily[0][0] < start else account.opening_balance
+        closing = daily[-1][1] if daily else opening
+        active_days = sum(1 for day, _ in daily if day >= start)
+        for metric, amount in (('opening', opening), ('closing', closing), ('net_change', closing - opening)):
+            totals['bank_account'].append({
+                'key': str(account.pk), 'label': account.account_name,
+                'metric': metric, 'amount': amount, 'count': active_days,
+            })
+    return totals
+
+
+def pivot(rows):
+    """Total rows as one entry per key with an amount per metric"""
+    entries = OrderedDict()
+    for row in rows:
+        entry = entries.setdefault(row['key'], {'key': row['key'], 'label': row['label']})
+        entry[row['metric']] = row['amount']
+        entry[f"{row['metric']}_count"] = row['count']
+    return list(entries.values())
+
+
+def period_totals(period, dimension):
+    """(source, rows) for ``period``: stored when it is closed, live otherwise"""
+    if period.is_closed:
+        rows = PeriodTotal.objects.filter(period=period, dimension=dimension).values(
+            'key', 'label', 'metric', 'amount', 'count'
+        ).order_by('pk')
+        return 'snapshot', pivot(rows)
+    return 'live', pivot(compute_totals(period.start_date, period.end_date)[dimension])
+
+
+# ==================== CLOSING ====================
+
+def close_period(period):
+    """Freeze ``period``: store its totals and balance points, then mark it closed"""
+    with transaction.atomic():
+        period = FinancialPeriod.objects.select_for_update().get(pk=period.pk)
+        if period.is_closed:
+            raise ClosedPeriodError(f'{period.name} is already closed')
+
+        totals = compute_totals(period.start_date, period.end_date)
+        PeriodTotal.objects.filter(period=period).delete()
+        PeriodTotal.objects.bulk_create([
+            PeriodTotal(period=period, dimension=dimension, **row)
+            for dimension, rows in totals.items()
+            for row in rows
+        ], batch_size=1000)
+
+        period.is_closed = True
+        period.save()
+        store_period_balances(period)
+    return period
@@ -0,0 +1,122 @@
+# finance/posting.py
+"""
+Balance posting for bank and petty-cash accounts.
+
+Each call posts a batch of entries to one account in a short transaction:
+one ``UPDATE ... SET current_balance = current_balance + <net>`` (which takes
+the row lock), one read of the resulting balance, and one bulk insert of the
+transaction rows with their running ``balance_after``. The balance is never
+read before it is changed, so concurrent posters cannot lose updates, and
+the lock is held only for those three statements whatever the batch size.
+Neither write sends signals; both are logged to the audit trail here.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from audit.capture import record_bulk, record_update
+from core.versioning import bump_version
+
+from .models import BankAccount, BankTransaction, PettyCashAccount, PettyCashTransaction
+from .periods import closed_period_name, closed_ranges
+
+
+# Transaction types that take money out of the account
+BANK_DEBIT_TYPES = {'withdrawal', 'fee'}
+PETTY_CASH_DEBIT_TYPES = {'withdrawal', 'reimbursement'}
+
+# Transaction types that go either way; the caller must say which with ``outgoing``
+BANK_TWO_WAY_TYPES = {'transfer'}
+
+
+class PostingError(Exception):
+    pass
+
+
+def _signed(entry, debit_types, two_way_types):
+    amount = Decimal(entry['amount'])
+    if amount <= 0:
+        raise PostingError('Amount must be greater than zero')
+    outgoing = entry.pop('outgoing', None)
+    if outgoing is None:
+        if entry['transaction_type'] in two_way_types:
+            raise PostingError(f"A {entry['transaction_type']} needs a direction (outgoing true or false)")
+        outgoing = entry['transaction_type'] in debit_types
+    return -amount if outgoing else amount
+
+
+def _post(account_model, transaction_model, debit_types, two_way_types, account, entries):
+    entries = [dict(entry) for entry in entries]
+    if not entries:
+        return Decimal('0'), []
+
+    deltas = [_signed(entry, debit_types, two_way_types) for entry in entries]
+    net = sum(deltas, Decimal('0'))
+    account_id = getattr(account, 'pk', account)
+    today = timezone.now().date()
+
+    closed = closed_ranges()
+    for entry in entries:
+        period = closed_period_name(entry.get('transaction_date') or today, closed)
+        if period is not None:
+            raise PostingError(f"{entry.get('transaction_date') or today} falls in closed period {period}")
+
+    with transaction.atomic():
+        updated = account_model.objects.filter(pk=account_id).update(
+            current_balance=F('current_balance') + net,
+            updated_at=timezone.now()
+        )
+        if not updated:
+            raise PostingError(f'{account_model.__name__} {account_id} does not exist')
+
+        # Our UPDATE holds the row lock, so this is exactly our result
+        balance = account_model.objects.filter(pk=account_id).values_list(
+            'current_balance', flat=True
+        ).get()
+
+        running = balance - net
+        rows = []
+        for entry, delta in zip(entries, deltas):
+            running += delta
+            entry.setdefault('transaction_date', today)
+            rows.append(transaction_model(
+                account_id=account_id,
+                balance_after=running,
+                **entry
+            ))
+        created = transaction_model.objects.bulk_create(rows)
+        record_update(account_model, account_id, {'current_balance': (balance - net, balance)})
+        record_bulk(created, created=True)
+
+    # The F() update sends no signal; bump again once the caller's transaction commits
+    bump_version(account_model)
+    transaction.on_commit(lambda: bump_version(account_model))
+    if isinstance(account, account_model):
+        account.current_balance = balance
+    return balance, created
+
+
+def post_bank_entries(account, entries):
+    """
+    Post ``entries`` (BankTransaction field dicts with a positive ``amount``;
+    ``outgoing`` overrides the direction implied by the type and is required
+    for transfers) to ``account`` (instance or id). Returns (new balance, transactions).
+    """
+    return _post(BankAccount, BankTransaction, BANK_DEBIT_TYPES, BANK_TWO_WAY_TYPES, account, entries)
+
+
+def post_petty_cash_entries(account, entries):
+    """As post_bank_entries, for PettyCashTransaction rows"""
+    return _post(PettyCashAccount, PettyCashTransaction, PETTY_CASH_DEBIT_TYPES, set(), account, entries)
+
+
+def post_bank_entry(account, **entry):
+    balance, created = post_bank_entries(account, [entry])
+    return created[0]
+
+
+def post_petty_cash_entry(account, **entry):
+    balance, created = post_petty_cash_entries(account, [entry])
+    return created[0]
@@ -0,0 +1,312 @@
+# finance/reconciliation.py
+"""
+Bank reconciliation: match statement lines (BankTransaction rows with neither
+``payment`` nor ``expense``) to the Payments and Expenses they settle.
+
+Open documents are loaded once per run and bucketed by amount, each bucket
+sorted by date, so a line's candidates are found with a hash lookup and a
+bisect over its date window instead of a scan of every document. Candidates
+are scored on amount (always equal), reference number and date proximity;
+all (line, document) pairs are then assigned greedily by score, so a
+document settles at most one line. Unambiguous matches scoring at least
+``AUTO_APPLY_SCORE`` are applied; the rest are stored as proposals for
+review, and lines without candidates as unmatched (see ReconciliationItem).
+
+A re-run skips matched lines and only revisits a stored line when a document
+of its amount has been created or changed since it was last checked. The
+bulk writes are recorded in the audit trail (audit.capture.record_bulk).
+"""
+import re
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from audit.capture import record_bulk
+
+from .models import BankTransaction, Expense, Payment, ReconciliationItem
+
+
+DATE_WINDOW_DAYS = 7
+
+# An equal amount alone is worth AMOUNT_SCORE; a matching reference adds
+# REFERENCE_SCORE, and up to DATE_SCORE goes to the closest dates
+AMOUNT_SCORE = 50
+REFERENCE_SCORE = 40
+DATE_SCORE = 10
+AUTO_APPLY_SCORE = 90
+
+# Statement line types each kind of document can explain
+PAYMENT_LINE_TYPES = {'deposit', 'transfer'}
+EXPENSE_LINE_TYPES = {'withdrawal', 'fee', 'transfer'}
+
+OPEN_PAYMENT_STATUSES = ['pending', 'cleared']
+OPEN_EXPENSE_STATUSES = ['approved', 'paid']
+
+Document = namedtuple('Document', 'kind pk amount date references updated_at')
+
+
+def _normalize(reference):
+    return re.sub(r'[^A-Z0-9]', '', (reference or '').upper())
+
+
+class CandidateIndex:
+    """Open documents of one kind, bucketed by amount and sorted by date"""
+
+    def __init__(self, documents):
+        buckets = {}
+        for document in documents:
+            buckets.setdefault(document.amount, []).append(document)
+        self.buckets = {}
+        self.changed_at = {}
+        for amount, bucket in buckets.items():
+            bucket.sort(key=lambda document: document.date)
+            self.buckets[amount] = ([document.date for document in bucket], bucket)
+            self.changed_at[amount] = max(document.updated_at for document in bucket)
+
+    def candidates(self, amount, day, window):
+        dates, bucket = self.buckets.get(amount, ((), ()))
+        low = bisect_left(dates, day - window)
+        high = bisect_right(dates, day + window)
+        return bucket[low:high]
+
+    def changed_since(self, amount, moment):
+        changed = self.changed_at.get(amount)
+        return changed is not None and changed > moment
+
+
+def score(line, document, window_days=DATE_WINDOW_DAYS):
+    """0-100 confidence that ``document`` explains statement ``line`` (amounts already equal)"""
+    total = AMOUNT_SCORE
+
+    line_reference = _normalize(line.reference_number)
+    description = _normalize(line.description)
+    for reference in document.references:
+        if reference and (reference == line_reference or reference in description):
+            total += REFERENCE_SCORE
+            break
+
+    days = abs((line.transaction_date - document.date).days)
+    total += round(DATE_SCORE * max(window_days - days, 0) / window_days) if window_days else DATE_SCORE
+    return total
+
+
+class Reconciler:
+    def __init__(self, account, window_days=DATE_WINDOW_DAYS, auto_apply=True, full=False):
+        self.account = account
+        self.window_days = window_days
+        self.window = timedelta(days=window_days)
+        self.auto_apply = auto_apply
+        self.full = full
+        self.now = timezone.now()
+
+    def run(self):
+        report = {'examined': 0, 'matched': 0, 'proposed': 0, 'unmatched': 0, 'skipped': 0}
+
+        lines = list(
+            BankTransaction.objects.filter(
+                account=self.account, payment__isnull=True, expense__isnull=True
+            ).exclude(
+                reconciliation__status='matched'
+            ).select_related('reconciliation')
+        )
+        if not lines:
+            return report
+
+        first = min(line.transaction_date for line in lines) - self.window
+        last = max(line.transaction_date for line in lines) + self.window
+        payments = CandidateIndex(self._open_payments(first, last))
+        expenses = CandidateIndex(self._open_expenses(first, last))
+
+        examined = []
+        for line in lines:
+            item = getattr(line, 'reconciliation', None)
+            if item is not None and not self.full and not self._worth_retrying(line, item, payments, expenses):
+                report['skipped'] += 1
+                continue
+            examined.append(line)
+        report['examined'] = len(examined)
+
+        # Documents proposed for lines not being revisited stay reserved
+        reserved = self._reserved_documents(examined)
+        assignments = self._assign(examined, payments, expenses, reserved)
+
+        with transaction.atomic():
+            counts = self._save(examined, assignments)
+        report.update(counts)
+        return report
+
+    # ==================== CANDIDATES ====================
+
+    def _open_payments(self, first, last):
+        rows = Payment.objects.filter(
+            Q(deposited_to_account=self.account) | Q(deposited_to_account__isnull=True),
+            status__in=OPEN_PAYMENT_STATUSES,
+            payment_date__range=(first, last),
+            bank_transactions__isnull=True,
+        ).values_list('pk', 'amount', 'payment_date', 'receipt_number', 'reference_number', 'updated_at')
+        return [
+            Document('payment', pk, amount, day, (_normalize(receipt), _normalize(reference)), updated_at)
+            for pk, amount, day, receipt, reference, updated_at in rows
+        ]
+
+    def _open_expenses(self, first, last):
+        rows = Expense.objects.filter(
+            Q(paid_from_account=self.account) | Q(paid_from_account__isnull=True),
+            status__in=OPEN_EXPENSE_STATUSES,
+            expense_date__range=(first, last),
+            bank_transactions__isnull=True,
+        ).values_list('pk', 'total_amount', 'expense_date', 'expense_number', 'updated_at')
+        return [
+            Document('expense', pk, amount, day, (_normalize(number),), updated_at)
+            for pk, amount, day, number, updated_at in rows
+        ]
+
+    def _indexes_for(self, line, payments, expenses):
+        if line.transaction_type in PAYMENT_LINE_TYPES:
+            yield payments
+        if line.transaction_type in EXPENSE_LINE_TYPES:
+            yield expenses
+
+    def _worth_retrying(self, line, item, payments, expenses):
+        return any(
+            index.changed_since(line.amount, item.checked_at)
+            for index in self._indexes_for(line, payments, expenses)
+        )
+
+    def _reserved_documents(self, examined):
+        held = ReconciliationItem.objects.filter(
+            account=self.account, status='proposed'
+        ).exclude(
+            bank_transaction__in=[line.pk for line in examined]
+        ).values_list('payment_id', 'expense_id')
+        reserved = set()
+        for payment_id, expense_id in held:
+            if payment_id:
+                reserved.add(('payment', payment_id))
+            if expense_id:
+                reserved.add(('expense', expense_id))
+        return reserved
+
+    # ==================== ASSIGNMENT ====================
+
+    def _assign(self, lines, payments, expenses, reserved):
+        """{line pk: (document, score, unambiguous)}, each document used once"""
+        pairs = []
+        best = {}
+        for line in lines:
+            scores = []
+            for index in self._indexes_for(line, payments, expenses):
+                for document in index.candidates(line.amount, line.transaction_date, self.window):
+                    if (document.kind, document.pk) in reserved:
+                        continue
+                    value = score(line, document, self.window_days)
+                    days = abs((line.transaction_date - document.date).days)
+                    pairs.append((-value, days, line.pk, document.kind, document.pk, document))
+                    scores.append(value)
+            scores.sort(reverse=True)
+            best[line.pk] = scores[:2]
+
+        pairs.sort(key=lambda pair: pair[:5])
+        assignments = {}
+        used = set()
+        for negative_score, days, line_pk, kind, pk, document in pairs:
+            if line_pk in assignments or (kind, pk) in used:
+                continue
+            top = best[line_pk]
+            unambiguous = -negative_score == top[0] and (len(top) == 1 or top[1] < top[0])
+            assignments[line_pk] = (document, -negative_score, unambiguous)
+            used.add((kind, pk))
+        return assignments
+
+    # ==================== WRITING ====================
+
+    def _save(self, lines, assignments):
+        counts = {'matched': 0, 'proposed': 0, 'unmatched': 0}
+        linked, new_items, changed_items = [], [], []
+
+        for line in lines:
+            item = getattr(line, 'reconciliation', None)
+            if item is None:
+                item = ReconciliationItem(bank_transaction=line, account_id=line.account_id)
+                new_items.append(item)
+            else:
+                changed_items.append(item)
+
+            document, value, unambiguous = assignments.get(line.pk, (None, 0, False))
+            item.payment_id = document.pk if document and document.kind == 'payment' else None
+            item.expense_id = document.pk if document and document.kind == 'expense' else None
+            item.score = value
+            item.checked_at = self.now
+
+            if document is None:
+                item.status = 'unmatched'
+            elif self.auto_apply and unambiguous and value >= AUTO_APPLY_SCORE:
+                item.status = 'matched'
+                line.payment_id = item.payment_id
+                line.expense_id = item.expense_id
+                linked.append(line)
+            else:
+                item.status = 'proposed'
+            counts[item.status] += 1
+
+        BankTransaction.objects.bulk_update(linked, ['payment', 'expense'], batch_size=500)
+        ReconciliationItem.objects.bulk_create(new_items, batch_size=500)
+        ReconciliationItem.objects.bulk_update(
+            changed_items, ['status', 'payment', 'expense', 'score', 'checked_at'], batch_size=500
+        )
+        record_bulk(linked + changed_items, created=False)
+        record_bulk(new_items, created=True)
+        return counts
+
+
+def reconcile(account, **options):
+    """Match the account's open statement lines; returns counts per outcome"""
+    return Reconciler(account, **options).run()
+
+
+def confirm(account, item_ids, confirmed_by=None):
+    """
+    Apply reviewed proposals. Returns (ids of the items applied, ids of the
+    items whose document was meanwhile linked to another line and so could
+    not be applied); ids that are not open proposals of the account are in
+    neither.
+    """
+    rejected = []
+    with transaction.atomic():
+        items = list(
+            ReconciliationItem.objects.select_for_update().filter(
+                account=account, pk__in=item_ids, status='proposed'
+            ).select_related('bank_transaction')
+        )
+        taken_payments = set(BankTransaction.objects.filter(
+            payment__in=[item.payment_id for item in items if item.payment_id]
+        ).values_list('payment_id', flat=True))
+        taken_expenses = set(BankTransaction.objects.filter(
+            expense__in=[item.expense_id for item in items if item.expense_id]
+        ).values_list('expense_id', flat=True))
+
+        lines, applied = [], []
+        for item in items:
+            if item.payment_id in taken_payments or item.expense_id in taken_expenses:
+                rejected.append(item.pk)
+                continue
+            if item.payment_id:
+                taken_payments.add(item.payment_id)
+            if item.expense_id:
+                taken_expenses.add(item.expense_id)
+            line = item.bank_transaction
+            line.payment_id = item.payment_id
+            line.expense_id = item.expense_id
+            lines.append(line)
+            item.status = 'matched'
+            item.matched_by = confirmed_by
+            applied.append(item)
+
+        BankTransaction.objects.bulk_update(lines, ['payment', 'expense'])
+        ReconciliationItem.objects.bulk_update(applied, ['status', 'matched_by'])
+        record_bulk(lines + applied, created=False)
+    return [item.pk for item in applied], rejected
@@ -0,0 +1,12 @@
+# finance/resources.py
+"""Bulk import resources of the finance app (see core.imports)"""
+from core.imports import BulkModelResource
+
+from .models import Vendor
+
+
+class VendorResource(BulkModelResource):
+    class Meta:
+        model = Vendor
+        import_id_fields = ['vendor_code']
+        exclude = ['id', 'created_at', 'updated_at']
@@ -6,8 +6,42 @@ from .models import (
     PurchaseOrderItem, Expense, BankAccount, BankTransaction,
     Budget, BudgetLineItem, FinancialPeriod, TaxConfiguration,
     CostCenter, ProjectCost, PettyCashAccount, PettyCashTransaction,
-    Asset, CommissionStructure, Commission
+    Asset, CommissionStructure, Commission, ReconciliationItem, DepreciationEntry
 )
+from .commissions import commission_amount, validate_tiers
+from .periods import closed_period_on
+from .posting import BANK_TWO_WAY_TYPES
+
+
+class OpenPeriodMixin:
+    """Reject creating, changing or re-dating rows dated in a closed FinancialPeriod"""
+    period_date_field = None
+    
+    def validate(self, data):
+        data = super().validate(data)
+        days = [data.get(self.period_date_field)]
+        if self.instance is not None:
+            days.append(getattr(self.instance, self.period_date_field))
+        for day in days:
+            period = closed_period_on(day)
+            if period is not None:
+                raise serializers.ValidationError({
+                    self.period_date_field: f"{day} falls in closed period {period.name}"
+                })
+        return data
+
+
+class TransferDirectionMixin:
+    """Require ``outgoing`` on transaction types that go either way (transfers)"""
+    
+    def validate(self, data):
+        data = super().validate(data)
+        transaction_type = data.get('transaction_type', getattr(self.instance, 'transaction_type', None))
+        if self.instance is None and transaction_type in BANK_TWO_WAY_TYPES and data.get('outgoing') is None:
+            raise serializers.ValidationError({
+                'outgoing': f"Required for a {transaction_type}: true for money leaving the account, false for money arriving"
+            })
+        return data
 
 
 # ==================== INVOICING SERIALIZERS ====================
@@ -37,13 +71,15 @@ class InvoiceLineItemSerializer(serializers.ModelSerializer):
         return data
 
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceSerializer(OpenPeriodMixin, serializers.ModelSerializer):
     allocation_name = serializers.CharField(source='allocation.__str__', read_only=True)
     customer_name = serializers.CharField(source='customer.name', read_only=True)
     project_name = serializers.CharField(source='project.name', read_only=True)
     created_by_name = serializers.CharField(source='created_by.__str__', read_only=True)
     balance_due = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True)
     
+    period_date_field = 'issue_date'
+    
     class Meta:
         model = Invoice
         fields = [
@@ -76,12 +112,14 @@ class InvoiceDetailSerializer(InvoiceSerializer):
 
 # ==================== PAYMENT SERIALIZERS ====================
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(OpenPeriodMixin, serializers.ModelSerializer):
     customer_name = serializers.CharField(source='customer.full_name', read_only=True)
     received_by_name = serializers.CharField(source='received_by.__str__', read_only=True)
     invoice_number = serializers.CharField(source='invoice.invoice_number', read_only=True)
     account_name = serializers.CharField(source='deposited_to_account.account_name', read_only=True)
     
+    period_date_field = 'payment_date'
+    
     class Meta:
         model = Payment
         fields = [
@@ -186,7 +224,7 @@ class PurchaseOrderDetailSerializer(PurchaseOrderSerializer):
 
 # ==================== EXPENSE SERIALIZERS ====================
 
-class ExpenseSerializer(serializers.ModelSerializer):
+class ExpenseSerializer(OpenPeriodMixin, serializers.ModelSerializer):
     project_name = serializers.CharField(source='project.name', read_only=True)
     vendor_name = serializers.CharField(source='vendor.name', read_only=True)
     po_number = serializers.CharField(source='purchase_order.po_number', read_only=True)
@@ -196,6 +234,8 @@ class ExpenseSerializer(serializers.ModelSerializer):
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     
+    period_date_field = 'expense_date'
+    
     class Meta:
         model = Expense
         fields = [
@@ -216,6 +256,7 @@ class ExpenseSerializer(serializers.ModelSerializer):
         read_only_fields = ['expense_number', 'submitted_by', 'approved_by', 'created_at', 'updated_at']
     
     def validate(self, data):
+        data = super().validate(data)
         # Calculate total amount if not provided
         if 'total_amount' not in data:
             amount = data.get('amount', 0)
@@ -257,11 +298,17 @@ class BankAccountSerializer(serializers.ModelSerializer):
         return obj.current_balance
 
 
-class BankTransactionSerializer(serializers.ModelSerializer):
+class BankTransactionSerializer(TransferDirectionMixin, OpenPeriodMixin, serializers.ModelSerializer):
     account_name = serializers.CharField(source='account.account_name', read_only=True)
     transaction_type_display = serializers.CharField(source='get_transaction_type_display', read_only=True)
     payment_receipt = serializers.CharField(source='payment.receipt_number', read_only=True)
     expense_number = serializers.CharField(source='expense.expense_number', read_only=True)
+    # None, not False, when a form leaves it out
+    outgoing = serializers.BooleanField(
+        required=False, allow_null=True, default=None, write_only=True, help_text="Direction of a transfer"
+    )
+    
+    period_date_field = 'transaction_date'
     
     class Meta:
         model = BankTransaction
@@ -271,12 +318,51 @@ class BankTransactionSerializer(serializers.ModelSerializer):
             'amount', 'balance_after',
             'reference_number', 'description',
             'payment', 'payment_receipt',
-            'expense', 'expense_number',
+            'expense', 'expense_number', 'outgoing',
             'created_at'
         ]
         read_only_fields = ['balance_after', 'created_at']
 
 
+class BankEntrySerializer(TransferDirectionMixin, serializers.ModelSerializer):
+    """One entry of a batch posted to a single account"""
+    outgoing = serializers.BooleanField(required=False, allow_null=True, default=None, help_text="Direction of a transfer")
+    
+    class Meta:
+        model = BankTransaction
+        fields = [
+            'transaction_date', 'transaction_type', 'amount',
+            'reference_number', 'description', 'payment', 'expense', 'outgoing'
+        ]
+    
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be greater than zero")
+        return value
+
+
+class ReconciliationItemSerializer(serializers.ModelSerializer):
+    transaction_date = serializers.DateField(source='bank_transaction.transaction_date', read_only=True)
+    transaction_type = serializers.CharField(source='bank_transaction.transaction_type', read_only=True)
+    amount = serializers.DecimalField(source='bank_transaction.amount', max_digits=15, decimal_places=2, read_only=True)
+    reference_number = serializers.CharField(source='bank_transaction.reference_number', read_only=True)
+    description = serializers.CharField(source='bank_transaction.description', read_only=True)
+    payment_receipt = serializers.CharField(source='payment.receipt_number', read_only=True)
+    expense_number = serializers.CharField(source='expense.expense_number', read_only=True)
+    
+    class Meta:
+        model = ReconciliationItem
+        fields = [
+            'id', 'bank_transaction', 'status', 'score',
+            'transaction_date', 'transaction_type', 'amount',
+            'reference_number', 'description',
+            'payment', 'payment_receipt',
+            'expense', 'expense_number',
+            'checked_at', 'matched_by'
+        ]
+        read_only_fields = fields
+
+
 # ==================== BUDGET SERIALIZERS ====================
 
 class BudgetLineItemSerializer(serializers.ModelSerializer):
@@ -403,12 +489,14 @@ class CostCenterSerializer(serializers.ModelSerializer):
         return obj.children.exists()
 
 
-class ProjectCostSerializer(serializers.ModelSerializer):
+class ProjectCostSerializer(OpenPeriodMixin, serializers.ModelSerializer):
     project_name = serializers.CharField(source='project.name', read_only=True)
     cost_center_name = serializers.CharField(source='cost_center.name', read_only=True)
     expense_number = serializers.CharField(source='expense.expense_number', read_only=True)
     variance = serializers.SerializerMethodField()
     
+    period_date_field = 'date'
+    
     class Meta:
         model = ProjectCost
         fields = [
@@ -448,12 +536,14 @@ class PettyCashAccountSerializer(serializers.ModelSerializer):
         return obj.maximum_limit - obj.current_balance
 
 
-class PettyCashTransactionSerializer(serializers.ModelSerializer):
+class PettyCashTransactionSerializer(OpenPeriodMixin, serializers.ModelSerializer):
     account_name = serializers.CharField(source='account.name', read_only=True)
     transaction_type_display = serializers.CharField(source='get_transaction_type_display', read_only=True)
     requested_by_name = serializers.CharField(source='requested_by.__str__', read_only=True)
     approved_by_name = serializers.CharField(source='approved_by.__str__', read_only=True)
     
+    period_date_field = 'transaction_date'
+    
     class Meta:
         model = PettyCashTransaction
         fields = [
@@ -505,6 +595,18 @@ class AssetSerializer(serializers.ModelSerializer):
         return 0
 
 
+class DepreciationEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DepreciationEntry
+        fields = [
+            'id', 'asset', 'period_end', 'method',
+            'opening_value', 'depreciation', 'closing_value',
+            'accumulated_depreciation',
+            'created_at'
+        ]
+        read_only_fields = fields
+
+
 # ==================== COMMISSION SERIALIZERS ====================
 
 class CommissionStructureSerializer(serializers.ModelSerializer):
@@ -516,12 +618,18 @@ class CommissionStructureSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'description',
             'commission_type', 'commission_type_display',
-            'rate',
+            'rate', 'fixed_amount', 'tiers',
             'applicable_to', 'applicable_to_display',
             'is_active',
-            'created_at'
+            'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at']
+        read_only_fields = ['created_at', 'updated_at']
+    
+    def validate_tiers(self, value):
+        error = validate_tiers(value)
+        if error:
+            raise serializers.ValidationError(error)
+        return value
 
 
 class CommissionSerializer(serializers.ModelSerializer):
@@ -552,19 +660,9 @@ class CommissionSerializer(serializers.ModelSerializer):
                 "Either employee or broker_name must be provided"
             )
         
-        # Calculate commission based on structure
+        # Calculate commission based on structure (tiers as if this were the earner's first sale)
         if 'structure' in data and 'base_amount' in data:
-            structure = data['structure']
-            base_amount = data['base_amount']
-            
-            if structure.commission_type == 'percentage':
-                commission = base_amount * (structure.rate / 100)
-            elif structure.commission_type == 'fixed':
-                commission = structure.rate
-            else:  # tiered - simplified, you can add complex logic
-                commission = base_amount * (structure.rate / 100)
-            
-            data['commission_amount'] = commission
+            data['commission_amount'] = commission_amount(data['structure'], data['base_amount'])
         
         return data
 
@@ -596,4 +694,18 @@ class RevenueSummarySerializer(serializers.Serializer):
     period = serializers.CharField()
     total_invoiced = serializers.DecimalField(max_digits=15, decimal_places=2)
     total_collected = serializers.DecimalField(max_digits=15, decimal_places=2)
-    outstanding = serializers.DecimalField(max_digits=15, decimal_places=2)
\ No newline at end of file
+    outstanding = serializers.DecimalField(max_digits=15, decimal_places=2)
+
+
+def dashboard_data(data):
+    """finance_dashboard() output with its summary blocks in their API shape"""
+    summary = data['summary']
+    data['summary'] = FinancialDashboardSerializer(summary).data
+    data['revenue'] = RevenueSummarySerializer({
+        'period': f"{summary['period_start']} - {summary['period_end']}",
+        'total_invoiced': data['receivables']['invoiced'],
+        'total_collected': data['receipts']['collected'],
+        'outstanding': data['receivables']['outstanding'],
+    }).data
+    data['expense_by_category'] = ExpenseSummarySerializer(data['expense_by_category'], many=True).data
+    return data
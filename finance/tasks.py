@@ -0,0 +1,76 @@
+# finance/tasks.py
+"""
+Background jobs of the finance app, queued by the ``?async=1`` variants of
+the matching actions (see jobs.runner). Params arrive as JSON: dates as
+ISO strings, rows as ids.
+"""
+from django.core.files.storage import default_storage
+from django.utils.dateparse import parse_date
+
+from core.models import EmployeeProfile
+from jobs.runner import job
+
+from .aging import aging_report
+from .commissions import calculate_commissions, run_report
+from .dashboard import finance_dashboard
+from .depreciation import run_depreciation as depreciate
+from .imports import import_payments as import_payments_file
+from .models import BankAccount
+from .reconciliation import reconcile as reconcile_account
+from .serializers import dashboard_data
+
+
+def _date(value):
+    return parse_date(value) if value else None
+
+
+# ==================== REPORTS ====================
+
+@job('finance.dashboard', queue='reports')
+def dashboard(job, start, end):
+    return dashboard_data(finance_dashboard(_date(start), _date(end)))
+
+
+@job('finance.receivable_aging', queue='reports')
+def receivable_aging(job, group_by, as_of=None):
+    return aging_report(_date(as_of), group_by)
+
+
+# ==================== IMPORTS AND BATCH RUNS ====================
+
+@job('finance.import_payments', queue='imports')
+def import_payments(job, path, received_by=None, deposited_to_account=None, dry_run=False):
+    try:
+        size = default_storage.size(path)
+        with default_storage.open(path, 'rb') as upload:
+            def progress(report):
+                # Rows are streamed, so the share of the file read so far
+                job.set_progress(
+                    min(upload.tell() * 100 // max(size, 1), 99),
+                    f"{report['total']} rows read, {report['imported']} imported",
+                )
+
+            return import_payments_file(
+                upload,
+                received_by=EmployeeProfile.objects.filter(pk=received_by).first(),
+                deposited_to_account=deposited_to_account,
+                dry_run=dry_run,
+                progress=progress,
+            )
+    finally:
+        default_storage.delete(path)
+
+
+@job('finance.reconcile', queue='imports')
+def reconcile(job, account, **options):
+    return reconcile_account(BankAccount.objects.get(pk=account), **options)
+
+
+@job('finance.run_depreciation', queue='imports')
+def run_depreciation(job, period_end=None):
+    return depreciate(_date(period_end))
+
+
+@job('finance.calculate_commissions', queue='imports')
+def commissions(job, start, end, full=False):
+    return run_report(calculate_commissions(_date(start), _date(end), full=full))
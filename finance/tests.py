@@ -1,3 +1,868 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models import F
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from audit.models import AuditLog
+from core.models import CustomUser, EmployeeProfile
+from core.response_cache import local_cache
+from crm.models import Allocation, Customer
+from jobs.models import Job
+from jobs.runner import enqueue
+from projects.models import Project
+from . import numbering
+from .aging import receivable_aging
+from .balances import balance_series
+from .commissions import calculate_commissions, validate_tiers
+from .depreciation import run_depreciation
+from .imports import import_payments
+from .models import (
+    Asset, BankAccount, BankBalancePoint, BankTransaction, Commission, CommissionStructure, Expense, FinancialPeriod,
+    Invoice, Payment, ReconciliationItem,
+)
+from .periods import close_period
+from .permissions import CanApproveExpenses, IsFinanceManager
+from .posting import PostingError, post_bank_entries
+from .reconciliation import confirm, reconcile
+from .serializers import PaymentSerializer
+
+
+def make_profile(email, position):
+    user = CustomUser.objects.create_user(username=email, email=email, password='secret')
+    return EmployeeProfile.objects.create(user=user, position=position)
+
+
+def make_account(balance='1000.00', number='001'):
+    return BankAccount.objects.create(
+        account_name='Operating', account_number=number, bank_name='Bank', account_type='current',
+        current_balance=Decimal(balance),
+    )
+
+
+def make_invoice(customer, amount='500.00', number='INV-1', **fields):
+    fields.setdefault('issue_date', date(2024, 1, 1))
+    fields.setdefault('due_date', date(2024, 2, 1))
+    return Invoice.objects.create(customer=customer, invoice_number=number, amount=Decimal(amount), **fields)
+
+
+def csv_file(content):
+    return io.BytesIO(content.encode())
+
+
+class BulkAuditTests(TestCase):
+    def setUp(self):
+        self.account = make_account()
+        self.customer = Customer.objects.create(full_name='Ada', phone='1')
+
+    def entries(self, model_name, action=None):
+        entries = AuditLog.objects.filter(model_name=model_name)
+        return entries.filter(action=action) if action else entries
+
+    def test_posting_logs_transactions_and_balance(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            balance, created = post_bank_entries(self.account, [
+                {'transaction_type': 'deposit', 'amount': '200.00'},
+                {'transaction_type': 'fee', 'amount': '5.00'},
+            ])
+        self.assertEqual(balance, Decimal('1195.00'))
+        self.assertEqual(self.entries('BankTransaction', 'CREATE').count(), 2)
+        update = self.entries('BankAccount', 'UPDATE').get()
+        self.assertEqual(update.object_id, self.account.pk)
+        self.assertEqual(update.changes['current_balance'], ['1000.00', '1195.00'])
+
+    def test_payment_import_logs_payments_and_invoices(self):
+        invoice = make_invoice(self.customer)
+        with self.captureOnCommitCallbacks(execute=True):
+            report = import_payments(
+                csv_file('invoice_number,amount,payment_date\nINV-1,200,2024-01-15\n'),
+                deposited_to_account=self.account,
+            )
+        self.assertEqual(report['imported'], 1)
+        self.assertEqual(self.entries('Payment', 'CREATE').count(), 1)
+        self.assertEqual(self.entries('BankTransaction', 'CREATE').count(), 1)
+        update = self.entries('Invoice', 'UPDATE').get(object_id=invoice.pk)
+        self.assertEqual(update.changes['paid_amount'], ['0.00', '200.00'])
+        self.assertEqual(update.changes['status'], ['draft', 'partial'])
+
+    def test_depreciation_logs_asset_values(self):
+        asset = Asset.objects.create(
+            asset_code='A-1', name='Truck', asset_type='vehicle', purchase_date=date(2024, 1, 10),
+            purchase_price=Decimal('1200.00'), current_value=Decimal('1200.00'), useful_life_years=1,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            run_depreciation(date(2024, 3, 31))
+        update = self.entries('Asset', 'UPDATE').get(object_id=asset.pk)
+        self.assertEqual(update.changes['current_value'], ['1200.00', '900.00'])
+        self.assertEqual(update.changes['accumulated_depreciation'], ['0.00', '300.00'])
+
+    def reconciliation_payment(self, receipt):
+        return Payment.objects.create(
+            customer=self.customer, receipt_number=receipt, amount=Decimal('50.00'),
+            payment_date=date(2024, 3, 1), payment_method='bank_transfer',
+        )
+
+    def statement_line(self, reference):
+        return post_bank_entries(self.account, [
+            {'transaction_date': date(2024, 3, 1), 'transaction_type': 'deposit', 'amount': '50.00',
+             'reference_number': reference, 'description': 'Credit'},
+        ])[1][0]
+
+    def test_reconciliation_logs_links_and_items(self):
+        payment = self.reconciliation_payment('R-1')
+        line = self.statement_line('R-1')
+        with self.captureOnCommitCallbacks(execute=True):
+            reconcile(self.account)
+        update = self.entries('BankTransaction', 'UPDATE').get(object_id=line.pk)
+        self.assertEqual(update.changes, {'payment': [None, payment.pk]})
+        item = self.entries('ReconciliationItem', 'CREATE').get()
+        self.assertEqual(item.changes['status'], [None, 'matched'])
+
+    def test_confirmed_proposals_are_logged(self):
+        payment = self.reconciliation_payment('R-1')
+        line = self.statement_line('OTHER')
+        reconcile(self.account)
+        with self.captureOnCommitCallbacks(execute=True):
+            confirm(self.account, [line.reconciliation.pk])
+        self.assertEqual(self.entries('BankTransaction', 'UPDATE').get().changes, {'payment': [None, payment.pk]})
+        update = self.entries('ReconciliationItem', 'UPDATE').get()
+        self.assertEqual(update.changes['status'], ['proposed', 'matched'])
+
+    def test_commission_run_logs_commissions(self):
+        agent = make_profile('agent@x.com', 'Sales Officer')
+        project = Project.objects.create(
+            name='Estate', code='E-1', description='', start_date=date(2024, 1, 1), budget=Decimal('1'),
+        )
+        allocation = Allocation.objects.create(customer=self.customer, project=project, plot_number='7', sales_agent=agent)
+        invoice = make_invoice(self.customer, allocation=allocation)
+        Payment.objects.create(
+            invoice=invoice, customer=self.customer, receipt_number='R-1', amount=Decimal('500.00'),
+            payment_date=allocation.allocation_date, payment_method='cash',
+        )
+        CommissionStructure.objects.create(name='Sales', commission_type='percentage', rate=Decimal('2'), applicable_to='sales')
+
+        start = allocation.allocation_date.replace(day=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            calculate_commissions(start)
+        commission = Commission.objects.get()
+        self.assertEqual(self.entries('Commission', 'CREATE').get().object_id, commission.pk)
+
+        Payment.objects.create(
+            invoice=invoice, customer=self.customer, receipt_number='R-2', amount=Decimal('500.00'),
+            payment_date=allocation.allocation_date, payment_method='cash',
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            calculate_commissions(start, full=True)
+        update = self.entries('Commission', 'UPDATE').get(object_id=commission.pk)
+        self.assertEqual(update.changes['commission_amount'], ['10.00', '20.00'])
+
+
+class PeriodCloseTests(APITestCase):
+    def setUp(self):
+        profile = make_profile('fm@x.com', 'Finance Manager')
+        self.client.force_authenticate(profile.user)
+        for permission in (IsFinanceManager, CanApproveExpenses):
+            patcher = patch.object(permission, 'has_permission', return_value=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.period = FinancialPeriod.objects.create(name='Jan 24', start_date=date(2024, 1, 1), end_date=date(2024, 1, 31))
+        self.customer = Customer.objects.create(full_name='Ada', phone='1')
+        self.invoice = make_invoice(self.customer, '500.00', 'INV-1', status='sent', issue_date=date(2024, 1, 10))
+        make_invoice(self.customer, '900.00', 'INV-2', status='draft', issue_date=date(2024, 1, 11))
+        make_invoice(self.customer, '70.00', 'INV-3', status='sent', issue_date=date(2024, 2, 1))
+        self.expense = Expense.objects.create(
+            expense_number='EXP-1', category='material', description='Cement', expense_date=date(2024, 1, 12),
+            amount=Decimal('80.00'), total_amount=Decimal('80.00'), status='approved',
+        )
+
+    def totals(self, dimension):
+        response = self.client.get(f'/api/finance/financial-periods/{self.period.pk}/totals/', {'dimension': dimension})
+        self.assertEqual(response.status_code, 200)
+        return response.data['source'], response.data['rows']
+
+    def close(self):
+        return self.client.post(f'/api/finance/financial-periods/{self.period.pk}/close_period/')
+
+    def test_close_freezes_the_totals(self):
+        source, live = self.totals('customer')
+        self.assertEqual(source, 'live')
+        self.assertEqual(live[0]['invoiced'], Decimal('500.00'))
+
+        self.assertEqual(self.close().status_code, 200)
+        # Bulk writes bypass the guards; the frozen totals do not see them
+        Invoice.objects.filter(pk=self.invoice.pk).update(amount=Decimal('1.00'))
+        source, frozen = self.totals('customer')
+        self.assertEqual(source, 'snapshot')
+        self.assertEqual(frozen, live)
+
+        source, categories = self.totals('expense_category')
+        self.assertEqual(categories, [{
+            'key': 'material', 'label': 'Material', 'spent': Decimal('80.00'), 'spent_count': 1,
+        }])
+
+    def test_period_closes_once(self):
+        self.close()
+        self.assertEqual(self.close().status_code, 400)
+
+    def test_writes_into_a_closed_period_are_refused(self):
+        self.close()
+        response = self.client.patch(f'/api/finance/expenses/{self.expense.pk}/', {'description': 'Sand'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('closed period Jan 24', response.data['expense_date'][0])
+
+        with self.assertRaises(PostingError):
+            post_bank_entries(make_account(), [
+                {'transaction_date': date(2024, 1, 20), 'transaction_type': 'deposit', 'amount': '5.00'},
+            ])
+
+
+class CommissionRunTests(TestCase):
+    def setUp(self):
+        self.agent = make_profile('agent@x.com', 'Sales Officer')
+        self.customer = Customer.objects.create(full_name='Ada', phone='1')
+        self.project = Project.objects.create(
+            name='Estate', code='E-1', description='', start_date=date(2024, 1, 1), budget=Decimal('1'),
+        )
+
+    def sell(self, plot, collected, **fields):
+        fields.setdefault('sales_agent', self.agent)
+        allocation = Allocation.objects.create(customer=self.customer, project=self.project, plot_number=plot, **fields)
+        invoice = make_invoice(self.customer, collected, f'INV-{plot}', allocation=allocation)
+        Payment.objects.create(
+            invoice=invoice, customer=self.customer, receipt_number=f'R-{plot}', amount=Decimal(collected),
+            payment_date=allocation.allocation_date, payment_method='cash',
+        )
+        return allocation
+
+    def amounts(self, **filters):
+        return list(Commission.objects.filter(**filters).order_by('allocation_id').values_list(
+            'commission_amount', flat=True
+        ))
+
+    def test_tiers_are_marginal_over_the_earners_period_total(self):
+        CommissionStructure.objects.create(
+            name='Tiered', commission_type='tiered', applicable_to='sales',
+            tiers=[{'from': 0, 'rate': 1}, {'from': 1000, 'rate': 2}],
+        )
+        self.sell('1', '800.00')
+        self.sell('2', '800.00')
+        run = calculate_commissions()
+        self.assertEqual((run.allocations, run.created), (2, 2))
+        # 200 more at 1% and 600 at 2%
+        self.assertEqual(self.amounts(), [Decimal('8.00'), Decimal('14.00')])
+
+    def test_fixed_amounts_need_a_collected_base(self):
+        CommissionStructure.objects.create(
+            name='Broker fee', commission_type='fixed', applicable_to='brokers', fixed_amount=Decimal('50.00'),
+        )
+        self.sell('1', '800.00', broker_name='Acme')
+        Allocation.objects.create(customer=self.customer, project=self.project, plot_number='2', broker_name='Acme')
+        calculate_commissions()
+        commission = Commission.objects.get()
+        self.assertEqual((commission.broker_name, commission.commission_amount), ('Acme', Decimal('50.00')))
+        self.assertIsNone(commission.employee_id)
+
+    def test_rerun_revisits_only_changed_earners(self):
+        CommissionStructure.objects.create(name='Sales', commission_type='percentage', rate=Decimal('2'), applicable_to='sales')
+        other = make_profile('other@x.com', 'Sales Officer')
+        mine = self.sell('1', '500.00')
+        self.sell('2', '500.00', sales_agent=other)
+        calculate_commissions()
+
+        self.assertEqual(calculate_commissions().allocations, 0)
+
+        mine.sales_agent = other
+        mine.save()
+        run = calculate_commissions()
+        self.assertFalse(run.full)
+        self.assertEqual((run.allocations, run.created, run.cancelled), (2, 1, 1))
+        self.assertEqual(Commission.objects.get(employee=self.agent).status, 'cancelled')
+        self.assertEqual(self.amounts(employee=other, status='pending'), [Decimal('10.00'), Decimal('10.00')])
+
+    def test_settled_commissions_are_left_alone(self):
+        CommissionStructure.objects.create(name='Sales', commission_type='percentage', rate=Decimal('2'), applicable_to='sales')
+        allocation = self.sell('1', '500.00')
+        calculate_commissions()
+        Commission.objects.update(status='approved')
+
+        Payment.objects.create(
+            invoice=allocation.invoices.get(), customer=self.customer, receipt_number='R-2', amount=Decimal('500.00'),
+            payment_date=allocation.allocation_date, payment_method='cash',
+        )
+        self.assertEqual(calculate_commissions().updated, 0)
+        self.assertEqual(self.amounts(), [Decimal('10.00')])
+
+    def test_tier_lists_are_validated(self):
+        self.assertIsNone(validate_tiers([{'from': 0, 'rate': 1}]))
+        self.assertIsNotNone(validate_tiers({'from': 0}))
+        self.assertIsNotNone(validate_tiers([{'from': -1, 'rate': 1}]))
+        self.assertIsNotNone(validate_tiers([{'from': 0, 'rate': 1}, {'from': 0, 'rate': 2}]))
+
+
+class ClosedPeriodActionTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_superuser(username='root@x.com', email='root@x.com', password='secret')
+        EmployeeProfile.objects.create(user=self.user, position='Finance Manager')
+        self.client.force_authenticate(self.user)
+        FinancialPeriod.objects.create(name='2024-01', start_date=date(2024, 1, 1), end_date=date(2024, 1, 31), is_closed=True)
+        self.customer = Customer.objects.create(full_name='Ada', phone='1')
+
+    def post(self, url):
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 400)
+        return response
+
+    def test_invoice_actions_refused_in_closed_period(self):
+        invoice = make_invoice(self.customer, status='pending_approval', paid_amount=Decimal('500.00'))
+        for action in ('approve', 'send_to_customer', 'mark_paid'):
+            response = self.post(f'/api/finance/invoices/{invoice.pk}/{action}/')
+            self.assertIn('closed period 2024-01', response.data['issue_date'][0])
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.status, 'pending_approval')
+
+    def test_invoice_actions_allowed_in_open_period(self):
+        invoice = make_invoice(self.customer, status='pending_approval', issue_date=date(2024, 2, 1))
+        response = self.client.post(f'/api/finance/invoices/{invoice.pk}/approve/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_payment_cannot_bounce_in_closed_period(self):
+        payment = Payment.objects.create(
+            customer=self.customer, receipt_number='R-1', amount=Decimal('10.00'),
+            payment_date=date(2024, 1, 15), payment_method='cash',
+        )
+        self.post(f'/api/finance/payments/{payment.pk}/mark_bounced/')
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'cleared')
+
+    def test_expense_actions_refused_in_closed_period(self):
+        expense = Expense.objects.create(
+            expense_number='EXP-1', category='other', description='Ink', expense_date=date(2024, 1, 10),
+            amount=Decimal('10.00'), total_amount=Decimal('10.00'), status='pending',
+        )
+        # The role checks are the permissions' business, not this test's
+        with patch.object(CanApproveExpenses, 'has_permission', return_value=True), \
+                patch.object(IsFinanceManager, 'has_permission', return_value=True):
+            for action in ('approve', 'reject', 'mark_paid'):
+                self.post(f'/api/finance/expenses/{expense.pk}/{action}/')
+        expense.refresh_from_db()
+        self.assertEqual(expense.status, 'pending')
+
+
+class DepreciationTests(TestCase):
+    def make_asset(self, method, price='10000.00', salvage='0.00', years=5):
+        return Asset.objects.create(
+            asset_code=f'A-{method}', name='Excavator', asset_type='machinery', purchase_date=date(2024, 1, 15),
+            purchase_price=Decimal(price), current_value=Decimal(price), salvage_value=Decimal(salvage),
+            useful_life_years=years, depreciation_method=method,
+        )
+
+    def test_declining_balance_switches_to_straight_line_and_ends_with_life(self):
+        asset = self.make_asset('declining_balance')
+        report = run_depreciation(date(2030, 12, 31))
+        self.assertEqual(report['entries'], 60)
+        asset.refresh_from_db()
+        self.assertEqual(asset.current_value, Decimal('0.00'))
+        self.assertEqual(asset.accumulated_depreciation, Decimal('10000.00'))
+
+        charges = list(asset.depreciation_entries.order_by('period_end').values_list('depreciation', flat=True))
+        self.assertEqual(charges[0], Decimal('333.33'))
+        # Never rising (but for rounding cents once on straight-line)
+        self.assertTrue(all(later - earlier <= Decimal('0.01') for earlier, later in zip(charges, charges[1:])))
+        # Straight-line at the end: level charges
+        self.assertLessEqual(max(charges[-12:]) - min(charges[-12:]), Decimal('0.05'))
+
+    def test_straight_line_stops_at_salvage(self):
+        asset = self.make_asset('straight_line', price='1000.00', salvage='100.00', years=1)
+        report = run_depreciation(date(2026, 1, 31))
+        self.assertEqual(report['entries'], 12)
+        asset.refresh_from_db()
+        self.assertEqual(asset.current_value, Decimal('100.00'))
+
+    def test_rerunning_a_month_adds_nothing(self):
+        self.make_asset('straight_line')
+        run_depreciation(date(2024, 6, 30))
+        self.assertEqual(run_depreciation(date(2024, 6, 30))['entries'], 0)
+
+
+class PaymentImportJobTests(TestCase):
+    def setUp(self):
+        # Uploads wait for their job under MEDIA_ROOT
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_progress_follows_the_file(self):
+        # Big enough to be read in several chunks
+        lines = ['customer,amount,payment_date,notes'] + [f'999,10,2024-03-0{n % 9 + 1},{"x" * 200}' for n in range(2500)]
+        path = default_storage.save('jobs/uploads/payments.csv', ContentFile('\n'.join(lines).encode()))
+
+        reported = []
+        set_progress = Job.set_progress
+
+        def record(job, progress, message=''):
+            reported.append(progress)
+            set_progress(job, progress, message)
+
+        with patch.object(Job, 'set_progress', record), self.captureOnCommitCallbacks(execute=True):
+            record_job = enqueue('finance.import_payments', None, path=path)
+        record_job.refresh_from_db()
+        self.assertEqual(record_job.status, 'succeeded')
+        self.assertEqual(record_job.result['failed'], 2500)
+        # One report per chunk of 1,000 rows, rising through the file
+        self.assertEqual(len(reported), 3)
+        self.assertTrue(0 < reported[0] < reported[1] < reported[2] <= 99, reported)
+        self.assertFalse(default_storage.exists(path))
+
+
+class PaymentCreateTests(APITestCase):
+    def setUp(self):
+        profile = make_profile('cashier@x.com', 'Accountant')
+        self.client.force_authenticate(profile.user)
+        self.customer = Customer.objects.create(full_name='Ada', phone='1')
+        self.invoice = make_invoice(self.customer, issue_date=date(2024, 2, 1))
+
+    def pay(self, amount):
+        response = self.client.post('/api/finance/payments/', {
+            'invoice': self.invoice.pk, 'customer': self.customer.pk, 'amount': amount,
+            'payment_date': '2024-02-10', 'payment_method': 'cash',
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_payments_add_to_the_stored_paid_amount(self):
+        self.pay('200.00')
+        save = PaymentSerializer.save
+
+        def concurrent_save(serializer, **kwargs):
+            # Another payment lands after this request loaded the invoice
+            Invoice.objects.filter(pk=self.invoice.pk).update(paid_amount=F('paid_amount') + Decimal('100.00'))
+            return save(serializer, **kwargs)
+
+        with patch.object(PaymentSerializer, 'save', concurrent_save):
+            self.pay('150.00')
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.paid_amount, Decimal('450.00'))
+        self.assertEqual(self.invoice.status, 'partial')
+
+    def test_bounce_takes_the_payment_off_the_stored_paid_amount(self):
+        self.pay('200.00')
+        self.pay('300.00')
+        payment = Payment.objects.get(amount=Decimal('300.00'))
+        response = self.client.post(f'/api/finance/payments/{payment.pk}/mark_bounced/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.paid_amount, Decimal('200.00'))
+        self.assertEqual(self.invoice.status, 'partial')
+
+
+class TransferDirectionTests(APITestCase):
+    def setUp(self):
+        profile = make_profile('fm@x.com', 'Finance Manager')
+        self.client.force_authenticate(profile.user)
+        self.account = make_account()
+        patcher = patch.object(IsFinanceManager, 'has_permission', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def transfer(self, **fields):
+        return self.client.post('/api/finance/bank-transactions/', {
+            'account': self.account.pk, 'transaction_date': '2024-03-01', 'transaction_type': 'transfer',
+            'amount': '100.00', 'description': 'Sweep', **fields,
+        })
+
+    def test_transfer_needs_a_direction(self):
+        response = self.transfer()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('outgoing', response.data)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.current_balance, Decimal('1000.00'))
+
+    def test_outgoing_transfer_debits_the_account(self):
+        self.assertEqual(self.transfer(outgoing=True).status_code, 201)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.current_balance, Decimal('900.00'))
+
+    def test_batch_transfer_needs_a_direction(self):
+        response = self.client.post(f'/api/finance/bank-accounts/{self.account.pk}/post_entries/', [
+            {'transaction_date': '2024-03-01', 'transaction_type': 'transfer', 'amount': '5.00', 'description': 'x'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_posting_refuses_a_transfer_without_direction(self):
+        with self.assertRaises(PostingError):
+            post_bank_entries(self.account, [{'transaction_type': 'transfer', 'amount': '5.00'}])
+
+
+class NumberingTests(TestCase):
+    def setUp(self):
+        numbering._reserved.clear()
+        self.addCleanup(numbering._reserved.clear)
+        self.addCleanup(self.drop_sequences)
+
+    def drop_sequences(self):
+        # Sequences are created outside the test's transaction
+        if connection.vendor == 'postgresql':
+            side = connections.create_connection(DEFAULT_DB_ALIAS)
+            try:
+                with side.cursor() as cursor:
+                    for name in numbering._sequences:
+                        cursor.execute(f'DROP SEQUENCE IF EXISTS {name}')
+            finally:
+                side.close()
+        numbering._sequences.clear()
+
+    def make_expense(self, number=''):
+        return Expense.objects.create(
+            expense_number=number, category='other', description='Ink', expense_date=date(2024, 1, 10),
+            amount=Decimal('10.00'), total_amount=Decimal('10.00'),
+        )
+
+    def test_new_series_starts_after_the_numerically_highest(self):
+        self.make_expense('EXP-99999')
+        self.make_expense('EXP-100000')
+        self.make_expense('EXP-OLD-7')
+        self.assertEqual(self.make_expense().expense_number, 'EXP-100001')
+
+    def test_block_size_change_continues_the_series(self):
+        series = numbering._series['expense']
+        first = numbering.next_numbers('expense', 3)
+        self.assertEqual(first, ['EXP-00001', 'EXP-00002', 'EXP-00003'])
+
+        # A restart with a smaller block leaves the first block's numbers alone
+        numbering._reserved.clear()
+        reserved = series.block_size
+        with patch.object(series, 'block_size', 5):
+            self.assertEqual(numbering.next_number('expense'), f'EXP-{reserved + 1:05d}')
+
+    @skipUnless(connection.vendor == 'postgresql', 'Document number sequences need PostgreSQL')
+    def test_sequence_numbers_survive_a_rollback(self):
+        series = numbering._series['expense']
+        self.make_expense('EXP-00041')
+        try:
+            with transaction.atomic():
+                self.assertEqual(numbering._reserve_from_sequence(series, 0, 3), [42, 43, 44])
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(numbering._reserve_from_sequence(series, 0, 2), [45, 46])
+
+
+class ConfirmMatchesTests(APITestCase):
+    def setUp(self):
+        profile = make_profile('fm@x.com', 'Finance Manager')
+        self.client.force_authenticate(profile.user)
+        patcher = patch.object(IsFinanceManager, 'has_permission', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.account = make_account()
+        customer = Customer.objects.create(full_name='Ada', phone='1')
+        self.payment = Payment.objects.create(
+            customer=customer, receipt_number='R-1', amount=Decimal('50.00'),
+            payment_date=date(2024, 3, 1), payment_method='bank_transfer',
+        )
+
+    def proposal(self, reference, status='proposed'):
+        line = post_bank_entries(self.account, [
+            {'transaction_date': date(2024, 3, 1), 'transaction_type': 'deposit', 'amount': '50.00',
+             'reference_number': reference, 'description': 'Credit'},
+        ])[1][0]
+        return ReconciliationItem.objects.create(
+            bank_transaction=line, account=self.account, status=status, payment=self.payment, score=90,
+        )
+
+    def test_counts_only_the_items_applied(self):
+        first, second = self.proposal('A'), self.proposal('B')
+        matched = self.proposal('C', status='matched')
+        response = self.client.post(
+            f'/api/finance/bank-accounts/{self.account.pk}/confirm_matches/',
+            {'items': [first.pk, second.pk, matched.pk, 9999]}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        # The second proposal wants the payment the first one took
+        self.assertEqual(response.data, {'confirmed': 1, 'rejected': [second.pk]})
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'matched')
+
+
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        self.account = make_account()
+        self.customer = Customer.objects.create(full_name='Ada', phone='1')
+
+    def pay(self, receipt, amount='50.00', day=date(2024, 3, 1)):
+        return Payment.objects.create(
+            customer=self.customer, receipt_number=receipt, amount=Decimal(amount),
+            payment_date=day, payment_method='bank_transfer',
+        )
+
+    def deposit(self, reference, amount='50.00', day=date(2024, 3, 1), description='Credit'):
+        return post_bank_entries(self.account, [
+            {'transaction_date': day, 'transaction_type': 'deposit', 'amount': amount,
+             'reference_number': reference, 'description': description},
+        ])[1][0]
+
+    def test_reference_and_amount_match_is_applied(self):
+        payment = self.pay('R-1')
+        line = self.deposit('r1', day=date(2024, 3, 2))
+        report = reconcile(self.account)
+        self.assertEqual(report['matched'], 1)
+        line.refresh_from_db()
+        self.assertEqual(line.payment, payment)
+        self.assertEqual(line.reconciliation.status, 'matched')
+
+    def test_amount_alone_is_only_proposed(self):
+        payment = self.pay('R-1')
+        line = self.deposit('OTHER')
+        self.assertEqual(reconcile(self.account)['proposed'], 1)
+        line.refresh_from_db()
+        self.assertIsNone(line.payment)
+        self.assertEqual(line.reconciliation.payment, payment)
+
+    def test_tied_candidates_are_only_proposed(self):
+        self.pay('R-1')
+        self.pay('R-2')
+        self.deposit('', description='Receipts R-1 R-2')
+        self.assertEqual(reconcile(self.account)['proposed'], 1)
+
+    def test_lines_outside_the_window_stay_unmatched(self):
+        self.pay('R-1', day=date(2024, 1, 1))
+        self.deposit('R-1')
+        self.assertEqual(reconcile(self.account)['unmatched'], 1)
+        self.assertEqual(reconcile(self.account, window_days=90, full=True)['matched'], 1)
+
+    def test_rerun_skips_lines_until_a_candidate_changes(self):
+        self.deposit('R-1')
+        reconcile(self.account)
+        report = reconcile(self.account)
+        self.assertEqual((report['examined'], report['skipped']), (0, 1))
+
+        self.pay('R-1')
+        report = reconcile(self.account)
+        self.assertEqual((report['examined'], report['matched']), (1, 1))
+
+
+class DashboardTests(APITestCase):
+    url = '/api/finance/dashboard/'
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        profile = make_profile('fm@x.com', 'Finance Manager')
+        self.client.force_authenticate(profile.user)
+        patcher = patch.object(IsFinanceManager, 'has_permission', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        make_account()
+        customer = Customer.objects.create(full_name='Ada', phone='1')
+        make_invoice(customer, '500.00', 'INV-1', status='sent', paid_amount=Decimal('100.00'),
+                     issue_date=date(2024, 3, 1), due_date=date(2024, 3, 15))
+        make_invoice(customer, '200.00', 'INV-2', status='draft', issue_date=date(2024, 3, 5))
+        for receipt, amount, day, state in [
+            ('R-1', '100.00', date(2024, 3, 10), 'cleared'),
+            ('R-2', '40.00', date(2024, 3, 11), 'pending'),
+            ('R-3', '900.00', date(2024, 4, 1), 'cleared'),
+        ]:
+            Payment.objects.create(
+                customer=customer, receipt_number=receipt, amount=Decimal(amount), payment_date=day,
+                payment_method='cash', status=state,
+            )
+        for number, category, amount, state in [
+            ('EXP-1', 'material', '300.00', 'approved'),
+            ('EXP-2', 'labor', '50.00', 'paid'),
+            ('EXP-3', 'labor', '20.00', 'pending'),
+        ]:
+            Expense.objects.create(
+                expense_number=number, category=category, description='-', expense_date=date(2024, 3, 2),
+                amount=Decimal(amount), total_amount=Decimal(amount), status=state,
+            )
+
+    def test_month_totals(self):
+        response = self.client.get(self.url, {'month': '2024-03'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary'], {
+            'total_revenue': '100.00', 'total_expenses': '350.00', 'net_profit': '-250.00',
+            'outstanding_receivables': '400.00', 'outstanding_payables': '300.00', 'cash_balance': '1000.00',
+            'period_start': '2024-03-01', 'period_end': '2024-03-31',
+        })
+        self.assertEqual(response.data['receivables']['invoiced'], Decimal('500.00'))
+        self.assertEqual(response.data['receivables']['overdue_count'], 1)
+        self.assertEqual(response.data['receipts']['pending'], Decimal('40.00'))
+        self.assertEqual(response.data['payables']['pending_approval_count'], 1)
+        self.assertEqual(
+            [(row['category'], row['total']) for row in response.data['expense_by_category']],
+            [('material', '300.00'), ('labor', '50.00')],
+        )
+
+    def test_inclusive_date_range(self):
+        response = self.client.get(self.url, {'start': '2024-03-01', 'end': '2024-04-01'})
+        self.assertEqual(response.data['summary']['total_revenue'], '1000.00')
+
+    def test_bad_period_is_refused(self):
+        self.assertEqual(self.client.get(self.url, {'month': 'March'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'start': '2024-03-02', 'end': '2024-03-01'}).status_code, 400)
+
+    def test_cached_copy_lasts_until_a_write(self):
+        params = {'month': '2024-03', 'cached': '1'}
+        self.client.get(self.url, params)
+        with self.assertNumQueries(0):
+            self.client.get(self.url, params)
+        Expense.objects.get(expense_number='EXP-3').delete()
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.data['payables']['pending_approval_count'], 0)
+
+
+class BalanceSeriesTests(APITestCase):
+    def setUp(self):
+        self.account = BankAccount.objects.create(
+            account_name='Operating', account_number='001', bank_name='Bank', account_type='current',
+            opening_balance=Decimal('1000.00'), current_balance=Decimal('1000.00'),
+        )
+        for day, kind, amount in [
+            (date(2024, 3, 1), 'deposit', '100.00'),
+            (date(2024, 3, 5), 'withdrawal', '30.00'),
+            # Back-dated: posted last, counted on its own day
+            (date(2024, 2, 20), 'deposit', '10.00'),
+        ]:
+            post_bank_entries(self.account, [
+                {'transaction_date': day, 'transaction_type': kind, 'amount': amount, 'description': '-'},
+            ])
+
+    def balances(self, start, end, resolution='day'):
+        return [point['balance'] for point in balance_series(self.account, start, end, resolution)]
+
+    def test_daily_balances_carry_forward(self):
+        self.assertEqual(
+            self.balances(date(2024, 2, 28), date(2024, 3, 6)),
+            [Decimal(value) for value in ['1010', '1010', '1110', '1110', '1110', '1110', '1080', '1080']],
+        )
+
+    def test_weeks_end_on_sunday(self):
+        series = balance_series(self.account, date(2024, 2, 26), date(2024, 3, 6), 'week')
+        self.assertEqual(
+            [(point['date'], point['balance']) for point in series],
+            [(date(2024, 3, 3), Decimal('1110.00')), (date(2024, 3, 6), Decimal('1080.00'))],
+        )
+
+    def test_closed_periods_are_read_from_stored_points(self):
+        period = FinancialPeriod.objects.create(name='Mar 24', start_date=date(2024, 3, 1), end_date=date(2024, 3, 31))
+        close_period(period)
+        self.assertEqual(self.balances(date(2024, 3, 1), date(2024, 4, 2))[-1], Decimal('1080.00'))
+
+        BankBalancePoint.objects.filter(account=self.account, day=date(2024, 3, 5)).update(balance=Decimal('1'))
+        self.assertEqual(self.balances(date(2024, 3, 4), date(2024, 3, 5)), [Decimal('1110.00'), Decimal('1')])
+
+    def test_endpoint_refuses_unknown_resolutions(self):
+        profile = make_profile('fm@x.com', 'Finance Manager')
+        self.client.force_authenticate(profile.user)
+        patcher = patch.object(IsFinanceManager, 'has_permission', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        url = f'/api/finance/bank-accounts/{self.account.pk}/balance_series/'
+        self.assertEqual(self.client.get(url, {'resolution': 'hour'}).status_code, 400)
+        response = self.client.get(url, {'start': '2024-03-01', 'end': '2024-03-31', 'resolution': 'month'})
+        self.assertEqual(response.data['points'], [{'date': date(2024, 3, 31), 'balance': Decimal('1080.00')}])
+
+
+class AgingTests(TestCase):
+    def test_past_balances_land_in_their_buckets(self):
+        customer = Customer.objects.create(full_name='Ada', phone='1')
+        make_invoice(customer, '100.00', 'INV-1', status='sent', due_date=date(2024, 3, 20))
+        late = make_invoice(customer, '300.00', 'INV-2', status='paid', paid_amount=Decimal('300.00'))
+        # Paid after the as-of date: still owed then
+        Payment.objects.create(
+            invoice=late, customer=customer, receipt_number='R-1', amount=Decimal('300.00'),
+            payment_date=date(2024, 4, 1), payment_method='cash',
+        )
+        report = receivable_aging(date(2024, 3, 15))
+        row = report['rows'][0]
+        self.assertEqual(row['current'], Decimal('100.00'))
+        self.assertEqual(row['days_31_60'], Decimal('300.00'))
+        self.assertEqual(row['invoice_count'], 2)
+        self.assertEqual(report['totals']['total'], Decimal('400.00'))
+
+
+class PaymentImportTests(APITestCase):
+    def setUp(self):
+        self.account = make_account()
+        self.customer = Customer.objects.create(full_name='Ada', phone='1')
+        self.first = make_invoice(self.customer, '500.00', 'INV-1', status='sent')
+        self.second = make_invoice(self.customer, '300.00', 'INV-2', status='sent')
+
+    def run_import(self, content, **options):
+        return import_payments(csv_file(content), deposited_to_account=self.account, chunk_size=2, **options)
+
+    def test_settles_invoices_and_posts_deposits_across_chunks(self):
+        report = self.run_import(
+            'invoice_number,amount,payment_date\n'
+            'INV-1,200,2024-03-01\n'
+            'INV-1,300,2024-03-02\n'
+            'INV-2,100,2024-03-03\n'
+        )
+        self.assertEqual(report, {'total': 3, 'imported': 3, 'failed': 0, 'errors': []})
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.paid_amount, self.first.status), (Decimal('500.00'), 'paid'))
+        self.assertEqual((self.second.paid_amount, self.second.status), (Decimal('100.00'), 'partial'))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.current_balance, Decimal('1600.00'))
+        self.assertEqual(BankTransaction.objects.filter(account=self.account).count(), 3)
+        self.assertEqual(len(set(Payment.objects.values_list('receipt_number', flat=True))), 3)
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        FinancialPeriod.objects.create(name='2024-01', start_date=date(2024, 1, 1), end_date=date(2024, 1, 31), is_closed=True)
+        report = self.run_import(
+            'invoice_number,amount,payment_date,receipt_number\n'
+            'INV-9,10,2024-03-01,\n'
+            'INV-1,-5,2024-03-01,\n'
+            'INV-1,10,2024-01-15,\n'
+            'INV-1,10,2024-03-01,R-1\n'
+            'INV-1,10,2024-03-01,R-1\n'
+        )
+        self.assertEqual((report['imported'], report['failed']), (1, 4))
+        self.assertEqual(
+            [(error['row'], list(error['errors'])) for error in report['errors']],
+            [(2, ['invoice_number', 'customer']), (3, ['amount']), (4, ['payment_date']), (6, ['receipt_number'])],
+        )
+
+    def test_dry_run_writes_nothing(self):
+        report = self.run_import('invoice_number,amount,payment_date\nINV-1,200,2024-03-01\n', dry_run=True)
+        self.assertEqual(report['imported'], 1)
+        self.assertFalse(Payment.objects.exists())
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.current_balance, Decimal('1000.00'))
+
+    def test_upload_endpoint(self):
+        profile = make_profile('cashier@x.com', 'Accountant')
+        self.client.force_authenticate(profile.user)
+        upload = SimpleUploadedFile('payments.csv', b'invoice_number,amount,payment_date\nINV-2,300,2024-03-01\n')
+        response = self.client.post('/api/finance/payments/import_csv/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['imported'], 1)
+        self.assertEqual(Payment.objects.get().received_by, profile)
+
+    def test_background_upload_is_stored_under_a_random_name(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        self.client.force_authenticate(make_profile('cashier@x.com', 'Accountant').user)
+        upload = SimpleUploadedFile('payments.csv', b'invoice_number,amount,payment_date\nINV-2,300,2024-03-01\n')
+        with override_settings(MEDIA_ROOT=media), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/finance/payments/import_csv/?async=1', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(pk=response.data['id'])
+        self.assertEqual(job.status, 'succeeded', job.error)
+        self.assertRegex(job.params['path'], r'^jobs/uploads/[\w-]{32}\.csv$')
+        self.assertEqual(job.result['imported'], 1)
@@ -8,7 +8,8 @@ from .views import (
     BudgetViewSet, BudgetLineItemViewSet, FinancialPeriodViewSet,
     TaxConfigurationViewSet, CostCenterViewSet, ProjectCostViewSet,
     PettyCashAccountViewSet, PettyCashTransactionViewSet,
-    AssetViewSet, CommissionStructureViewSet, CommissionViewSet
+    AssetViewSet, CommissionStructureViewSet, CommissionViewSet,
+    FinanceDashboardView
 )
 
 app_name = 'finance'
@@ -56,5 +57,6 @@ router.register(r'commission-structures', CommissionStructureViewSet, basename='
 router.register(r'commissions', CommissionViewSet, basename='commission')
 
 urlpatterns = [
+    path('dashboard/', FinanceDashboardView.as_view(), name='dashboard'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
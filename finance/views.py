@@ -2,42 +2,90 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
 from django.db.models import Sum, Q, F, Count
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
+from django.core.files.storage import default_storage
 from django.db import transaction
+from core.export import ExportMixin
+from core.imports import ImportMixin
+from core.fieldsets import SparseFieldsetMixin
+from core.response_cache import cached_response
+from jobs.models import upload_path
+from jobs.views import offload, wants_async
 from .models import (
     Invoice, InvoiceLineItem, Payment, Vendor, PurchaseOrder, 
     PurchaseOrderItem, Expense, BankAccount, BankTransaction,
     Budget, BudgetLineItem, FinancialPeriod, TaxConfiguration,
     CostCenter, ProjectCost, PettyCashAccount, PettyCashTransaction,
-    Asset, CommissionStructure, Commission
+    Asset, CommissionStructure, Commission, ReconciliationItem, ReceivableAgingSnapshot,
+    DepreciationEntry
 )
 from .serializers import (
     InvoiceSerializer, InvoiceDetailSerializer, InvoiceLineItemSerializer,
     PaymentSerializer, PaymentDetailSerializer, VendorSerializer,
     PurchaseOrderSerializer, PurchaseOrderDetailSerializer, PurchaseOrderItemSerializer,
     ExpenseSerializer, ExpenseDetailSerializer, BankAccountSerializer,
-    BankTransactionSerializer, BudgetSerializer, BudgetDetailSerializer,
+    BankTransactionSerializer, BankEntrySerializer, BudgetSerializer, BudgetDetailSerializer,
     BudgetLineItemSerializer, FinancialPeriodSerializer, TaxConfigurationSerializer,
     CostCenterSerializer, ProjectCostSerializer, PettyCashAccountSerializer,
     PettyCashTransactionSerializer, AssetSerializer, CommissionStructureSerializer,
-    CommissionSerializer
+    CommissionSerializer, ReconciliationItemSerializer,
+    DepreciationEntrySerializer, dashboard_data
 )
+from .balances import balance_series, RESOLUTIONS as BALANCE_RESOLUTIONS
+from .commissions import calculate_commissions, run_report
+from .dashboard import finance_dashboard, month_range
+from .depreciation import run_depreciation
+from .aging import aging_report, GROUPINGS as AGING_GROUPINGS
+from .imports import import_payments
+from .periods import (
+    close_period as close_financial_period, closed_period_on, period_totals,
+    ClosedPeriodError, DIMENSIONS as PERIOD_DIMENSIONS
+)
+from .reconciliation import reconcile as reconcile_account, confirm as confirm_reconciliation, DATE_WINDOW_DAYS
+from .resources import VendorResource
+from .posting import post_bank_entries, post_bank_entry, post_petty_cash_entry, PostingError
 from .permissions import IsFinanceManager, IsAccountant, CanApproveExpenses
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 
 
+# Longest range served at day resolution
+MAX_DAILY_POINTS = 3660
+
+
+class OpenPeriodDestroyMixin:
+    """
+    Refuse to delete rows dated inside a closed FinancialPeriod; status
+    actions call ``check_open_period()`` before changing a row
+    """
+    period_date_field = None
+
+    def check_open_period(self, instance):
+        day = getattr(instance, self.period_date_field)
+        period = closed_period_on(day)
+        if period is not None:
+            raise ValidationError({self.period_date_field: [f'{day} falls in closed period {period.name}']})
+
+    def perform_destroy(self, instance):
+        self.check_open_period(instance)
+        super().perform_destroy(instance)
+
+
 # ==================== INVOICING ====================
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class InvoiceViewSet(OpenPeriodDestroyMixin, ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Invoice.objects.all().select_related(
         'allocation', 'project', 'customer', 'created_by', 'approved_by'
     ).prefetch_related('line_items', 'payments')
     permission_classes = [IsAuthenticated]
+    period_date_field = 'issue_date'
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'invoice_type', 'customer', 'project']
     search_fields = ['invoice_number', 'customer__name']
@@ -56,6 +104,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     def approve(self, request, pk=None):
         """Approve an invoice"""
         invoice = self.get_object()
+        self.check_open_period(invoice)
         
         if invoice.status != 'pending_approval':
             return Response(
@@ -74,6 +123,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     def send_to_customer(self, request, pk=None):
         """Mark invoice as sent"""
         invoice = self.get_object()
+        self.check_open_period(invoice)
         
         if invoice.status not in ['approved', 'draft']:
             return Response(
@@ -92,6 +142,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     def mark_paid(self, request, pk=None):
         """Mark invoice as fully paid"""
         invoice = self.get_object()
+        self.check_open_period(invoice)
         
         if invoice.paid_amount >= invoice.amount:
             invoice.status = 'paid'
@@ -111,36 +162,62 @@ class InvoiceViewSet(viewsets.ModelViewSet):
             due_date__lt=today,
             status__in=['unpaid', 'partial', 'sent']
         )
+        page = self.paginate_queryset(overdue_invoices)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(overdue_invoices, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @cached_response(Invoice, Payment, ReceivableAgingSnapshot)
+    def aging(self, request):
+        """Receivable aging buckets (?group_by=customer|project|allocation&as_of=YYYY-MM-DD)"""
+        group_by = request.query_params.get('group_by', 'customer')
+        if group_by not in AGING_GROUPINGS:
+            return Response(
+                {'error': f'group_by must be one of {", ".join(AGING_GROUPINGS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        as_of = None
+        if request.query_params.get('as_of'):
+            try:
+                as_of = datetime.strptime(request.query_params['as_of'], '%Y-%m-%d').date()
+            except ValueError:
+                return Response({'error': 'as_of must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if wants_async(request):
+            return offload(request, 'finance.receivable_aging', as_of=as_of, group_by=group_by)
+        return Response(aging_report(as_of, group_by))
+
+    @action(detail=False, methods=['get'])
+    @cached_response(Invoice)
     def dashboard(self, request):
         """Get invoice dashboard statistics"""
-        total_outstanding = self.queryset.filter(
-            status__in=['unpaid', 'partial', 'sent']
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        total_paid_this_month = self.queryset.filter(
-            status='paid',
-            issue_date__month=timezone.now().month,
-            issue_date__year=timezone.now().year
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        today = timezone.now().date()
+        month_start, next_month_start = month_range(today)
+        open_invoice = Q(status__in=['unpaid', 'partial', 'sent'])
         
-        overdue_count = self.queryset.filter(
-            due_date__lt=timezone.now().date(),
-            status__in=['unpaid', 'partial', 'sent']
-        ).count()
+        # One pass over Invoice; the month is a date range so issue_date's index applies
+        stats = self.queryset.order_by().aggregate(
+            total_outstanding=Sum('amount', filter=open_invoice),
+            total_paid_this_month=Sum('amount', filter=Q(
+                status='paid', issue_date__gte=month_start, issue_date__lt=next_month_start
+            )),
+            overdue_count=Count('pk', filter=open_invoice & Q(due_date__lt=today)),
+            total_invoices=Count('pk'),
+        )
         
         return Response({
-            'total_outstanding': total_outstanding,
-            'total_paid_this_month': total_paid_this_month,
-            'overdue_count': overdue_count,
-            'total_invoices': self.queryset.count()
+            'total_outstanding': stats['total_outstanding'] or 0,
+            'total_paid_this_month': stats['total_paid_this_month'] or 0,
+            'overdue_count': stats['overdue_count'],
+            'total_invoices': stats['total_invoices']
         })
 
 
-class InvoiceLineItemViewSet(viewsets.ModelViewSet):
+class InvoiceLineItemViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = InvoiceLineItem.objects.all()
     serializer_class = InvoiceLineItemSerializer
     permission_classes = [IsAuthenticated]
@@ -148,11 +225,12 @@ class InvoiceLineItemViewSet(viewsets.ModelViewSet):
 
 # ==================== PAYMENTS ====================
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(OpenPeriodDestroyMixin, ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all().select_related(
         'invoice', 'customer', 'received_by', 'deposited_to_account'
     )
     permission_classes = [IsAuthenticated]
+    period_date_field = 'payment_date'
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'payment_method', 'customer', 'invoice']
     search_fields = ['receipt_number', 'reference_number', 'customer__name']
@@ -165,80 +243,110 @@ class PaymentViewSet(viewsets.ModelViewSet):
         return PaymentSerializer
 
     def perform_create(self, serializer):
-        payment = serializer.save(received_by=self.request.user.profile)
-
-        
-        # Update invoice paid amount if linked
-        if payment.invoice:
-            invoice = payment.invoice
-            invoice.paid_amount += payment.amount
+        with transaction.atomic():
+            payment = serializer.save(received_by=self.request.user.profile)
             
-            # Update invoice status
-            if invoice.paid_amount >= invoice.amount:
-                invoice.status = 'paid'
-            elif invoice.paid_amount > 0:
-                invoice.status = 'partial'
+            # Update invoice paid amount if linked
+            if payment.invoice_id:
+                # Locked so concurrent payments against the invoice add up
+                invoice = Invoice.objects.select_for_update().get(pk=payment.invoice_id)
+                invoice.paid_amount += payment.amount
+                
+                # Update invoice status
+                if invoice.paid_amount >= invoice.amount:
+                    invoice.status = 'paid'
+                elif invoice.paid_amount > 0:
+                    invoice.status = 'partial'
+                
+                invoice.save()
             
-            invoice.save()
+            # Create bank transaction if account specified
+            if payment.deposited_to_account and payment.status == 'cleared':
+                post_bank_entry(
+                    payment.deposited_to_account,
+                    transaction_date=payment.payment_date,
+                    transaction_type='deposit',
+                    amount=payment.amount,
+                    reference_number=payment.receipt_number,
+                    description=f"Payment received - {payment.receipt_number}",
+                    payment=payment
+                )
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def import_csv(self, request):
+        """Import payments from a CSV upload (field "file"); returns per-row errors"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'A CSV file is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create bank transaction if account specified
-        if payment.deposited_to_account and payment.status == 'cleared':
-            BankTransaction.objects.create(
-                account=payment.deposited_to_account,
-                transaction_date=payment.payment_date,
-                transaction_type='deposit',
-                amount=payment.amount,
-                balance_after=payment.deposited_to_account.current_balance + payment.amount,
-                reference_number=payment.receipt_number,
-                description=f"Payment received - {payment.receipt_number}",
-                payment=payment
+        account = request.data.get('deposited_to_account') or None
+        if account is not None:
+            try:
+                account = int(account)
+            except ValueError:
+                return Response(
+                    {'error': 'deposited_to_account must be an id'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        if wants_async(request):
+            path = default_storage.save(upload_path(upload.name), upload)
+            return offload(
+                request, 'finance.import_payments',
+                path=path, received_by=request.user.profile.pk,
+                deposited_to_account=account, dry_run=dry_run
             )
-            
-            # Update bank account balance
-            payment.deposited_to_account.current_balance += payment.amount
-            payment.deposited_to_account.save()
+        
+        report = import_payments(
+            upload,
+            received_by=request.user.profile,
+            deposited_to_account=account,
+            dry_run=dry_run,
+        )
+        return Response(report)
 
     @action(detail=True, methods=['post'])
     def mark_bounced(self, request, pk=None):
         """Mark payment as bounced"""
         payment = self.get_object()
+        self.check_open_period(payment)
         
-        if payment.status != 'cleared':
-            return Response(
-                {'error': 'Only cleared payments can be marked as bounced'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        payment.status = 'bounced'
-        payment.save()
-        
-        # Reverse invoice payment
-        if payment.invoice:
-            invoice = payment.invoice
-            invoice.paid_amount -= payment.amount
+        with transaction.atomic():
+            # Lock the payment so a double submit cannot reverse it twice
+            payment = Payment.objects.select_for_update().get(pk=payment.pk)
+            if payment.status != 'cleared':
+                return Response(
+                    {'error': 'Only cleared payments can be marked as bounced'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
-            if invoice.paid_amount <= 0:
-                invoice.status = 'unpaid'
-            else:
-                invoice.status = 'partial'
+            payment.status = 'bounced'
+            payment.save()
             
-            invoice.save()
-        
-        # Reverse bank transaction
-        if payment.deposited_to_account:
-            BankTransaction.objects.create(
-                account=payment.deposited_to_account,
-                transaction_date=timezone.now().date(),
-                transaction_type='withdrawal',
-                amount=payment.amount,
-                balance_after=payment.deposited_to_account.current_balance - payment.amount,
-                reference_number=f"BOUNCED-{payment.receipt_number}",
-                description=f"Payment bounced - {payment.receipt_number}",
-                payment=payment
-            )
+            # Reverse invoice payment; locked like perform_create so a payment
+            # recorded meanwhile is not overwritten
+            if payment.invoice_id:
+                invoice = Invoice.objects.select_for_update().get(pk=payment.invoice_id)
+                invoice.paid_amount -= payment.amount
+                
+                if invoice.paid_amount <= 0:
+                    invoice.status = 'unpaid'
+                else:
+                    invoice.status = 'partial'
+                
+                invoice.save()
             
-            payment.deposited_to_account.current_balance -= payment.amount
-            payment.deposited_to_account.save()
+            # Reverse bank transaction
+            if payment.deposited_to_account_id:
+                post_bank_entry(
+                    payment.deposited_to_account_id,
+                    transaction_type='withdrawal',
+                    amount=payment.amount,
+                    reference_number=f"BOUNCED-{payment.receipt_number}",
+                    description=f"Payment bounced - {payment.receipt_number}",
+                    payment=payment
+                )
         
         return Response({'status': 'Payment marked as bounced'})
 
@@ -255,10 +363,11 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
 # ==================== VENDORS ====================
 
-class VendorViewSet(viewsets.ModelViewSet):
+class VendorViewSet(ImportMixin, ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Vendor.objects.all()
     serializer_class = VendorSerializer
     permission_classes = [IsAuthenticated]
+    import_resource_class = VendorResource
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['vendor_type', 'is_active']
     search_fields = ['name', 'vendor_code', 'contact_person', 'email']
@@ -287,7 +396,7 @@ class VendorViewSet(viewsets.ModelViewSet):
 
 # ==================== PURCHASE ORDERS ====================
 
-class PurchaseOrderViewSet(viewsets.ModelViewSet):
+class PurchaseOrderViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = PurchaseOrder.objects.all().select_related(
         'vendor', 'project', 'created_by', 'approved_by'
     ).prefetch_related('items')
@@ -345,7 +454,7 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
             )
 
 
-class PurchaseOrderItemViewSet(viewsets.ModelViewSet):
+class PurchaseOrderItemViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = PurchaseOrderItem.objects.all()
     serializer_class = PurchaseOrderItemSerializer
     permission_classes = [IsAuthenticated]
@@ -353,12 +462,13 @@ class PurchaseOrderItemViewSet(viewsets.ModelViewSet):
 
 # ==================== EXPENSES ====================
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+class ExpenseViewSet(OpenPeriodDestroyMixin, ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Expense.objects.all().select_related(
         'project', 'vendor', 'purchase_order', 'paid_from_account',
         'submitted_by', 'approved_by'
     )
     permission_classes = [IsAuthenticated]
+    period_date_field = 'expense_date'
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'category', 'project', 'vendor']
     search_fields = ['expense_number', 'description', 'vendor__name']
@@ -373,25 +483,15 @@ class ExpenseViewSet(viewsets.ModelViewSet):
     
 
     def perform_create(self, serializer):
-        with transaction.atomic():
-            last_expense = Expense.objects.select_for_update().order_by('-id').first()
-        
-            if last_expense:
-                last_id = last_expense.id
-                expense_number = f"EXP-{last_id + 1:05d}"
-            else:
-                expense_number = "EXP-00001"
-
-            serializer.save(
-                expense_number=expense_number,
-                submitted_by=self.request.user.profile
-            )
+        # expense_number comes from the numbering series (see numbering.py)
+        serializer.save(submitted_by=self.request.user.profile)
 
 
     @action(detail=True, methods=['post'], permission_classes=[CanApproveExpenses])
     def approve(self, request, pk=None):
         """Approve expense"""
         expense = self.get_object()
+        self.check_open_period(expense)
         
         if expense.status != 'pending':
             return Response(
@@ -409,6 +509,7 @@ class ExpenseViewSet(viewsets.ModelViewSet):
     def reject(self, request, pk=None):
         """Reject expense"""
         expense = self.get_object()
+        self.check_open_period(expense)
         
         expense.status = 'rejected'
         expense.approved_by = request.user.profile
@@ -421,31 +522,30 @@ class ExpenseViewSet(viewsets.ModelViewSet):
     def mark_paid(self, request, pk=None):
         """Mark expense as paid"""
         expense = self.get_object()
+        self.check_open_period(expense)
         
-        if expense.status != 'approved':
-            return Response(
-                {'error': 'Only approved expenses can be marked as paid'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        expense.status = 'paid'
-        expense.save()
-        
-        # Create bank transaction if account specified
-        if expense.paid_from_account:
-            BankTransaction.objects.create(
-                account=expense.paid_from_account,
-                transaction_date=timezone.now().date(),
-                transaction_type='withdrawal',
-                amount=expense.total_amount,
-                balance_after=expense.paid_from_account.current_balance - expense.total_amount,
-                reference_number=expense.expense_number,
-                description=f"Expense payment - {expense.description}",
-                expense=expense
-            )
+        with transaction.atomic():
+            # Lock the expense so a double submit cannot pay it twice
+            expense = Expense.objects.select_for_update().get(pk=expense.pk)
+            if expense.status != 'approved':
+                return Response(
+                    {'error': 'Only approved expenses can be marked as paid'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
-            expense.paid_from_account.current_balance -= expense.total_amount
-            expense.paid_from_account.save()
+            expense.status = 'paid'
+            expense.save()
+            
+            # Create bank transaction if account specified
+            if expense.paid_from_account_id:
+                post_bank_entry(
+                    expense.paid_from_account_id,
+                    transaction_type='withdrawal',
+                    amount=expense.total_amount,
+                    reference_number=expense.expense_number,
+                    description=f"Expense payment - {expense.description}",
+                    expense=expense
+                )
         
         return Response({'status': 'Expense marked as paid'})
 
@@ -457,6 +557,7 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @cached_response(Expense)
     def expense_summary(self, request):
         """Get expense summary by category"""
         category = request.query_params.get('category')
@@ -477,12 +578,12 @@ class ExpenseViewSet(viewsets.ModelViewSet):
             count=Count('id')
         )
         
-        return Response(summary)
+        return Response(list(summary))
 
 
 # ==================== BANK ACCOUNTS ====================
 
-class BankAccountViewSet(viewsets.ModelViewSet):
+class BankAccountViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = BankAccount.objects.all()
     serializer_class = BankAccountSerializer
     permission_classes = [IsAuthenticated, IsFinanceManager]
@@ -495,10 +596,115 @@ class BankAccountViewSet(viewsets.ModelViewSet):
     def transactions(self, request, pk=None):
         """Get transactions for this account"""
         account = self.get_object()
-        transactions = account.transactions.all()[:50]
-        serializer = BankTransactionSerializer(transactions, many=True)
+        transactions = account.transactions.select_related('account', 'payment', 'expense')
+        # Paged in the transactions' own ordering, not this viewset's
+        page = self.paginator.paginate_queryset(transactions, request) if self.paginator else None
+        if page is not None:
+            serializer = BankTransactionSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = BankTransactionSerializer(transactions[:50], many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post'])
+    def post_entries(self, request, pk=None):
+        """Post a batch of transactions to this account in one balance update"""
+        account = self.get_object()
+        serializer = BankEntrySerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            balance, created = post_bank_entries(account, serializer.validated_data)
+        except PostingError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        for bank_transaction in created:
+            bank_transaction.account = account
+        return Response({
+            'current_balance': balance,
+            'transactions': BankTransactionSerializer(created, many=True).data
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def reconcile(self, request, pk=None):
+        """Match unlinked statement lines to payments and expenses"""
+        account = self.get_object()
+        try:
+            window_days = int(request.data.get('window_days', DATE_WINDOW_DAYS))
+        except (TypeError, ValueError):
+            return Response({'error': 'window_days must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        options = {
+            'window_days': window_days,
+            'auto_apply': str(request.data.get('auto_apply', 'true')).lower() in ('1', 'true', 'yes'),
+            'full': str(request.data.get('full', '')).lower() in ('1', 'true', 'yes'),
+        }
+        if wants_async(request):
+            return offload(request, 'finance.reconcile', account=account.pk, **options)
+        
+        return Response(reconcile_account(account, **options))
+
+    @action(detail=True, methods=['get'])
+    def reconciliation(self, request, pk=None):
+        """Unmatched lines and proposed matches (?status=unmatched|proposed|matched)"""
+        account = self.get_object()
+        statuses = request.query_params.getlist('status') or ['unmatched', 'proposed']
+        items = ReconciliationItem.objects.filter(
+            account=account, status__in=statuses
+        ).select_related(
+            'bank_transaction', 'payment', 'expense'
+        ).order_by('-score', 'bank_transaction__transaction_date')[:200]
+        serializer = ReconciliationItemSerializer(items, many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['post'])
+    def confirm_matches(self, request, pk=None):
+        """Apply reviewed proposals (body: {"items": [ids]})"""
+        account = self.get_object()
+        item_ids = request.data.get('items')
+        if not isinstance(item_ids, list) or not item_ids:
+            return Response({'error': 'items must be a list of ids'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        applied, rejected = confirm_reconciliation(account, item_ids, confirmed_by=request.user.profile)
+        return Response({
+            'confirmed': len(applied),
+            'rejected': rejected
+        })
+
+    @action(detail=True, methods=['get'])
+    def balance_series(self, request, pk=None):
+        """End-of-day/week/month balances (?start=&end=YYYY-MM-DD&resolution=day|week|month)"""
+        account = self.get_object()
+        resolution = request.query_params.get('resolution', 'day')
+        if resolution not in BALANCE_RESOLUTIONS:
+            return Response(
+                {'error': f'resolution must be one of {", ".join(BALANCE_RESOLUTIONS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        today = timezone.now().date()
+        try:
+            end = datetime.strptime(request.query_params['end'], '%Y-%m-%d').date() \
+                if request.query_params.get('end') else today
+            start = datetime.strptime(request.query_params['start'], '%Y-%m-%d').date() \
+                if request.query_params.get('start') else end - timedelta(days=30)
+        except ValueError:
+            return Response({'error': 'start and end must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        if end < start:
+            return Response({'error': 'end must not be before start'}, status=status.HTTP_400_BAD_REQUEST)
+        if resolution == 'day' and (end - start).days > MAX_DAILY_POINTS:
+            return Response(
+                {'error': f'Use week or month resolution for more than {MAX_DAILY_POINTS} days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({
+            'account': account.pk,
+            'resolution': resolution,
+            'start': start,
+            'end': end,
+            'points': balance_series(account, start, end, resolution)
+        })
+
     @action(detail=True, methods=['get'])
     def balance_history(self, request, pk=None):
         """Get balance history"""
@@ -514,19 +720,29 @@ class BankAccountViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class BankTransactionViewSet(viewsets.ModelViewSet):
+class BankTransactionViewSet(OpenPeriodDestroyMixin, ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = BankTransaction.objects.all().select_related('account', 'payment', 'expense')
     serializer_class = BankTransactionSerializer
     permission_classes = [IsAuthenticated, IsFinanceManager]
+    period_date_field = 'transaction_date'
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['account', 'transaction_type']
     ordering_fields = ['transaction_date', 'amount']
     ordering = ['-transaction_date']
 
+    def perform_create(self, serializer):
+        # Moves the account balance and derives balance_after
+        entry = dict(serializer.validated_data)
+        account = entry.pop('account')
+        try:
+            serializer.instance = post_bank_entry(account, **entry)
+        except PostingError as e:
+            raise ValidationError({'amount': str(e)})
+
 
 # ==================== BUDGETS ====================
 
-class BudgetViewSet(viewsets.ModelViewSet):
+class BudgetViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Budget.objects.all().select_related('project', 'created_by').prefetch_related('line_items')
     serializer_class = BudgetSerializer
     permission_classes = [IsAuthenticated]
@@ -565,7 +781,7 @@ class BudgetViewSet(viewsets.ModelViewSet):
         return Response(variance_data)
 
 
-class BudgetLineItemViewSet(viewsets.ModelViewSet):
+class BudgetLineItemViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = BudgetLineItem.objects.all()
     serializer_class = BudgetLineItemSerializer
     permission_classes = [IsAuthenticated]
@@ -573,7 +789,7 @@ class BudgetLineItemViewSet(viewsets.ModelViewSet):
 
 # ==================== COST TRACKING ====================
 
-class CostCenterViewSet(viewsets.ModelViewSet):
+class CostCenterViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = CostCenter.objects.all()
     serializer_class = CostCenterSerializer
     permission_classes = [IsAuthenticated]
@@ -581,10 +797,11 @@ class CostCenterViewSet(viewsets.ModelViewSet):
     search_fields = ['code', 'name']
 
 
-class ProjectCostViewSet(viewsets.ModelViewSet):
+class ProjectCostViewSet(OpenPeriodDestroyMixin, ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = ProjectCost.objects.all().select_related('project', 'cost_center', 'expense')
     serializer_class = ProjectCostSerializer
     permission_classes = [IsAuthenticated]
+    period_date_field = 'date'
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['project', 'cost_center']
     ordering_fields = ['date', 'actual_amount']
@@ -613,7 +830,7 @@ class ProjectCostViewSet(viewsets.ModelViewSet):
 
 # ==================== PETTY CASH ====================
 
-class PettyCashAccountViewSet(viewsets.ModelViewSet):
+class PettyCashAccountViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = PettyCashAccount.objects.all().select_related('custodian')
     serializer_class = PettyCashAccountSerializer
     permission_classes = [IsAuthenticated]
@@ -630,30 +847,26 @@ class PettyCashAccountViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create transaction
-        PettyCashTransaction.objects.create(
-            account=account,
-            transaction_date=timezone.now().date(),
+        # Create transaction and move the balance
+        post_petty_cash_entry(
+            account,
             transaction_type='replenishment',
             amount=amount,
-            balance_after=account.current_balance + amount,
             description='Petty cash replenishment',
             requested_by=request.user.profile,
             approved_by=request.user.profile
         )
         
-        account.current_balance += amount
-        account.save()
-        
         return Response({'status': 'Petty cash replenished', 'new_balance': account.current_balance})
 
 
-class PettyCashTransactionViewSet(viewsets.ModelViewSet):
+class PettyCashTransactionViewSet(OpenPeriodDestroyMixin, ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = PettyCashTransaction.objects.all().select_related(
         'account', 'requested_by', 'approved_by'
     )
     serializer_class = PettyCashTransactionSerializer
     permission_classes = [IsAuthenticated]
+    period_date_field = 'transaction_date'
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['account', 'transaction_type']
     ordering = ['-transaction_date']
@@ -661,7 +874,7 @@ class PettyCashTransactionViewSet(viewsets.ModelViewSet):
 
 # ==================== ASSETS ====================
 
-class AssetViewSet(viewsets.ModelViewSet):
+class AssetViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Asset.objects.all().select_related('assigned_to', 'project')
     serializer_class = AssetSerializer
     permission_classes = [IsAuthenticated]
@@ -673,25 +886,56 @@ class AssetViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def calculate_depreciation(self, request, pk=None):
-        """Calculate and update depreciation"""
+        """Bring this asset's depreciation schedule up to the current month"""
         asset = self.get_object()
-        
-        # Simple straight-line depreciation
-        years_used = (timezone.now().date() - asset.purchase_date).days / 365.25
-        annual_depreciation = (asset.purchase_price - asset.salvage_value) / asset.useful_life_years
-        
-        asset.accumulated_depreciation = min(
-            annual_depreciation * years_used,
-            asset.purchase_price - asset.salvage_value
-        )
-        asset.current_value = asset.purchase_price - asset.accumulated_depreciation
-        asset.save()
+        run_depreciation(assets=Asset.objects.filter(pk=asset.pk))
+        asset.refresh_from_db()
         
         return Response({
             'accumulated_depreciation': asset.accumulated_depreciation,
             'current_value': asset.current_value
         })
 
+    @action(detail=False, methods=['post'])
+    def run_depreciation(self, request):
+        """Depreciate all active assets through a month (body: {"month": "YYYY-MM"})"""
+        period_end = None
+        if request.data.get('month'):
+            try:
+                period_end = datetime.strptime(request.data['month'], '%Y-%m').date()
+            except (TypeError, ValueError):
+                return Response({'error': 'month must be YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if wants_async(request):
+            return offload(request, 'finance.run_depreciation', period_end=period_end)
+        return Response(run_depreciation(period_end))
+
+    @action(detail=True, methods=['get'])
+    def depreciation_schedule(self, request, pk=None):
+        """Stored monthly depreciation of this asset"""
+        asset = self.get_object()
+        entries = asset.depreciation_entries.order_by('period_end')
+        serializer = DepreciationEntrySerializer(entries, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def depreciation_summary(self, request):
+        """Depreciation per month and asset type from the stored schedule (?year=YYYY)"""
+        try:
+            year = int(request.query_params.get('year', timezone.now().year))
+        except ValueError:
+            return Response({'error': 'year must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        summary = DepreciationEntry.objects.filter(
+            period_end__gte=datetime(year, 1, 1).date(),
+            period_end__lte=datetime(year, 12, 31).date()
+        ).values('period_end', 'asset__asset_type').annotate(
+            total=Sum('depreciation'),
+            assets=Count('asset')
+        ).order_by('period_end', 'asset__asset_type')
+        
+        return Response(list(summary))
+
     @action(detail=True, methods=['post'])
     def dispose(self, request, pk=None):
         """Dispose of an asset"""
@@ -707,13 +951,13 @@ class AssetViewSet(viewsets.ModelViewSet):
 
 # ==================== COMMISSIONS ====================
 
-class CommissionStructureViewSet(viewsets.ModelViewSet):
+class CommissionStructureViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = CommissionStructure.objects.all()
     serializer_class = CommissionStructureSerializer
     permission_classes = [IsAuthenticated, IsFinanceManager]
 
 
-class CommissionViewSet(viewsets.ModelViewSet):
+class CommissionViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Commission.objects.all().select_related(
         'employee', 'allocation', 'structure'
     )
@@ -756,10 +1000,37 @@ class CommissionViewSet(viewsets.ModelViewSet):
         
         return Response({'status': 'Commission marked as paid'})
 
+    @action(detail=False, methods=['post'], permission_classes=[IsFinanceManager])
+    def calculate(self, request):
+        """
+        Calculate the commissions of a sales period
+        (body: {"month": "YYYY-MM"} or start/end as YYYY-MM-DD, inclusive; "full": true to recompute all)
+        """
+        try:
+            if request.data.get('month'):
+                start, end = month_range(datetime.strptime(request.data['month'], '%Y-%m').date())
+            elif request.data.get('start') or request.data.get('end'):
+                start = datetime.strptime(request.data['start'], '%Y-%m-%d').date()
+                end = datetime.strptime(request.data['end'], '%Y-%m-%d').date() + timedelta(days=1)
+            else:
+                start, end = month_range(timezone.now().date())
+        except (KeyError, TypeError, ValueError):
+            return Response(
+                {'error': 'Use month=YYYY-MM or start and end as YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if end <= start:
+            return Response({'error': 'end must not be before start'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        full = str(request.data.get('full', '')).lower() in ('1', 'true', 'yes')
+        if wants_async(request):
+            return offload(request, 'finance.calculate_commissions', start=start, end=end, full=full)
+        return Response(run_report(calculate_commissions(start, end, full=full)))
+
 
 # ==================== FINANCIAL REPORTS ====================
 
-class FinancialPeriodViewSet(viewsets.ModelViewSet):
+class FinancialPeriodViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = FinancialPeriod.objects.all()
     serializer_class = FinancialPeriodSerializer
     permission_classes = [IsAuthenticated, IsFinanceManager]
@@ -767,14 +1038,103 @@ class FinancialPeriodViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def close_period(self, request, pk=None):
-        """Close financial period"""
+        """Close financial period, freezing its totals"""
         period = self.get_object()
-        period.is_closed = True
-        period.save()
+        try:
+            close_financial_period(period)
+        except ClosedPeriodError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         return Response({'status': 'Period closed'})
 
+    @action(detail=True, methods=['get'])
+    def totals(self, request, pk=None):
+        """Period totals by ?dimension= (frozen once the period is closed)"""
+        period = self.get_object()
+        dimension = request.query_params.get('dimension', 'project')
+        if dimension not in PERIOD_DIMENSIONS:
+            return Response(
+                {'error': f'dimension must be one of {", ".join(PERIOD_DIMENSIONS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        source, rows = period_totals(period, dimension)
+        return Response({'period': period.pk, 'dimension': dimension, 'source': source, 'rows': rows})
+
+    @action(detail=False, methods=['get'])
+    def comparison(self, request):
+        """Side-by-side totals of several periods (?periods=1,2,3&dimension=)"""
+        dimension = request.query_params.get('dimension', 'project')
+        if dimension not in PERIOD_DIMENSIONS:
+            return Response(
+                {'error': f'dimension must be one of {", ".join(PERIOD_DIMENSIONS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            period_ids = [int(pk) for pk in request.query_params.get('periods', '').split(',') if pk.strip()]
+        except ValueError:
+            return Response({'error': 'periods must be a list of ids'}, status=status.HTTP_400_BAD_REQUEST)
+        periods = list(self.queryset.filter(pk__in=period_ids).order_by('start_date'))
+        if not periods:
+            return Response({'error': 'periods is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        rows = {}
+        sources = []
+        for period in periods:
+            source, totals = period_totals(period, dimension)
+            sources.append({'id': period.pk, 'name': period.name, 'source': source})
+            for total in totals:
+                row = rows.setdefault(total['key'], {'key': total['key'], 'label': total['label'], 'periods': {}})
+                row['periods'][period.pk] = {
+                    metric: value for metric, value in total.items() if metric not in ('key', 'label')
+                }
+        
+        return Response({'dimension': dimension, 'periods': sources, 'rows': list(rows.values())})
+
+
+class FinanceDashboardView(APIView):
+    """
+    Finance landing page: GET /api/finance/dashboard/?month=YYYY-MM
+    (or ?start=&end=, inclusive; default this month). ?cached=1 serves a
+    cached copy until one of the underlying tables changes.
+    """
+    permission_classes = [IsAuthenticated, IsFinanceManager]
 
-class TaxConfigurationViewSet(viewsets.ModelViewSet):
+    def get(self, request):
+        try:
+            start, end = self._period(request.query_params)
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'Use month=YYYY-MM or start and end as YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if end <= start:
+            return Response({'error': 'end must not be before start'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if wants_async(request):
+            return offload(request, 'finance.dashboard', start=start, end=end)
+        if str(request.query_params.get('cached', '')).lower() in ('1', 'true', 'yes'):
+            return self.cached_dashboard(request, start, end)
+        return self.dashboard(request, start, end)
+
+    def _period(self, params):
+        """[start, end) of the requested period"""
+        if params.get('month'):
+            return month_range(datetime.strptime(params['month'], '%Y-%m').date())
+        if params.get('start') or params.get('end'):
+            start = datetime.strptime(params['start'], '%Y-%m-%d').date()
+            end = datetime.strptime(params['end'], '%Y-%m-%d').date()
+            return start, end + timedelta(days=1)
+        return month_range(timezone.now().date())
+
+    def dashboard(self, request, start, end):
+        return Response(dashboard_data(finance_dashboard(start, end)))
+
+    @cached_response(Invoice, Payment, Expense, PurchaseOrder, BankAccount, PettyCashAccount)
+    def cached_dashboard(self, request, start, end):
+        return self.dashboard(request, start, end)
+
+
+class TaxConfigurationViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = TaxConfiguration.objects.all()
     serializer_class = TaxConfigurationSerializer
     permission_classes = [IsAuthenticated, IsFinanceManager]
@@ -0,0 +1,22 @@
+# himFirm/celery.py
+"""
+Celery app for background jobs (see jobs/runner.py).
+
+Workers take one or more queues, e.g.:
+
+    celery -A himFirm worker -Q reports -c 2
+    celery -A himFirm worker -Q imports,default -c 1
+    celery -A himFirm worker -Q notifications -c 4
+
+Without CELERY_BROKER_URL / REDIS_URL tasks run inline in the calling
+process (eager), which is what tests and local development use.
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'himFirm.settings')
+
+app = Celery('himFirm')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
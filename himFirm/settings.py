@@ -46,6 +46,9 @@ INSTALLED_APPS = [
     'crm',
     'support',
     'audit',
+    'search',
+    'jobs',
+    'realtime',
 ]
 
 REST_FRAMEWORK = {
@@ -55,6 +58,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
 SIMPLE_JWT = {
@@ -79,6 +84,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'audit.capture.AuditMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -90,6 +96,8 @@ AUTHENTICATION_BACKENDS = [
 
 ROOT_URLCONF = 'himFirm.urls'
 
+TEST_RUNNER = 'himFirm.test_runner.TestRunner'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -116,6 +124,76 @@ DATABASES = {
     )
 }
 
+# Cache - Redis when REDIS_URL is set, process-local memory otherwise (tests, local dev)
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'himfirm',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'himfirm',
+        }
+    }
+
+# Websockets (realtime app) - Redis channel layer when REDIS_URL is set, in-process memory
+# otherwise (tests, local dev; only reaches clients connected to the same process)
+ASGI_APPLICATION = 'himFirm.asgi.application'
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL], 'prefix': 'himfirm'},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
+# Audit trail (audit/writer.py): committed entries are spooled to AUDIT_SPOOL_DIR and written
+# with bulk_create by a per-process thread every AUDIT_FLUSH_INTERVAL seconds, or once
+# AUDIT_FLUSH_SIZE are waiting. 0 writes each entry on commit (one-off scripts; the test
+# runner sets it, with a scratch spool directory).
+AUDIT_SPOOL_DIR = config('AUDIT_SPOOL_DIR', default=str(BASE_DIR / 'var' / 'audit'))
+AUDIT_FLUSH_INTERVAL = config('AUDIT_FLUSH_INTERVAL', default=1.0, cast=float)
+AUDIT_FLUSH_SIZE = config('AUDIT_FLUSH_SIZE', default=500, cast=int)
+
+# Analytics responses: per-process LRU in front of the shared cache
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+RESPONSE_CACHE_LOCAL_ENTRIES = config('RESPONSE_CACHE_LOCAL_ENTRIES', default=512, cast=int)
+
+# Background jobs (jobs app, himFirm/celery.py). Queues: reports (read-heavy
+# reports and exports), imports (bulk imports and batch recalculations),
+# notifications; anything else goes to default. Without a broker, tasks run eagerly in-process.
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default=REDIS_URL or 'memory://')
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=CELERY_BROKER_URL == 'memory://', cast=bool)
+CELERY_TASK_IGNORE_RESULT = True  # Status and results live on jobs.Job
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_TIME_LIMIT = config('CELERY_TASK_TIME_LIMIT', default=3600, cast=int)
+JOB_QUEUES = ['default', 'reports', 'imports', 'notifications']
+
+# ?format=csv|xlsx exports (core/export.py): rows fetched per cursor round trip, and
+# the largest XLSX built in the request; bigger ones become a background job
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+EXPORT_XLSX_MAX_ROWS = config('EXPORT_XLSX_MAX_ROWS', default=100000, cast=int)
+
+# Document numbers (finance/numbering.py): per-series format overrides,
+# e.g. {'invoice': 'INV/{year}/{number:04d}'}, and the per-process cache size: numbers
+# reserved per process at a time (the database sequences still step by one)
+DOCUMENT_NUMBER_FORMATS = {}
+DOCUMENT_NUMBER_BLOCK_SIZE = config('DOCUMENT_NUMBER_BLOCK_SIZE', default=20, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
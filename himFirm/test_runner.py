@@ -0,0 +1,28 @@
+# himFirm/test_runner.py
+"""
+Test runner (TEST_RUNNER in settings.py).
+
+Audit entries are written as soon as their transaction commits, and any
+spool file goes to a scratch directory removed after the run: a test run
+never leaves spool files behind for a writer of the real database to adopt.
+"""
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.scratch = tempfile.mkdtemp(prefix='himfirm-tests-')
+        self.saved_audit = settings.AUDIT_FLUSH_INTERVAL, settings.AUDIT_SPOOL_DIR
+        settings.AUDIT_FLUSH_INTERVAL = 0
+        settings.AUDIT_SPOOL_DIR = str(Path(self.scratch) / 'audit')
+
+    def teardown_test_environment(self, **kwargs):
+        settings.AUDIT_FLUSH_INTERVAL, settings.AUDIT_SPOOL_DIR = self.saved_audit
+        shutil.rmtree(self.scratch, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
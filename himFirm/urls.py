@@ -26,6 +26,8 @@ urlpatterns = [
     # Mid Management Level
     path('api/projects/', include('projects.urls')),       # PMDC Manager + PPD Unit
     path('api/production/', include('production.urls')),  # Production & Depot + BWU Unit
+    path('api/search/', include('search.urls')),           # Full-text search across projects, tasks, documents, customers
+    path('api/jobs/', include('jobs.urls')),               # Background job status (?async=1 on heavy actions)
 
     # First Level / Entry
     # These can share the above endpoints based on permissions
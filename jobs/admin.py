@@ -0,0 +1,17 @@
+# jobs/admin.py
+from django.contrib import admin
+from .models import Job
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'queue', 'status', 'progress', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'queue', 'name', 'created_at')
+    search_fields = ('name', 'created_by__email', 'message')
+    date_hierarchy = 'created_at'
+    readonly_fields = (
+        'name', 'queue', 'params', 'status', 'progress', 'message', 'result', 'result_file',
+        'error', 'created_by', 'created_at', 'started_at', 'finished_at'
+    )
+
+    def has_add_permission(self, request):
+        return False  # Jobs are created by the API
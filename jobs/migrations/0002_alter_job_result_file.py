@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-17 18:05
+
+import jobs.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='result_file',
+            field=models.FileField(blank=True, null=True, upload_to=jobs.models.result_path),
+        ),
+    ]
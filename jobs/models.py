@@ -0,0 +1,64 @@
+# jobs/models.py
+import os
+import secrets
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def result_path(job, filename):
+    """An unguessable name; result files are served only by the job's download action"""
+    extension = os.path.splitext(filename)[1]
+    return f"jobs/{timezone.now():%Y/%m}/{secrets.token_urlsafe(24)}{extension}"
+
+
+def upload_path(filename):
+    """Where an upload waits for its job: an unguessable name keeping only the extension"""
+    extension = os.path.splitext(filename)[1]
+    return f"jobs/uploads/{secrets.token_urlsafe(24)}{extension}"
+
+
+class Job(models.Model):
+    """A unit of background work run by a Celery worker (see runner.py)"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)  # registered job, e.g. "finance.receivable_aging"
+    queue = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0)  # percent
+    message = models.CharField(max_length=255, blank=True)
+    
+    # Encoded as the API renders it, so results read the same as synchronous responses
+    result = models.JSONField(null=True, blank=True, encoder=JSONEncoder)
+    result_file = models.FileField(upload_to=result_path, null=True, blank=True)
+    error = models.TextField(blank=True)
+    
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_by', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    def set_progress(self, progress, message=''):
+        """Record progress without touching the other columns"""
+        self.progress = max(0, min(int(progress), 100))
+        self.message = message[:255]
+        Job.objects.filter(pk=self.pk).update(progress=self.progress, message=self.message)
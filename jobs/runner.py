@@ -0,0 +1,104 @@
+# jobs/runner.py
+"""
+Background jobs.
+
+A job is a plain function registered under a name and a queue:
+
+    @job('finance.receivable_aging', queue='reports')
+    def receivable_aging(job, as_of=None, group_by='customer'):
+        ...
+        return {...}            # stored as Job.result
+
+``enqueue(name, user, **params)`` records a ``Job`` and hands its id to the
+``jobs.run_job`` Celery task on the job's queue once the caller's transaction
+commits. The worker looks the function up, calls it with the job and its
+(JSON) params, and stores the return value, or a one-line error (the
+traceback goes to the log, not to API clients). Functions can call
+``job.set_progress()`` on the way and save a file to ``job.result_file``.
+
+Job functions live in each app's ``tasks.py`` so the worker's task
+autodiscovery registers them.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from audit.capture import acting_as
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+# Job.error is shown to API clients
+MAX_ERROR_LENGTH = 500
+
+
+class UnknownJob(Exception):
+    pass
+
+
+def job(name, queue='default'):
+    """Register the decorated ``func(job, **params)`` as job ``name`` on ``queue``"""
+    if queue not in settings.JOB_QUEUES:
+        raise ValueError(f"Unknown job queue {queue!r}; add it to settings.JOB_QUEUES")
+
+    def decorator(func):
+        _registry[name] = (func, queue)
+        return func
+    return decorator
+
+
+def enqueue(name, user=None, **params):
+    """Create a queued Job for ``name`` and send it to its worker queue"""
+    from .tasks import run_job
+
+    if name not in _registry:
+        raise UnknownJob(name)
+    func, queue = _registry[name]
+    if user is not None and not user.is_authenticated:
+        user = None
+
+    record = Job.objects.create(name=name, queue=queue, params=params, created_by=user)
+    transaction.on_commit(lambda: run_job.apply_async(args=[record.pk], queue=queue))
+    return record
+
+
+def execute(job_id):
+    """Run a queued job (called by the worker)"""
+    record = Job.objects.filter(pk=job_id).first()
+    if record is None or record.status in ('succeeded', 'failed'):
+        # Deleted, or a redelivery of a job that already finished
+        return
+    if record.name not in _registry:
+        _finish(record, 'failed', error=f"Unknown job {record.name}")
+        return
+
+    func, queue = _registry[record.name]
+    record.status = 'running'
+    record.started_at = timezone.now()
+    record.save(update_fields=['status', 'started_at'])
+
+    try:
+        # Changes made by the job are audited as the user who queued it
+        with acting_as(record.created_by_id):
+            result = func(record, **record.params)
+    except Exception as e:
+        logger.exception("Job %s #%s failed", record.name, record.pk)
+        _finish(record, 'failed', error=f"{type(e).__name__}: {e}"[:MAX_ERROR_LENGTH])
+        return
+    _finish(record, 'succeeded', result=result)
+
+
+def _finish(record, status, result=None, error=''):
+    record.status = status
+    record.result = result
+    record.error = error
+    if status == 'succeeded':
+        record.progress = 100
+    record.finished_at = timezone.now()
+    record.save(update_fields=['status', 'result', 'error', 'progress', 'finished_at'])
@@ -0,0 +1,25 @@
+# jobs/serializers.py
+from django.urls import reverse
+from rest_framework import serializers
+from .models import Job
+
+class JobSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    result_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'queue', 'params',
+            'status', 'status_display', 'progress', 'message',
+            'result', 'result_url', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+    def get_result_url(self, obj):
+        if not obj.result_file:
+            return None
+        request = self.context.get('request')
+        url = reverse('job-download', args=[obj.pk])
+        return request.build_absolute_uri(url) if request else url
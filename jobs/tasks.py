@@ -0,0 +1,9 @@
+# jobs/tasks.py
+from celery import shared_task
+
+from .runner import execute
+
+
+@shared_task(name='jobs.run_job')
+def run_job(job_id):
+    execute(job_id)
@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from core.models import CustomUser
+from .models import Job
+from .runner import UnknownJob, enqueue, job
+
+
+@job('tests.add', queue='default')
+def add(job, a, b):
+    job.set_progress(50, 'Halfway')
+    return {'sum': a + b}
+
+
+@job('tests.fail', queue='default')
+def fail(job, message):
+    job.set_progress(30, 'Started')
+    raise ValueError(message)
+
+
+def make_user(email, **fields):
+    return CustomUser.objects.create_user(username=email, email=email, password='secret', **fields)
+
+
+class RunnerTests(TestCase):
+    def setUp(self):
+        # Job uploads and results live under MEDIA_ROOT
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = make_user('u@x.com')
+
+    def test_enqueue_records_a_queued_job(self):
+        record = enqueue('tests.add', self.user, a=1, b=2)
+        self.assertEqual(record.status, 'queued')
+        self.assertEqual(record.queue, 'default')
+        self.assertEqual(record.params, {'a': 1, 'b': 2})
+        self.assertEqual(record.created_by, self.user)
+
+    def test_job_runs_once_the_transaction_commits(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record = enqueue('tests.add', self.user, a=1, b=2)
+            self.assertEqual(Job.objects.get(pk=record.pk).status, 'queued')
+        record.refresh_from_db()
+        self.assertEqual(record.status, 'succeeded')
+        self.assertEqual(record.result, {'sum': 3})
+        self.assertEqual(record.progress, 100)
+        self.assertEqual(record.message, 'Halfway')
+        self.assertIsNotNone(record.started_at)
+        self.assertIsNotNone(record.finished_at)
+
+    def test_failure_stores_a_short_error_and_logs_the_traceback(self):
+        with self.assertLogs('jobs.runner', 'ERROR') as logs, self.captureOnCommitCallbacks(execute=True):
+            record = enqueue('tests.fail', self.user, message='Bad row 7')
+        record.refresh_from_db()
+        self.assertEqual(record.status, 'failed')
+        self.assertEqual(record.error, 'ValueError: Bad row 7')
+        self.assertEqual(record.progress, 30)
+        self.assertIn('Traceback', logs.output[0])
+
+    def test_unknown_job_is_refused(self):
+        with self.assertRaises(UnknownJob):
+            enqueue('tests.missing', self.user)
+
+
+class JobApiTests(APITestCase):
+    def setUp(self):
+        self.owner = make_user('owner@x.com')
+        self.record = Job.objects.create(name='tests.add', queue='default', created_by=self.owner)
+
+    def test_users_see_their_own_jobs(self):
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.client.get(f'/api/jobs/{self.record.pk}/').data['status'], 'queued')
+
+        self.client.force_authenticate(make_user('other@x.com'))
+        self.assertEqual(self.client.get(f'/api/jobs/{self.record.pk}/').status_code, 404)
+
+    def test_staff_see_every_job(self):
+        self.client.force_authenticate(make_user('staff@x.com', is_staff=True))
+        self.assertEqual(self.client.get(f'/api/jobs/{self.record.pk}/').status_code, 200)
@@ -0,0 +1,15 @@
+# jobs/urls.py
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
+from .views import JobViewSet
+
+router = SimpleRouter()
+router.register(r'', JobViewSet, basename='job')
+
+urlpatterns = [
+    # Base path: /api/jobs/
+    # GET    /api/jobs/          → Your jobs, newest first
+    # GET    /api/jobs/{id}/     → Status, progress, result / result_url
+    # GET    /api/jobs/{id}/download/ → Result file (the job's creator only)
+    path('', include(router.urls)),
+]
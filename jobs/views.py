@@ -0,0 +1,57 @@
+# jobs/views.py
+import os
+
+from django.http import FileResponse, Http404
+from django.urls import reverse
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django_filters.rest_framework import DjangoFilterBackend
+from core.fieldsets import SparseFieldsetMixin
+from .models import Job
+from .runner import enqueue
+from .serializers import JobSerializer
+
+
+def wants_async(request):
+    """True when the caller asked for ?async=1"""
+    return str(request.query_params.get('async', '')).lower() in ('1', 'true', 'yes')
+
+
+def offload(request, name, **params):
+    """Queue job ``name`` for the caller; 202 with the job and where to poll it"""
+    record = enqueue(name, request.user, **params)
+    record.refresh_from_db()  # Eager mode (tests, development) has already run it
+    url = request.build_absolute_uri(reverse('job-detail', args=[record.pk]))
+    data = JobSerializer(record, context={'request': request}).data
+    data['url'] = url
+    return Response(data, status=status.HTTP_202_ACCEPTED, headers={'Location': url})
+
+
+class JobViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Status, progress and result of background jobs.
+    Users see their own jobs; staff see all. Result files are downloaded
+    only by the user who queued the job.
+    """
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['name', 'status', 'queue']
+    ordering = ['-created_at']
+
+    def get_queryset(self):
+        queryset = Job.objects.all()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(created_by=self.request.user)
+        return queryset
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """The job's result file (e.g. an export)"""
+        job = self.get_object()
+        if job.created_by_id != request.user.pk or not job.result_file:
+            raise Http404
+        filename = (job.result or {}).get('filename') or os.path.basename(job.result_file.name)
+        return FileResponse(job.result_file.open('rb'), as_attachment=True, filename=filename)
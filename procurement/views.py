@@ -3,10 +3,12 @@ from rest_framework import viewsets, filters, serializers
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
+from core.export import ExportMixin
+from core.fieldsets import SparseFieldsetMixin
 from .models import Supplier, PurchaseOrder
 from .serializers import SupplierSerializer, PurchaseOrderSerializer
 
-class SupplierViewSet(viewsets.ModelViewSet):
+class SupplierViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API for managing suppliers (Procurement & Purchasing Manager primary use).
     """
@@ -20,7 +22,7 @@ class SupplierViewSet(viewsets.ModelViewSet):
     ordering = ['name']
 
 
-class PurchaseOrderViewSet(viewsets.ModelViewSet):
+class PurchaseOrderViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API for purchase orders (P&D Unit).
     - Procurement Manager: Full access
@@ -2,6 +2,8 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from core.export import ExportMixin
+from core.fieldsets import SparseFieldsetMixin
 from .models import RawMaterial, ProductionBatch, BrickStock, Delivery
 from .serializers import (
     RawMaterialSerializer,
@@ -10,7 +12,7 @@ from .serializers import (
     DeliverySerializer
 )
 
-class RawMaterialViewSet(viewsets.ModelViewSet):
+class RawMaterialViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing raw materials used in brick production.
     Accessible to Production & Depot Manager and Procurement.
@@ -38,7 +40,7 @@ class RawMaterialViewSet(viewsets.ModelViewSet):
         return qs
 
 
-class ProductionBatchViewSet(viewsets.ModelViewSet):
+class ProductionBatchViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API endpoint for brick production batches (core of BWU Unit).
     Used by Production Manager and Block Officer for quality control.
@@ -59,7 +61,7 @@ class ProductionBatchViewSet(viewsets.ModelViewSet):
     ordering = ['-production_date']
 
 
-class BrickStockViewSet(viewsets.ModelViewSet):
+class BrickStockViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API endpoint for tracking brick inventory in warehouse and sites.
     """
@@ -79,7 +81,7 @@ class BrickStockViewSet(viewsets.ModelViewSet):
     ordering = ['-quantity']
 
 
-class DeliveryViewSet(viewsets.ModelViewSet):
+class DeliveryViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API endpoint for brick deliveries to projects/sites.
     Used by Delivery Officer, Driver, and Project Supervisor.
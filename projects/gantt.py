@@ -0,0 +1,137 @@
+# projects/gantt.py
+"""
+Compact Gantt payload for a project.
+
+Phases, milestones, tasks and dependencies come back as parallel arrays
+(one list per column), read with ``values_list`` and no serializer. The
+strong ETag is built from the max ``updated_at`` and row count of each
+contributing table, gathered in one query, so an unchanged chart can be
+answered with 304 before any rows are read.
+"""
+import hashlib
+
+from django.db.models import (
+    Count, Max, OuterRef, Subquery, Value, IntegerField, DateTimeField
+)
+from django.db.models.functions import Coalesce
+
+from .models import (
+    Project, ProjectPhase, ProjectMilestone, ProjectTask, TaskDependency
+)
+
+
+# name -> (model, lookup from the row to its project)
+SOURCES = {
+    'phases': (ProjectPhase, 'project'),
+    'milestones': (ProjectMilestone, 'project'),
+    'tasks': (ProjectTask, 'project'),
+    'dependencies': (TaskDependency, 'task__project'),
+}
+
+
+def _per_project(model, project_field, aggregate, output_field):
+    return Subquery(
+        model.objects.filter(**{project_field: OuterRef('pk')})
+        .order_by()
+        .values(project_field)
+        .annotate(value=aggregate)
+        .values('value'),
+        output_field=output_field
+    )
+
+
+def gantt_etag(project):
+    """Strong ETag for the project's Gantt payload, from one query"""
+    annotations = {}
+    for name, (model, project_field) in SOURCES.items():
+        annotations[f'{name}_updated'] = _per_project(
+            model, project_field, Max('updated_at'), DateTimeField()
+        )
+        annotations[f'{name}_count'] = Coalesce(
+            _per_project(model, project_field, Count('id'), IntegerField()),
+            Value(0)
+        )
+
+    versions = Project.objects.filter(pk=project.pk).annotate(
+        **annotations
+    ).values('updated_at', *annotations).get()
+
+    token = '|'.join(
+        f'{key}={versions[key].isoformat() if hasattr(versions[key], "isoformat") else versions[key]}'
+        for key in sorted(versions)
+    )
+    return hashlib.sha1(f'{project.pk}|{token}'.encode('utf-8')).hexdigest()
+
+
+def _columns(rows, names):
+    columns = {name: [] for name in names}
+    for row in rows:
+        for name, value in zip(names, row):
+            columns[name].append(value)
+    return columns
+
+
+def _date(value):
+    return value.isoformat() if value else None
+
+
+def _percent(value):
+    return float(value) if value is not None else None
+
+
+def gantt_payload(project):
+    """Columnar Gantt data: parallel arrays per entity, dates as ISO strings"""
+    phases = _columns(
+        (
+            (pk, name, sequence, _date(start), _date(end), status, _percent(progress))
+            for pk, name, sequence, start, end, status, progress in
+            ProjectPhase.objects.filter(project=project).order_by('sequence').values_list(
+                'id', 'name', 'sequence', 'start_date', 'end_date', 'status', 'progress_percentage'
+            )
+        ),
+        ['id', 'name', 'sequence', 'start', 'end', 'status', 'progress']
+    )
+
+    milestones = _columns(
+        (
+            (pk, name, phase_id, _date(target), _date(actual), status, is_critical)
+            for pk, name, phase_id, target, actual, status, is_critical in
+            ProjectMilestone.objects.filter(project=project).order_by('target_date', 'id').values_list(
+                'id', 'name', 'phase_id', 'target_date', 'actual_date', 'status', 'is_critical'
+            )
+        ),
+        ['id', 'name', 'phase', 'date', 'actual_date', 'status', 'is_critical']
+    )
+
+    tasks = _columns(
+        (
+            (pk, title, phase_id, parent_id, assigned_to_id, _date(start), _date(due), status, _percent(progress))
+            for pk, title, phase_id, parent_id, assigned_to_id, start, due, status, progress in
+            ProjectTask.objects.filter(project=project).order_by('due_date', 'id').values_list(
+                'id', 'title', 'phase_id', 'parent_task_id', 'assigned_to_id',
+                'start_date', 'due_date', 'status', 'progress_percentage'
+            )
+        ),
+        ['id', 'title', 'phase', 'parent', 'assigned_to', 'start', 'due', 'status', 'progress']
+    )
+
+    dependencies = _columns(
+        TaskDependency.objects.filter(task__project=project).order_by('id').values_list(
+            'task_id', 'depends_on_id', 'dependency_type', 'lag_days'
+        ),
+        ['task', 'depends_on', 'type', 'lag_days']
+    )
+
+    return {
+        'project': {
+            'id': project.pk,
+            'code': project.code,
+            'name': project.name,
+            'start': _date(project.start_date),
+            'expected_completion': _date(project.expected_completion),
+        },
+        'phases': phases,
+        'milestones': milestones,
+        'tasks': tasks,
+        'dependencies': dependencies,
+    }
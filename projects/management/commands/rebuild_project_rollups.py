@@ -0,0 +1,26 @@
+# projects/management/commands/rebuild_project_rollups.py
+from django.core.management.base import BaseCommand
+
+from projects.models import Project
+from projects.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute ProjectRollup rows for all (or the given) projects"
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_ids', nargs='*', type=int, help="Only rebuild these projects")
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        project_ids = Project.objects.order_by('pk').values_list('pk', flat=True)
+        if options['project_ids']:
+            project_ids = project_ids.filter(pk__in=options['project_ids'])
+        project_ids = list(project_ids)
+
+        chunk_size = options['chunk_size']
+        rebuilt = 0
+        for start in range(0, len(project_ids), chunk_size):
+            rebuilt += refresh_rollups(project_ids[start:start + chunk_size])
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} project rollups"))
@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-17 09:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tasks_total', models.IntegerField(default=0)),
+                ('tasks_pending', models.IntegerField(default=0)),
+                ('tasks_in_progress', models.IntegerField(default=0)),
+                ('tasks_review', models.IntegerField(default=0)),
+                ('tasks_completed', models.IntegerField(default=0)),
+                ('tasks_on_hold', models.IntegerField(default=0)),
+                ('tasks_cancelled', models.IntegerField(default=0)),
+                ('overdue_tasks', models.IntegerField(default=0)),
+                ('overdue_as_of', models.DateField(blank=True, help_text='Date the overdue count was computed for', null=True)),
+                ('active_risks', models.IntegerField(default=0)),
+                ('open_issues', models.IntegerField(default=0)),
+                ('pending_change_orders', models.IntegerField(default=0)),
+                ('budgeted_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('actual_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rollup', to='projects.project')),
+            ],
+            options={
+                'verbose_name': 'Project Rollup',
+                'verbose_name_plural': 'Project Rollups',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 10:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_projectrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projecttask',
+            index=models.Index(fields=['due_date', 'id'], name='projects_pr_due_dat_dc8fba_idx'),
+        ),
+    ]
@@ -294,6 +294,8 @@ class ProjectPhase(models.Model):
     budget = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     actual_cost = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     
+    updated_at = models.DateTimeField(auto_now=True)
+    
     class Meta:
         ordering = ['project', 'sequence']
         unique_together = ['project', 'sequence']
@@ -442,6 +444,9 @@ class ProjectTask(models.Model):
     
     class Meta:
         ordering = ['project', '-priority', 'due_date']
+        indexes = [
+            models.Index(fields=['due_date', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.project.code} - {self.title}"
@@ -467,6 +472,8 @@ class TaskDependency(models.Model):
     dependency_type = models.CharField(max_length=50, choices=DEPENDENCY_TYPES, default='finish_to_start')
     lag_days = models.IntegerField(default=0, help_text="Number of days delay after dependency")
     
+    updated_at = models.DateTimeField(auto_now=True)
+    
     class Meta:
         unique_together = ['task', 'depends_on']
         verbose_name_plural = 'Task Dependencies'
@@ -1122,4 +1129,39 @@ class SafetyIncident(models.Model):
         ordering = ['-incident_date']
     
     def __str__(self):
-        return f"{self.project.code} - {self.severity} - {self.incident_date.date()}"
\ No newline at end of file
+        return f"{self.project.code} - {self.severity} - {self.incident_date.date()}"
+
+# ==================== ROLLUPS ====================
+
+class ProjectRollup(models.Model):
+    """Per-project counts and sums read by the portfolio dashboard"""
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, related_name='rollup')
+    
+    # Tasks
+    tasks_total = models.IntegerField(default=0)
+    tasks_pending = models.IntegerField(default=0)
+    tasks_in_progress = models.IntegerField(default=0)
+    tasks_review = models.IntegerField(default=0)
+    tasks_completed = models.IntegerField(default=0)
+    tasks_on_hold = models.IntegerField(default=0)
+    tasks_cancelled = models.IntegerField(default=0)
+    overdue_tasks = models.IntegerField(default=0)
+    overdue_as_of = models.DateField(blank=True, null=True, help_text="Date the overdue count was computed for")
+    
+    # Risks, Issues & Change Orders
+    active_risks = models.IntegerField(default=0)
+    open_issues = models.IntegerField(default=0)
+    pending_change_orders = models.IntegerField(default=0)
+    
+    # Budget lines (budget vs actual)
+    budgeted_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    actual_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    
+    updated_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = 'Project Rollup'
+        verbose_name_plural = 'Project Rollups'
+    
+    def __str__(self):
+        return f"Rollup for {self.project_id}"
@@ -0,0 +1,77 @@
+# projects/resources.py
+"""Bulk import resources of the projects app (see core.imports)"""
+from core.imports import BulkModelResource
+from realtime.events import project_stream, resync, tasks_stream
+
+from .models import LandParcel, ProjectTask, ProjectExpense
+from .rollups import schedule_refresh
+from .signals import _invalidate_schedules
+
+
+class LandParcelResource(BulkModelResource):
+    class Meta:
+        model = LandParcel
+        import_id_fields = ['title_number']
+        exclude = ['id', 'created_at', 'updated_at']
+
+
+class ProjectTaskResource(BulkModelResource):
+    """Tasks by id (blank id: new task); the project by code, people by email"""
+
+    class Meta:
+        model = ProjectTask
+        fields = [
+            'id', 'project', 'phase', 'category', 'parent_task', 'title', 'description', 'task_code',
+            'assigned_to', 'start_date', 'due_date', 'completed_date', 'estimated_hours', 'actual_hours',
+            'status', 'priority', 'progress_percentage', 'is_billable', 'requires_approval', 'notes',
+        ]
+        widgets = {
+            'project': {'field': 'code'},
+            'category': {'field': 'name'},
+            'assigned_to': {'field': 'user__email'},
+        }
+
+    def after_init_instance(self, instance, new, row, **kwargs):
+        super().after_init_instance(instance, new, row, **kwargs)
+        if new:
+            instance.created_by = getattr(self.user, 'profile', None)
+
+    def after_bulk_import(self, instances):
+        # What projects.signals does on each task save
+        project_ids, assignee_ids = set(), set()
+        for task in instances:
+            project_ids.update((task.project_id, getattr(task, '_loaded_project_id', None)))
+            assignee_ids.update((task.assigned_to_id, getattr(task, '_realtime_state', {}).get('assigned_to_id')))
+        project_ids.discard(None)
+        assignee_ids.discard(None)
+        for project_id in project_ids:
+            schedule_refresh(project_id, 'tasks')
+        _invalidate_schedules(*project_ids)
+        resync([project_stream(pk) for pk in project_ids] + [tasks_stream(pk) for pk in assignee_ids])
+
+
+class ProjectExpenseResource(BulkModelResource):
+    """Expenses by id (blank id: new expense); the project by code, the category by code"""
+
+    class Meta:
+        model = ProjectExpense
+        fields = [
+            'id', 'project', 'budget_line', 'category', 'expense_type', 'description', 'amount',
+            'expense_date', 'invoice_number', 'vendor_name', 'payment_status', 'notes',
+        ]
+        widgets = {
+            'project': {'field': 'code'},
+            'category': {'field': 'code'},
+        }
+
+    def after_init_instance(self, instance, new, row, **kwargs):
+        super().after_init_instance(instance, new, row, **kwargs)
+        if new:
+            instance.submitted_by = getattr(self.user, 'profile', None)
+
+    def after_bulk_import(self, instances):
+        project_ids = set()
+        for expense in instances:
+            project_ids.update((expense.project_id, getattr(expense, '_realtime_state', {}).get('project_id')))
+        project_ids.discard(None)
+        resync([project_stream(pk) for pk in project_ids])
@@ -0,0 +1,189 @@
+# projects/rollups.py
+"""
+Incremental maintenance of ``ProjectRollup`` rows.
+
+Child-model signals queue the affected project and section; the queue is
+flushed once per transaction, recomputing each touched section with one
+grouped conditional-aggregation query per child table. The
+``rebuild_project_rollups`` command recomputes everything, which also picks up
+writes that bypass signals (``QuerySet.update``, ``bulk_create`` ...).
+"""
+import threading
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Count, Sum
+from django.utils import timezone
+
+from core.versioning import bump_version
+
+from .models import (
+    Project, ProjectTask, ProjectRisk, ProjectIssue, ChangeOrder,
+    ProjectBudgetLine, ProjectRollup
+)
+
+
+TASK_STATUS_FIELDS = {
+    'pending': 'tasks_pending',
+    'in_progress': 'tasks_in_progress',
+    'review': 'tasks_review',
+    'completed': 'tasks_completed',
+    'on_hold': 'tasks_on_hold',
+    'cancelled': 'tasks_cancelled',
+}
+
+OPEN_TASK_STATUSES = ['pending', 'in_progress']
+ACTIVE_RISK_STATUSES = ['identified', 'analyzing', 'mitigating']
+OPEN_ISSUE_STATUSES = ['open', 'in_progress']
+PENDING_CHANGE_ORDER_STATUSES = ['draft', 'submitted', 'under_review']
+
+
+def _task_values(project_ids, today):
+    aggregates = {
+        'tasks_total': Count('id'),
+        'overdue_tasks': Count(
+            'id', filter=Q(status__in=OPEN_TASK_STATUSES, due_date__lt=today)
+        ),
+    }
+    for status_value, field in TASK_STATUS_FIELDS.items():
+        aggregates[field] = Count('id', filter=Q(status=status_value))
+
+    rows = ProjectTask.objects.filter(project_id__in=project_ids).order_by().values(
+        'project_id'
+    ).annotate(**aggregates)
+    return rows, dict.fromkeys(aggregates, 0), {'overdue_as_of': today}
+
+
+def _count_values(model, field, statuses, project_ids):
+    rows = model.objects.filter(
+        project_id__in=project_ids, status__in=statuses
+    ).order_by().values('project_id').annotate(**{field: Count('id')})
+    return rows, {field: 0}, {}
+
+
+def _budget_values(project_ids):
+    rows = ProjectBudgetLine.objects.filter(project_id__in=project_ids).order_by().values(
+        'project_id'
+    ).annotate(
+        budgeted_amount=Sum('budgeted_amount'),
+        actual_amount=Sum('actual_amount'),
+    )
+    return rows, {'budgeted_amount': Decimal('0'), 'actual_amount': Decimal('0')}, {}
+
+
+SECTIONS = {
+    'tasks': lambda ids, today: _task_values(ids, today),
+    'risks': lambda ids, today: _count_values(
+        ProjectRisk, 'active_risks', ACTIVE_RISK_STATUSES, ids
+    ),
+    'issues': lambda ids, today: _count_values(
+        ProjectIssue, 'open_issues', OPEN_ISSUE_STATUSES, ids
+    ),
+    'change_orders': lambda ids, today: _count_values(
+        ChangeOrder, 'pending_change_orders', PENDING_CHANGE_ORDER_STATUSES, ids
+    ),
+    'budget': lambda ids, today: _budget_values(ids),
+}
+
+
+def refresh_rollups(project_ids, sections=None):
+    """Recompute the given sections (default: all) of the rollups for ``project_ids``"""
+    project_ids = set(Project.objects.filter(
+        pk__in=[pk for pk in project_ids if pk is not None]
+    ).values_list('pk', flat=True))
+    if not project_ids:
+        return 0
+
+    sections = list(sections or SECTIONS)
+    today = timezone.now().date()
+
+    values = {pk: {} for pk in project_ids}
+    fields = set()
+    for section in sections:
+        rows, defaults, extra = SECTIONS[section](project_ids, today)
+        fields.update(defaults)
+        fields.update(extra)
+        for pk in project_ids:
+            values[pk].update(defaults)
+            values[pk].update(extra)
+        for row in rows:
+            project_id = row.pop('project_id')
+            values[project_id].update(
+                {key: value if value is not None else defaults[key] for key, value in row.items()}
+            )
+
+    now = timezone.now()
+    existing = {
+        rollup.project_id: rollup
+        for rollup in ProjectRollup.objects.filter(project_id__in=project_ids)
+    }
+    to_create = []
+    for pk, row in values.items():
+        rollup = existing.get(pk)
+        if rollup is None:
+            to_create.append(ProjectRollup(project_id=pk, updated_at=now, **row))
+            continue
+        for field, value in row.items():
+            setattr(rollup, field, value)
+        rollup.updated_at = now
+
+    if to_create:
+        ProjectRollup.objects.bulk_create(to_create, ignore_conflicts=True)
+    if existing:
+        ProjectRollup.objects.bulk_update(
+            existing.values(), sorted(fields) + ['updated_at']
+        )
+    # Bulk writes send no signals
+    bump_version(ProjectRollup)
+    return len(values)
+
+
+def refresh_overdue(projects):
+    """
+    Bring rollups for ``projects`` up to date before they are read: tasks become
+    overdue by the passing of time, not by a save, so task sections computed on
+    an earlier day are recomputed, and projects without a rollup row are built.
+    """
+    today = timezone.now().date()
+    stale = list(ProjectRollup.objects.filter(project__in=projects).exclude(
+        overdue_as_of=today
+    ).values_list('project_id', flat=True))
+    missing = list(projects.filter(rollup__isnull=True).values_list('pk', flat=True))
+
+    if stale:
+        refresh_rollups(stale, sections=['tasks'])
+    if missing:
+        refresh_rollups(missing)
+
+
+# ==================== DEFERRED REFRESH ====================
+
+_pending = threading.local()
+
+
+def _flush():
+    queued = getattr(_pending, 'queue', None) or {}
+    _pending.queue = None
+
+    by_sections = {}
+    for project_id, sections in queued.items():
+        by_sections.setdefault(frozenset(sections), []).append(project_id)
+    for sections, project_ids in by_sections.items():
+        refresh_rollups(project_ids, sections=sections)
+
+
+def schedule_refresh(project_id, *sections):
+    """Queue a rollup refresh for ``project_id``, run once when the transaction commits"""
+    if project_id is None:
+        return
+
+    queue = getattr(_pending, 'queue', None)
+    if queue is None:
+        queue = _pending.queue = {}
+
+    queue.setdefault(project_id, set()).update(sections or SECTIONS)
+    # Registered on every call: entries queued by a transaction or savepoint
+    # that rolled back stay behind without their callback, and must not keep
+    # a later change of the same project from being flushed. Callbacks that
+    # find the queue already flushed do nothing.
+    transaction.on_commit(_flush)
@@ -0,0 +1,197 @@
+# projects/scheduling.py
+"""
+Critical-path (CPM) scheduling over ProjectTask / TaskDependency.
+
+A project's tasks and dependencies are loaded in two queries and scheduled in
+memory: topological sort, forward pass (earliest start/finish), backward pass
+(latest start/finish), total float and the critical path. Times are whole days
+counted from the schedule anchor; a task with a ``start_date`` may not start
+before it. Results are cached per project and dropped when a task or
+dependency of the project changes (see ``signals.py``).
+"""
+from collections import deque
+from datetime import timedelta
+
+from django.core.cache import cache
+
+from .models import ProjectTask, TaskDependency
+
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+EXCLUDED_STATUSES = ['cancelled']
+
+
+class DependencyCycleError(Exception):
+    """The dependency graph is not a DAG; ``cycle`` lists the task ids involved"""
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__(f"Dependency cycle between tasks {cycle}")
+
+
+def _duration(start_date, due_date):
+    if start_date and due_date and due_date >= start_date:
+        return (due_date - start_date).days + 1
+    return 1
+
+
+def _find_cycle(remaining, predecessors):
+    """Walk predecessor edges among unsorted tasks until one repeats"""
+    node = next(iter(remaining))
+    seen = {}
+    path = []
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = next(pred for pred, _, _ in predecessors[node] if pred in remaining)
+    cycle = path[seen[node]:]
+    cycle.reverse()
+    return cycle
+
+
+def compute_schedule(tasks, dependencies, anchor=None):
+    """
+    Schedule ``tasks`` (id, title, start_date, due_date) under ``dependencies``
+    (task_id, depends_on_id, dependency_type, lag_days).
+
+    Raises DependencyCycleError when the dependencies contain a cycle.
+    """
+    ids = [task[0] for task in tasks]
+    index = {task_id: i for i, task_id in enumerate(ids)}
+    count = len(ids)
+
+    if anchor is None:
+        starts = [task[2] for task in tasks if task[2]] or [task[3] for task in tasks if task[3]]
+        anchor = min(starts) if starts else None
+
+    duration = [_duration(task[2], task[3]) for task in tasks]
+    not_before = [
+        (task[2] - anchor).days if task[2] and anchor else 0
+        for task in tasks
+    ]
+
+    predecessors = [[] for _ in range(count)]
+    successors = [[] for _ in range(count)]
+    for task_id, depends_on_id, dependency_type, lag in dependencies:
+        succ = index.get(task_id)
+        pred = index.get(depends_on_id)
+        if succ is None or pred is None:
+            # Dependency on a task outside the schedule (other project, cancelled)
+            continue
+        predecessors[succ].append((pred, dependency_type, lag or 0))
+        successors[pred].append((succ, dependency_type, lag or 0))
+
+    # Kahn's algorithm
+    indegree = [len(preds) for preds in predecessors]
+    queue = deque(i for i in range(count) if indegree[i] == 0)
+    order = []
+    while queue:
+        node = queue.popleft()
+        order.append(node)
+        for succ, _, _ in successors[node]:
+            indegree[succ] -= 1
+            if indegree[succ] == 0:
+                queue.append(succ)
+
+    if len(order) < count:
+        remaining = set(range(count)) - set(order)
+        raise DependencyCycleError([ids[i] for i in _find_cycle(remaining, predecessors)])
+
+    # Forward pass
+    early_start = [0] * count
+    early_finish = [0] * count
+    for node in order:
+        start = not_before[node]
+        for pred, dependency_type, lag in predecessors[node]:
+            if dependency_type == 'start_to_start':
+                start = max(start, early_start[pred] + lag)
+            elif dependency_type == 'finish_to_finish':
+                start = max(start, early_finish[pred] + lag - duration[node])
+            elif dependency_type == 'start_to_finish':
+                start = max(start, early_start[pred] + lag - duration[node])
+            else:
+                start = max(start, early_finish[pred] + lag)
+        early_start[node] = start
+        early_finish[node] = start + duration[node]
+
+    project_finish = max(early_finish) if count else 0
+
+    # Backward pass
+    late_finish = [project_finish] * count
+    late_start = [0] * count
+    for node in reversed(order):
+        finish = project_finish
+        for succ, dependency_type, lag in successors[node]:
+            if dependency_type == 'start_to_start':
+                finish = min(finish, late_start[succ] - lag + duration[node])
+            elif dependency_type == 'finish_to_finish':
+                finish = min(finish, late_finish[succ] - lag)
+            elif dependency_type == 'start_to_finish':
+                finish = min(finish, late_finish[succ] - lag + duration[node])
+            else:
+                finish = min(finish, late_start[succ] - lag)
+        late_finish[node] = finish
+        late_start[node] = finish - duration[node]
+
+    def as_date(offset):
+        return anchor + timedelta(days=offset) if anchor else None
+
+    results = []
+    critical_path = []
+    for node in order:
+        total_float = late_start[node] - early_start[node]
+        is_critical = total_float <= 0
+        if is_critical:
+            critical_path.append(ids[node])
+        results.append({
+            'id': ids[node],
+            'title': tasks[node][1],
+            'duration_days': duration[node],
+            'earliest_start': as_date(early_start[node]),
+            # Finish dates are the last working day, hence the -1
+            'earliest_finish': as_date(early_finish[node] - 1),
+            'latest_start': as_date(late_start[node]),
+            'latest_finish': as_date(late_finish[node] - 1),
+            'total_float': total_float,
+            'is_critical': is_critical,
+        })
+
+    critical_path.sort(key=lambda task_id: early_start[index[task_id]])
+    project_start = min(early_start) if count else 0
+    return {
+        'project_start': as_date(project_start) if count else None,
+        'project_finish': as_date(project_finish - 1) if count else None,
+        'duration_days': project_finish - project_start,
+        'task_count': count,
+        'critical_path': critical_path,
+        'tasks': results,
+    }
+
+
+def _cache_key(project_id):
+    return f'projects:schedule:{project_id}'
+
+
+def project_schedule(project):
+    """Cached CPM schedule for ``project``; raises DependencyCycleError"""
+    key = _cache_key(project.pk)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    tasks = list(ProjectTask.objects.filter(project=project).exclude(
+        status__in=EXCLUDED_STATUSES
+    ).order_by('pk').values_list('id', 'title', 'start_date', 'due_date'))
+    dependencies = list(TaskDependency.objects.filter(
+        task__project=project
+    ).values_list('task_id', 'depends_on_id', 'dependency_type', 'lag_days'))
+
+    schedule = compute_schedule(tasks, dependencies, anchor=project.start_date)
+    cache.set(key, schedule, CACHE_TIMEOUT)
+    return schedule
+
+
+def invalidate_schedule(project_id):
+    if project_id is not None:
+        cache.delete(_cache_key(project_id))
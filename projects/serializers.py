@@ -10,8 +10,18 @@ from .models import (
     ProjectInspection, ProjectRisk, ProjectIssue, ChangeOrder,
     DailyProgressReport, ProjectMeeting, SafetyIncident
 )
+from .statistics import ProjectStatistics, task_annotations
 from documents.serializers import DocumentSerializer
 from core.serializers import EmployeeProfileSerializer
+from core.fieldsets import Requires
+
+
+def _task_count(name, statistic):
+    """Requirement for a per-project task count, as a correlated subquery"""
+    def annotate():
+        from django.utils import timezone
+        return {name: task_annotations(timezone.now().date())[statistic]}
+    return Requires(annotate=annotate)
 
 
 # ==================== LAND & PROPERTY ====================
@@ -96,6 +106,19 @@ class ProjectListSerializer(serializers.ModelSerializer):
             'task_count', 'completed_tasks', 'overdue_tasks',
             'is_delayed', 'days_until_completion', 'created_at'
         ]
+        field_requirements = {
+            'task_count': _task_count('task_count', 'task_total'),
+            'completed_tasks': _task_count('completed_tasks', 'task_completed'),
+            'overdue_tasks': _task_count('overdue_tasks', 'task_overdue'),
+            'budget_variance': Requires(only=['budget', 'actual_cost']),
+            'is_delayed': Requires(only=['expected_completion', 'status']),
+            'days_until_completion': Requires(only=['expected_completion', 'status']),
+        }
+        expandable_fields = {
+            'manager': (EmployeeProfileSerializer, {}),
+            'land_parcel': (LandParcelListSerializer, {}),
+            'project_type': (ProjectTypeSerializer, {}),
+        }
     
     def get_days_until_completion(self, obj):
         if obj.expected_completion and obj.status not in ['completed', 'cancelled']:
@@ -142,57 +165,31 @@ class ProjectSerializer(serializers.ModelSerializer):
     class Meta:
         model = Project
         fields = '__all__'
+        field_requirements = {
+            'task_statistics': Requires(),
+            'phase_statistics': Requires(),
+            'budget_statistics': Requires(only=['budget', 'contingency_budget', 'actual_cost']),
+            'timeline_info': Requires(only=['start_date', 'expected_completion', 'status']),
+            'budget_variance': Requires(only=['budget', 'actual_cost']),
+            'is_delayed': Requires(only=['expected_completion', 'status']),
+        }
+    
+    def _statistics(self, obj):
+        # One rollup per project, shared by all the statistics fields
+        if not hasattr(self, '_statistics_cache'):
+            self._statistics_cache = {}
+        if obj.pk not in self._statistics_cache:
+            self._statistics_cache[obj.pk] = ProjectStatistics(obj)
+        return self._statistics_cache[obj.pk]
     
     def get_task_statistics(self, obj):
-        tasks = obj.tasks.all()
-        total = tasks.count()
-        
-        return {
-            'total': total,
-            'pending': tasks.filter(status='pending').count(),
-            'in_progress': tasks.filter(status='in_progress').count(),
-            'completed': tasks.filter(status='completed').count(),
-            'overdue': tasks.filter(
-                status__in=['pending', 'in_progress'],
-                due_date__lt=serializers.DateField().to_representation(
-                    serializers.DateField().to_internal_value(
-                        serializers.DateField().get_default()
-                    )
-                )
-            ).count() if total > 0 else 0,
-            'completion_rate': (tasks.filter(status='completed').count() / total * 100) if total > 0 else 0
-        }
+        return self._statistics(obj).task_statistics()
     
     def get_budget_statistics(self, obj):
-        budget_lines = obj.budget_lines.aggregate(
-            total_budgeted=Sum('budgeted_amount'),
-            total_actual=Sum('actual_amount'),
-            total_committed=Sum('committed_amount')
-        )
-        
-        expenses = obj.expenses.aggregate(
-            total_expenses=Sum('amount'),
-            paid_expenses=Sum('amount', filter=Q(payment_status='paid')),
-            pending_expenses=Sum('amount', filter=Q(payment_status='pending'))
-        )
-        
-        return {
-            'total_budget': float(obj.budget),
-            'contingency_budget': float(obj.contingency_budget),
-            'actual_cost': float(obj.actual_cost),
-            'variance': float(obj.budget_variance),
-            'budget_lines': budget_lines,
-            'expenses': expenses,
-            'utilization_percentage': (float(obj.actual_cost) / float(obj.budget) * 100) if obj.budget > 0 else 0
-        }
+        return self._statistics(obj).budget_statistics()
     
     def get_phase_statistics(self, obj):
-        phases = obj.phases.all()
-        return {
-            'total_phases': phases.count(),
-            'completed_phases': phases.filter(status='completed').count(),
-            'current_phase': phases.filter(status='in_progress').first().name if phases.filter(status='in_progress').exists() else None
-        }
+        return self._statistics(obj).phase_statistics()
     
     def get_timeline_info(self, obj):
         from django.utils import timezone
@@ -295,6 +292,13 @@ class ProjectTaskListSerializer(serializers.ModelSerializer):
             'phase', 'phase_name', 'start_date', 'due_date',
             'estimated_hours', 'actual_hours', 'is_overdue', 'created_at'
         ]
+        field_requirements = {
+            'is_overdue': Requires(only=['status', 'due_date']),
+        }
+        expandable_fields = {
+            'assigned_to': (EmployeeProfileSerializer, {}),
+            'category': (TaskCategorySerializer, {}),
+        }
 
 
 class ProjectTaskSerializer(serializers.ModelSerializer):
@@ -321,6 +325,11 @@ class ProjectTaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProjectTask
         fields = '__all__'
+        field_requirements = {
+            'subtasks': Requires(prefetch=['subtasks']),
+            'is_overdue': Requires(only=['status', 'due_date']),
+            'hours_variance': Requires(only=['estimated_hours', 'actual_hours']),
+        }
     
     def get_subtasks(self, obj):
         subtasks = obj.subtasks.all()
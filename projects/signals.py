@@ -0,0 +1,93 @@
+# projects/signals.py
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from core.versioning import track_versions
+
+from .models import (
+    Project, ProjectTask, ProjectRisk, ProjectIssue, ChangeOrder,
+    ProjectBudgetLine, TaskDependency, ProjectType, TaskCategory,
+    ResourceCategory, ProjectResource, BudgetCategory, PermitType,
+    ProjectPermit, InspectionType, ProjectInspection, LandParcel,
+    ProjectTeamMember, SafetyIncident, ProjectRollup
+)
+from .rollups import schedule_refresh
+from .scheduling import invalidate_schedule
+
+
+ROLLUP_SECTIONS = {
+    ProjectTask: 'tasks',
+    ProjectRisk: 'risks',
+    ProjectIssue: 'issues',
+    ChangeOrder: 'change_orders',
+    ProjectBudgetLine: 'budget',
+}
+
+
+def _invalidate_schedules(*project_ids):
+    for project_id in set(project_ids):
+        invalidate_schedule(project_id)
+        # Again after commit, so a read racing the transaction cannot re-cache stale rows
+        transaction.on_commit(lambda project_id=project_id: invalidate_schedule(project_id))
+
+
+def remember_project(sender, instance, **kwargs):
+    """Keep the loaded project so a move between projects refreshes both"""
+    instance._loaded_project_id = instance.__dict__.get('project_id')
+
+
+def project_child_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    section = ROLLUP_SECTIONS[sender]
+    previous = getattr(instance, '_loaded_project_id', None)
+    if previous != instance.project_id:
+        schedule_refresh(previous, section)
+    schedule_refresh(instance.project_id, section)
+
+    if sender is ProjectTask:
+        _invalidate_schedules(previous, instance.project_id)
+    instance._loaded_project_id = instance.project_id
+
+
+for model in ROLLUP_SECTIONS:
+    post_init.connect(remember_project, sender=model, dispatch_uid=f'project_init_{model.__name__}')
+    post_save.connect(project_child_changed, sender=model, dispatch_uid=f'project_save_{model.__name__}')
+    post_delete.connect(project_child_changed, sender=model, dispatch_uid=f'project_delete_{model.__name__}')
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        schedule_refresh(instance.pk)
+    else:
+        # The schedule is anchored on the project start date
+        _invalidate_schedules(instance.pk)
+
+
+@receiver(post_save, sender=TaskDependency)
+@receiver(post_delete, sender=TaskDependency)
+def dependency_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    project_ids = ProjectTask.objects.filter(
+        pk__in=[instance.task_id, instance.depends_on_id]
+    ).values_list('project_id', flat=True)
+    _invalidate_schedules(*project_ids)
+
+
+# Reference-data viewsets cache by these versions (category, plus the rows behind its counts)
+track_versions(
+    ProjectType, Project,
+    TaskCategory, ProjectTask,
+    ResourceCategory, ProjectResource,
+    BudgetCategory, ProjectBudgetLine,
+    PermitType, ProjectPermit,
+    InspectionType, ProjectInspection,
+)
+
+# Cached analytics actions (see core.response_cache)
+track_versions(LandParcel, ProjectTeamMember, SafetyIncident, ProjectRollup)
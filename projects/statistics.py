@@ -0,0 +1,213 @@
+# projects/statistics.py
+"""
+Single-pass project statistics.
+
+Task, phase, budget-line and expense rollups for a project are computed in
+one query (correlated conditional-aggregation subqueries on the project row),
+or straight from the prefetched ``tasks`` when the caller already has them.
+"""
+from decimal import Decimal
+
+from django.db.models import (
+    Q, Count, Sum, OuterRef, Subquery, Value,
+    IntegerField, DecimalField, CharField
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (
+    Project, ProjectTask, ProjectPhase, ProjectBudgetLine, ProjectExpense
+)
+
+
+OPEN_TASK_STATUSES = ['pending', 'in_progress']
+
+MONEY = DecimalField(max_digits=15, decimal_places=2)
+
+
+def _rollup(queryset, aggregate, output_field):
+    """Correlated scalar subquery aggregating ``queryset`` for the outer project"""
+    subquery = Subquery(
+        queryset.filter(project=OuterRef('pk'))
+        .order_by()
+        .values('project')
+        .annotate(value=aggregate)
+        .values('value'),
+        output_field=output_field
+    )
+    return Coalesce(subquery, Value(0), output_field=output_field)
+
+
+def _count(queryset, **filters):
+    return _rollup(
+        queryset,
+        Count('id', filter=Q(**filters) if filters else None),
+        IntegerField()
+    )
+
+
+def _sum(queryset, field, **filters):
+    return _rollup(
+        queryset,
+        Sum(field, filter=Q(**filters) if filters else None),
+        MONEY
+    )
+
+
+def task_annotations(today):
+    tasks = ProjectTask.objects.all()
+    return {
+        'task_total': _count(tasks),
+        'task_pending': _count(tasks, status='pending'),
+        'task_in_progress': _count(tasks, status='in_progress'),
+        'task_completed': _count(tasks, status='completed'),
+        'task_overdue': _count(
+            tasks, status__in=OPEN_TASK_STATUSES, due_date__lt=today
+        ),
+    }
+
+
+def rollup_annotations():
+    phases = ProjectPhase.objects.all()
+    budget_lines = ProjectBudgetLine.objects.all()
+    expenses = ProjectExpense.objects.all()
+
+    return {
+        'phase_total': _count(phases),
+        'phase_completed': _count(phases, status='completed'),
+        'phase_current': Subquery(
+            phases.filter(project=OuterRef('pk'), status='in_progress')
+            .order_by('sequence')
+            .values('name')[:1],
+            output_field=CharField()
+        ),
+        'budget_total_budgeted': _sum(budget_lines, 'budgeted_amount'),
+        'budget_total_actual': _sum(budget_lines, 'actual_amount'),
+        'budget_total_committed': _sum(budget_lines, 'committed_amount'),
+        'expense_total': _sum(expenses, 'amount'),
+        'expense_paid': _sum(expenses, 'amount', payment_status='paid'),
+        'expense_pending': _sum(expenses, 'amount', payment_status='pending'),
+    }
+
+
+def _task_counts_from_rows(tasks, today):
+    counts = {
+        'task_total': 0,
+        'task_pending': 0,
+        'task_in_progress': 0,
+        'task_completed': 0,
+        'task_overdue': 0,
+    }
+    for task in tasks:
+        counts['task_total'] += 1
+        if task.status == 'pending':
+            counts['task_pending'] += 1
+        elif task.status == 'in_progress':
+            counts['task_in_progress'] += 1
+        elif task.status == 'completed':
+            counts['task_completed'] += 1
+        if task.status in OPEN_TASK_STATUSES and task.due_date < today:
+            counts['task_overdue'] += 1
+    return counts
+
+
+def _prefetched(project, name):
+    return getattr(project, '_prefetched_objects_cache', {}).get(name)
+
+
+class ProjectStatistics:
+    """Rollups for one project, loaded lazily in a single query"""
+
+    def __init__(self, project):
+        self.project = project
+        self.today = timezone.now().date()
+        self._values = None
+
+    @property
+    def values(self):
+        if self._values is None:
+            self._values = self._load()
+        return self._values
+
+    def _load(self):
+        annotations = rollup_annotations()
+        prefetched_tasks = _prefetched(self.project, 'tasks')
+        if prefetched_tasks is None:
+            annotations.update(task_annotations(self.today))
+
+        values = Project.objects.filter(pk=self.project.pk).annotate(
+            **annotations
+        ).values(*annotations.keys()).get()
+
+        if prefetched_tasks is not None:
+            values.update(_task_counts_from_rows(prefetched_tasks, self.today))
+        return values
+
+    def task_statistics(self):
+        v = self.values
+        total = v['task_total']
+        return {
+            'total': total,
+            'pending': v['task_pending'],
+            'in_progress': v['task_in_progress'],
+            'completed': v['task_completed'],
+            'overdue': v['task_overdue'],
+            'completion_rate': (v['task_completed'] / total * 100) if total > 0 else 0
+        }
+
+    def phase_statistics(self):
+        v = self.values
+        return {
+            'total_phases': v['phase_total'],
+            'completed_phases': v['phase_completed'],
+            'current_phase': v['phase_current'],
+        }
+
+    def budget_lines(self):
+        v = self.values
+        return {
+            'total_budgeted': v['budget_total_budgeted'],
+            'total_actual': v['budget_total_actual'],
+            'total_committed': v['budget_total_committed'],
+        }
+
+    def expenses(self):
+        v = self.values
+        return {
+            'total_expenses': v['expense_total'],
+            'paid_expenses': v['expense_paid'],
+            'pending_expenses': v['expense_pending'],
+        }
+
+    def budget_statistics(self):
+        project = self.project
+        return {
+            'total_budget': float(project.budget),
+            'contingency_budget': float(project.contingency_budget),
+            'actual_cost': float(project.actual_cost),
+            'variance': float(project.budget - project.actual_cost),
+            'budget_lines': self.budget_lines(),
+            'expenses': self.expenses(),
+            'utilization_percentage': self.budget_utilization(),
+        }
+
+    def budget_utilization(self):
+        project = self.project
+        if project.budget > 0:
+            return float(project.actual_cost) / float(project.budget) * 100
+        return 0
+
+    def expense_breakdown(self):
+        """Expense totals by type and by category name from one grouped query"""
+        by_type = {}
+        by_category = {}
+        rows = ProjectExpense.objects.filter(project=self.project).order_by().values(
+            'expense_type', 'category__name'
+        ).annotate(total=Sum('amount'))
+
+        for row in rows:
+            total = row['total'] or Decimal('0')
+            by_type[row['expense_type']] = by_type.get(row['expense_type'], Decimal('0')) + total
+            by_category[row['category__name']] = by_category.get(row['category__name'], Decimal('0')) + total
+
+        return by_type, by_category
@@ -1,3 +1,333 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from core.models import CustomUser, EmployeeProfile
+from jobs.models import Job
+from .models import Project, ProjectExpense, ProjectPhase, ProjectRollup, ProjectTask, TaskDependency
+from .scheduling import DependencyCycleError, compute_schedule
+from .statistics import ProjectStatistics
+
+
+def make_profile(email, position):
+    user = CustomUser.objects.create_user(username=email, email=email, password='secret')
+    return EmployeeProfile.objects.create(user=user, position=position)
+
+
+def make_project(manager, code='P-1'):
+    return Project.objects.create(
+        name=f'Project {code}', code=code, description='', start_date=date(2024, 1, 1),
+        budget=Decimal('100000'), manager=manager,
+    )
+
+
+def upload(content, name='tasks.csv'):
+    return SimpleUploadedFile(name, content.encode(), content_type='text/csv')
+
+
+class TaskImportTests(APITestCase):
+    def setUp(self):
+        # Background imports keep the upload under MEDIA_ROOT until their job runs
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.manager = make_profile('m@x.com', 'Project Manager')
+        self.worker = make_profile('w@x.com', 'Clerk')
+        self.project = make_project(self.manager)
+        self.hidden = ProjectTask.objects.create(project=self.project, title='Pour slab', due_date=date(2024, 6, 1), assigned_to=self.manager)
+        self.own = ProjectTask.objects.create(project=self.project, title='Fix door', due_date=date(2024, 6, 1), assigned_to=self.worker)
+
+    def import_tasks(self, user, content):
+        self.client.force_authenticate(user.user)
+        return self.client.post('/api/projects/tasks/import/', {'file': upload(content)}, format='multipart')
+
+    def test_cannot_update_task_outside_own_queryset(self):
+        self.client.force_authenticate(self.worker.user)
+        self.assertEqual(self.client.get(f'/api/projects/tasks/{self.hidden.pk}/').status_code, 404)
+
+        response = self.import_tasks(
+            self.worker, f'id,project,title,assigned_to\n{self.hidden.pk},P-1,Hijacked,w@x.com\n'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 0)
+        self.assertEqual(response.data['new'], 0)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertIn('id', response.data['errors'][0]['errors'])
+        self.hidden.refresh_from_db()
+        self.assertEqual(self.hidden.title, 'Pour slab')
+        self.assertEqual(self.hidden.assigned_to, self.manager)
+
+    def test_updates_own_task(self):
+        response = self.import_tasks(self.worker, f'id,project,title\n{self.own.pk},P-1,Fix back door\n')
+        self.assertEqual(response.data['updated'], 1)
+        self.own.refresh_from_db()
+        self.assertEqual(self.own.title, 'Fix back door')
+
+    def test_manager_sees_and_updates_every_task(self):
+        response = self.import_tasks(self.manager, f'id,project,title\n{self.hidden.pk},P-1,Pour slab B\n')
+        self.assertEqual(response.data['updated'], 1)
+
+    def test_rows_are_validated_by_the_serializer(self):
+        response = self.import_tasks(
+            self.manager, 'id,project,title,due_date,progress_percentage\n,P-1,New task,2024-06-01,50\n,P-1,Bad task,2024-06-01,150\n'
+        )
+        self.assertEqual(response.data['new'], 1)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+        self.assertTrue(ProjectTask.objects.filter(title='New task').exists())
+        self.assertFalse(ProjectTask.objects.filter(title='Bad task').exists())
+
+    def test_dry_run_saves_nothing(self):
+        self.client.force_authenticate(self.manager.user)
+        response = self.client.post('/api/projects/tasks/import/', {
+            'file': upload(f'id,project,title\n{self.own.pk},P-1,Renamed\n'), 'dry_run': 'true',
+        }, format='multipart')
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['changes'][0]['changes']['title'], ['Fix door', 'Renamed'])
+        self.own.refresh_from_db()
+        self.assertEqual(self.own.title, 'Fix door')
+
+    def test_background_import_is_scoped_too(self):
+        self.client.force_authenticate(self.worker.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/projects/tasks/import/?async=1', {
+                'file': upload(f'id,project,title\n{self.hidden.pk},P-1,Hijacked\n'),
+            }, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(pk=response.data['id'])
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.result['updated'], 0)
+        self.assertEqual(job.result['failed'], 1)
+        self.hidden.refresh_from_db()
+        self.assertEqual(self.hidden.title, 'Pour slab')
+
+
+class ProjectStatisticsTests(APITestCase):
+    def setUp(self):
+        self.manager = make_profile('m@x.com', 'Project Manager')
+        self.project = make_project(self.manager)
+        for status, due in [('pending', date(2020, 1, 1)), ('in_progress', date(2999, 1, 1)), ('completed', date(2020, 1, 1))]:
+            ProjectTask.objects.create(project=self.project, title=status, status=status, due_date=due)
+        for sequence, (name, status) in enumerate([('Dig', 'completed'), ('Frame', 'in_progress'), ('Roof', 'in_progress')]):
+            ProjectPhase.objects.create(
+                project=self.project, name=name, status=status, sequence=sequence,
+                start_date=date(2024, 1, 1), end_date=date(2024, 12, 31),
+            )
+        for expense_type, amount, status in [('material', '100.00', 'paid'), ('labor', '50.00', 'pending')]:
+            ProjectExpense.objects.create(
+                project=self.project, expense_type=expense_type, description=expense_type,
+                amount=Decimal(amount), expense_date=date(2024, 2, 1), payment_status=status,
+            )
+
+    def test_all_rollups_come_from_one_query(self):
+        statistics = ProjectStatistics(self.project)
+        with self.assertNumQueries(1):
+            tasks = statistics.task_statistics()
+            phases = statistics.phase_statistics()
+            expenses = statistics.expenses()
+        self.assertEqual(tasks, {
+            'total': 3, 'pending': 1, 'in_progress': 1, 'completed': 1, 'overdue': 1, 'completion_rate': 1 / 3 * 100,
+        })
+        self.assertEqual(phases, {'total_phases': 3, 'completed_phases': 1, 'current_phase': 'Frame'})
+        self.assertEqual(expenses, {
+            'total_expenses': Decimal('150.00'), 'paid_expenses': Decimal('100.00'), 'pending_expenses': Decimal('50.00'),
+        })
+
+    def test_prefetched_tasks_are_counted_in_python(self):
+        project = Project.objects.prefetch_related('tasks').get(pk=self.project.pk)
+        self.assertEqual(
+            ProjectStatistics(project).task_statistics(), ProjectStatistics(self.project).task_statistics()
+        )
+
+    def test_financial_summary(self):
+        self.client.force_authenticate(self.manager.user)
+        response = self.client.get(f'/api/projects/projects/{self.project.pk}/financial_summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['expenses_by_type'], {'material': Decimal('100.00'), 'labor': Decimal('50.00')})
+        self.assertEqual(response.data['expenses_by_category'], {None: Decimal('150.00')})
+
+
+class ProjectRollupTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager = make_profile('m@x.com', 'Project Manager')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first = make_project(self.manager, 'P-1')
+            self.second = make_project(self.manager, 'P-2')
+
+    def add_task(self, project, status='pending', due=date(2999, 1, 1)):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ProjectTask.objects.create(project=project, title=status, status=status, due_date=due)
+
+    def test_task_changes_refresh_the_rollup_on_commit(self):
+        task = self.add_task(self.first)
+        self.add_task(self.first, 'completed')
+        rollup = ProjectRollup.objects.get(project=self.first)
+        self.assertEqual((rollup.tasks_total, rollup.tasks_pending, rollup.tasks_completed), (2, 1, 1))
+
+        # Moving a task refreshes both projects
+        task.project = self.second
+        with self.captureOnCommitCallbacks(execute=True):
+            task.save()
+        self.assertEqual(ProjectRollup.objects.get(project=self.first).tasks_total, 1)
+        self.assertEqual(ProjectRollup.objects.get(project=self.second).tasks_pending, 1)
+
+    def test_rolled_back_change_does_not_strand_the_next_one(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            ProjectTask.objects.create(project=self.first, title='Gone', due_date=date(2999, 1, 1))
+            raise RuntimeError
+        self.add_task(self.first)
+        self.assertEqual(ProjectRollup.objects.get(project=self.first).tasks_total, 1)
+
+    def test_dashboard_reads_the_rollups_and_recounts_stale_overdue(self):
+        self.add_task(self.first, due=date(2020, 1, 1))
+        self.add_task(self.second, 'completed')
+        # Computed on an earlier day: the overdue count is redone on read
+        ProjectRollup.objects.update(overdue_tasks=0, overdue_as_of=date(2020, 1, 1))
+
+        self.client.force_authenticate(self.manager.user)
+        response = self.client.get('/api/projects/projects/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_tasks'], 2)
+        self.assertEqual(response.data['completed_tasks'], 1)
+        self.assertEqual(response.data['overdue_tasks'], 1)
+
+    def test_rebuild_command_picks_up_writes_without_signals(self):
+        self.add_task(self.first)
+        ProjectTask.objects.filter(project=self.first).update(status='completed')
+        call_command('rebuild_project_rollups', stdout=io.StringIO())
+        self.assertEqual(ProjectRollup.objects.get(project=self.first).tasks_completed, 1)
+
+
+class SchedulingTests(APITestCase):
+    def test_forward_and_backward_passes(self):
+        tasks = [
+            (1, 'Dig', date(2024, 1, 1), date(2024, 1, 3)),
+            (2, 'Order', date(2024, 1, 1), date(2024, 1, 2)),
+            (3, 'Pour', None, None),
+        ]
+        dependencies = [(3, 1, 'finish_to_start', 0), (3, 2, 'finish_to_start', 0)]
+        schedule = compute_schedule(tasks, dependencies)
+        by_id = {task['id']: task for task in schedule['tasks']}
+
+        self.assertEqual(schedule['critical_path'], [1, 3])
+        self.assertEqual(schedule['project_finish'], date(2024, 1, 4))
+        self.assertEqual(by_id[2]['total_float'], 1)
+        self.assertEqual(by_id[3]['earliest_start'], date(2024, 1, 4))
+        self.assertEqual(by_id[2]['latest_finish'], date(2024, 1, 3))
+
+    def test_lag_and_start_to_start(self):
+        tasks = [(1, 'A', date(2024, 1, 1), date(2024, 1, 5)), (2, 'B', None, None)]
+        schedule = compute_schedule(tasks, [(2, 1, 'start_to_start', 2)])
+        self.assertEqual(schedule['tasks'][1]['earliest_start'], date(2024, 1, 3))
+
+    def test_cycle_is_reported(self):
+        tasks = [(1, 'A', None, None), (2, 'B', None, None), (3, 'C', None, None)]
+        with self.assertRaises(DependencyCycleError) as raised:
+            compute_schedule(tasks, [(2, 1, 'finish_to_start', 0), (1, 2, 'finish_to_start', 0)])
+        self.assertEqual(sorted(raised.exception.cycle), [1, 2])
+
+    def test_schedule_endpoint_follows_dependency_changes(self):
+        cache.clear()
+        manager = make_profile('m@x.com', 'Project Manager')
+        project = make_project(manager)
+        first = ProjectTask.objects.create(project=project, title='A', start_date=date(2024, 1, 1), due_date=date(2024, 1, 2))
+        second = ProjectTask.objects.create(project=project, title='B', start_date=date(2024, 1, 1), due_date=date(2024, 1, 1))
+        self.client.force_authenticate(manager.user)
+        url = f'/api/projects/projects/{project.pk}/schedule/'
+        self.assertEqual(self.client.get(url).data['duration_days'], 2)
+
+        TaskDependency.objects.create(task=second, depends_on=first)
+        self.assertEqual(self.client.get(url).data['duration_days'], 3)
+
+        TaskDependency.objects.create(task=first, depends_on=second)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.data['cycle']), [first.pk, second.pk])
+
+
+class GanttTests(APITestCase):
+    def setUp(self):
+        manager = make_profile('m@x.com', 'Project Manager')
+        self.project = make_project(manager)
+        self.task = ProjectTask.objects.create(project=self.project, title='Dig', due_date=date(2024, 2, 1))
+        self.client.force_authenticate(manager.user)
+        self.url = f'/api/projects/projects/{self.project.pk}/gantt/'
+
+    def test_payload_is_columnar(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['tasks']['id'], [self.task.pk])
+        self.assertEqual(response.data['tasks']['due'], ['2024-02-01'])
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_unchanged_chart_answers_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # Deleting a row moves the count even when no timestamp does
+        ProjectTask.objects.create(project=self.project, title='Pour', due_date=date(2024, 3, 1)).delete()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.task.delete()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_task_change_changes_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.task.status = 'completed'
+        self.task.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class TaskTreeTests(APITestCase):
+    def setUp(self):
+        manager = make_profile('m@x.com', 'Project Manager')
+        self.project = make_project(manager)
+        self.client.force_authenticate(manager.user)
+
+        def add(title, parent=None):
+            return ProjectTask.objects.create(
+                project=self.project, title=title, parent_task=parent, due_date=date(2024, 2, 1)
+            )
+        self.root = add('Build')
+        self.walls = add('Walls', self.root)
+        self.brick = add('Brick', self.walls)
+        self.mortar = add('Mortar', self.brick)
+        self.other = add('Landscape')
+
+    def titles(self, node):
+        return {node['title']: [self.titles(child) for child in node['children']]}
+
+    def test_project_forest_in_one_query(self):
+        with self.assertNumQueries(2):
+            # The project lookup, then the whole forest
+            response = self.client.get(f'/api/projects/projects/{self.project.pk}/task_tree/')
+        self.assertEqual(
+            [self.titles(node) for node in response.data],
+            [{'Build': [{'Walls': [{'Brick': [{'Mortar': []}]}]}]}, {'Landscape': []}],
+        )
+
+    def test_depth_limit(self):
+        response = self.client.get(f'/api/projects/projects/{self.project.pk}/task_tree/?max_depth=1')
+        self.assertEqual(self.titles(response.data[0]), {'Build': [{'Walls': []}]})
+        bad = self.client.get(f'/api/projects/projects/{self.project.pk}/task_tree/?max_depth=-1')
+        self.assertEqual(bad.status_code, 400)
+
+    def test_subtree(self):
+        response = self.client.get(f'/api/projects/tasks/{self.walls.pk}/tree/?max_depth=1')
+        self.assertEqual(self.titles(response.data), {'Walls': [{'Brick': []}]})
+        self.assertEqual(response.data['children'][0]['parent_task'], self.walls.pk)
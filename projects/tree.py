@@ -0,0 +1,102 @@
+# projects/tree.py
+"""
+Task hierarchy (``parent_task``) loading.
+
+A recursive CTE walks the forest from its roots (a project's top-level tasks,
+or a single task for a subtree) down to an optional depth limit, and the rows
+are fetched in that same query with their list-serializer joins. The nesting
+is assembled in memory, so a tree costs one query whatever its depth or
+breadth.
+"""
+from django.db.models.expressions import RawSQL
+
+from .models import ProjectTask
+from .serializers import ProjectTaskListSerializer
+
+
+# Hard stop for corrupt data (a task that is its own ancestor)
+MAX_TREE_DEPTH = 50
+
+
+def _descendant_ids(root_condition, params, max_depth):
+    table = ProjectTask._meta.db_table
+    pk = ProjectTask._meta.pk.column
+    parent = ProjectTask._meta.get_field('parent_task').column
+
+    sql = (
+        f'WITH RECURSIVE tree (id, depth) AS ('
+        f' SELECT {pk}, 0 FROM {table} WHERE {root_condition}'
+        f' UNION ALL'
+        f' SELECT child.{pk}, tree.depth + 1 FROM {table} child'
+        f' INNER JOIN tree ON child.{parent} = tree.id'
+        f' WHERE tree.depth < %s'
+        f') SELECT id FROM tree'
+    )
+    return RawSQL(sql, (*params, max_depth))
+
+
+def parse_max_depth(value):
+    """?max_depth= as a non-negative int (None when absent); raises ValueError"""
+    if value in (None, ''):
+        return None
+    depth = int(value)
+    if depth < 0:
+        raise ValueError(value)
+    return depth
+
+
+def _limit(max_depth):
+    if max_depth is None:
+        return MAX_TREE_DEPTH
+    return min(max_depth, MAX_TREE_DEPTH)
+
+
+def _build(tasks, root_ids, context):
+    rows = ProjectTaskListSerializer(tasks, many=True, context=context).data
+    nodes = {}
+    for task, row in zip(tasks, rows):
+        row['parent_task'] = task.parent_task_id
+        row['children'] = []
+        nodes[task.pk] = row
+
+    roots = []
+    for task in tasks:
+        node = nodes[task.pk]
+        parent = nodes.get(task.parent_task_id)
+        if task.pk in root_ids or parent is None:
+            roots.append(node)
+        else:
+            parent['children'].append(node)
+    return roots
+
+
+def _queryset(ids):
+    return ProjectTask.objects.filter(pk__in=ids).select_related(
+        'project', 'assigned_to__user', 'category', 'phase'
+    ).order_by('due_date', 'id')
+
+
+def project_task_tree(project, max_depth=None, context=None):
+    """All task trees of ``project``, top-level tasks first"""
+    table = ProjectTask._meta.db_table
+    project_column = ProjectTask._meta.get_field('project').column
+    parent = ProjectTask._meta.get_field('parent_task').column
+
+    ids = _descendant_ids(
+        f'{table}.{project_column} = %s AND {table}.{parent} IS NULL',
+        (project.pk,),
+        _limit(max_depth)
+    )
+    tasks = list(_queryset(ids))
+    roots = {task.pk for task in tasks if task.parent_task_id is None}
+    return _build(tasks, roots, context)
+
+
+def task_subtree(task, max_depth=None, context=None):
+    """The tree rooted at ``task``"""
+    table = ProjectTask._meta.db_table
+    pk = ProjectTask._meta.pk.column
+
+    ids = _descendant_ids(f'{table}.{pk} = %s', (task.pk,), _limit(max_depth))
+    tasks = list(_queryset(ids))
+    return _build(tasks, {task.pk}, context)[0]
@@ -126,6 +126,7 @@ LAND & PROPERTY:
 - DELETE /api/projects/land-parcels/{id}/                     - Delete land parcel
 - GET    /api/projects/land-parcels/statistics/               - Get statistics
 - GET    /api/projects/land-parcels/{id}/projects/            - Get projects on parcel
+- POST   /api/projects/land-parcels/import/                   - Bulk import (file; dry_run)
 
 PROJECT CORE:
 - GET    /api/projects/project-types/                         - List project types
@@ -181,6 +182,7 @@ TASKS:
 - DELETE /api/projects/tasks/{id}/                            - Delete task
 - POST   /api/projects/tasks/{id}/complete/                   - Mark task complete
 - POST   /api/projects/tasks/{id}/approve/                    - Approve task
+- POST   /api/projects/tasks/import/                          - Bulk import (file; dry_run)
 
 - GET    /api/projects/task-dependencies/                     - List dependencies
 - POST   /api/projects/task-dependencies/                     - Create dependency
@@ -227,6 +229,7 @@ BUDGET & COSTS:
 - DELETE /api/projects/expenses/{id}/                         - Delete expense
 - POST   /api/projects/expenses/{id}/approve/                 - Approve expense
 - POST   /api/projects/expenses/{id}/mark_paid/               - Mark expense as paid
+- POST   /api/projects/expenses/import/                       - Bulk import (file; dry_run)
 
 PERMITS & APPROVALS:
 - GET    /api/projects/permit-types/                          - List permit types
@@ -4,13 +4,19 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import (
-    Q, Count, Sum, Avg, F, Case, When, Value, 
-    IntegerField, DecimalField, Prefetch
-)
+from django.db.models import Q, Count, Sum, Avg, F, DecimalField
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from datetime import timedelta
 
+from core.export import ExportMixin
+from core.imports import ImportMixin
+from core.fieldsets import SparseFieldsetMixin
+from core.versioning import VersionedCacheMixin
+from core.response_cache import cached_response
+from search.filters import IndexedSearchFilter
+from search.models import SearchEntry
 from .models import (
     LandParcel, ProjectType, Project, ProjectTeamMember,
     ProjectPhase, ProjectMilestone, TaskCategory, ProjectTask,
@@ -18,7 +24,7 @@ from .models import (
     ProjectResourceAllocation, BudgetCategory, ProjectBudgetLine,
     ProjectExpense, PermitType, ProjectPermit, InspectionType,
     ProjectInspection, ProjectRisk, ProjectIssue, ChangeOrder,
-    DailyProgressReport, ProjectMeeting, SafetyIncident
+    DailyProgressReport, ProjectMeeting, SafetyIncident, ProjectRollup
 )
 
 from .serializers import (
@@ -42,17 +48,24 @@ from .filters import (
     LandParcelFilter, ProjectFilter, ProjectTaskFilter,
     ProjectExpenseFilter, ProjectPermitFilter
 )
+from .resources import LandParcelResource, ProjectTaskResource, ProjectExpenseResource
+from .statistics import ProjectStatistics
+from .rollups import refresh_overdue
+from .scheduling import project_schedule, DependencyCycleError
+from .gantt import gantt_etag, gantt_payload
+from .tree import project_task_tree, task_subtree, parse_max_depth
 
 
 # ==================== LAND & PROPERTY ====================
 
-class LandParcelViewSet(viewsets.ModelViewSet):
+class LandParcelViewSet(ImportMixin, ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing land parcels (acquisition & development bank).
     Accessible to PMDC Manager, Project Supervisors, CEO/EDBO.
     """
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    import_resource_class = LandParcelResource
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_class = LandParcelFilter
     search_fields = [
         'title_number', 'plot_number', 'location', 'address',
@@ -82,6 +95,7 @@ class LandParcelViewSet(viewsets.ModelViewSet):
         return LandParcelSerializer
     
     @action(detail=False, methods=['get'])
+    @cached_response(LandParcel, SearchEntry)
     def statistics(self, request):
         """Get land parcel statistics"""
         queryset = self.filter_queryset(self.get_queryset())
@@ -123,23 +137,31 @@ class LandParcelViewSet(viewsets.ModelViewSet):
 
 # ==================== PROJECT CORE ====================
 
-class ProjectTypeViewSet(viewsets.ModelViewSet):
+class ProjectTypeViewSet(ExportMixin, VersionedCacheMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for project types"""
     queryset = ProjectType.objects.filter(is_active=True).order_by('name')
     serializer_class = ProjectTypeSerializer
     permission_classes = [IsAuthenticated]
+    version_models = [Project]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'code', 'description']
     ordering_fields = ['name', 'code']
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+def my_projects_scope(view, request):
+    """?quick_filter=my_projects narrows rows to the caller's projects"""
+    if request.query_params.get('quick_filter') == 'my_projects':
+        return request.user.pk
+    return None
+
+
+class ProjectViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API endpoint for real estate development projects.
     Core module for PMDC Manager and PPD Unit.
     """
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_class = ProjectFilter
     search_fields = [
         'name', 'code', 'description', 'land_parcel__title_number',
@@ -152,43 +174,12 @@ class ProjectViewSet(viewsets.ModelViewSet):
     ordering = ['-created_at']
 
     def get_queryset(self):
-        queryset = Project.objects.select_related(
-            'land_parcel', 'manager', 'project_type',
-            'architect', 'engineer', 'site_supervisor'
-        ).prefetch_related(
-            'team_members',
-            Prefetch('tasks', queryset=ProjectTask.objects.select_related('assigned_to'))
-        )
-        
-        # Annotate with computed fields
-        queryset = queryset.annotate(
-            task_count=Count('tasks', distinct=True),
-            completed_tasks=Count(
-                'tasks',
-                filter=Q(tasks__status='completed'),
-                distinct=True
-            ),
-            overdue_tasks=Count(
-                'tasks',
-                filter=Q(
-                    tasks__status__in=['pending', 'in_progress'],
-                    tasks__due_date__lt=timezone.now().date()
-                ),
-                distinct=True
-            ),
-            budget_variance=F('budget') - F('actual_cost'),
-            is_delayed=Case(
-                When(
-                    Q(expected_completion__lt=timezone.now().date()) &
-                    ~Q(status__in=['completed', 'cancelled']),
-                    then=Value(True)
-                ),
-                default=Value(False),
-                output_field=IntegerField()
-            )
-        )
-        
-        # Quick filters
+        # Joins and computed columns are derived from the serializer fields
+        # in use (see core.fieldsets); only row filtering happens here
+        return self.apply_quick_filter(Project.objects.all())
+    
+    def apply_quick_filter(self, queryset):
+        """Apply the ?quick_filter= shortcut (active, delayed, my_projects)"""
         quick_filter = self.request.query_params.get('quick_filter', None)
         if quick_filter == 'active':
             queryset = queryset.exclude(status__in=['completed', 'cancelled'])
@@ -224,68 +215,47 @@ class ProjectViewSet(viewsets.ModelViewSet):
             serializer.save()
     
     @action(detail=False, methods=['get'])
+    @cached_response(Project, ProjectTeamMember, ProjectRollup, SearchEntry, scope=my_projects_scope)
     def dashboard(self, request):
         """Get project dashboard statistics"""
-        queryset = self.filter_queryset(self.get_queryset())
+        # Plain project rows: the list annotations and prefetches are not needed here
+        queryset = self.filter_queryset(self.apply_quick_filter(Project.objects.all()))
+        projects = Project.objects.filter(pk__in=queryset.values('pk'))
         today = timezone.now().date()
+        closed = Q(status__in=['completed', 'cancelled'])
+        
+        stats = projects.aggregate(
+            total_projects=Count('id'),
+            active_projects=Count('id', filter=~closed),
+            completed_projects=Count('id', filter=Q(status='completed')),
+            delayed_projects=Count('id', filter=Q(expected_completion__lt=today) & ~closed),
+            total_budget=Sum('budget'),
+            total_spent=Sum('actual_cost'),
+            budget_variance=Sum(F('budget') - F('actual_cost')),
+        )
         
-        stats = {
-            'total_projects': queryset.count(),
-            'active_projects': queryset.exclude(
-                status__in=['completed', 'cancelled']
-            ).count(),
-            'completed_projects': queryset.filter(status='completed').count(),
-            'delayed_projects': queryset.filter(
-                expected_completion__lt=today
-            ).exclude(status__in=['completed', 'cancelled']).count(),
-            
-            'total_budget': queryset.aggregate(
-                total=Sum('budget')
-            )['total'] or 0,
-            'total_spent': queryset.aggregate(
-                total=Sum('actual_cost')
-            )['total'] or 0,
-            'budget_variance': queryset.aggregate(
-                variance=Sum(F('budget') - F('actual_cost'))
-            )['variance'] or 0,
-            
-            'total_tasks': ProjectTask.objects.filter(
-                project__in=queryset
-            ).count(),
-            'completed_tasks': ProjectTask.objects.filter(
-                project__in=queryset,
-                status='completed'
-            ).count(),
-            'overdue_tasks': ProjectTask.objects.filter(
-                project__in=queryset,
-                status__in=['pending', 'in_progress'],
-                due_date__lt=today
-            ).count(),
-            
-            'active_risks': ProjectRisk.objects.filter(
-                project__in=queryset,
-                status__in=['identified', 'analyzing', 'mitigating']
-            ).count(),
-            'open_issues': ProjectIssue.objects.filter(
-                project__in=queryset,
-                status__in=['open', 'in_progress']
-            ).count(),
-            'pending_change_orders': ChangeOrder.objects.filter(
-                project__in=queryset,
-                status__in=['draft', 'submitted', 'under_review']
-            ).count(),
-            
-            'projects_by_status': dict(
-                queryset.values('status').annotate(
-                    count=Count('id')
-                ).values_list('status', 'count')
-            ),
-            'projects_by_priority': dict(
-                queryset.values('priority').annotate(
-                    count=Count('id')
-                ).values_list('priority', 'count')
-            ),
-        }
+        # Child-table counts come from the per-project rollup rows
+        refresh_overdue(projects)
+        stats.update(ProjectRollup.objects.filter(project__in=projects).aggregate(
+            total_tasks=Sum('tasks_total'),
+            completed_tasks=Sum('tasks_completed'),
+            overdue_tasks=Sum('overdue_tasks'),
+            active_risks=Sum('active_risks'),
+            open_issues=Sum('open_issues'),
+            pending_change_orders=Sum('pending_change_orders'),
+        ))
+        stats = {key: value or 0 for key, value in stats.items()}
+        
+        stats['projects_by_status'] = dict(
+            projects.values('status').annotate(
+                count=Count('id')
+            ).values_list('status', 'count')
+        )
+        stats['projects_by_priority'] = dict(
+            projects.values('priority').annotate(
+                count=Count('id')
+            ).values_list('priority', 'count')
+        )
         
         serializer = ProjectDashboardSerializer(stats)
         return Response(serializer.data)
@@ -311,39 +281,86 @@ class ProjectViewSet(viewsets.ModelViewSet):
         })
     
     @action(detail=True, methods=['get'])
-    def financial_summary(self, request, pk=None):
-        """Get detailed financial summary"""
+    def gantt(self, request, pk=None):
+        """Get compact Gantt data, answering 304 while the chart is unchanged"""
         project = self.get_object()
+        etag = quote_etag(gantt_etag(project))
         
-        budget_lines = project.budget_lines.aggregate(
-            total_budgeted=Sum('budgeted_amount'),
-            total_actual=Sum('actual_amount'),
-            total_committed=Sum('committed_amount')
-        )
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
         
-        expenses_by_type = dict(
-            project.expenses.values('expense_type').annotate(
-                total=Sum('amount')
-            ).values_list('expense_type', 'total')
-        )
+        response = Response(gantt_payload(project))
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    
+    @action(detail=True, methods=['get'])
+    def schedule(self, request, pk=None):
+        """Get the critical-path schedule (earliest/latest dates and float per task)"""
+        project = self.get_object()
+        try:
+            schedule = project_schedule(project)
+        except DependencyCycleError as e:
+            return Response(
+                {'error': 'Task dependencies contain a cycle', 'cycle': e.cycle},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(schedule)
+    
+    @action(detail=True, methods=['get'])
+    def task_tree(self, request, pk=None):
+        """Get the project's task hierarchy, optionally limited by ?max_depth="""
+        project = self.get_object()
+        try:
+            max_depth = parse_max_depth(request.query_params.get('max_depth'))
+        except ValueError:
+            return Response(
+                {'error': 'max_depth must be a non-negative integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        expenses_by_category = dict(
-            project.expenses.values('category__name').annotate(
-                total=Sum('amount')
-            ).values_list('category__name', 'total')
-        )
+        return Response(project_task_tree(
+            project, max_depth=max_depth, context=self.get_serializer_context()
+        ))
+    
+    @action(detail=True, methods=['get'])
+    def critical_path(self, request, pk=None):
+        """Get the tasks on the critical path, in schedule order"""
+        project = self.get_object()
+        try:
+            schedule = project_schedule(project)
+        except DependencyCycleError as e:
+            return Response(
+                {'error': 'Task dependencies contain a cycle', 'cycle': e.cycle},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        tasks = {task['id']: task for task in schedule['tasks']}
+        return Response({
+            'project_start': schedule['project_start'],
+            'project_finish': schedule['project_finish'],
+            'duration_days': schedule['duration_days'],
+            'tasks': [tasks[task_id] for task_id in schedule['critical_path']],
+        })
+    
+    @action(detail=True, methods=['get'])
+    def financial_summary(self, request, pk=None):
+        """Get detailed financial summary"""
+        project = self.get_object()
+        statistics = ProjectStatistics(project)
+        expenses_by_type, expenses_by_category = statistics.expense_breakdown()
         
         return Response({
             'project_budget': float(project.budget),
             'contingency_budget': float(project.contingency_budget),
             'actual_cost': float(project.actual_cost),
             'variance': float(project.budget - project.actual_cost),
-            'budget_lines': budget_lines,
+            'budget_lines': statistics.budget_lines(),
             'expenses_by_type': expenses_by_type,
             'expenses_by_category': expenses_by_category,
-            'budget_utilization': (
-                float(project.actual_cost) / float(project.budget) * 100
-            ) if project.budget > 0 else 0
+            'budget_utilization': statistics.budget_utilization()
         })
     
     @action(detail=True, methods=['post'])
@@ -376,7 +393,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         )
 
 
-class ProjectTeamMemberViewSet(viewsets.ModelViewSet):
+class ProjectTeamMemberViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for project team members"""
     queryset = ProjectTeamMember.objects.select_related(
         'project', 'employee', 'employee__user'
@@ -390,7 +407,7 @@ class ProjectTeamMemberViewSet(viewsets.ModelViewSet):
 
 # ==================== PHASES & MILESTONES ====================
 
-class ProjectPhaseViewSet(viewsets.ModelViewSet):
+class ProjectPhaseViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for project phases"""
     queryset = ProjectPhase.objects.select_related('project').order_by('project', 'sequence')
     serializer_class = ProjectPhaseSerializer
@@ -429,7 +446,7 @@ class ProjectPhaseViewSet(viewsets.ModelViewSet):
         )
 
 
-class ProjectMilestoneViewSet(viewsets.ModelViewSet):
+class ProjectMilestoneViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for project milestones"""
     queryset = ProjectMilestone.objects.select_related(
         'project', 'phase', 'responsible_person'
@@ -458,22 +475,24 @@ class ProjectMilestoneViewSet(viewsets.ModelViewSet):
 
 # ==================== TASKS ====================
 
-class TaskCategoryViewSet(viewsets.ModelViewSet):
+class TaskCategoryViewSet(ExportMixin, VersionedCacheMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for task categories"""
     queryset = TaskCategory.objects.filter(is_active=True).order_by('name')
     serializer_class = TaskCategorySerializer
     permission_classes = [IsAuthenticated]
+    version_models = [ProjectTask]
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'description']
 
 
-class ProjectTaskViewSet(viewsets.ModelViewSet):
+class ProjectTaskViewSet(ImportMixin, ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API endpoint for tasks within projects.
     Used by Project Supervisors and assigned team members.
     """
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    import_resource_class = ProjectTaskResource
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_class = ProjectTaskFilter
     search_fields = [
         'title', 'description', 'task_code',
@@ -486,23 +505,7 @@ class ProjectTaskViewSet(viewsets.ModelViewSet):
     ordering = ['due_date']
 
     def get_queryset(self):
-        queryset = ProjectTask.objects.select_related(
-            'project', 'phase', 'category', 'assigned_to',
-            'created_by', 'approved_by', 'parent_task'
-        ).prefetch_related('subtasks', 'dependencies')
-        
-        # Annotate with is_overdue
-        queryset = queryset.annotate(
-            is_overdue=Case(
-                When(
-                    Q(status__in=['pending', 'in_progress']) &
-                    Q(due_date__lt=timezone.now().date()),
-                    then=Value(True)
-                ),
-                default=Value(False),
-                output_field=IntegerField()
-            )
-        )
+        queryset = ProjectTask.objects.all()
         
         # Role-based filtering
         user = self.request.user
@@ -568,9 +571,25 @@ class ProjectTaskViewSet(viewsets.ModelViewSet):
             {'error': 'Task does not require approval'},
             status=status.HTTP_400_BAD_REQUEST
         )
+    
+    @action(detail=True, methods=['get'])
+    def tree(self, request, pk=None):
+        """Get the subtree under this task, optionally limited by ?max_depth="""
+        task = self.get_object()
+        try:
+            max_depth = parse_max_depth(request.query_params.get('max_depth'))
+        except ValueError:
+            return Response(
+                {'error': 'max_depth must be a non-negative integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(task_subtree(
+            task, max_depth=max_depth, context=self.get_serializer_context()
+        ))
 
 
-class TaskDependencyViewSet(viewsets.ModelViewSet):
+class TaskDependencyViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for task dependencies"""
     queryset = TaskDependency.objects.select_related('task', 'depends_on').all()
     serializer_class = TaskDependencySerializer
@@ -581,16 +600,17 @@ class TaskDependencyViewSet(viewsets.ModelViewSet):
 
 # ==================== RESOURCES ====================
 
-class ResourceCategoryViewSet(viewsets.ModelViewSet):
+class ResourceCategoryViewSet(ExportMixin, VersionedCacheMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for resource categories"""
     queryset = ResourceCategory.objects.filter(is_active=True).order_by('name')
     serializer_class = ResourceCategorySerializer
     permission_classes = [IsAuthenticated]
+    version_models = [ProjectResource]
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'description']
 
 
-class ProjectResourceViewSet(viewsets.ModelViewSet):
+class ProjectResourceViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for project resources"""
     queryset = ProjectResource.objects.select_related('category').filter(
         is_active=True
@@ -611,7 +631,7 @@ class ProjectResourceViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ProjectResourceAllocationViewSet(viewsets.ModelViewSet):
+class ProjectResourceAllocationViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for resource allocations"""
     queryset = ProjectResourceAllocation.objects.select_related(
         'project', 'resource', 'task', 'allocated_by'
@@ -629,16 +649,17 @@ class ProjectResourceAllocationViewSet(viewsets.ModelViewSet):
 
 # ==================== BUDGET & COSTS ====================
 
-class BudgetCategoryViewSet(viewsets.ModelViewSet):
+class BudgetCategoryViewSet(ExportMixin, VersionedCacheMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for budget categories"""
     queryset = BudgetCategory.objects.filter(is_active=True).order_by('code')
     serializer_class = BudgetCategorySerializer
     permission_classes = [IsAuthenticated]
+    version_models = [ProjectBudgetLine]
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'code', 'description']
 
 
-class ProjectBudgetLineViewSet(viewsets.ModelViewSet):
+class ProjectBudgetLineViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for project budget lines"""
     queryset = ProjectBudgetLine.objects.select_related(
         'project', 'category', 'phase'
@@ -650,14 +671,15 @@ class ProjectBudgetLineViewSet(viewsets.ModelViewSet):
     search_fields = ['description']
 
 
-class ProjectExpenseViewSet(viewsets.ModelViewSet):
+class ProjectExpenseViewSet(ImportMixin, ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for project expenses"""
     queryset = ProjectExpense.objects.select_related(
         'project', 'budget_line', 'category', 'approved_by', 'submitted_by'
     ).order_by('-expense_date')
     serializer_class = ProjectExpenseSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    import_resource_class = ProjectExpenseResource
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_class = ProjectExpenseFilter
     search_fields = [
         'description', 'invoice_number', 'vendor_name',
@@ -696,16 +718,17 @@ class ProjectExpenseViewSet(viewsets.ModelViewSet):
 
 # ==================== PERMITS & APPROVALS ====================
 
-class PermitTypeViewSet(viewsets.ModelViewSet):
+class PermitTypeViewSet(ExportMixin, VersionedCacheMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for permit types"""
     queryset = PermitType.objects.filter(is_active=True).order_by('name')
     serializer_class = PermitTypeSerializer
     permission_classes = [IsAuthenticated]
+    version_models = [ProjectPermit]
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'description', 'issuing_authority']
 
 
-class ProjectPermitViewSet(viewsets.ModelViewSet):
+class ProjectPermitViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for project permits"""
     queryset = ProjectPermit.objects.select_related(
         'project', 'permit_type', 'responsible_person'
@@ -737,16 +760,17 @@ class ProjectPermitViewSet(viewsets.ModelViewSet):
 
 # ==================== QUALITY & INSPECTIONS ====================
 
-class InspectionTypeViewSet(viewsets.ModelViewSet):
+class InspectionTypeViewSet(ExportMixin, VersionedCacheMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for inspection types"""
     queryset = InspectionType.objects.filter(is_active=True).order_by('name')
     serializer_class = InspectionTypeSerializer
     permission_classes = [IsAuthenticated]
+    version_models = [ProjectInspection]
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'description']
 
 
-class ProjectInspectionViewSet(viewsets.ModelViewSet):
+class ProjectInspectionViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for project inspections"""
     queryset = ProjectInspection.objects.select_related(
         'project', 'inspection_type', 'phase', 'conducted_by'
@@ -773,7 +797,7 @@ class ProjectInspectionViewSet(viewsets.ModelViewSet):
 
 # ==================== RISKS & ISSUES ====================
 
-class ProjectRiskViewSet(viewsets.ModelViewSet):
+class ProjectRiskViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for project risks"""
     queryset = ProjectRisk.objects.select_related(
         'project', 'identified_by', 'owner'
@@ -799,7 +823,7 @@ class ProjectRiskViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ProjectIssueViewSet(viewsets.ModelViewSet):
+class ProjectIssueViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for project issues"""
     queryset = ProjectIssue.objects.select_related(
         'project', 'related_task', 'reported_by', 'assigned_to'
@@ -831,7 +855,7 @@ class ProjectIssueViewSet(viewsets.ModelViewSet):
 
 # ==================== CHANGE ORDERS ====================
 
-class ChangeOrderViewSet(viewsets.ModelViewSet):
+class ChangeOrderViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for change orders"""
     queryset = ChangeOrder.objects.select_related(
         'project', 'requested_by', 'approved_by'
@@ -888,7 +912,7 @@ class ChangeOrderViewSet(viewsets.ModelViewSet):
 
 # ==================== DAILY REPORTS ====================
 
-class DailyProgressReportViewSet(viewsets.ModelViewSet):
+class DailyProgressReportViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for daily progress reports"""
     queryset = DailyProgressReport.objects.select_related(
         'project', 'submitted_by'
@@ -906,7 +930,7 @@ class DailyProgressReportViewSet(viewsets.ModelViewSet):
 
 # ==================== MEETINGS ====================
 
-class ProjectMeetingViewSet(viewsets.ModelViewSet):
+class ProjectMeetingViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for project meetings"""
     queryset = ProjectMeeting.objects.select_related(
         'project', 'organizer'
@@ -935,7 +959,7 @@ class ProjectMeetingViewSet(viewsets.ModelViewSet):
 
 # ==================== SAFETY ====================
 
-class SafetyIncidentViewSet(viewsets.ModelViewSet):
+class SafetyIncidentViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for safety incidents"""
     queryset = SafetyIncident.objects.select_related(
         'project', 'reported_by', 'investigated_by'
@@ -951,6 +975,7 @@ class SafetyIncidentViewSet(viewsets.ModelViewSet):
         serializer.save(reported_by=self.request.user.profile)
     
     @action(detail=False, methods=['get'])
+    @cached_response(SafetyIncident, Project)
     def statistics(self, request):
         """Get safety statistics"""
         queryset = self.filter_queryset(self.get_queryset())
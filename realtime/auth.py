@@ -0,0 +1,45 @@
+# realtime/auth.py
+"""
+Websocket authentication with the same simplejwt access tokens as the API.
+
+Browsers cannot set headers on a websocket handshake, so the token is read
+from the ``token`` query parameter, falling back to an
+``Authorization: Bearer <token>`` header for other clients.
+"""
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+
+def _raw_token(scope):
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    if query.get('token'):
+        return query['token'][0]
+    headers = dict(scope.get('headers', []))
+    parts = headers.get(b'authorization', b'').decode('latin-1').split()
+    if len(parts) == 2 and parts[0].lower() == 'bearer':
+        return parts[1]
+    return None
+
+
+@database_sync_to_async
+def _user_for(raw_token):
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Sets ``scope['user']`` from the connection's access token (AnonymousUser without a valid one)"""
+
+    async def __call__(self, scope, receive, send):
+        raw_token = _raw_token(scope)
+        scope = dict(scope, user=await _user_for(raw_token) if raw_token else AnonymousUser())
+        return await super().__call__(scope, receive, send)
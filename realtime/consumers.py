@@ -0,0 +1,109 @@
+# realtime/consumers.py
+"""
+``ws/updates/``: one websocket per client, subscribed to any number of streams.
+
+Client messages:
+    {"action": "subscribe", "stream": "project", "id": 12}
+    {"action": "subscribe", "stream": "tasks"}              (own tasks; "id" is an
+                                                            employee profile, staff only)
+    {"action": "subscribe", "stream": "finance"}
+    {"action": "unsubscribe", "stream": "project", "id": 12}
+
+Server messages:
+    {"type": "subscribed" | "unsubscribed", "stream": ..., "id": ..., "group": "project.12"}
+    {"type": "error", "error": "..."}
+    {"type": "events", "stream": "project.12", "events": [{"type": "task.updated", ...}]}
+
+Events are the change events of realtime.signals; a ``resync`` event means
+too much changed at once and the stream should be re-read over the API.
+"""
+from types import SimpleNamespace
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from core.models import EmployeeProfile
+from finance.permissions import IsAccountant
+from projects.models import Project
+
+from .events import FINANCE_STREAM, project_stream, tasks_stream
+
+
+# Close code for a handshake without a valid access token
+UNAUTHENTICATED = 4401
+
+MAX_SUBSCRIPTIONS = 50
+
+
+@database_sync_to_async
+def _resolve(user, stream, object_id):
+    """(group name, None) for a stream ``user`` may follow, else (None, error)"""
+    if stream == 'project':
+        if not Project.objects.filter(pk=object_id).exists():
+            return None, 'Project not found'
+        return project_stream(object_id), None
+
+    if stream == 'tasks':
+        own = EmployeeProfile.objects.filter(user=user).values_list('pk', flat=True).first()
+        if object_id is None:
+            object_id = own
+        if object_id is None:
+            return None, 'No employee profile for this user'
+        if object_id != own and not user.is_staff:
+            return None, "Only staff can follow another employee's tasks"
+        return tasks_stream(object_id), None
+
+    if stream == 'finance':
+        # Same rule as the finance approval endpoints
+        if not (user.is_staff or IsAccountant().has_permission(SimpleNamespace(user=user), None)):
+            return None, 'Not allowed to follow finance'
+        return FINANCE_STREAM, None
+
+    return None, 'stream must be one of project, tasks, finance'
+
+
+class UpdatesConsumer(AsyncJsonWebsocketConsumer):
+    async def connect(self):
+        if not self.scope['user'].is_authenticated:
+            await self.close(code=UNAUTHENTICATED)
+            return
+        self.subscriptions = set()
+        await self.accept()
+
+    async def disconnect(self, code):
+        for group in getattr(self, 'subscriptions', ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if not isinstance(content, dict) or content.get('action') not in ('subscribe', 'unsubscribe'):
+            await self.send_json({'type': 'error', 'error': 'action must be subscribe or unsubscribe'})
+            return
+
+        stream, object_id = content.get('stream'), content.get('id')
+        if object_id is not None:
+            try:
+                object_id = int(object_id)
+            except (TypeError, ValueError):
+                await self.send_json({'type': 'error', 'error': 'id must be an integer'})
+                return
+
+        group, error = await _resolve(self.scope['user'], stream, object_id)
+        if error:
+            await self.send_json({'type': 'error', 'stream': stream, 'id': object_id, 'error': error})
+            return
+
+        if content['action'] == 'subscribe':
+            if group not in self.subscriptions and len(self.subscriptions) >= MAX_SUBSCRIPTIONS:
+                await self.send_json({'type': 'error', 'error': f'At most {MAX_SUBSCRIPTIONS} subscriptions'})
+                return
+            await self.channel_layer.group_add(group, self.channel_name)
+            self.subscriptions.add(group)
+            reply = 'subscribed'
+        else:
+            await self.channel_layer.group_discard(group, self.channel_name)
+            self.subscriptions.discard(group)
+            reply = 'unsubscribed'
+        await self.send_json({'type': reply, 'stream': stream, 'id': object_id, 'group': group})
+
+    async def stream_events(self, message):
+        await self.send_json({'type': 'events', 'stream': message['stream'], 'events': message['events']})
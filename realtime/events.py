@@ -0,0 +1,132 @@
+# realtime/events.py
+"""
+Change events pushed to websocket subscribers (see consumers.py).
+
+Events are queued per stream (a channel-layer group: ``project.<id>``,
+``tasks.<profile id>``, ``finance``) and sent once the transaction commits,
+one group message per stream. Several changes of the same row in one
+transaction collapse into a single event; a stream with more than
+``MAX_EVENTS`` changes gets one ``resync`` event instead, telling clients
+to re-read it. Nothing is sent for a transaction that rolls back.
+"""
+import datetime
+import logging
+import threading
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+# Past this many events a stream is told to resync rather than sent each one
+MAX_EVENTS = 200
+
+RESYNC = {'type': 'resync'}
+
+
+def project_stream(project_id):
+    return f'project.{project_id}'
+
+
+def tasks_stream(profile_id):
+    return f'tasks.{profile_id}'
+
+
+FINANCE_STREAM = 'finance'
+
+
+def plain(value):
+    """``value`` as something every channel layer can serialize"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def _merge(queued, event):
+    """One event for two changes of the same row"""
+    if queued['type'].endswith('.created') and not event['type'].endswith('.deleted'):
+        # Still new to subscribers, with the latest values
+        return {**event, 'type': queued['type']}
+    if 'changed' in queued and 'changed' in event:
+        changed = queued['changed'] + [name for name in event['changed'] if name not in queued['changed']]
+        return {**event, 'changed': changed}
+    return event
+
+
+_pending = threading.local()
+
+
+def send(stream, events):
+    """Send ``events`` to the subscribers of ``stream`` now"""
+    layer = get_channel_layer()
+    if layer is None or not events:
+        return
+    if len(events) > MAX_EVENTS:
+        events = [RESYNC]
+    try:
+        async_to_sync(layer.group_send)(stream, {
+            'type': 'stream.events',
+            'stream': stream,
+            'events': events,
+        })
+    except Exception:
+        # Subscribers miss an update; the write itself has committed
+        logger.exception('Could not publish %d event(s) to %s', len(events), stream)
+
+
+def _flush():
+    queued = getattr(_pending, 'queue', None) or {}
+    _pending.queue = None
+    for stream, events in queued.items():
+        send(stream, list(events.values()))
+
+
+def _flush_registered(connection):
+    return any(func is _flush for _, func, _ in connection.run_on_commit)
+
+
+def publish(streams, event, key=None):
+    """
+    Queue ``event`` for each of ``streams``, sent when the transaction
+    commits (right away outside one). ``key`` identifies the changed row so
+    later events of the same row replace this one.
+    """
+    streams = [stream for stream in streams if stream]
+    if not streams:
+        return
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        for stream in streams:
+            send(stream, [event])
+        return
+
+    queue = getattr(_pending, 'queue', None)
+    # A rollback replaces the callback list; the queue is stale if our flush went with it
+    hooks_replaced = getattr(_pending, 'hooks', None) is not connection.run_on_commit
+    if queue is None or (hooks_replaced and not _flush_registered(connection)):
+        queue = _pending.queue = {}
+
+    key = key or object()
+    added = False
+    for stream in streams:
+        events = queue.setdefault(stream, {})
+        if key in events:
+            events[key] = _merge(events[key], event)
+        else:
+            events[key] = event
+            added = True
+    if added or hooks_replaced:
+        # Registered per new entry rather than once per queue so a callback
+        # dropped by a rolled-back savepoint does not strand the queue
+        transaction.on_commit(_flush)
+    _pending.hooks = connection.run_on_commit
+
+
+def resync(streams):
+    """Tell the subscribers of ``streams`` to re-read them (writes that send no signals)"""
+    publish(streams, RESYNC, key='resync')
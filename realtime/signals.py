@@ -0,0 +1,155 @@
+# realtime/signals.py
+"""
+Which model changes become websocket events (see events.py).
+
+``watch()`` declares a model's event name, the fields worth an event, the
+streams that hear about a row and its compact payload. Creating a row
+publishes ``<name>.created``; a save that changes one of the watched fields
+(compared with the values the row was loaded with) publishes
+``<name>.updated`` with the changed fields; a delete publishes
+``<name>.deleted``. Saves that change nothing watched send nothing.
+"""
+from django.db.models.signals import post_init, post_save, post_delete
+
+from finance.models import Expense, PurchaseOrder
+from projects.models import Project, ProjectTask, ProjectExpense
+
+from .events import FINANCE_STREAM, plain, project_stream, publish, tasks_stream
+
+
+_watched = {}
+
+
+class Watch:
+    def __init__(self, model, name, fields, streams, payload):
+        self.model = model
+        self.name = name
+        # Attribute names, e.g. 'assigned_to_id'
+        self.fields = tuple(fields)
+        # (pk, snapshot) -> channel-layer group names, None entries ignored
+        self.streams = streams
+        self.payload = payload
+
+    def snapshot(self, instance):
+        # Deferred fields are missing from __dict__ and never count as changed
+        values = instance.__dict__
+        return {field: values[field] for field in self.fields if field in values}
+
+    def event(self, instance, action, changed=None):
+        event = {'type': f'{self.name}.{action}', 'id': instance.pk}
+        event.update((key, plain(value)) for key, value in self.payload(instance).items())
+        if changed is not None:
+            event['changed'] = changed
+        return event
+
+
+def watch(model, name, fields, streams, payload):
+    _watched[model] = Watch(model, name, fields, streams, payload)
+    uid = f'realtime_{model._meta.label_lower}'
+    post_init.connect(remember_state, sender=model, dispatch_uid=f'{uid}_init')
+    post_save.connect(row_saved, sender=model, dispatch_uid=f'{uid}_save')
+    post_delete.connect(row_deleted, sender=model, dispatch_uid=f'{uid}_delete')
+
+
+def remember_state(sender, instance, **kwargs):
+    instance._realtime_state = _watched[sender].snapshot(instance)
+
+
+def row_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    spec = _watched[sender]
+    before = getattr(instance, '_realtime_state', {})
+    after = spec.snapshot(instance)
+    instance._realtime_state = after
+
+    if created:
+        event = spec.event(instance, 'created')
+        streams = spec.streams(instance.pk, after)
+    else:
+        changed = [
+            field.removesuffix('_id') for field in spec.fields
+            if field in before and field in after and before[field] != after[field]
+        ]
+        if not changed:
+            return
+        event = spec.event(instance, 'updated', changed)
+        # Subscribers the row moved away from hear about it too
+        streams = set(spec.streams(instance.pk, before)) | set(spec.streams(instance.pk, after))
+    publish(streams, event, key=(spec.name, instance.pk))
+
+
+def row_deleted(sender, instance, **kwargs):
+    spec = _watched[sender]
+    state = getattr(instance, '_realtime_state', None) or spec.snapshot(instance)
+    event = {'type': f'{spec.name}.deleted', 'id': instance.pk}
+    publish(spec.streams(instance.pk, state), event, key=(spec.name, instance.pk))
+
+
+# ==================== WATCHED MODELS ====================
+
+watch(
+    Project, 'project',
+    fields=['status', 'progress_percentage'],
+    streams=lambda pk, state: [project_stream(pk)],
+    payload=lambda project: {
+        'status': project.status,
+        'progress': project.progress_percentage,
+    },
+)
+
+watch(
+    ProjectTask, 'task',
+    fields=['project_id', 'assigned_to_id', 'status', 'progress_percentage', 'is_approved'],
+    streams=lambda pk, state: [
+        project_stream(state['project_id']) if state.get('project_id') else None,
+        tasks_stream(state['assigned_to_id']) if state.get('assigned_to_id') else None,
+    ],
+    payload=lambda task: {
+        'project': task.project_id,
+        'title': task.title,
+        'status': task.status,
+        'progress': task.progress_percentage,
+        'assigned_to': task.assigned_to_id,
+        'is_approved': task.is_approved,
+    },
+)
+
+watch(
+    ProjectExpense, 'project_expense',
+    fields=['project_id', 'payment_status', 'amount'],
+    streams=lambda pk, state: [project_stream(state['project_id']) if state.get('project_id') else None],
+    payload=lambda expense: {
+        'project': expense.project_id,
+        'amount': expense.amount,
+        'payment_status': expense.payment_status,
+        'approved_by': expense.approved_by_id,
+    },
+)
+
+watch(
+    Expense, 'expense',
+    fields=['status', 'total_amount'],
+    streams=lambda pk, state: [FINANCE_STREAM],
+    payload=lambda expense: {
+        'number': expense.expense_number,
+        'project': expense.project_id,
+        'total_amount': expense.total_amount,
+        'status': expense.status,
+        'approved_by': expense.approved_by_id,
+    },
+)
+
+watch(
+    PurchaseOrder, 'purchase_order',
+    fields=['status', 'total_amount'],
+    streams=lambda pk, state: [FINANCE_STREAM],
+    payload=lambda order: {
+        'number': order.po_number,
+        'project': order.project_id,
+        'vendor': order.vendor_id,
+        'total_amount': order.total_amount,
+        'status': order.status,
+        'approved_by': order.approved_by_id,
+    },
+)
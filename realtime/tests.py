@@ -0,0 +1,79 @@
+from datetime import date
+from decimal import Decimal
+
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import CustomUser, EmployeeProfile
+from projects.models import Project, ProjectTask
+from .auth import JWTAuthMiddleware
+from .consumers import UNAUTHENTICATED
+from .routing import websocket_urlpatterns
+
+
+application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class UpdatesConsumerTests(TransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='u@x.com', email='u@x.com', password='secret')
+        self.profile = EmployeeProfile.objects.create(user=self.user, position='Project Manager')
+        self.project = Project.objects.create(
+            name='Estate', code='E-1', description='', start_date=date(2024, 1, 1),
+            budget=Decimal('1000'), manager=self.profile,
+        )
+        self.task = ProjectTask.objects.create(
+            project=self.project, title='Survey', due_date=date(2024, 2, 1), assigned_to=self.profile,
+        )
+
+    async def connect(self, query=''):
+        communicator = WebsocketCommunicator(application, f'/ws/updates/{query}')
+        connected, code = await communicator.connect()
+        return communicator, connected, code
+
+    async def test_rejects_a_missing_token(self):
+        communicator, connected, code = await self.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, UNAUTHENTICATED)
+
+    async def test_rejects_an_invalid_token(self):
+        communicator, connected, code = await self.connect('?token=not-a-jwt')
+        self.assertFalse(connected)
+        self.assertEqual(code, UNAUTHENTICATED)
+
+    async def test_receives_model_changes_of_a_subscribed_project(self):
+        token = AccessToken.for_user(self.user)
+        communicator, connected, code = await self.connect(f'?token={token}')
+        self.assertTrue(connected)
+
+        await communicator.send_json_to({'action': 'subscribe', 'stream': 'project', 'id': self.project.pk})
+        reply = await communicator.receive_json_from()
+        self.assertEqual(reply['type'], 'subscribed')
+        self.assertEqual(reply['group'], f'project.{self.project.pk}')
+
+        def complete_task():
+            self.task.status = 'completed'
+            self.task.save()
+        await database_sync_to_async(complete_task)()
+
+        message = await communicator.receive_json_from()
+        self.assertEqual(message['type'], 'events')
+        self.assertEqual(message['stream'], f'project.{self.project.pk}')
+        event = message['events'][0]
+        self.assertEqual(event['type'], 'task.updated')
+        self.assertEqual(event['id'], self.task.pk)
+        self.assertEqual(event['status'], 'completed')
+        self.assertEqual(event['changed'], ['status'])
+        await communicator.disconnect()
+
+    async def test_refuses_unknown_streams(self):
+        token = AccessToken.for_user(self.user)
+        communicator, connected, code = await self.connect(f'?token={token}')
+        await communicator.send_json_to({'action': 'subscribe', 'stream': 'payroll'})
+        reply = await communicator.receive_json_from()
+        self.assertEqual(reply['type'], 'error')
+        await communicator.disconnect()
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    name = 'search'
+
+    def ready(self):
+        from . import indexes  # noqa: F401
+        from .registry import connect_signals
+        connect_signals()
@@ -0,0 +1,105 @@
+# search/backends.py
+"""
+Database-specific full-text matching over ``SearchEntry``.
+
+PostgreSQL matches the generated ``document`` tsvector (GIN-indexed) with a
+prefix ``to_tsquery`` and ranks with ``ts_rank_cd``; SQLite matches the FTS5
+table and ranks with weighted ``bm25``. Every query token must match, as a
+prefix, somewhere in the row. Other databases are not supported and callers
+fall back to ``icontains``.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import SearchEntry
+
+
+MAX_TOKENS = 8
+
+# Relative weight of the A, B and C columns for SQLite's bm25
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+
+FTS_TABLE = 'search_searchentry_fts'
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    return _TOKEN.findall((query or '').lower())[:MAX_TOKENS]
+
+
+def supported():
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def _match_expression(tokens):
+    if connection.vendor == 'postgresql':
+        return ' & '.join(f'{token}:*' for token in tokens)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def matching_ids(index, tokens):
+    """RawSQL of the ids of ``index.model`` rows matching every token, for ``pk__in``"""
+    table = SearchEntry._meta.db_table
+    content_type_id = index.content_type.pk
+    match = _match_expression(tokens)
+
+    if connection.vendor == 'postgresql':
+        sql = (
+            f"SELECT object_id FROM {table}"
+            f" WHERE content_type_id = %s AND document @@ to_tsquery('simple', %s)"
+        )
+    else:
+        sql = (
+            f"SELECT entry.object_id FROM {FTS_TABLE}"
+            f" INNER JOIN {table} entry ON entry.id = {FTS_TABLE}.rowid"
+            f" WHERE entry.content_type_id = %s AND {FTS_TABLE} MATCH %s"
+        )
+    return RawSQL(sql, (content_type_id, match))
+
+
+def _scope_sql(scopes, column_prefix):
+    """
+    OR of ``(content type, visible ids)`` pairs; ids are a ``values('pk')``
+    queryset, or None when every row of the type is visible
+    """
+    clauses, params = [], []
+    for content_type_id, ids in scopes:
+        if ids is None:
+            clauses.append(f"{column_prefix}content_type_id = %s")
+            params.append(content_type_id)
+        else:
+            ids_sql, ids_params = ids.query.sql_with_params()
+            clauses.append(f"({column_prefix}content_type_id = %s AND {column_prefix}object_id IN ({ids_sql}))")
+            params.extend([content_type_id, *ids_params])
+    return ' OR '.join(clauses), params
+
+
+def ranked_entries(tokens, scopes, limit):
+    """(content_type_id, object_id, title, subtitle, rank) rows within ``scopes``, best first"""
+    table = SearchEntry._meta.db_table
+    match = _match_expression(tokens)
+    scope, scope_params = _scope_sql(scopes, '' if connection.vendor == 'postgresql' else 'entry.')
+
+    if connection.vendor == 'postgresql':
+        sql = (
+            f"SELECT content_type_id, object_id, title, subtitle, ts_rank_cd(document, query) AS rank"
+            f" FROM {table}, to_tsquery('simple', %s) query"
+            f" WHERE document @@ query AND ({scope})"
+            f" ORDER BY rank DESC, id LIMIT %s"
+        )
+    else:
+        weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+        sql = (
+            f"SELECT entry.content_type_id, entry.object_id, entry.title, entry.subtitle,"
+            f" -bm25({FTS_TABLE}, {weights}) AS rank"
+            f" FROM {FTS_TABLE} INNER JOIN {table} entry ON entry.id = {FTS_TABLE}.rowid"
+            f" WHERE {FTS_TABLE} MATCH %s AND ({scope})"
+            f" ORDER BY rank DESC, entry.id LIMIT %s"
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, *scope_params, limit])
+        return cursor.fetchall()
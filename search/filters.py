@@ -0,0 +1,22 @@
+# search/filters.py
+from rest_framework import filters
+
+from . import backends
+from .registry import get_index
+
+
+class IndexedSearchFilter(filters.SearchFilter):
+    """
+    ``?search=`` answered from the full-text index when the model is indexed;
+    otherwise the usual ``icontains`` over ``search_fields``
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        index = get_index(queryset.model)
+        if index is None or not backends.supported():
+            return super().filter_queryset(request, queryset, view)
+
+        tokens = backends.tokenize(' '.join(self.get_search_terms(request)))
+        if not tokens:
+            return queryset
+        return queryset.filter(pk__in=backends.matching_ids(index, tokens))
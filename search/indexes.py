@@ -0,0 +1,58 @@
+# search/indexes.py
+"""
+Searchable models, their weighted fields (A ranks above B above C) and the
+viewset that decides which rows each user may find
+"""
+from crm.models import Customer
+from documents.models import Document
+from projects.models import LandParcel, Project, ProjectTask, ProjectExpense
+
+from .registry import register
+
+
+register(
+    LandParcel, key='land_parcel', view='projects.views.LandParcelViewSet',
+    title='title_number', subtitle='location',
+    a=['title_number', 'plot_number'],
+    b=['location', 'city', 'state_province'],
+    c=['address', 'legal_description'],
+)
+
+register(
+    Project, key='project', view='projects.views.ProjectViewSet',
+    title='name', subtitle='code',
+    a=['name', 'code'],
+    b=['client_name', 'land_parcel__title_number', 'land_parcel__location'],
+    c=['description'],
+)
+
+register(
+    ProjectTask, key='task', view='projects.views.ProjectTaskViewSet',
+    title='title', subtitle='project__name',
+    a=['title', 'task_code'],
+    b=['project__name', 'project__code'],
+    c=['description'],
+)
+
+register(
+    ProjectExpense, key='expense', view='projects.views.ProjectExpenseViewSet',
+    title='description', subtitle='vendor_name',
+    a=['description', 'invoice_number'],
+    b=['vendor_name', 'project__name', 'project__code'],
+)
+
+register(
+    Document, key='document', view='documents.views.DocumentViewSet',
+    title='title', subtitle='document_type__name',
+    a=['title'],
+    b=['document_type__name'],
+    c=['description'],
+)
+
+register(
+    Customer, key='customer', view='crm.views.CustomerViewSet',
+    title='full_name', subtitle='phone',
+    a=['full_name'],
+    b=['phone', 'email', 'national_id'],
+    c=['address'],
+)
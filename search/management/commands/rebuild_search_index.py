@@ -0,0 +1,29 @@
+# search/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand, CommandError
+
+from search.models import SearchEntry
+from search.registry import indexes, get_index_by_key, index_queryset
+
+
+class Command(BaseCommand):
+    help = "Rebuild SearchEntry rows for all (or the given) indexed types"
+
+    def add_arguments(self, parser):
+        parser.add_argument('types', nargs='*', help="Index keys, e.g. project task customer")
+
+    def handle(self, *args, **options):
+        selected = indexes()
+        if options['types']:
+            selected = [get_index_by_key(key) for key in options['types']]
+            if None in selected:
+                raise CommandError(f"Unknown types; choose from: {', '.join(i.key for i in indexes())}")
+
+        for index in selected:
+            # Drop entries whose rows no longer exist, then upsert the rest
+            SearchEntry.objects.filter(content_type=index.content_type).exclude(
+                object_id__in=index.model._default_manager.values('pk')
+            ).delete()
+            total = index_queryset(index, index.queryset())
+            self.stdout.write(f"{index.key}: {total}")
+
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
@@ -0,0 +1,101 @@
+# Hand-written: the SearchEntry table plus the full-text index Django cannot
+# express (a generated tsvector column with a GIN index on PostgreSQL, an FTS5
+# table kept in sync by triggers on SQLite). The search tests need it applied.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE search_searchentry ADD COLUMN document tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(weight_a, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(weight_b, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(weight_c, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX search_searchentry_document_gin ON search_searchentry USING GIN (document)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS search_searchentry_document_gin",
+    "ALTER TABLE search_searchentry DROP COLUMN IF EXISTS document",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE search_searchentry_fts USING fts5(
+        weight_a, weight_b, weight_c,
+        content='search_searchentry', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER search_searchentry_fts_insert AFTER INSERT ON search_searchentry BEGIN
+        INSERT INTO search_searchentry_fts (rowid, weight_a, weight_b, weight_c)
+        VALUES (new.id, new.weight_a, new.weight_b, new.weight_c);
+    END
+    """,
+    """
+    CREATE TRIGGER search_searchentry_fts_delete AFTER DELETE ON search_searchentry BEGIN
+        INSERT INTO search_searchentry_fts (search_searchentry_fts, rowid, weight_a, weight_b, weight_c)
+        VALUES ('delete', old.id, old.weight_a, old.weight_b, old.weight_c);
+    END
+    """,
+    """
+    CREATE TRIGGER search_searchentry_fts_update AFTER UPDATE ON search_searchentry BEGIN
+        INSERT INTO search_searchentry_fts (search_searchentry_fts, rowid, weight_a, weight_b, weight_c)
+        VALUES ('delete', old.id, old.weight_a, old.weight_b, old.weight_c);
+        INSERT INTO search_searchentry_fts (rowid, weight_a, weight_b, weight_c)
+        VALUES (new.id, new.weight_a, new.weight_b, new.weight_c);
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS search_searchentry_fts_update",
+    "DROP TRIGGER IF EXISTS search_searchentry_fts_delete",
+    "DROP TRIGGER IF EXISTS search_searchentry_fts_insert",
+    "DROP TABLE IF EXISTS search_searchentry_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('subtitle', models.CharField(blank=True, max_length=255)),
+                ('weight_a', models.TextField(blank=True)),
+                ('weight_b', models.TextField(blank=True)),
+                ('weight_c', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Search Entry',
+                'verbose_name_plural': 'Search Entries',
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
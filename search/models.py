@@ -0,0 +1,34 @@
+# search/models.py
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+
+class SearchEntry(models.Model):
+    """
+    Denormalised search document for one indexed row.
+
+    The weighted text columns feed a generated ``tsvector`` column with a GIN
+    index on PostgreSQL, or an FTS5 table kept in sync by triggers on SQLite
+    (both created in the initial migration, outside the model).
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    
+    # Display
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True)
+    
+    # Weighted text, most to least important
+    weight_a = models.TextField(blank=True)
+    weight_b = models.TextField(blank=True)
+    weight_c = models.TextField(blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['content_type', 'object_id']
+        verbose_name = 'Search Entry'
+        verbose_name_plural = 'Search Entries'
+    
+    def __str__(self):
+        return f"{self.content_type_id}:{self.object_id} {self.title}"
@@ -0,0 +1,229 @@
+# search/registry.py
+"""
+Which models are searchable and how their search documents are built.
+
+``register()`` declares the weighted fields of a model (paths may follow
+foreign keys, e.g. ``land_parcel__location``) and the viewset whose
+queryset decides which rows a user may find. Saves and deletes keep the
+model's ``SearchEntry`` rows current, and a save of a related row that
+changes an indexed field (a Project's name, for tasks that index
+``project__name``) re-indexes the rows that point at it. Everything is
+written after commit in bulk upserts.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.utils.module_loading import import_string
+
+from core.versioning import bump_version, track_versions
+
+from .models import SearchEntry
+
+
+CHUNK_SIZE = 1000
+
+_indexes = {}
+
+# Related model -> [(index, relation, fields of the related model the index reads)]
+_dependents = {}
+
+
+class SearchIndex:
+    def __init__(self, model, key, title, subtitle=None, a=(), b=(), c=(), view=None):
+        self.model = model
+        self.key = key
+        self.view = view
+        self.title = title
+        self.subtitle = subtitle
+        self.weights = {'weight_a': tuple(a), 'weight_b': tuple(b), 'weight_c': tuple(c)}
+
+    @property
+    def paths(self):
+        paths = [self.title] + ([self.subtitle] if self.subtitle else [])
+        for fields in self.weights.values():
+            paths.extend(fields)
+        return paths
+
+    @property
+    def relations(self):
+        """First hop of every followed path, e.g. {'project', 'land_parcel'}"""
+        return {path.split('__')[0] for path in self.paths if '__' in path}
+
+    def related_fields(self, relation):
+        """Fields read through ``relation``, e.g. {'name', 'code'} for 'project'"""
+        return {
+            path.split('__')[1] for path in self.paths
+            if '__' in path and path.split('__')[0] == relation
+        }
+
+    @property
+    def content_type(self):
+        return ContentType.objects.get_for_model(self.model)
+
+    def queryset(self):
+        select = {path.rsplit('__', 1)[0] for path in self.paths if '__' in path}
+        return self.model._default_manager.select_related(*sorted(select)).order_by('pk')
+
+    def visible_ids(self, request):
+        """
+        Ids the user may see, as a ``values('pk')`` queryset of the index's
+        viewset; None when every row is visible, False when the viewset
+        refuses the user altogether
+        """
+        if self.view is None:
+            return None
+        view = import_string(self.view)(
+            request=request, args=(), kwargs={}, format_kwarg=None, action='list', detail=False
+        )
+        if not all(permission.has_permission(request, view) for permission in view.get_permissions()):
+            return False
+        queryset = view.get_queryset()
+        if not queryset.query.where:
+            return None
+        return queryset.order_by().values('pk')
+
+    def entry(self, instance, content_type):
+        return SearchEntry(
+            content_type=content_type,
+            object_id=instance.pk,
+            title=_text(_resolve(instance, self.title))[:255],
+            subtitle=_text(_resolve(instance, self.subtitle))[:255] if self.subtitle else '',
+            **{
+                column: ' '.join(filter(None, (_text(_resolve(instance, path)) for path in fields)))
+                for column, fields in self.weights.items()
+            }
+        )
+
+
+def _resolve(instance, path):
+    value = instance
+    for attr in path.split('__'):
+        if value is None:
+            return None
+        value = getattr(value, attr)
+    return value
+
+
+def _text(value):
+    return '' if value is None else str(value)
+
+
+def register(model, **options):
+    _indexes[model] = SearchIndex(model, **options)
+
+
+def get_index(model):
+    return _indexes.get(model)
+
+
+def get_index_by_key(key):
+    for index in _indexes.values():
+        if index.key == key:
+            return index
+    return None
+
+
+def indexes():
+    return list(_indexes.values())
+
+
+# ==================== WRITING ====================
+
+def index_queryset(index, queryset):
+    """Upsert entries for every row of ``queryset``, in chunks; returns the row count"""
+    content_type = index.content_type
+    total = 0
+    last_pk = None
+    while True:
+        chunk = queryset
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        rows = list(chunk[:CHUNK_SIZE])
+        if not rows:
+            return total
+
+        SearchEntry.objects.bulk_create(
+            [index.entry(row, content_type) for row in rows],
+            update_conflicts=True,
+            unique_fields=['content_type', 'object_id'],
+            update_fields=['title', 'subtitle', 'weight_a', 'weight_b', 'weight_c', 'updated_at'],
+        )
+        # Upserts send no signals; cached ?search= responses depend on the entries
+        bump_version(SearchEntry)
+        total += len(rows)
+        last_pk = rows[-1].pk
+
+
+def reindex(model, pks):
+    index = get_index(model)
+    if index is not None and pks:
+        index_queryset(index, index.queryset().filter(pk__in=pks))
+
+
+def remove(model, pk):
+    SearchEntry.objects.filter(
+        content_type=ContentType.objects.get_for_model(model),
+        object_id=pk
+    ).delete()
+
+
+# ==================== SIGNALS ====================
+
+def _indexed_row_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: reindex(sender, [instance.pk]))
+
+
+def _indexed_row_deleted(sender, instance, **kwargs):
+    remove(sender, instance.pk)
+
+
+def _indexed_values(sender, instance):
+    """Loaded values of the fields other indexes read from ``sender`` rows"""
+    names = set().union(*(fields for index, relation, fields in _dependents[sender]))
+    loaded = instance.__dict__
+    values = {}
+    for name in names:
+        attname = sender._meta.get_field(name).attname
+        if attname in loaded:
+            values[name] = loaded[attname]
+    return values
+
+
+def _related_row_loaded(sender, instance, **kwargs):
+    instance._search_values = _indexed_values(sender, instance)
+
+
+def _related_row_saved(sender, instance, created=False, raw=False, **kwargs):
+    # Nothing points at a new row yet
+    if raw or created:
+        return
+
+    before = getattr(instance, '_search_values', {})
+    after = _indexed_values(sender, instance)
+    instance._search_values = after
+    changed = {name for name, value in after.items() if name in before and before[name] != value}
+    stale = [(index, relation) for index, relation, fields in _dependents[sender] if fields & changed]
+    if not stale:
+        return
+
+    def refresh():
+        for index, relation in stale:
+            index_queryset(index, index.queryset().filter(**{relation: instance.pk}))
+    transaction.on_commit(refresh)
+
+
+def connect_signals():
+    track_versions(SearchEntry)
+    _dependents.clear()
+    for model, index in _indexes.items():
+        post_save.connect(_indexed_row_saved, sender=model, dispatch_uid=f'search_save_{model._meta.label}')
+        post_delete.connect(_indexed_row_deleted, sender=model, dispatch_uid=f'search_delete_{model._meta.label}')
+        for relation in index.relations:
+            related_model = model._meta.get_field(relation).related_model
+            _dependents.setdefault(related_model, []).append((index, relation, index.related_fields(relation)))
+
+    for model in _dependents:
+        post_init.connect(_related_row_loaded, sender=model, dispatch_uid=f'search_loaded_{model._meta.label}')
+        post_save.connect(_related_row_saved, sender=model, dispatch_uid=f'search_related_{model._meta.label}')
@@ -0,0 +1,71 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from core.models import CustomUser, EmployeeProfile
+from projects.models import Project, ProjectTask
+from . import registry
+from .backends import FTS_TABLE
+from .models import SearchEntry
+
+
+def make_profile(email, position):
+    user = CustomUser.objects.create_user(username=email, email=email, password='secret')
+    return EmployeeProfile.objects.create(user=user, position=position)
+
+
+def full_text_index_installed():
+    """Whether the hand-written search migration ran (not when migrations are disabled)"""
+    if connection.vendor == 'sqlite':
+        return FTS_TABLE in connection.introspection.table_names()
+    with connection.cursor() as cursor:
+        columns = connection.introspection.get_table_description(cursor, SearchEntry._meta.db_table)
+    return any(column.name == 'document' for column in columns)
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        if not full_text_index_installed():
+            self.skipTest('Needs the search migrations applied')
+        self.manager = make_profile('pm@x.com', 'Project Manager')
+        self.worker = make_profile('w@x.com', 'Site Engineer')
+        self.other = make_profile('o@x.com', 'Site Engineer')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = Project.objects.create(
+                name='Harbour', code='H-1', description='', start_date=date(2024, 1, 1), budget=Decimal('1000'),
+            )
+            self.mine = ProjectTask.objects.create(
+                project=self.project, title='Pour slab east', due_date=date(2024, 2, 1), assigned_to=self.worker,
+            )
+            self.theirs = ProjectTask.objects.create(
+                project=self.project, title='Pour slab west', due_date=date(2024, 2, 1), assigned_to=self.other,
+            )
+
+    def search(self, profile, query):
+        self.client.force_authenticate(profile.user)
+        response = self.client.get('/api/search/', {'q': query, 'types': 'task'})
+        self.assertEqual(response.status_code, 200)
+        return {row['id'] for row in response.data['results']}
+
+    def test_results_follow_the_viewset_visibility(self):
+        self.assertEqual(self.search(self.worker, 'slab'), {self.mine.pk})
+        self.assertEqual(self.search(self.manager, 'slab'), {self.mine.pk, self.theirs.pk})
+
+    def test_project_rename_reindexes_its_tasks(self):
+        self.project = Project.objects.get(pk=self.project.pk)
+        self.project.name = 'Lighthouse'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+        self.assertEqual(self.search(self.manager, 'lighthouse'), {self.mine.pk, self.theirs.pk})
+
+    def test_other_project_changes_leave_its_tasks_alone(self):
+        self.project = Project.objects.get(pk=self.project.pk)
+        self.project.budget = Decimal('2000')
+        with patch.object(registry, 'index_queryset', wraps=registry.index_queryset) as index_queryset, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+        # The project's own entry only
+        self.assertEqual([call.args[0].key for call in index_queryset.call_args_list], ['project'])
@@ -0,0 +1,11 @@
+# search/urls.py
+from django.urls import path
+
+from .views import SearchView
+
+urlpatterns = [
+    # Base path: /api/search/
+    # GET /api/search/?q=villa                     → Ranked results across all types
+    # GET /api/search/?q=villa&types=project,task  → Only projects and tasks
+    path('', SearchView.as_view(), name='search'),
+]
@@ -0,0 +1,98 @@
+# search/views.py
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import backends
+from .models import SearchEntry
+from .registry import indexes, get_index_by_key
+
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class SearchView(APIView):
+    """
+    Cross-entity search: GET /api/search/?q=&types=project,task&limit=20
+
+    Results are ranked best first across every requested type, and only
+    rows the user can see through each type's own endpoint are returned.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        tokens = backends.tokenize(request.query_params.get('q'))
+        if not tokens:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        types = [name.strip() for name in request.query_params.get('types', '').split(',') if name.strip()]
+        if types:
+            unknown = [name for name in types if get_index_by_key(name) is None]
+            if unknown:
+                return Response(
+                    {'error': f"Unknown types: {', '.join(unknown)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            selected = [get_index_by_key(name) for name in types]
+        else:
+            selected = indexes()
+
+        try:
+            limit = min(int(request.query_params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'error': 'limit must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+
+        keys = {}
+        scopes = []
+        for index in selected:
+            visible = index.visible_ids(request)
+            if visible is False:
+                continue
+            keys[index.content_type.pk] = index.key
+            scopes.append((index.content_type.pk, visible))
+
+        if not scopes:
+            rows = []
+        elif backends.supported():
+            rows = backends.ranked_entries(tokens, scopes, limit)
+        else:
+            rows = self._unranked(tokens, scopes, limit)
+
+        return Response({
+            'query': request.query_params.get('q'),
+            'results': [
+                {
+                    'type': keys[content_type_id],
+                    'id': object_id,
+                    'title': title,
+                    'subtitle': subtitle,
+                    'rank': float(rank),
+                }
+                for content_type_id, object_id, title, subtitle, rank in rows
+            ]
+        })
+
+    def _unranked(self, tokens, scopes, limit):
+        """Databases without a full-text backend: every token as a substring, by title"""
+        scope = Q()
+        for content_type_id, ids in scopes:
+            if ids is None:
+                scope |= Q(content_type_id=content_type_id)
+            else:
+                scope |= Q(content_type_id=content_type_id, object_id__in=ids)
+        entries = SearchEntry.objects.filter(scope)
+        for token in tokens:
+            entries = entries.filter(
+                Q(weight_a__icontains=token) | Q(weight_b__icontains=token) | Q(weight_c__icontains=token)
+            )
+        return [
+            (*row, 0)
+            for row in entries.order_by('title', 'id').values_list(
+                'content_type_id', 'object_id', 'title', 'subtitle'
+            )[:limit]
+        ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 10:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='visitorlog',
+            index=models.Index(fields=['time_in', 'id'], name='support_vis_time_in_7b292f_idx'),
+        ),
+    ]
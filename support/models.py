@@ -6,6 +6,11 @@ class VisitorLog(models.Model):
     time_in = models.DateTimeField(auto_now_add=True)
     time_out = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['time_in', 'id']),
+        ]
+
 class Vehicle(models.Model):
     registration = models.CharField(max_length=50, unique=True)
     model = models.CharField(max_length=100)
@@ -2,6 +2,8 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from core.export import ExportMixin
+from core.fieldsets import SparseFieldsetMixin
 from .models import VisitorLog, Vehicle, IncidentReport
 from .serializers import (
     VisitorLogSerializer,
@@ -9,7 +11,7 @@ from .serializers import (
     IncidentReportSerializer
 )
 
-class VisitorLogViewSet(viewsets.ModelViewSet):
+class VisitorLogViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API for visitor management (Receptionist, Admin & Records Manager, Security).
     Receptionist: Create logs | Security: Check-out | Managers: Reports
@@ -42,7 +44,7 @@ class VisitorLogViewSet(viewsets.ModelViewSet):
         return qs
 
 
-class VehicleViewSet(viewsets.ModelViewSet):
+class VehicleViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API for fleet management (Drivers, Site & Logistics Supervisor, Production Manager).
     """
@@ -55,7 +57,7 @@ class VehicleViewSet(viewsets.ModelViewSet):
     ordering_fields = ['registration']
 
 
-class IncidentReportViewSet(viewsets.ModelViewSet):
+class IncidentReportViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API for security/maintenance incidents (Security, Janitor, Supervisors).
     """